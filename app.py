@@ -1,8 +1,8 @@
 from flask_jwt_extended import JWTManager
 from datetime import timedelta
-from flask import Flask
+from flask import Flask, Response, jsonify
 from dotenv import load_dotenv
-from config.database import get_mongo_connection, get_postgres_connection, get_redis_connection
+from config.database import get_mongo_connection, get_redis_connection, get_pool_stats, close_postgres_pool
 from routes.user_routes import user_routes
 from routes.post_routes import post_routes
 from routes.place_routes import place_routes
@@ -14,7 +14,21 @@ from routes.search_routes import search_routes
 from routes.follow_routes import follow_routes
 from routes.notification_routes import notification_routes
 from routes.trip_routes import trip_routes
+from routes.admin_routes import admin_routes
 from middleware.error_handler import register_error_handlers
+from middleware.unit_of_work import register_unit_of_work
+from middleware.timing import register_timing, get_latency_stats
+from middleware.metrics import register_metrics
+from middleware.profiler import register_profiler
+from services.cache_service import start_invalidation_listener, get_cache_stats
+from services.notification_outbox import start_notification_worker, get_outbox_stats
+from services.timeline_service import start_fanout_worker
+from services.counter_service import start_counter_reconciler
+from services.search_cache import get_search_cache_stats
+from services.metrics import generate_metrics
+from services.slow_query_log import start_slow_query_log
+from services.auth_service import admin_required
+import atexit
 import os
 
 
@@ -33,6 +47,20 @@ jwt = JWTManager(app)
 # Declarar el manejo de errores
 register_error_handlers(app)
 
+# Perfilador de peticiones (muestreo o header X-Profile de un administrador);
+# primero, para que incluya a los demas middlewares
+register_profiler(app)
+
+# Tiempos por endpoint y header Server-Timing (antes de la unidad de trabajo,
+# para que el commit quede dentro de la medicion)
+register_timing(app)
+
+# Metricas de Prometheus (GET /metrics)
+register_metrics(app)
+
+# Una conexion y una transaccion por peticion
+register_unit_of_work(app)
+
 # Registrar los blueprints
 app.register_blueprint(user_routes)
 app.register_blueprint(post_routes)
@@ -45,16 +73,70 @@ app.register_blueprint(search_routes)
 app.register_blueprint(follow_routes)
 app.register_blueprint(notification_routes)
 app.register_blueprint(trip_routes)
+app.register_blueprint(admin_routes)
 
 # Establecer conexiones a las bases de datos
-postgres_conn = get_postgres_connection()
+# (PostgreSQL usa un pool que se crea en el primer uso)
+atexit.register(close_postgres_pool)
 mongo_conn = get_mongo_connection()
 redis_conn = get_redis_connection()
 
+# Invalidaciones del cache local que publican los otros workers
+start_invalidation_listener()
+
+# Worker que escribe en lotes las notificaciones del outbox
+start_notification_worker()
+
+# Worker que distribuye los posts nuevos a los timelines de los seguidores
+start_fanout_worker()
+
+# Reconciliacion periodica de los contadores de likes y reacciones
+start_counter_reconciler()
+
+# Registro de consultas lentas y muestreo de sus planes (EXPLAIN ANALYZE)
+start_slow_query_log()
+
 # Ruta de inicio
 @app.route('/')
 def home():
     return "Red Social de Viajes"
 
+# Estadisticas del pool de conexiones de PostgreSQL
+@app.route('/health/pool')
+@admin_required
+def pool_stats():
+    return jsonify(get_pool_stats()), 200
+
+# Aciertos/fallos del cache local y de Redis
+@app.route('/health/cache')
+@admin_required
+def cache_stats():
+    return jsonify(get_cache_stats()), 200
+
+# Aciertos y latencia del cache de busquedas
+@app.route('/health/search')
+@admin_required
+def search_cache_stats():
+    return jsonify(get_search_cache_stats()), 200
+
+# Notificaciones pendientes en el outbox
+@app.route('/health/notifications')
+@admin_required
+def notification_stats():
+    return jsonify(get_outbox_stats()), 200
+
+# Percentiles de latencia por endpoint, consultas y comandos de Redis
+@app.route('/health/latency')
+@admin_required
+def latency_stats():
+    return jsonify(get_latency_stats()), 200
+
+# Metricas en formato de Prometheus (suma de todos los workers si
+# PROMETHEUS_MULTIPROC_DIR esta definido)
+@app.route('/metrics')
+def prometheus_metrics():
+    body, content_type = generate_metrics()
+    return Response(body, content_type=content_type)
+
 if __name__ == '__main__':
     app.run(host='0.0.0.0', port=5000)
@@ -0,0 +1,141 @@
+# benchmarks/harness.py
+import gc
+import json
+import math
+import time
+import platform
+import tracemalloc
+from datetime import datetime, timezone
+
+# Tolerancias por defecto antes de marcar una regresion: los tiempos varian
+# entre corridas mucho mas que las asignaciones de memoria
+TIME_TOLERANCE = 0.30
+ALLOC_TOLERANCE = 0.15
+# Diferencias menores a esto no cuentan (ruido en operaciones muy cortas)
+MIN_P95_DELTA_MS = 0.05
+MIN_ALLOC_DELTA_KB = 1.0
+
+
+def _percentile(samples, fraction):
+    # Rango mas cercano sobre las muestras ordenadas
+    rank = max(1, math.ceil(len(samples) * fraction))
+    return samples[rank - 1]
+
+def _time_run(operation, iterations):
+    samples = []
+    start = time.perf_counter()
+    for _ in range(iterations):
+        op_start = time.perf_counter()
+        operation()
+        samples.append(time.perf_counter() - op_start)
+    elapsed = time.perf_counter() - start
+    samples.sort()
+    return {
+        "ops_per_sec": iterations / elapsed if elapsed else float("inf"),
+        "p50_ms": _percentile(samples, 0.50) * 1000,
+        "p95_ms": _percentile(samples, 0.95) * 1000,
+        "p99_ms": _percentile(samples, 0.99) * 1000,
+    }
+
+# Memoria asignada por operacion con tracemalloc, en una pasada aparte para
+# no sumar su costo a los tiempos: el pico (lo que la operacion llego a
+# tener en memoria) y lo que quedo retenido al terminar
+def _alloc_run(operation, iterations):
+    peaks, retained = [], []
+    tracemalloc.start()
+    try:
+        for _ in range(iterations):
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+            operation()
+            current, peak = tracemalloc.get_traced_memory()
+            peaks.append(peak - before)
+            retained.append(current - before)
+    finally:
+        tracemalloc.stop()
+    peaks.sort()
+    return {
+        "alloc_peak_kb": _percentile(peaks, 0.50) / 1024,
+        "alloc_retained_kb": sum(retained) / len(retained) / 1024,
+    }
+
+def measure(operation, iterations=500, warmup=50, repeat=3, alloc_iterations=50):
+    """
+    Mide una operacion: ops/s y p50/p95/p99 (la mejor de repeat pasadas,
+    como timeit) y memoria asignada por operacion. El calentamiento llena los
+    caches, igual que en un worker que ya atendio peticiones.
+    """
+    for _ in range(warmup):
+        operation()
+    gc.collect()
+    runs = [_time_run(operation, iterations) for _ in range(repeat)]
+    result = {
+        "iterations": iterations,
+        "ops_per_sec": max(run["ops_per_sec"] for run in runs),
+        "p50_ms": min(run["p50_ms"] for run in runs),
+        "p95_ms": min(run["p95_ms"] for run in runs),
+        "p99_ms": min(run["p99_ms"] for run in runs),
+    }
+    result.update(_alloc_run(operation, alloc_iterations))
+    return {key: round(value, 4) if isinstance(value, float) else value for key, value in result.items()}
+
+def compare(results, baseline, time_tolerance=TIME_TOLERANCE, alloc_tolerance=ALLOC_TOLERANCE):
+    """
+    Compara contra el baseline y devuelve la lista de regresiones como
+    textos. Los escenarios que no estan en el baseline no se comparan.
+    """
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        if result["ops_per_sec"] < base["ops_per_sec"] * (1 - time_tolerance):
+            regressions.append(
+                f"{name}: {result['ops_per_sec']:,.0f} ops/s (baseline {base['ops_per_sec']:,.0f})"
+            )
+        p95_limit = max(base["p95_ms"] * (1 + time_tolerance), base["p95_ms"] + MIN_P95_DELTA_MS)
+        if result["p95_ms"] > p95_limit:
+            regressions.append(f"{name}: p95 {result['p95_ms']:.3f} ms (baseline {base['p95_ms']:.3f} ms)")
+        alloc_limit = max(base["alloc_peak_kb"] * (1 + alloc_tolerance), base["alloc_peak_kb"] + MIN_ALLOC_DELTA_KB)
+        if result["alloc_peak_kb"] > alloc_limit:
+            regressions.append(
+                f"{name}: {result['alloc_peak_kb']:.1f} KB asignados por operacion "
+                f"(baseline {base['alloc_peak_kb']:.1f} KB)"
+            )
+    return regressions
+
+def environment():
+    return {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "machine": platform.machine(),
+        "system": platform.system(),
+    }
+
+def load_baseline(path):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+def save_baseline(path, results):
+    data = {
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "environment": environment(),
+        "benchmarks": results,
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+def format_table(results, baseline=None):
+    baseline = baseline or {}
+    lines = [
+        f"{'escenario':<36}{'ops/s':>11}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'KB/op':>9}{'vs base':>9}"
+    ]
+    for name, result in results.items():
+        base = baseline.get(name)
+        change = f"{(result['ops_per_sec'] / base['ops_per_sec'] - 1) * 100:+.0f}%" if base else "-"
+        lines.append(
+            f"{name:<36}{result['ops_per_sec']:>11,.0f}{result['p50_ms']:>10.3f}{result['p95_ms']:>10.3f}"
+            f"{result['p99_ms']:>10.3f}{result['alloc_peak_kb']:>9.1f}{change:>9}"
+        )
+    return "\n".join(lines)
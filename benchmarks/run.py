@@ -0,0 +1,83 @@
+# benchmarks/run.py
+# Corre los escenarios de benchmarks/scenarios.py con PostgreSQL y Redis en
+# memoria (benchmarks/standins.py) y los compara contra el baseline guardado.
+# Uso:
+#   python -m benchmarks.run                      # medir y comparar
+#   python -m benchmarks.run --only "GET /trips"  # solo los escenarios que contienen el texto
+#   python -m benchmarks.run --update-baseline    # guardar los resultados como baseline
+# Termina con codigo 1 si algun escenario empeoro mas que la tolerancia.
+import os
+import sys
+import argparse
+from benchmarks import harness
+from benchmarks.scenarios import SCENARIOS
+from benchmarks.standins import standins
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+
+def run_scenarios(names=None, scale=1.0, repeat=3):
+    """Mide los escenarios (todos o los de names) y devuelve {nombre: resultado}"""
+    from app import app
+
+    results = {}
+    for name, (setup, iterations) in SCENARIOS.items():
+        if names is not None and name not in names:
+            continue
+        iterations = max(1, int(iterations * scale))
+        with standins(app) as env:
+            operation = setup(env)
+            results[name] = harness.measure(
+                operation,
+                iterations=iterations,
+                warmup=max(1, iterations // 10),
+                repeat=repeat,
+                alloc_iterations=max(1, min(iterations, 50)),
+            )
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks de rutas y controladores")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--update-baseline", action="store_true", help="guardar los resultados como baseline")
+    parser.add_argument("--only", help="solo los escenarios cuyo nombre contiene este texto")
+    parser.add_argument("--scale", type=float, default=1.0, help="multiplica las iteraciones de cada escenario")
+    parser.add_argument("--repeat", type=int, default=3, help="pasadas de tiempo por escenario (se toma la mejor)")
+    parser.add_argument("--tolerance", type=float, default=harness.TIME_TOLERANCE,
+                        help="empeoramiento permitido en ops/s y p95 (0.30 = 30%%)")
+    parser.add_argument("--alloc-tolerance", type=float, default=harness.ALLOC_TOLERANCE,
+                        help="aumento permitido en memoria asignada por operacion")
+    args = parser.parse_args(argv)
+
+    names = [name for name in SCENARIOS if args.only in name] if args.only else None
+    results = run_scenarios(names, args.scale, args.repeat)
+
+    if args.update_baseline:
+        harness.save_baseline(args.baseline, results)
+        print(harness.format_table(results))
+        print(f"\nBaseline guardado en {args.baseline}")
+        return 0
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        stored = harness.load_baseline(args.baseline)
+        baseline = stored["benchmarks"]
+        if stored.get("environment") != harness.environment():
+            print(f"Aviso: el baseline se midio en otro entorno ({stored.get('environment')}); "
+                  "regenerarlo con --update-baseline en esta maquina")
+    else:
+        print(f"No hay baseline en {args.baseline}; crearlo con --update-baseline")
+
+    print(harness.format_table(results, baseline))
+    regressions = harness.compare(results, baseline, args.tolerance, args.alloc_tolerance)
+    if regressions:
+        print("\nREGRESIONES:")
+        for regression in regressions:
+            print(f"  - {regression}")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,103 @@
+# benchmarks/scenarios.py
+# Escenarios del benchmark: cada uno prepara los datos falsos que necesita y
+# devuelve la operacion a medir (una peticion o una llamada a un controlador).
+import random
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+from controllers import trip_controller
+from services import geo_service
+
+# nombre -> (preparacion(env) -> operacion, iteraciones)
+SCENARIOS = {}
+
+NOW = datetime(2024, 5, 1, 12, 0, tzinfo=timezone.utc)
+
+
+def scenario(name, iterations=500):
+    def decorator(setup):
+        SCENARIOS[name] = (setup, iterations)
+        return setup
+    return decorator
+
+# Falla en vez de medir respuestas de error
+def _expect(response, status=200):
+    if response.status_code != status:
+        raise AssertionError(f"{response.status_code}: {response.get_data(as_text=True)[:200]}")
+    return response
+
+# Fila de get_trip_by_id / get_user_trips (sin total_count)
+def _trip_row(trip_id, user_id=1):
+    start = date(2024, 1, 1) + timedelta(days=trip_id % 300)
+    return (
+        trip_id, user_id, f"Viaje {trip_id} por Costa Rica", "Playas, volcanes y cafe " * 4,
+        start, start + timedelta(days=7), "planned", Decimal("1500.00"), NOW, NOW
+    )
+
+def _place_row(place_id):
+    rng = random.Random(place_id)
+    return (
+        place_id, f"Lugar {place_id}", "Mirador con vista al valle", "San Jose", "Costa Rica",
+        NOW, NOW, rng.uniform(9.5, 10.5), rng.uniform(-84.5, -83.5)
+    )
+
+
+@scenario("GET /trips")
+def list_trips(env):
+    rows = [_trip_row(trip_id) + (500,) for trip_id in range(1, 51)]
+    env.db.handle("get_user_trips", rows)
+    headers = env.auth_headers()
+    return lambda: _expect(env.client.get('/trips?page_size=50', headers=headers))
+
+@scenario("GET /trips/<id>/statistics")
+def trip_statistics(env):
+    env.db.handle("get_trip_by_id", [_trip_row(1)])
+    env.db.handle("get_trip_statistics", [(12, Decimal("845.50"), Decimal("4.25"), 7)])
+    headers = env.auth_headers()
+    return lambda: _expect(env.client.get('/trips/1/statistics', headers=headers))
+
+@scenario("GET /trips/search")
+def search_trips(env):
+    # SQL dinamico de search_trips: "SELECT t.* FROM trips t WHERE ..."
+    env.db.handle("select", [_trip_row(trip_id) for trip_id in range(1, 21)])
+    env.db.handle("estimate_trip_search_count", [(1000,)])
+    headers = env.auth_headers()
+    url = '/trips/search?title=playa&status=planned&start_date_from=2024-01-01&page_size=20'
+    return lambda: _expect(env.client.get(url, headers=headers))
+
+@scenario("POST /trips/<id>/expenses/import", iterations=60)
+def import_expenses(env):
+    env.db.handle("get_trip_by_id", [_trip_row(1)])
+    lines = ["category,description,amount,expense_date,place_id"]
+    for i in range(1000):
+        lines.append(f"food,Almuerzo {i},{10 + i % 40}.50,2024-01-{1 + i % 28:02d},")
+    body = "\n".join(lines).encode("utf-8")
+    headers = dict(env.auth_headers(), **{'Content-Type': 'text/csv'})
+    return lambda: _expect(
+        env.client.post('/trips/1/expenses/import', data=body, headers=headers), 201
+    )
+
+# GEOSEARCH de fakeredis recorre todo el set en Python: con pocos lugares
+# para que la medicion refleje sobre todo get_many y la serializacion
+@scenario("GET /places/nearby", iterations=200)
+def nearby_places(env):
+    rng = random.Random(42)
+    batch = []
+    for place_id in range(1, 1001):
+        batch.extend((rng.uniform(-84.5, -83.5), rng.uniform(9.5, 10.5), place_id))
+    env.redis.geoadd(geo_service.GEO_KEY, batch)
+    env.db.handle("get_places_by_ids", lambda params: [_place_row(place_id) for place_id in params[0]])
+    headers = env.auth_headers()
+    return lambda: _expect(env.client.get('/places/nearby?lat=9.93&lon=-84.08&radius=5&limit=20', headers=headers))
+
+@scenario("GET /posts/<id>")
+def get_post(env):
+    # Misma forma que espera Post(*row) en post_controller.get_post
+    env.db.handle("get_post_by_id", [(1, 7, "Recorrido por el Volcan Irazu y Cartago " * 4, NOW, NOW)])
+    headers = env.auth_headers()
+    return lambda: _expect(env.client.get('/posts/1', headers=headers))
+
+@scenario("trip_controller.get_user_trips")
+def controller_user_trips(env):
+    rows = [_trip_row(trip_id) + (200,) for trip_id in range(1, 201)]
+    env.db.handle("get_user_trips", rows)
+    return lambda: trip_controller.get_user_trips(1, None, 1, 200)
@@ -0,0 +1,157 @@
+# benchmarks/standins.py
+# Reemplazos en memoria de PostgreSQL y Redis para medir el codigo de Python
+# (rutas, controladores, cache, middlewares) sin servicios externos.
+import time
+from contextlib import contextmanager, ExitStack
+from unittest.mock import patch
+import fakeredis
+from flask_jwt_extended import create_access_token
+from psycopg2 import extensions
+from config import database
+from config.database import PostgresPool
+from services.metrics import procedure_name
+
+# Modulos con un cliente de Redis propio y si decodifican las respuestas.
+# notification_outbox queda con su cola local: su worker leeria el stream
+# en segundo plano y meteria ruido en las mediciones.
+REDIS_CLIENTS = {
+    "services.cache_service": False,
+    "services.search_cache": False,
+    "services.counter_service": True,
+    "services.timeline_service": True,
+    "services.geo_service": True,
+    "services.suggest_service": True,
+}
+
+
+class FakeDatabase:
+    """
+    Respuestas fijas por consulta: handlers[nombre](params) -> filas, donde
+    nombre es el de services.metrics.procedure_name (el stored procedure o
+    la primera palabra de la sentencia). Las consultas sin handler no
+    devuelven filas.
+    """
+
+    def __init__(self):
+        self.handlers = {}
+        self.queries = 0
+
+    def handle(self, name, rows):
+        self.handlers[name] = rows if callable(rows) else (lambda params: rows)
+
+    def run(self, sql, params):
+        self.queries += 1
+        handler = self.handlers.get(procedure_name(sql))
+        return list(handler(params)) if handler else []
+
+
+class FakeCursor:
+    """Cursor con la interfaz que usan los controladores"""
+
+    def __init__(self, db):
+        self._db = db
+        self._rows = []
+        self.itersize = 2000
+        self.rowcount = -1
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def __iter__(self):
+        return iter(self._rows)
+
+    # Igual que TimedCursor: informa la duracion a los observadores, asi las
+    # metricas y el registro de consultas lentas cuestan lo mismo que en produccion
+    def execute(self, sql, params=None):
+        start = time.perf_counter()
+        self._rows = self._db.run(sql, params)
+        self.rowcount = len(self._rows)
+        database._notify(database._query_observers, sql, params, time.perf_counter() - start)
+
+    def fetchone(self):
+        return self._rows.pop(0) if self._rows else None
+
+    def fetchall(self):
+        rows, self._rows = self._rows, []
+        return rows
+
+    def mogrify(self, sql, params=None):
+        return sql.encode("utf-8")
+
+    # COPY ... FROM STDIN: lee todo el archivo como lo haria psycopg2
+    def copy_expert(self, sql, file, size=8192):
+        start = time.perf_counter()
+        while file.read(size):
+            pass
+        database._notify(database._query_observers, sql, None, time.perf_counter() - start)
+
+    def close(self):
+        pass
+
+
+class _ConnectionInfo:
+    transaction_status = extensions.TRANSACTION_STATUS_IDLE
+
+
+class FakeConnection:
+    def __init__(self, db):
+        self._db = db
+        self.closed = 0
+        self.info = _ConnectionInfo()
+
+    def cursor(self, name=None, **kwargs):
+        return FakeCursor(self._db)
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        self.closed = 1
+
+
+class BenchmarkEnv:
+    """Lo que recibe cada escenario: la base falsa, Redis y el cliente de Flask"""
+
+    def __init__(self, app, db, redis_server):
+        self.app = app
+        self.db = db
+        self.redis_server = redis_server
+        self.redis = fakeredis.FakeRedis(server=redis_server, decode_responses=True)
+        self.client = app.test_client()
+
+    def auth_headers(self, user_id=1):
+        with self.app.app_context():
+            return {'Authorization': f'Bearer {create_access_token(identity=str(user_id))}'}
+
+
+@contextmanager
+def standins(app):
+    """
+    Reemplaza el pool de PostgreSQL por el pool real sobre conexiones falsas
+    y los clientes de Redis por fakeredis (un mismo servidor en memoria).
+    Todo se restaura al salir.
+    """
+    from services.cache_service import local_cache
+
+    db = FakeDatabase()
+    redis_server = fakeredis.FakeServer()
+    pool = PostgresPool(lambda: FakeConnection(db), minconn=1, maxconn=4, health_check_idle=None)
+    secret = app.config.get('JWT_SECRET_KEY') or 'benchmark-secret-key-with-32-bytes!'
+    with ExitStack() as stack:
+        stack.enter_context(patch.dict(app.config, {'JWT_SECRET_KEY': secret}))
+        stack.enter_context(patch.object(database, '_postgres_pool', pool))
+        for module, decode_responses in REDIS_CLIENTS.items():
+            client = fakeredis.FakeRedis(server=redis_server, decode_responses=decode_responses)
+            stack.enter_context(patch(f'{module}.redis_client', client))
+        local_cache.clear()
+        try:
+            yield BenchmarkEnv(app, db, redis_server)
+        finally:
+            local_cache.clear()
+            pool.closeall()
@@ -1,32 +1,472 @@
 import os
+import re
+import time
+import threading
+from collections import deque
+from contextlib import contextmanager
 import psycopg2
+from psycopg2 import extensions
+from psycopg2.pool import PoolError
 import redis
 from pymongo import MongoClient
+from flask import g, has_request_context
 from dotenv import load_dotenv
 
 # Cargar las variables de entorno
 load_dotenv()
 
+# Observadores de la capa de datos: funciones que se llaman despues de cada
+# consulta, comando de Redis o espera por una conexion del pool, con su
+# duracion en segundos. Los usa la medicion de tiempos por peticion.
+_query_observers = []  # f(sql, params, duracion)
+_redis_observers = []  # f(comando, args, duracion)
+_pool_observers = []  # f(duracion)
+
+def add_query_observer(observer):
+    _query_observers.append(observer)
+
+def add_redis_observer(observer):
+    _redis_observers.append(observer)
+
+def add_pool_observer(observer):
+    _pool_observers.append(observer)
+
+# Un observador que falla no debe afectar la consulta
+def _notify(observers, *args):
+    for observer in observers:
+        try:
+            observer(*args)
+        except Exception as e:
+            print(f"Error en un observador de la base de datos: {e}")
+
+
+class TimedCursor(extensions.cursor):
+    """Cursor que informa a los observadores la duracion de cada consulta"""
+
+    def _timed(self, sql, params, call):
+        if not _query_observers:
+            return call()
+        start = time.perf_counter()
+        try:
+            return call()
+        finally:
+            _notify(_query_observers, sql, params, time.perf_counter() - start)
+
+    def execute(self, query, vars=None):
+        return self._timed(query, vars, lambda: super(TimedCursor, self).execute(query, vars))
+
+    def executemany(self, query, vars_list):
+        return self._timed(query, vars_list, lambda: super(TimedCursor, self).executemany(query, vars_list))
+
+    def callproc(self, procname, parameters=None):
+        return self._timed(procname, parameters, lambda: super(TimedCursor, self).callproc(procname, parameters))
+
+    def copy_expert(self, sql, file, size=8192):
+        return self._timed(sql, None, lambda: super(TimedCursor, self).copy_expert(sql, file, size))
+
+# Commit de una conexion, informado a los observadores como una consulta mas
+def _commit(conn):
+    if not _query_observers:
+        conn.commit()
+        return
+    start = time.perf_counter()
+    try:
+        conn.commit()
+    finally:
+        _notify(_query_observers, "COMMIT", None, time.perf_counter() - start)
+
+# Pide una conexion al pool informando cuanto se espero
+def _checkout(pool):
+    start = time.perf_counter()
+    conn = pool.getconn()
+    _notify(_pool_observers, time.perf_counter() - start)
+    return conn
+
+# Abre una conexion nueva a PostgreSQL (lanza la excepcion si falla)
+def _connect_postgres():
+    return psycopg2.connect(
+        host=os.getenv('postgres'),
+        port=os.getenv('DB_PORT_POSTGRES'),
+        user=os.getenv('DB_USER'),
+        password=os.getenv('DB_PASSWORD'),
+        dbname='redsocial',
+        cursor_factory=TimedCursor
+    )
+
 # Configuracion de PostgreSQL
 def get_postgres_connection():
     try:
-        connection = psycopg2.connect(
-            host=os.getenv('postgres'),  
-            port=os.getenv('DB_PORT_POSTGRES'),
-            user=os.getenv('DB_USER'),
-            password=os.getenv('DB_PASSWORD'),
-            dbname='redsocial'
-        )
+        connection = _connect_postgres()
         print("Conexión a PostgreSQL exitosa")
         return connection
     except Exception as e:
         print(f"Error al conectar con PostgreSQL: {e}")
         return None
 
+
+class PoolTimeoutError(PoolError):
+    """No se pudo obtener una conexion del pool dentro del tiempo limite"""
+
+
+class PostgresPool:
+    """
+    Pool de conexiones a PostgreSQL compartido por todo el proceso.
+
+    - minconn/maxconn: conexiones que se abren al inicio y limite maximo
+    - max_lifetime: segundos que puede vivir una conexion antes de reciclarse
+    - timeout: segundos que se espera por una conexion libre antes de fallar
+    - health_check_idle: si una conexion estuvo inactiva mas de estos segundos,
+      se valida con SELECT 1 antes de entregarla
+    """
+
+    def __init__(self, connect, minconn=1, maxconn=10, max_lifetime=1800,
+                 timeout=5.0, health_check_idle=30.0):
+        if minconn < 0 or maxconn < 1 or minconn > maxconn:
+            raise ValueError("Invalid pool size: minconn must be <= maxconn and maxconn >= 1")
+        self._connect = connect
+        self.minconn = minconn
+        self.maxconn = maxconn
+        self.max_lifetime = max_lifetime
+        self.timeout = timeout
+        self.health_check_idle = health_check_idle
+        self._cond = threading.Condition()
+        self._idle = deque()  # (conexion, momento en que quedo libre)
+        self._born = {}  # id(conexion) -> momento de creacion
+        self._in_use = 0
+        self._opening = 0
+        self._closed = False
+        self._stats = {
+            "checkouts": 0,
+            "timeouts": 0,
+            "connections_created": 0,
+            "connections_discarded": 0,
+            "health_check_failures": 0,
+            "wait_time_total": 0.0,
+        }
+        for _ in range(minconn):
+            self._idle.append((self._open(), time.monotonic()))
+
+    # Abre una conexion nueva y registra su momento de creacion
+    def _open(self):
+        try:
+            conn = self._connect()
+        except Exception as e:
+            # No exponer detalles del servidor en los mensajes de error
+            print(f"Error al conectar con PostgreSQL: {e}")
+            raise PoolError("Could not open a database connection") from e
+        with self._cond:
+            self._born[id(conn)] = time.monotonic()
+            self._stats["connections_created"] += 1
+        return conn
+
+    # Cierra una conexion y la saca del registro del pool
+    def _discard(self, conn):
+        self._born.pop(id(conn), None)
+        self._stats["connections_discarded"] += 1
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def _expired(self, conn, now):
+        born = self._born.get(id(conn), now)
+        return self.max_lifetime is not None and now - born > self.max_lifetime
+
+    def _healthy(self, conn):
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1")
+            conn.rollback()
+            return True
+        except Exception:
+            return False
+
+    def getconn(self):
+        start = time.monotonic()
+        deadline = start + self.timeout
+        while True:
+            conn, idle_since = self._reserve(deadline)
+            if conn is None:
+                # Hay un espacio libre: abrir la conexion fuera del lock
+                try:
+                    conn = self._open()
+                except Exception:
+                    with self._cond:
+                        self._opening -= 1
+                        self._cond.notify()
+                    raise
+                with self._cond:
+                    self._opening -= 1
+                    self._in_use += 1
+                break
+            if (self.health_check_idle is not None
+                    and time.monotonic() - idle_since > self.health_check_idle
+                    and not self._healthy(conn)):
+                with self._cond:
+                    self._stats["health_check_failures"] += 1
+                    self._in_use -= 1
+                    self._discard(conn)
+                    self._cond.notify()
+                continue
+            break
+        with self._cond:
+            self._stats["checkouts"] += 1
+            self._stats["wait_time_total"] += time.monotonic() - start
+        return conn
+
+    # Reserva una conexion libre o un espacio para abrir una nueva.
+    # Devuelve (conexion, idle_since) o (None, None) si hay que abrir una.
+    def _reserve(self, deadline):
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise PoolError("connection pool is closed")
+                now = time.monotonic()
+                while self._idle:
+                    conn, idle_since = self._idle.pop()
+                    if conn.closed or self._expired(conn, now):
+                        self._discard(conn)
+                        continue
+                    self._in_use += 1
+                    return conn, idle_since
+                if self._in_use + self._opening < self.maxconn:
+                    self._opening += 1
+                    return None, None
+                remaining = deadline - now
+                if remaining <= 0:
+                    self._stats["timeouts"] += 1
+                    raise PoolTimeoutError(
+                        f"Timed out after {self.timeout}s waiting for a PostgreSQL connection"
+                    )
+                self._cond.wait(remaining)
+
+    # Devuelve una conexion al pool, descartandola si esta rota o vencida
+    def putconn(self, conn, discard=False):
+        if not discard and not conn.closed:
+            status = conn.info.transaction_status
+            if status == extensions.TRANSACTION_STATUS_UNKNOWN:
+                discard = True
+            elif status != extensions.TRANSACTION_STATUS_IDLE:
+                try:
+                    conn.rollback()
+                except Exception:
+                    discard = True
+        with self._cond:
+            self._in_use -= 1
+            if discard or conn.closed or self._closed or self._expired(conn, time.monotonic()):
+                self._discard(conn)
+            else:
+                self._idle.append((conn, time.monotonic()))
+            self._cond.notify()
+
+    def closeall(self):
+        with self._cond:
+            self._closed = True
+            while self._idle:
+                conn, _ = self._idle.pop()
+                self._discard(conn)
+            self._cond.notify_all()
+
+    def stats(self):
+        with self._cond:
+            stats = dict(self._stats)
+            stats.update({
+                "min_size": self.minconn,
+                "max_size": self.maxconn,
+                "in_use": self._in_use,
+                "idle": len(self._idle),
+                "size": self._in_use + len(self._idle),
+            })
+            checkouts = stats["checkouts"]
+            stats["avg_wait_ms"] = (stats["wait_time_total"] / checkouts * 1000) if checkouts else 0.0
+            return stats
+
+
+_postgres_pool = None
+_postgres_pool_lock = threading.Lock()
+
+# Obtiene (o crea la primera vez) el pool de conexiones del proceso
+def get_postgres_pool():
+    global _postgres_pool
+    if _postgres_pool is None:
+        with _postgres_pool_lock:
+            if _postgres_pool is None:
+                _postgres_pool = PostgresPool(
+                    _connect_postgres,
+                    minconn=int(os.getenv('PG_POOL_MIN_SIZE', 1)),
+                    maxconn=int(os.getenv('PG_POOL_MAX_SIZE', 10)),
+                    max_lifetime=float(os.getenv('PG_POOL_MAX_LIFETIME', 1800)),
+                    timeout=float(os.getenv('PG_POOL_TIMEOUT', 5)),
+                    health_check_idle=float(os.getenv('PG_POOL_HEALTH_CHECK_IDLE', 30)),
+                )
+    return _postgres_pool
+
+# Cierra el pool del proceso (p. ej. al apagar un worker)
+def close_postgres_pool():
+    global _postgres_pool
+    with _postgres_pool_lock:
+        if _postgres_pool is not None:
+            _postgres_pool.closeall()
+            _postgres_pool = None
+
+# Estadisticas del pool para dimensionarlo por worker
+def get_pool_stats():
+    if _postgres_pool is None:
+        return {"initialized": False}
+    return dict(_postgres_pool.stats(), initialized=True)
+
+class UnitOfWork:
+    """
+    Conexion y transaccion compartidas por todas las llamadas a controladores
+    de una misma peticion. La conexion se pide al pool en el primer uso y se
+    confirma o revierte una sola vez al terminar la peticion.
+    """
+
+    def __init__(self, pool=None):
+        self._pool = pool
+        self.conn = None
+        self.failed = False
+        self._callbacks = []
+        # False: solo lecturas; True: ya escribio; None: no se sabe
+        self._writes = False
+
+    def connection(self):
+        if self.conn is None:
+            if self._pool is None:
+                self._pool = get_postgres_pool()
+            self.conn = _checkout(self._pool)
+        return self.conn
+
+    # Una llamada fallo: la transaccion ya no se puede confirmar
+    def mark_failed(self):
+        self.failed = True
+        if self.conn is not None and not self.conn.closed:
+            self.conn.rollback()
+
+    # Cada sentencia de la transaccion: las lecturas no cambian nada; las
+    # demas (o un procedimiento que no se sabe si escribe) dejan la duda
+    def record_statement(self, sql):
+        if self._writes is not True and not _is_read(sql):
+            self._writes = None
+
+    # True si la transaccion ya modifico datos. Solo si no se sabe se le
+    # pregunta a PostgreSQL, que asigna un txid solo cuando se escribe
+    def has_pending_writes(self):
+        if self.conn is None or self.conn.closed or self.failed:
+            return False
+        if self._writes is None:
+            with self.conn.cursor() as cur:
+                cur.execute("SELECT txid_current_if_assigned() IS NOT NULL")
+                self._writes = cur.fetchone()[0] is True
+        return self._writes
+
+    # Registra una accion (p. ej. invalidar cache) para despues del commit.
+    # Solo las escrituras las registran.
+    def on_commit(self, callback):
+        self._writes = True
+        self._callbacks.append(callback)
+
+    def commit(self):
+        if self.failed:
+            self.rollback()
+            return False
+        if self.conn is not None:
+            _commit(self.conn)
+        callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                print(f"Error en accion posterior al commit: {e}")
+        return True
+
+    def rollback(self):
+        self._callbacks = []
+        if self.conn is not None and not self.conn.closed:
+            self.conn.rollback()
+
+    # Devuelve la conexion al pool (si quedo algo sin confirmar, se revierte)
+    def close(self):
+        self._callbacks = []
+        if self.conn is not None:
+            self._pool.putconn(self.conn)
+            self.conn = None
+
+
+# Unidad de trabajo de la peticion actual (None fuera de una peticion)
+def current_unit_of_work():
+    if has_request_context():
+        return g.get('db_unit_of_work')
+    return None
+
+# Procedimientos de init/ que solo leen (convencion de nombres)
+_READ_PROCEDURE_PREFIXES = ("get_", "search_", "count_", "suggest_", "estimate_")
+_PROCEDURE_CALL_RE = re.compile(r"^\s*select\s+(?:\*\s+from\s+)?([a-z]+_[a-z0-9_]*)\s*\(", re.IGNORECASE)
+
+# SELECT sin procedimiento o con uno de solo lectura
+def _is_read(sql):
+    if isinstance(sql, bytes):
+        sql = sql.decode("utf-8", "replace")
+    sql = str(sql)
+    if sql.lstrip()[:6].lower() != "select":
+        return False
+    match = _PROCEDURE_CALL_RE.match(sql)
+    return match is None or match.group(1).lower().startswith(_READ_PROCEDURE_PREFIXES)
+
+def _record_unit_statement(sql, params, seconds):
+    unit = current_unit_of_work()
+    if unit is not None:
+        unit.record_statement(sql)
+
+add_query_observer(_record_unit_statement)
+
+# True si la peticion actual tiene escrituras sin confirmar: lo que lea
+# puede revertirse y no se debe guardar en el cache ni compartir
+def has_pending_writes():
+    unit = current_unit_of_work()
+    return unit is not None and unit.has_pending_writes()
+
+# Ejecuta la accion despues del commit de la peticion, o de inmediato
+# si no hay una unidad de trabajo activa
+def on_commit(callback):
+    unit = current_unit_of_work()
+    if unit is None:
+        callback()
+    else:
+        unit.on_commit(callback)
+
+# Conexion del pool como context manager:
+# hace commit al salir sin errores, rollback si hay una excepcion,
+# y siempre devuelve la conexion al pool.
+# Dentro de una peticion con unidad de trabajo se reutiliza su conexion
+# y el commit se hace una sola vez al final de la peticion.
+@contextmanager
+def postgres_connection():
+    unit = current_unit_of_work()
+    if unit is not None:
+        try:
+            yield unit.connection()
+        except Exception:
+            unit.mark_failed()
+            raise
+        return
+
+    pool = get_postgres_pool()
+    conn = _checkout(pool)
+    try:
+        yield conn
+        _commit(conn)
+    except Exception:
+        if not conn.closed:
+            conn.rollback()
+        raise
+    finally:
+        pool.putconn(conn)
+
 # Configuracion de MongoDB
 def get_mongo_connection():
     try:
-        client = MongoClient(os.getenv('mongodb'), int(os.getenv('DB_PORT_MONGO'))) 
+        client = MongoClient(os.getenv('mongodb'), int(os.getenv('DB_PORT_MONGO')))
         db = client.redsocial
         print("Conexión a MongoDB exitosa")
         return db
@@ -34,14 +474,44 @@ def get_mongo_connection():
         print(f"Error al conectar con MongoDB: {e}")
         return None
 
+class TimedPipeline(redis.client.Pipeline):
+    """Pipeline que informa la duracion de cada envio como un solo comando"""
+
+    def execute(self, raise_on_error=True):
+        if not _redis_observers:
+            return super().execute(raise_on_error)
+        size = len(self.command_stack)
+        start = time.perf_counter()
+        try:
+            return super().execute(raise_on_error)
+        finally:
+            _notify(_redis_observers, "PIPELINE", (size,), time.perf_counter() - start)
+
+
+class TimedRedis(redis.Redis):
+    """Cliente de Redis que informa a los observadores la duracion de cada comando"""
+
+    def execute_command(self, *args, **options):
+        if not _redis_observers:
+            return super().execute_command(*args, **options)
+        start = time.perf_counter()
+        try:
+            return super().execute_command(*args, **options)
+        finally:
+            _notify(_redis_observers, args[0], args[1:], time.perf_counter() - start)
+
+    def pipeline(self, transaction=True, shard_hint=None):
+        return TimedPipeline(self.connection_pool, self.response_callbacks, transaction, shard_hint)
+
+
 # Configuracion de Redis
-def get_redis_connection():
+def get_redis_connection(decode_responses=True):
     try:
-        redis_client = redis.Redis(
+        redis_client = TimedRedis(
             host=os.getenv('redis'),
             port=int(os.getenv('REDIS_PORT')),
             db=0,
-            decode_responses=True
+            decode_responses=decode_responses
         )
         print("Conexión a Redis exitosa")
         return redis_client
@@ -1,71 +1,86 @@
-from config.database import get_postgres_connection
+from config.database import postgres_connection, on_commit
 from models.user import User
 from models.post import Post
-from controllers import notification_controller
+from controllers import notification_controller, post_controller
+from services import timeline_service
+from services.pagination import decode_cursor, paginate
+from datetime import datetime, timezone
 
 def follow_user(follower_id, followed_id):
-    conn = get_postgres_connection()
-    try:
+    with postgres_connection() as conn:
         with conn.cursor() as cur:
             cur.execute("SELECT follow_user(%s, %s)", (follower_id, followed_id))
             new_follow_id = cur.fetchone()
-            conn.commit()
 
-            # Crear notificacion para el usuario seguido
-            notification_controller.create_notification(
-                followed_id,
-                "follow",
-                f"User {follower_id} followed you",
-                None
-            )
+    if new_follow_id:
+        on_commit(lambda: timeline_service.add_followed(follower_id, followed_id))
+
+    # Crear notificacion para el usuario seguido
+    notification_controller.queue_notification(
+        followed_id,
+        "follow",
+        f"User {follower_id} followed you",
+        None
+    )
 
-            return new_follow_id[0] if new_follow_id else None
-    except Exception as e:
-        conn.rollback()
-        raise e
-    finally:
-        conn.close()
+    return new_follow_id[0] if new_follow_id else None
 
 def unfollow_user(follower_id, followed_id):
-    conn = get_postgres_connection()
-    try:
+    with postgres_connection() as conn:
         with conn.cursor() as cur:
             cur.execute("SELECT unfollow_user(%s, %s)", (follower_id, followed_id))
             deleted_follow_id = cur.fetchone()
-            conn.commit()
-            return deleted_follow_id[0] if deleted_follow_id else None
-    except Exception as e:
-        conn.rollback()
-        raise e
-    finally:
-        conn.close()
+    if deleted_follow_id and deleted_follow_id[0]:
+        on_commit(lambda: timeline_service.remove_followed(follower_id, followed_id))
+    return deleted_follow_id[0] if deleted_follow_id else None
 
 def get_followed_users(user_id):
-    conn = get_postgres_connection()
-    try:
+    with postgres_connection() as conn:
         with conn.cursor() as cur:
             cur.execute("SELECT * FROM get_followed_users(%s)", (user_id,))
             users_data = cur.fetchall()
-            return [User(*user_data) for user_data in users_data]
-    finally:
-        conn.close()
+    return [User(*user_data) for user_data in users_data]
 
 def get_followers(user_id):
-    conn = get_postgres_connection()
-    try:
+    with postgres_connection() as conn:
         with conn.cursor() as cur:
             cur.execute("SELECT * FROM get_followers(%s)", (user_id,))
             users_data = cur.fetchall()
-            return [User(*user_data) for user_data in users_data]
-    finally:
-        conn.close()
+    return [User(*user_data) for user_data in users_data]
 
+# Feed desde el timeline en Redis; las paginas que no estan en Redis
+# (o si Redis no esta disponible) se consultan en PostgreSQL
 def get_feed(user_id, page=1, page_size=10):
-    conn = get_postgres_connection()
-    try:
+    post_ids = timeline_service.get_feed_post_ids(user_id, (page - 1) * page_size, page_size)
+    if post_ids is not None:
+        return [post for post in post_controller.get_many(post_ids) if post is not None]
+
+    with postgres_connection() as conn:
         with conn.cursor() as cur:
             cur.execute("SELECT * FROM get_feed(%s, %s, %s)", (user_id, page, page_size))
             posts_data = cur.fetchall()
-            return [Post(*post_data) for post_data in posts_data]
-    finally:
-        conn.close()
\ No newline at end of file
+    return [Post(*post_data) for post_data in posts_data]
+
+# Feed paginado por cursor. El cursor guarda el timestamp (epoch) y el id del
+# ultimo post, que sirven tanto para el timeline en Redis como para PostgreSQL.
+# Devuelve (posts, cursor de la pagina siguiente o None)
+def get_feed_by_cursor(user_id, cursor=None, page_size=10):
+    score, last_id = decode_cursor(cursor, kind="score") if cursor else (None, None)
+    entries = timeline_service.get_feed_entries_before(user_id, score, last_id, page_size + 1)
+    if entries is not None:
+        # El cursor sale de las entradas del timeline: si se filtraran antes
+        # los posts borrados, la pagina tomaria uno de mas y lo saltaria
+        entries, next_cursor = paginate(entries, page_size, lambda entry: (entry[1], entry[0]))
+        posts = post_controller.get_many([post_id for post_id, _ in entries])
+        return [post for post in posts if post is not None], next_cursor
+
+    created_at = datetime.fromtimestamp(score, timezone.utc) if score is not None else None
+    with postgres_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute(
+                "SELECT * FROM get_feed_by_cursor(%s, %s, %s, %s)",
+                (user_id, created_at, last_id, page_size + 1)
+            )
+            posts_data = cur.fetchall()
+    posts = [Post.from_row(row) for row in posts_data]
+    return paginate(posts, page_size, lambda post: (post.created_at.timestamp(), post.id))
@@ -1,43 +1,76 @@
-from config.database import get_postgres_connection
+from psycopg2.extras import execute_values
+from config.database import postgres_connection, on_commit
 from controllers import post_controller, notification_controller
+from services import counter_service
 
 # Agregar un like a un post o lugar
 def add_like(user_id, post_id=None, place_id=None):
-    conn = get_postgres_connection()
-    try:
+    with postgres_connection() as conn:
         with conn.cursor() as cur:
             cur.execute(
                 "SELECT add_like(%s, %s, %s)",
                 (user_id, post_id, place_id)
             )
             success = cur.fetchone()[0]
-        conn.commit()
-
-        # Crear notificacion para el propietario del post
-        if post_id:
-            post = post_controller.get_post(post_id)
-            if post.user_id != user_id:  # No notificar si el usuario comenta en su propio post
-                notification_controller.create_notification(
-                    post.user_id,
-                    "comment",
-                    f"User {user_id} commented on your post",
-                    post_id
-                )
-
-        return success
-    except Exception as e:
-        conn.rollback()
-        raise e
-    finally:
-        conn.close()
-
-# Obtener el número de likes de un post o lugar
-def get_like_count(post_id=None, place_id=None):
-    conn = get_postgres_connection()
-    try:
+
+    if success:
+        on_commit(lambda: counter_service.record_like(post_id, place_id))
+
+    # Crear notificacion para el propietario del post
+    if post_id:
+        _notify_post_owner(user_id, post_id, post_controller.get_post(post_id))
+
+    return success
+
+def _notify_post_owner(user_id, post_id, post):
+    # No notificar si el post ya no existe o si el usuario da like a su propio post
+    if post is not None and post.user_id != user_id:
+        notification_controller.queue_notification(
+            post.user_id,
+            "like",
+            f"User {user_id} liked your post",
+            post_id
+        )
+
+# Maximo de likes por peticion en /likes/batch
+MAX_BATCH_SIZE = 500
+
+def _like_row(user_id, like):
+    post_id, place_id = like.get('post_id'), like.get('place_id')
+    if (post_id is None) == (place_id is None):
+        raise ValueError("Each like needs exactly one of post_id or place_id")
+    return (user_id, post_id, place_id)
+
+# Agregar varios likes del usuario en una sola ida a la base de datos (p. ej.
+# los que un cliente movil acumulo sin conexion). Devuelve cuantos eran nuevos.
+def add_likes_batch(user_id, likes):
+    if len(likes) > MAX_BATCH_SIZE:
+        raise ValueError(f"At most {MAX_BATCH_SIZE} likes per batch")
+    rows = [_like_row(user_id, like) for like in likes]
+    if not rows:
+        return 0
+    with postgres_connection() as conn:
         with conn.cursor() as cur:
-            cur.execute("SELECT get_like_count(%s, %s)", (post_id, place_id))
-            count = cur.fetchone()[0]
-        return count
-    finally:
-        conn.close()
\ No newline at end of file
+            inserted = execute_values(
+                cur,
+                "INSERT INTO likes (user_id, post_id, place_id) VALUES %s "
+                "ON CONFLICT DO NOTHING RETURNING user_id, post_id, place_id",
+                rows,
+                page_size=len(rows),
+                fetch=True
+            )
+
+    if inserted:
+        on_commit(lambda: counter_service.record_likes(
+            [(post_id, place_id) for _, post_id, place_id in inserted]
+        ))
+    # Los propietarios de todos los posts con una sola consulta
+    post_ids = list(dict.fromkeys(post_id for _, post_id, _ in inserted if post_id))
+    for post_id, post in zip(post_ids, post_controller.get_many(post_ids)):
+        _notify_post_owner(user_id, post_id, post)
+
+    return len(inserted)
+
+# Obtener el número de likes de un post o lugar (contador en Redis)
+def get_like_count(post_id=None, place_id=None):
+    return counter_service.get_like_count(post_id, place_id)
@@ -1,61 +1,68 @@
-from config.database import get_postgres_connection
+from config.database import postgres_connection, on_commit
+from services.notification_outbox import enqueue_notification
+from services.pagination import decode_cursor, paginate
 
 # Crear una nueva notificación
 def create_notification(user_id, type, content, related_id):
-    conn = get_postgres_connection()
-    try:
+    with postgres_connection() as conn:
         with conn.cursor() as cur:
             cur.execute(
                 "SELECT create_notification(%s, %s, %s, %s)",
                 (user_id, type, content, related_id)
             )
             notification_id = cur.fetchone()[0]
-        conn.commit()
-        return notification_id
-    except Exception as e:
-        conn.rollback()
-        raise e
-    finally:
-        conn.close()
+    return notification_id
+
+# Encolar una notificación en el outbox al confirmar la transacción;
+# un worker en segundo plano la inserta junto con otras en un solo INSERT
+def queue_notification(user_id, type, content, related_id):
+    on_commit(lambda: enqueue_notification(user_id, type, content, related_id))
 
 # Obtener las notificaciones de un usuario
 def get_user_notifications(user_id, limit=10, offset=0):
-    conn = get_postgres_connection()
-    try:
+    with postgres_connection() as conn:
         with conn.cursor() as cur:
             cur.execute(
                 "SELECT * FROM get_user_notifications(%s, %s, %s)",
                 (user_id, limit, offset)
             )
             notifications = cur.fetchall()
-        return [
-            {
-                "id": row[0],
-                "type": row[1],
-                "content": row[2],
-                "related_id": row[3],
-                "is_read": row[4],
-                "created_at": row[5]
-            }
-            for row in notifications
-        ]
-    finally:
-        conn.close()
+    return [_notification_from_row(row) for row in notifications]
+
+# Obtener las notificaciones de un usuario paginadas por cursor (created_at, id).
+# Devuelve (notificaciones, cursor de la pagina siguiente o None)
+def get_user_notifications_by_cursor(user_id, cursor=None, limit=10):
+    created_at, last_id = decode_cursor(cursor) if cursor else (None, None)
+    with postgres_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute(
+                "SELECT * FROM get_user_notifications_by_cursor(%s, %s, %s, %s)",
+                (user_id, created_at, last_id, limit + 1)
+            )
+            notifications = cur.fetchall()
+    return paginate(
+        [_notification_from_row(row) for row in notifications],
+        limit,
+        lambda notification: (notification["created_at"], notification["id"])
+    )
+
+def _notification_from_row(row):
+    return {
+        "id": row[0],
+        "type": row[1],
+        "content": row[2],
+        "related_id": row[3],
+        "is_read": row[4],
+        "created_at": row[5]
+    }
 
 # Marcar una notificación como leída
 def mark_notification_as_read(notification_id):
-    conn = get_postgres_connection()
-    try:
+    with postgres_connection() as conn:
         with conn.cursor() as cur:
             cur.execute(
                 "SELECT mark_notification_as_read(%s)",
                 (notification_id,)
             )
             success = cur.fetchone()[0]
-        conn.commit()
-        return success
-    except Exception as e:
-        conn.rollback()
-        raise e
-    finally:
-        conn.close()
\ No newline at end of file
+    return success
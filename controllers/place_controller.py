@@ -1,68 +1,105 @@
 from models.place import Place
-from config.database import get_postgres_connection
+from config.database import postgres_connection, on_commit
+from services.cache_service import read_through, read_through_many, invalidate_place
+from services.search_cache import bump_generation
+from services import suggest_service, geo_service
 
 # Crear un nuevo lugar
-def create_place(name, description, city, country):
-    conn = get_postgres_connection()
-    try:
+def create_place(name, description, city, country, latitude=None, longitude=None):
+    with postgres_connection() as conn:
         with conn.cursor() as cur:
             cur.execute(
-                "SELECT create_place(%s, %s, %s, %s)",
-                (name, description, city, country)
+                "SELECT create_place(%s, %s, %s, %s, %s, %s)",
+                (name, description, city, country, latitude, longitude)
             )
             place_id = cur.fetchone()[0]
-        conn.commit()
-        return place_id
-    except Exception as e:
-        conn.rollback()
-        raise e
-    finally:
-        conn.close()
+    on_commit(lambda: bump_generation("place"))
+    on_commit(lambda: suggest_service.index_place(place_id, name, city, country))
+    if latitude is not None:
+        on_commit(lambda: geo_service.index_place(place_id, latitude, longitude))
+    return place_id
 
 # Obtener un lugar por ID
+@read_through(
+    key_func=lambda place_id: f"place:{place_id}",
+    to_cache=Place.to_dict,
+    from_cache=Place.from_dict,
+)
 def get_place(place_id):
-    conn = get_postgres_connection()
-    try:
+    with postgres_connection() as conn:
         with conn.cursor() as cur:
             cur.execute("SELECT * FROM get_place_by_id(%s)", (place_id,))
             place_data = cur.fetchone()
-            if place_data:
-                return Place(*place_data)
-            return None
-    finally:
-        conn.close()
+    if place_data:
+        return Place.from_row(place_data)
+    return None
+
+# Obtener varios lugares por ID (MGET en Redis y una sola consulta para
+# los que faltan). Devuelve una lista en el orden de place_ids, con None
+# para los que no existen
+def get_many(place_ids):
+    return read_through_many(
+        place_ids,
+        key_func=lambda place_id: f"place:{place_id}",
+        load_many=_load_places,
+        to_cache=Place.to_dict,
+        from_cache=Place.from_dict,
+    )
+
+def _load_places(place_ids):
+    with postgres_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("SELECT * FROM get_places_by_ids(%s)", (list(place_ids),))
+            rows = cur.fetchall()
+    return {row[0]: Place.from_row(row) for row in rows}
 
 # Actualizar un lugar existente
-def update_place(place_id, name, description, city, country):
-    conn = get_postgres_connection()
-    try:
+# Sin latitude/longitude se conserva la ubicacion que tenia
+def update_place(place_id, name, description, city, country, latitude=None, longitude=None):
+    with postgres_connection() as conn:
         with conn.cursor() as cur:
             cur.execute(
-                "SELECT update_place(%s, %s, %s, %s, %s)",
-                (place_id, name, description, city, country)
+                "SELECT update_place(%s, %s, %s, %s, %s, %s, %s)",
+                (place_id, name, description, city, country, latitude, longitude)
             )
             updated_place_id = cur.fetchone()
-            conn.commit()
-            return updated_place_id[0] if updated_place_id else None
-    except Exception as e:
-        conn.rollback()
-        raise e
-    finally:
-        conn.close()
+    if updated_place_id:
+        on_commit(lambda: invalidate_place(place_id))
+        on_commit(lambda: bump_generation("place"))
+        on_commit(lambda: suggest_service.index_place(place_id, name, city, country))
+        if latitude is not None:
+            on_commit(lambda: geo_service.index_place(place_id, latitude, longitude))
+        return updated_place_id[0]
+    return None
 
 # Eliminar un lugar existente
 def delete_place(place_id):
-    conn = get_postgres_connection()
-    try:
+    with postgres_connection() as conn:
         with conn.cursor() as cur:
             cur.execute("SELECT delete_place(%s)", (place_id,))
             deleted_place_id = cur.fetchone()
-            if deleted_place_id:
-                conn.commit()
-                return deleted_place_id[0]
-            return None
-    except Exception as e:
-        conn.rollback()
-        raise e
-    finally:
-        conn.close()
\ No newline at end of file
+    if deleted_place_id:
+        on_commit(lambda: invalidate_place(place_id))
+        on_commit(lambda: bump_generation("place"))
+        on_commit(lambda: suggest_service.remove_place(place_id))
+        on_commit(lambda: geo_service.remove_place(place_id))
+        return deleted_place_id[0]
+    return None
+
+# Lugares cercanos a (latitude, longitude), del mas cercano al mas lejano.
+# Con radius_km, los que estan dentro del radio (hasta limit); sin el, los
+# limit mas cercanos. Usa el set GEO de Redis y, si no esta disponible,
+# la funcion get_places_nearby (indice GiST de earthdistance).
+# Devuelve una lista de (Place, distancia_km)
+def get_nearby(latitude, longitude, radius_km=None, limit=20):
+    matches = geo_service.nearby(latitude, longitude, radius_km, limit)
+    if matches is None:
+        with postgres_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute(
+                    "SELECT * FROM get_places_nearby(%s, %s, %s, %s)",
+                    (latitude, longitude, radius_km * 1000 if radius_km is not None else None, limit)
+                )
+                matches = [(place_id, distance_m / 1000) for place_id, distance_m in cur.fetchall()]
+    places = get_many([place_id for place_id, _ in matches])
+    return [(place, distance) for place, (_, distance) in zip(places, matches) if place is not None]
@@ -1,94 +1,183 @@
+import os
 from models.post import Post
-from config.database import get_postgres_connection
-from services.cache_service import cache_post, get_cached_post
+from config.database import postgres_connection, on_commit
+from services.cache_service import read_through, read_through_many, invalidate_post
+from services import timeline_service
+from services.search_cache import bump_generation
+from services.pagination import decode_cursor, paginate, total_from_page
 
 # Crear un nuevo post
 def create_post(user_id, content):
-    conn = get_postgres_connection()
-    try:
+    with postgres_connection() as conn:
         with conn.cursor() as cur:
             cur.execute(
-                "SELECT create_post(%s, %s)",
+                "SELECT * FROM create_post(%s, %s)",
                 (user_id, content)
             )
-            post_id = cur.fetchone()[0]
-        conn.commit()
-        return post_id
-    except Exception as e:
-        conn.rollback()
-        raise e
-    finally:
-        conn.close()
+            post_id, created_at = cur.fetchone()
+    # Agregar el post a los timelines de los seguidores cuando se confirme,
+    # con created_at como score (igual que al reconstruirlos desde PostgreSQL)
+    score = created_at.timestamp()
+    on_commit(lambda: timeline_service.push_post(user_id, post_id, score))
+    on_commit(lambda: bump_generation("post"))
+    return post_id
 
 # Obtener un post por ID
+# Lectura a traves del cache: en un miss solo una llamada consulta la base de datos
+@read_through(
+    key_func=lambda post_id: f"post:{post_id}",
+    to_cache=Post.to_dict,
+    from_cache=Post.from_dict,
+)
 def get_post(post_id):
-    cached_post = get_cached_post(post_id)
-    if cached_post:
-        return Post(**cached_post)
-
-    conn = get_postgres_connection()
-    try:
+    with postgres_connection() as conn:
         with conn.cursor() as cur:
             cur.execute("SELECT * FROM get_post_by_id(%s)", (post_id,))
             post_data = cur.fetchone()
-            if post_data:
-                post = Post(*post_data)
-                cache_post(post_id, post.to_dict())
-                return post
-            return None
-    finally:
-        conn.close()
+    if post_data:
+        return Post.from_row(post_data)
+    return None
+
+# Obtener varios posts por ID (MGET en Redis y una sola consulta para
+# los que faltan). Devuelve una lista en el orden de post_ids, con None
+# para los que no existen
+def get_many(post_ids):
+    return read_through_many(
+        post_ids,
+        key_func=lambda post_id: f"post:{post_id}",
+        load_many=_load_posts,
+        to_cache=Post.to_dict,
+        from_cache=Post.from_dict,
+    )
+
+def _load_posts(post_ids):
+    with postgres_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("SELECT * FROM get_posts_by_ids(%s)", (list(post_ids),))
+            rows = cur.fetchall()
+    return {row[0]: Post.from_row(row) for row in rows}
+
+# Partes de un post que se pueden pedir con ?expand= y los campos que agregan
+EXPAND_FIELDS = {
+    "media": ("media_links",),
+    "comments": ("comments", "comment_count"),
+    "likes": ("like_count",),
+    "reactions": ("reactions",),
+}
+# Comentarios mas recientes incluidos en el documento expandido
+EXPANDED_COMMENT_LIMIT = 50
+# Los conteos de likes y reacciones del documento pueden tener este atraso
+EXPANDED_POST_TTL = int(os.getenv('EXPANDED_POST_TTL', 60))
+
+# Convierte "comments,likes" en {"comments", "likes"}; rechaza partes desconocidas
+def parse_expand(value):
+    parts = {part.strip() for part in value.split(",") if part.strip()}
+    unknown = parts - EXPAND_FIELDS.keys()
+    if unknown:
+        raise ValueError(f"Unknown expand value(s): {', '.join(sorted(unknown))}")
+    return parts
+
+# Documento completo del post (una sola consulta), cacheado como una unidad
+@read_through(
+    key_func=lambda post_id: f"post:{post_id}:expanded",
+    to_cache=dict,
+    from_cache=dict,
+    expire_time=EXPANDED_POST_TTL,
+)
+def _get_post_document(post_id):
+    with postgres_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute(
+                "SELECT * FROM get_post_expanded(%s, %s)",
+                (post_id, EXPANDED_COMMENT_LIMIT)
+            )
+            row = cur.fetchone()
+    if row is None:
+        return None
+    return {
+        "id": row[0],
+        "user_id": row[1],
+        "content": row[2],
+        "created_at": row[3],
+        "updated_at": row[4],
+        "media_links": row[5],
+        "comments": row[6],
+        "comment_count": row[7],
+        "like_count": row[8],
+        "reactions": row[9]
+    }
 
-# Obtener publicaciones paginadas
-def get_posts_paginated(page, page_size):
-    conn = get_postgres_connection()
-    try:
+# Obtener un post con las partes pedidas en expand (medios, comentarios,
+# likes y reacciones) sin consultas adicionales
+def get_post_expanded(post_id, expand):
+    document = _get_post_document(post_id)
+    if document is None:
+        return None
+    fields = {"id", "user_id", "content", "created_at", "updated_at"}
+    for part in expand:
+        fields.update(EXPAND_FIELDS[part])
+    return {key: value for key, value in document.items() if key in fields}
+
+# Obtener publicaciones paginadas.
+# include_total: None (sin total), "estimate" (pg_class.reltuples de la tabla)
+# o "exact" (COUNT(*) sobre la tabla, solo bajo demanda)
+def get_posts_paginated(page, page_size, include_total="estimate"):
+    with postgres_connection() as conn:
         with conn.cursor() as cur:
             cur.execute("SELECT * FROM get_posts_paginated(%s, %s)", (page, page_size))
             posts_data = cur.fetchall()
-            if posts_data:
-                total_count = posts_data[0][-1]
-                posts = [Post(*row[:-1]) for row in posts_data]
-                return posts, total_count
-            return [], 0
-    finally:
-        conn.close()
+            total_count = None
+            if include_total:
+                total_count = total_from_page(page, page_size, len(posts_data))
+            if include_total and total_count is None:
+                if include_total == "exact":
+                    cur.execute("SELECT count_posts()")
+                else:
+                    cur.execute("SELECT get_table_count(%s)", ('posts',))
+                total_count = cur.fetchone()[0]
+    return [Post.from_row(row) for row in posts_data], total_count
+
+# Obtener publicaciones paginadas por cursor (created_at, id).
+# Devuelve (posts, cursor de la pagina siguiente o None)
+def get_posts_by_cursor(cursor=None, page_size=10):
+    created_at, last_id = decode_cursor(cursor) if cursor else (None, None)
+    with postgres_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute(
+                "SELECT * FROM get_posts_by_cursor(%s, %s, %s)",
+                (created_at, last_id, page_size + 1)
+            )
+            posts_data = cur.fetchall()
+    posts = [Post.from_row(row) for row in posts_data]
+    return paginate(posts, page_size, lambda post: (post.created_at, post.id))
 
 # Actualizar un post existente
 def update_post(post_id, content):
-    conn = get_postgres_connection()
-    try:
+    with postgres_connection() as conn:
         with conn.cursor() as cur:
             cur.execute("SELECT update_post(%s, %s)", (post_id, content))
             updated_post_id = cur.fetchone()
-            if updated_post_id:
-                conn.commit()
-                # Actualizar el cache
-                updated_post = get_post(post_id)
-                cache_post(post_id, updated_post.to_dict())
-                return updated_post_id[0]
-            return None
-    except Exception as e:
-        conn.rollback()
-        raise e
-    finally:
-        conn.close()
+    if updated_post_id:
+        # Invalidar el cache (Redis y el cache local de todos los workers)
+        # cuando la transaccion se confirme; la siguiente lectura lo recarga
+        on_commit(lambda: invalidate_post(post_id))
+        on_commit(lambda: bump_generation("post"))
+        return updated_post_id[0]
+    return None
 
 # Eliminar un post existente
 def delete_post(post_id):
-    conn = get_postgres_connection()
-    try:
+    # El autor se necesita para quitar el post de los timelines de sus seguidores
+    post = get_post(post_id) if timeline_service.enabled() else None
+    with postgres_connection() as conn:
         with conn.cursor() as cur:
             cur.execute("SELECT delete_post(%s)", (post_id,))
             deleted_post_id = cur.fetchone()
-            if deleted_post_id:
-                conn.commit()
-                # Eliminar del cache
-                cache_post(post_id, None, expire_time=1)
-                return deleted_post_id[0]
-            return None
-    except Exception as e:
-        conn.rollback()
-        raise e
-    finally:
-        conn.close()
\ No newline at end of file
+    if deleted_post_id:
+        # Eliminar del cache cuando la transaccion se confirme
+        on_commit(lambda: invalidate_post(post_id))
+        on_commit(lambda: bump_generation("post"))
+        if post is not None:
+            on_commit(lambda: timeline_service.remove_post(post.user_id, post_id))
+        return deleted_post_id[0]
+    return None
@@ -1,27 +1,67 @@
-from config.database import get_postgres_connection
+from psycopg2.extras import execute_values
+from config.database import postgres_connection, on_commit
+from services import counter_service
 
 def add_or_update_reaction(user_id, post_id, reaction_type):
-    conn = get_postgres_connection()
-    try:
+    with postgres_connection() as conn:
         with conn.cursor() as cur:
             cur.execute(
                 "SELECT add_or_update_reaction(%s, %s, %s)",
                 (user_id, post_id, reaction_type)
             )
-            success = cur.fetchone()[0]
-        conn.commit()
-        return success
-    except Exception as e:
-        conn.rollback()
-        raise e
-    finally:
-        conn.close()
+            # Tipo de reaccion anterior (None si es nueva)
+            previous_type = cur.fetchone()[0]
+    on_commit(lambda: counter_service.record_reaction(post_id, reaction_type, previous_type))
+    return True
 
-def get_reaction_counts(post_id):
-    conn = get_postgres_connection()
-    try:
+# Maximo de reacciones por peticion en /reactions/batch
+MAX_BATCH_SIZE = 500
+
+# Agregar o actualizar varias reacciones del usuario con un solo upsert.
+# Si reacciona varias veces al mismo post, gana la ultima.
+# Devuelve cuantas reacciones se aplicaron.
+def add_or_update_reactions_batch(user_id, reactions):
+    if len(reactions) > MAX_BATCH_SIZE:
+        raise ValueError(f"At most {MAX_BATCH_SIZE} reactions per batch")
+    latest = {}
+    for reaction in reactions:
+        post_id, reaction_type = reaction.get('post_id'), reaction.get('reaction_type')
+        if post_id is None or not reaction_type:
+            raise ValueError("Each reaction needs post_id and reaction_type")
+        # ON CONFLICT DO UPDATE no puede modificar la misma fila dos veces
+        latest.pop(post_id, None)
+        latest[post_id] = reaction_type
+    rows = [(user_id, post_id, reaction_type) for post_id, reaction_type in latest.items()]
+    if not rows:
+        return 0
+    with postgres_connection() as conn:
         with conn.cursor() as cur:
-            cur.execute("SELECT * FROM get_reaction_counts(%s)", (post_id,))
-            return cur.fetchall()
-    finally:
-        conn.close()
\ No newline at end of file
+            applied = execute_values(
+                cur,
+                """
+                WITH items (user_id, post_id, reaction_type) AS (VALUES %s),
+                previous AS (
+                    SELECT r.user_id, r.post_id, r.reaction_type
+                    FROM reactions r
+                    JOIN items i ON i.user_id = r.user_id AND i.post_id = r.post_id
+                )
+                INSERT INTO reactions (user_id, post_id, reaction_type)
+                SELECT user_id, post_id, reaction_type FROM items
+                ON CONFLICT (user_id, post_id)
+                DO UPDATE SET reaction_type = EXCLUDED.reaction_type
+                RETURNING reactions.post_id, reactions.reaction_type, (
+                    SELECT p.reaction_type FROM previous p
+                    WHERE p.user_id = reactions.user_id AND p.post_id = reactions.post_id
+                )
+                """,
+                rows,
+                template="(%s::integer, %s::integer, %s::varchar)",
+                page_size=len(rows),
+                fetch=True
+            )
+    on_commit(lambda: counter_service.record_reactions(applied))
+    return len(applied)
+
+# Conteo de reacciones por tipo (contador en Redis)
+def get_reaction_counts(post_id):
+    return counter_service.get_reaction_counts(post_id)
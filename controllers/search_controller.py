@@ -1,20 +1,61 @@
-from config.database import get_postgres_connection
+from config.database import postgres_connection
+from services.pagination import decode_cursor, paginate
+from services import search_cache
 
-def search_content(query):
-    conn = get_postgres_connection()
-    try:
-        with conn.cursor() as cur:
-            cur.execute("SELECT * FROM search_content(%s)", (query,))
-            results = cur.fetchall()
-            return [
-                {
-                    "id": row[0],
-                    "content_type": row[1],
-                    "title": row[2],
-                    "description": row[3],
-                    "created_at": row[4]
-                }
-                for row in results
-            ]
-    finally:
-        conn.close()
\ No newline at end of file
+# Tipos de contenido que se pueden buscar
+SEARCH_TYPES = ("post", "place", "travel_list", "trip")
+
+# Convierte "post,place" en ["post", "place"]; rechaza tipos desconocidos
+def parse_types(value):
+    if not value:
+        return None
+    types = [part.strip() for part in value.split(",") if part.strip()]
+    unknown = set(types) - set(SEARCH_TYPES)
+    if unknown:
+        raise ValueError(f"Unknown content type(s): {', '.join(sorted(unknown))}")
+    return types or None
+
+# Buscar en posts, lugares, listas de viaje y viajes con una sola consulta,
+# ordenado por relevancia. Las paginas se cachean por consulta normalizada y filtros.
+# Devuelve (resultados, cursor de la pagina siguiente o None)
+def search(query, types=None, date_from=None, date_to=None, cursor=None, limit=20):
+    after_rank, after_type, after_id = None, None, None
+    if cursor:
+        (after_rank, after_type), after_id = decode_cursor(cursor, kind="rank")
+
+    def load():
+        with postgres_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute(
+                    "SELECT * FROM search_content(%s, %s, %s, %s, %s, %s, %s, %s)",
+                    (query, types, date_from, date_to, after_rank, after_type, after_id, limit + 1)
+                )
+                results = cur.fetchall()
+        results, next_cursor = paginate(
+            [_result_from_row(row) for row in results],
+            limit,
+            lambda result: ([result["rank"], result["content_type"]], result["id"])
+        )
+        return {"results": results, "next_cursor": next_cursor}
+
+    page = search_cache.cached_search(
+        query, types or SEARCH_TYPES, date_from, date_to, cursor, limit, load
+    )
+    return page["results"], page["next_cursor"]
+
+# Primera pagina de resultados, sin cursor
+def search_content(query, types=None, date_from=None, date_to=None, limit=20):
+    results, _ = search(query, types, date_from, date_to, limit=limit)
+    return results
+
+def _result_from_row(row):
+    return {
+        "id": row[0],
+        "content_type": row[1],
+        "title": row[2],
+        "description": row[3],
+        "created_at": row[4],
+        "user_id": row[5],
+        "username": row[6],
+        "rank": row[7]
+    }
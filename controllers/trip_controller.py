@@ -1,12 +1,15 @@
 # controllers/trip_controller.py
+from psycopg2.extras import Json
 from models.trip import Trip, TripPlace
-from config.database import get_postgres_connection
+from config.database import postgres_connection, on_commit
+from services.cache_service import read_through, invalidate_trip
+from services.search_cache import bump_generation
 from datetime import date
+from services.pagination import decode_cursor, paginate, total_from_page
 
 # Crear un nuevo viaje
 def create_trip(user_id, title, description, start_date, end_date, status='planned', budget=None):
-    conn = get_postgres_connection()
-    try:
+    with postgres_connection() as conn:
         with conn.cursor() as cur:
             # Ejecuta la función SQL para crear un nuevo viaje
             cur.execute(
@@ -15,18 +18,18 @@ def create_trip(user_id, title, description, start_date, end_date, status='plann
             )
             # Obtiene el ID del viaje recién creado
             trip_id = cur.fetchone()[0]
-        conn.commit()  # Confirma la transacción
+        # Las busquedas cacheadas que incluyen viajes dejan de ser validas
+        on_commit(lambda: bump_generation("trip"))
         return trip_id  # Devuelve el ID del viaje
-    except Exception as e:
-        conn.rollback()  # Revierte la transacción en caso de error
-        raise e  # Lanza la excepción
-    finally:
-        conn.close()  # Cierra la conexión a la base de datos
 
 # Obtener un viaje por ID
+@read_through(
+    key_func=lambda trip_id: f"trip:{trip_id}",
+    to_cache=Trip.to_dict,
+    from_cache=Trip.from_dict,
+)
 def get_trip(trip_id):
-    conn = get_postgres_connection()
-    try:
+    with postgres_connection() as conn:
         with conn.cursor() as cur:
             # Ejecuta la función SQL para obtener un viaje por su ID
             cur.execute("SELECT * FROM get_trip_by_id(%s)", (trip_id,))
@@ -44,13 +47,10 @@ def get_trip(trip_id):
                     id=trip_data[0]
                 )
             return None  # Devuelve None si no se encuentra el viaje
-    finally:
-        conn.close()  # Cierra la conexión a la base de datos
 
 # Obtener viajes de un usuario con paginación
 def get_user_trips(user_id, status=None, page=1, page_size=10):
-    conn = get_postgres_connection()
-    try:
+    with postgres_connection() as conn:
         with conn.cursor() as cur:
             # Ejecuta la función SQL para obtener viajes de un usuario con paginación
             cur.execute("SELECT * FROM get_user_trips(%s, %s, %s, %s)", 
@@ -74,13 +74,23 @@ def get_user_trips(user_id, status=None, page=1, page_size=10):
                     trips.append(trip)
                 return trips, total_count  # Devuelve la lista de viajes y el total
             return [], 0  # Devuelve una lista vacía y 0 si no hay viajes
-    finally:
-        conn.close()  # Cierra la conexión a la base de datos
+
+# Obtener viajes de un usuario paginados por cursor (start_date, id)
+def get_user_trips_by_cursor(user_id, status=None, cursor=None, page_size=10):
+    start_date, last_id = decode_cursor(cursor, kind="date") if cursor else (None, None)
+    with postgres_connection() as conn:
+        with conn.cursor() as cur:
+            # Pide una fila de mas para saber si hay una pagina siguiente
+            cur.execute("SELECT * FROM get_user_trips_by_cursor(%s, %s, %s, %s, %s)",
+                       (user_id, status, start_date, last_id, page_size + 1))
+            trips_data = cur.fetchall()
+    trips = [_trip_from_row(row) for row in trips_data]
+    # Devuelve los viajes y el cursor de la pagina siguiente (o None)
+    return paginate(trips, page_size, lambda trip: (trip.start_date, trip.id))
 
 # Actualizar un viaje existente
 def update_trip(trip_id, title, description, start_date, end_date, status, budget):
-    conn = get_postgres_connection()
-    try:
+    with postgres_connection() as conn:
         with conn.cursor() as cur:
             # Ejecuta la función SQL para actualizar un viaje existente
             cur.execute(
@@ -89,37 +99,29 @@ def update_trip(trip_id, title, description, start_date, end_date, status, budge
             )
             updated_trip_id = cur.fetchone()  # Obtiene el ID del viaje actualizado
             if updated_trip_id:
-                conn.commit()  # Confirma la transacción
+                # Invalida el viaje en cache cuando la transaccion se confirme
+                on_commit(lambda: invalidate_trip(trip_id))
+                on_commit(lambda: bump_generation("trip"))
                 return updated_trip_id[0]  # Devuelve el ID del viaje actualizado
             return None  # Devuelve None si no se actualiza el viaje
-    except Exception as e:
-        conn.rollback()  # Revierte la transacción en caso de error
-        raise e  # Lanza la excepción
-    finally:
-        conn.close()  # Cierra la conexión a la base de datos
 
 # Eliminar un viaje existente
 def delete_trip(trip_id):
-    conn = get_postgres_connection()
-    try:
+    with postgres_connection() as conn:
         with conn.cursor() as cur:
             # Ejecuta la función SQL para eliminar un viaje existente
             cur.execute("SELECT delete_trip(%s)", (trip_id,))
             deleted_trip_id = cur.fetchone()  # Obtiene el ID del viaje eliminado
             if deleted_trip_id:
-                conn.commit()  # Confirma la transacción
+                # Elimina el viaje del cache cuando la transaccion se confirme
+                on_commit(lambda: invalidate_trip(trip_id))
+                on_commit(lambda: bump_generation("trip"))
                 return deleted_trip_id[0]  # Devuelve el ID del viaje eliminado
             return None  # Devuelve None si no se elimina el viaje
-    except Exception as e:
-        conn.rollback()  # Revierte la transacción en caso de error
-        raise e  # Lanza la excepción
-    finally:
-        conn.close()  # Cierra la conexión a la base de datos
 
 # Agregar un lugar a un viaje
 def add_place_to_trip(trip_id, place_id, visit_date=None, visit_order=None, notes=None, rating=None):
-    conn = get_postgres_connection()
-    try:
+    with postgres_connection() as conn:
         with conn.cursor() as cur:
             # Ejecuta la función SQL para agregar un lugar a un viaje
             cur.execute(
@@ -127,34 +129,53 @@ def add_place_to_trip(trip_id, place_id, visit_date=None, visit_order=None, note
                 (trip_id, place_id, visit_date, visit_order, notes, rating)
             )
             new_entry_id = cur.fetchone()  # Obtiene el ID de la nueva entrada
-            conn.commit()  # Confirma la transacción
             return new_entry_id[0] if new_entry_id else None  # Devuelve el ID de la nueva entrada o None
-    except Exception as e:
-        conn.rollback()  # Revierte la transacción en caso de error
-        raise e  # Lanza la excepción
-    finally:
-        conn.close()  # Cierra la conexión a la base de datos
 
 # Eliminar un lugar de un viaje
 def remove_place_from_trip(trip_id, place_id):
-    conn = get_postgres_connection()
-    try:
+    with postgres_connection() as conn:
         with conn.cursor() as cur:
             # Ejecuta la función SQL para eliminar un lugar de un viaje
             cur.execute("SELECT remove_place_from_trip(%s, %s)", (trip_id, place_id))
             deleted_entry_id = cur.fetchone()  # Obtiene el ID de la entrada eliminada
-            conn.commit()  # Confirma la transacción
             return deleted_entry_id[0] if deleted_entry_id else None  # Devuelve el ID de la entrada eliminada o None
-    except Exception as e:
-        conn.rollback()  # Revierte la transacción en caso de error
-        raise e  # Lanza la excepción
-    finally:
-        conn.close()  # Cierra la conexión a la base de datos
+
+MAX_TRIP_PLACES_BATCH = 200
+TRIP_PLACE_FIELDS = ('place_id', 'visit_date', 'visit_order', 'notes', 'rating')
+
+# Agregar varios lugares a un viaje en una sola sentencia.
+# places es una lista de dicts con place_id y opcionalmente visit_date,
+# visit_order, notes y rating; los que no traen visit_order se numeran en el
+# orden de la lista al final del itinerario.
+# Devuelve [{"entry_id", "place_id", "visit_order"}] ordenado por visit_order
+def add_places_to_trip_batch(trip_id, places):
+    if len(places) > MAX_TRIP_PLACES_BATCH:
+        raise ValueError(f"At most {MAX_TRIP_PLACES_BATCH} places per batch")
+    if any(not isinstance(place, dict) or place.get('place_id') is None for place in places):
+        raise ValueError("Each place needs a place_id")
+    if not places:
+        return []
+    items = [{field: place.get(field) for field in TRIP_PLACE_FIELDS} for place in places]
+    with postgres_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("SELECT * FROM add_places_to_trip(%s, %s)", (trip_id, Json(items)))
+            rows = cur.fetchall()
+    return [{"entry_id": row[0], "place_id": row[1], "visit_order": row[2]} for row in rows]
+
+# Reordenar los lugares de un viaje: place_ids tiene todos sus lugares en el
+# nuevo orden. Devuelve la cantidad de lugares reordenados
+def reorder_trip_places(trip_id, place_ids):
+    place_ids = [int(place_id) for place_id in place_ids]
+    if len(set(place_ids)) != len(place_ids):
+        raise ValueError("place_ids must not contain duplicates")
+    with postgres_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("SELECT reorder_trip_places(%s, %s)", (trip_id, place_ids))
+            return cur.fetchone()[0]
 
 # Obtener los lugares de un viaje
 def get_trip_places(trip_id):
-    conn = get_postgres_connection()
-    try:
+    with postgres_connection() as conn:
         with conn.cursor() as cur:
             # Ejecuta la función SQL para obtener los lugares de un viaje
             cur.execute("SELECT * FROM get_trip_places(%s)", (trip_id,))
@@ -175,13 +196,11 @@ def get_trip_places(trip_id):
                 }
                 places.append(place_info)
             return places  # Devuelve la lista de lugares
-    finally:
-        conn.close()  # Cierra la conexión a la base de datos
 
 # Obtener estadísticas de un viaje
+# (una fila de trip_stats, que los triggers mantienen al día)
 def get_trip_statistics(trip_id):
-    conn = get_postgres_connection()
-    try:
+    with postgres_connection() as conn:
         with conn.cursor() as cur:
             # Ejecuta la función SQL para obtener estadísticas de un viaje
             cur.execute("SELECT * FROM get_trip_statistics(%s)", (trip_id,))
@@ -195,75 +214,126 @@ def get_trip_statistics(trip_id):
                     "trip_duration_days": stats_data[3]
                 }
             return None  # Devuelve None si no se encuentran estadísticas
-    finally:
-        conn.close()  # Cierra la conexión a la base de datos
 
-# Buscar viajes por criterios
+# Recalcular las estadísticas materializadas (trip_stats) de todos los viajes
+# o solo de trip_ids; devuelve la cantidad de viajes procesados
+def rebuild_trip_stats(trip_ids=None):
+    with postgres_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("SELECT rebuild_trip_stats(%s)", (list(trip_ids) if trip_ids else None,))
+            return cur.fetchone()[0]
+
+# Construye la clausula WHERE de la busqueda de viajes
+def _trip_search_conditions(user_id, status, start_date_from, start_date_to, title_search):
+    conditions = []  # Lista para almacenar las condiciones de búsqueda
+    params = []  # Lista para almacenar los parámetros de búsqueda
+
+    if user_id:
+        conditions.append("t.user_id = %s")  # Agrega condición para el ID de usuario
+        params.append(user_id)  # Agrega el ID de usuario a los parámetros
+
+    if status:
+        conditions.append("t.status = %s")  # Agrega condición para el estado
+        params.append(status)  # Agrega el estado a los parámetros
+
+    if start_date_from:
+        conditions.append("t.start_date >= %s")  # Agrega condición para la fecha de inicio
+        params.append(start_date_from)  # Agrega la fecha de inicio a los parámetros
+
+    if start_date_to:
+        conditions.append("t.start_date <= %s")  # Agrega condición para la fecha de fin
+        params.append(start_date_to)  # Agrega la fecha de fin a los parámetros
+
+    if title_search:
+        # Agrega condición para la búsqueda en el título usando un vector de búsqueda
+        conditions.append("t.search_vector @@ plainto_tsquery('english', %s)")
+        params.append(title_search)  # Agrega el término de búsqueda al título
+
+    return conditions, params
+
+# Crea un objeto Trip a partir de una fila de la tabla trips
+def _trip_from_row(row):
+    return Trip(
+        user_id=row[1],
+        title=row[2],
+        description=row[3],
+        start_date=row[4],
+        end_date=row[5],
+        status=row[6],
+        budget=row[7],
+        id=row[0]
+    )
+
+# Buscar viajes por criterios.
+# include_total: None (sin total), "estimate" (estimación del planificador)
+# o "exact" (COUNT(*) con los mismos filtros)
 def search_trips(user_id=None, status=None, start_date_from=None, start_date_to=None, 
-                title_search=None, page=1, page_size=10):
-    conn = get_postgres_connection()
-    try:
+                title_search=None, page=1, page_size=10, include_total="estimate"):
+    with postgres_connection() as conn:
         with conn.cursor() as cur:
             # Construir consulta dinámica
-            conditions = []  # Lista para almacenar las condiciones de búsqueda
-            params = []  # Lista para almacenar los parámetros de búsqueda
-            
-            if user_id:
-                conditions.append("t.user_id = %s")  # Agrega condición para el ID de usuario
-                params.append(user_id)  # Agrega el ID de usuario a los parámetros
-            
-            if status:
-                conditions.append("t.status = %s")  # Agrega condición para el estado
-                params.append(status)  # Agrega el estado a los parámetros
-            
-            if start_date_from:
-                conditions.append("t.start_date >= %s")  # Agrega condición para la fecha de inicio
-                params.append(start_date_from)  # Agrega la fecha de inicio a los parámetros
-            
-            if start_date_to:
-                conditions.append("t.start_date <= %s")  # Agrega condición para la fecha de fin
-                params.append(start_date_to)  # Agrega la fecha de fin a los parámetros
-            
-            if title_search:
-                # Agrega condición para la búsqueda en el título usando un vector de búsqueda
-                conditions.append("t.search_vector @@ plainto_tsquery('english', %s)")
-                params.append(title_search)  # Agrega el término de búsqueda al título
+            conditions, params = _trip_search_conditions(
+                user_id, status, start_date_from, start_date_to, title_search
+            )
             
             # Construye la cláusula WHERE de la consulta
             where_clause = " AND ".join(conditions) if conditions else "1=1"
             
-            # Agregar paginación
-            params.extend([page_size, (page - 1) * page_size])  # Agrega los parámetros de paginación
-            
-            # Construye la consulta SQL completa
+            # Construye la consulta SQL completa (sin COUNT(*) OVER(), que recorre todo el resultado)
             query = f"""
-                SELECT t.*, COUNT(*) OVER() as total_count
+                SELECT t.*
                 FROM trips t
                 WHERE {where_clause}
-                ORDER BY t.start_date DESC
+                ORDER BY t.start_date DESC, t.id DESC
                 LIMIT %s OFFSET %s
             """
             
-            cur.execute(query, params)  # Ejecuta la consulta con los parámetros
+            # Ejecuta la consulta con los parámetros de búsqueda y de paginación
+            cur.execute(query, params + [page_size, (page - 1) * page_size])
             trips_data = cur.fetchall()  # Obtiene todos los datos de los viajes
+            trips = [_trip_from_row(row) for row in trips_data]
             
-            if trips_data:
-                total_count = trips_data[0][-1]  # último campo
-                trips = []
-                for row in trips_data[:-1]:  # excluir total_count
-                    # Crea un objeto Trip para cada fila de datos y lo agrega a la lista
-                    trip = Trip(
-                        user_id=row[1],
-                        title=row[2],
-                        description=row[3],
-                        start_date=row[4],
-                        end_date=row[5],
-                        status=row[6],
-                        budget=row[7],
-                        id=row[0]
+            if not include_total:
+                return trips, None
+            # Si la página no se llenó, el total se conoce sin contar
+            total_count = total_from_page(page, page_size, len(trips_data))
+            if total_count is None:
+                if include_total == "exact":
+                    cur.execute(f"SELECT COUNT(*) FROM trips t WHERE {where_clause}", params)
+                else:
+                    # El planificador estima las filas a partir de pg_class.reltuples
+                    cur.execute(
+                        "SELECT estimate_trip_search_count(%s, %s, %s, %s, %s)",
+                        (user_id or None, status or None, start_date_from or None,
+                         start_date_to or None, title_search or None)
                     )
-                    trips.append(trip)
-                return trips, total_count  # Devuelve la lista de viajes y el total
-            return [], 0  # Devuelve una lista vacía y 0 si no hay viajes
-    finally:
-        conn.close()  # Cierra la conexión a la base de datos
\ No newline at end of file
+                total_count = cur.fetchone()[0]
+            return trips, total_count  # Devuelve la lista de viajes y el total
+
+# Buscar viajes por criterios, paginando por cursor (start_date, id).
+# Devuelve (viajes, cursor de la pagina siguiente o None)
+def search_trips_by_cursor(user_id=None, status=None, start_date_from=None, start_date_to=None,
+                           title_search=None, cursor=None, page_size=10):
+    conditions, params = _trip_search_conditions(
+        user_id, status, start_date_from, start_date_to, title_search
+    )
+    if cursor:
+        # Continua despues de la ultima fila de la pagina anterior
+        conditions.append("(t.start_date, t.id) < (%s, %s)")
+        params.extend(decode_cursor(cursor, kind="date"))
+    where_clause = " AND ".join(conditions) if conditions else "1=1"
+    params.append(page_size + 1)  # Una fila de mas indica que hay pagina siguiente
+
+    query = f"""
+        SELECT t.*
+        FROM trips t
+        WHERE {where_clause}
+        ORDER BY t.start_date DESC, t.id DESC
+        LIMIT %s
+    """
+    with postgres_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute(query, params)
+            trips_data = cur.fetchall()
+    trips = [_trip_from_row(row) for row in trips_data]
+    return paginate(trips, page_size, lambda trip: (trip.start_date, trip.id))
@@ -0,0 +1,170 @@
+# controllers/trip_expense_controller.py
+import os
+import csv
+import json
+from datetime import date
+from decimal import Decimal, InvalidOperation
+from models.trip import TripExpense
+from config.database import postgres_connection
+from services.copy_stream import CopyStream
+
+# Categorias validas de un gasto (ver trip_expenses en create_trips_tables.sql)
+EXPENSE_CATEGORIES = ('transport', 'accommodation', 'food', 'activities', 'other')
+# Filas maximas por importacion
+MAX_IMPORT_ROWS = int(os.getenv('EXPENSE_IMPORT_MAX_ROWS', 100000))
+
+IMPORT_COLUMNS = ("trip_id", "category", "description", "amount", "expense_date", "place_id")
+COPY_SQL = (
+    f"COPY trip_expenses ({', '.join(IMPORT_COLUMNS)}) FROM STDIN WITH (FORMAT csv)"
+)
+
+
+class ExpenseImportError(ValueError):
+    """Fila invalida en una importacion de gastos (incluye el numero de linea)."""
+
+
+# Valida y normaliza los campos de un gasto; lanza ValueError si alguno es invalido
+def validate_expense(category, description, amount, expense_date, place_id=None):
+    if category not in EXPENSE_CATEGORIES:
+        raise ValueError(f"Invalid category: {category}. Must be one of {', '.join(EXPENSE_CATEGORIES)}")
+    if not description or len(description) > 200:
+        raise ValueError("description is required and must have at most 200 characters")
+    try:
+        amount = Decimal(str(amount))
+    except InvalidOperation:
+        raise ValueError(f"Invalid amount: {amount}")
+    if not amount.is_finite() or amount < 0 or amount >= Decimal("100000000"):
+        raise ValueError(f"Invalid amount: {amount}")
+    if not isinstance(expense_date, date):
+        expense_date = date.fromisoformat(str(expense_date))
+    if place_id in ("", None):
+        place_id = None
+    else:
+        place_id = int(place_id)
+    return category, description, amount.quantize(Decimal("0.01")), expense_date, place_id
+
+# Agregar un gasto a un viaje
+def add_expense(trip_id, category, description, amount, expense_date, place_id=None):
+    fields = validate_expense(category, description, amount, expense_date, place_id)
+    with postgres_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute(
+                "SELECT add_trip_expense(%s, %s, %s, %s, %s, %s)",
+                (trip_id, *fields)
+            )
+            return cur.fetchone()[0]
+
+# Obtener los gastos de un viaje
+def get_expenses(trip_id):
+    with postgres_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("SELECT * FROM get_trip_expenses(%s)", (trip_id,))
+            rows = cur.fetchall()
+    return [TripExpense.from_row(row) for row in rows]
+
+# Actualizar un gasto; devuelve None si no existe en ese viaje
+def update_expense(trip_id, expense_id, category, description, amount, expense_date, place_id=None):
+    fields = validate_expense(category, description, amount, expense_date, place_id)
+    with postgres_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute(
+                "SELECT update_trip_expense(%s, %s, %s, %s, %s, %s, %s)",
+                (expense_id, trip_id, *fields)
+            )
+            updated = cur.fetchone()
+    return updated[0] if updated else None
+
+# Eliminar un gasto; devuelve None si no existe en ese viaje
+def delete_expense(trip_id, expense_id):
+    with postgres_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("SELECT delete_trip_expense(%s, %s)", (expense_id, trip_id))
+            deleted = cur.fetchone()
+    return deleted[0] if deleted else None
+
+# Registros (dict) de un cuerpo CSV con encabezado
+def _csv_records(lines):
+    reader = csv.DictReader(lines)
+    for record in reader:
+        yield reader.line_num, record
+
+# Registros (dict) de un cuerpo NDJSON: un objeto JSON por linea
+def _ndjson_records(lines):
+    for line_num, line in enumerate(lines, start=1):
+        if line.strip():
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as e:
+                raise ExpenseImportError(f"Line {line_num}: invalid JSON ({e})")
+            if not isinstance(record, dict):
+                raise ExpenseImportError(f"Line {line_num}: expected a JSON object")
+            yield line_num, record
+
+# Filas para COPY a partir de los registros, validadas una por una
+def _import_rows(trip_id, records):
+    for count, (line_num, record) in enumerate(records, start=1):
+        if count > MAX_IMPORT_ROWS:
+            raise ExpenseImportError(f"Too many rows (max {MAX_IMPORT_ROWS})")
+        try:
+            fields = validate_expense(
+                record.get("category"), record.get("description"), record.get("amount"),
+                record.get("expense_date"), record.get("place_id")
+            )
+        except (ValueError, TypeError) as e:
+            raise ExpenseImportError(f"Line {line_num}: {e}")
+        yield (trip_id, *fields)
+
+def import_expenses(trip_id, lines, fmt):
+    """
+    Importa gastos a un viaje con COPY, leyendo el cuerpo a medida que
+    PostgreSQL consume las filas (lines es un iterador de lineas de texto).
+    fmt es 'csv' (con encabezado category,description,amount,expense_date,place_id)
+    o 'ndjson'. Es todo o nada: una fila invalida lanza ExpenseImportError y
+    no se guarda ninguna. Devuelve la cantidad de gastos importados.
+    """
+    if fmt == "csv":
+        records = _csv_records(lines)
+    elif fmt == "ndjson":
+        records = _ndjson_records(lines)
+    else:
+        raise ValueError(f"Unsupported import format: {fmt}")
+
+    stream = CopyStream(_import_rows(trip_id, records))
+    try:
+        with postgres_connection() as conn:
+            with conn.cursor() as cur:
+                cur.copy_expert(COPY_SQL, stream)
+    except Exception:
+        # El COPY se aborto por una fila invalida: reportar ese error
+        if stream.error is not None:
+            raise stream.error from None
+        raise
+    return stream.count
+
+def get_expense_summary(trip_id):
+    """
+    Gastos agrupados por categoria y por dia, y el total frente al presupuesto
+    del viaje. La agregacion se hace en PostgreSQL (get_trip_expense_summary),
+    que devuelve una fila por grupo.
+    """
+    with postgres_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("SELECT * FROM get_trip_expense_summary(%s)", (trip_id,))
+            rows = cur.fetchall()
+
+    summary = {"by_category": [], "by_day": [], "expense_count": 0, "total_spent": 0.0, "budget": None}
+    for level, category, expense_date, count, total, budget in rows:
+        summary["budget"] = float(budget) if budget is not None else None
+        total = float(total) if total is not None else 0.0
+        if level == "category":
+            summary["by_category"].append({"category": category, "expense_count": count, "total": total})
+        elif level == "day":
+            summary["by_day"].append({"date": expense_date.isoformat(), "expense_count": count, "total": total})
+        else:
+            summary["expense_count"] = count
+            summary["total_spent"] = total
+
+    budget = summary["budget"]
+    summary["remaining"] = round(budget - summary["total_spent"], 2) if budget is not None else None
+    summary["over_budget"] = budget is not None and summary["total_spent"] > budget
+    return summary
@@ -1,10 +1,11 @@
 from models.user import User
-from config.database import get_postgres_connection
+from config.database import postgres_connection, on_commit
+from services.cache_service import read_through, read_through_many
+from services import suggest_service
 
 # Crear un nuevo usuario
 def create_user(username, email, password, bio=None, profile_picture_url=None):
-    conn = get_postgres_connection()
-    try:
+    with postgres_connection() as conn:
         with conn.cursor() as cur:
             cur.execute(
 
@@ -12,36 +13,50 @@ def create_user(username, email, password, bio=None, profile_picture_url=None):
                 (username, email, password, bio, profile_picture_url)
             )
             user_id = cur.fetchone()[0]
-        conn.commit()
-        return user_id
-    except Exception as e:
-        conn.rollback()
-        raise e
-    finally:
-        conn.close()
+    on_commit(lambda: suggest_service.index_user(user_id, username))
+    return user_id
 
 # Obtener un usuario por ID
+# El perfil se cachea sin la contraseña (to_dict no la incluye)
+@read_through(
+    key_func=lambda user_id: f"user:{user_id}",
+    to_cache=User.to_dict,
+    from_cache=User.from_dict,
+)
 def get_user(user_id):
-    conn = get_postgres_connection()
-    try:
+    with postgres_connection() as conn:
         with conn.cursor() as cur:
             cur.execute("SELECT * FROM get_user_by_id(%s)", (user_id,))
             user_data = cur.fetchone()
-            if user_data:
-                return User(*user_data)
-            return None
-    finally:
-        conn.close()
+    if user_data:
+        return User.from_row(user_data)
+    return None
+
+# Obtener varios usuarios por ID (MGET en Redis y una sola consulta para
+# los que faltan). Devuelve una lista en el orden de user_ids, con None
+# para los que no existen
+def get_many(user_ids):
+    return read_through_many(
+        user_ids,
+        key_func=lambda user_id: f"user:{user_id}",
+        load_many=_load_users,
+        to_cache=User.to_dict,
+        from_cache=User.from_dict,
+    )
+
+def _load_users(user_ids):
+    with postgres_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("SELECT * FROM get_users_by_ids(%s)", (list(user_ids),))
+            rows = cur.fetchall()
+    return {row[0]: User.from_row(row) for row in rows}
 
 # Obtener un usuario por Nombre 
 def get_user_by_username(username):
-    conn = get_postgres_connection()
-    try:
+    with postgres_connection() as conn:
         with conn.cursor() as cur:
             cur.execute("SELECT * FROM get_user_by_username(%s)", (username,))
             user_data = cur.fetchone()
-            if user_data:
-                return User(*user_data)
-            return None
-    finally:
-        conn.close()
\ No newline at end of file
+    if user_data:
+        return User.from_row(user_data)
+    return None
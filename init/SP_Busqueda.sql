@@ -1,12 +1,18 @@
+-- Busqueda de texto completo en posts, lugares, listas de viaje y viajes.
+-- Una sola consulta (UNION ALL) sobre los indices GIN de search_vector,
+-- ordenada por relevancia (ts_rank_cd) y paginada por cursor
+-- (rank, result_type, id): se pasan los valores de la ultima fila de la pagina.
+-- p_types filtra los tipos de contenido (NULL = todos).
+DROP FUNCTION IF EXISTS search_content(TEXT, TEXT, TIMESTAMP WITH TIME ZONE, TIMESTAMP WITH TIME ZONE, TEXT, TEXT, INTEGER, INTEGER);
 CREATE OR REPLACE FUNCTION search_content(
-    search_query TEXT,
-    content_type TEXT,
-    date_from TIMESTAMP WITH TIME ZONE,
-    date_to TIMESTAMP WITH TIME ZONE,
-    sort_by TEXT,
-    sort_order TEXT,
-    p_offset INTEGER,
-    p_limit INTEGER
+    p_query TEXT,
+    p_types TEXT[] DEFAULT NULL,
+    p_date_from TIMESTAMP WITH TIME ZONE DEFAULT NULL,
+    p_date_to TIMESTAMP WITH TIME ZONE DEFAULT NULL,
+    p_after_rank REAL DEFAULT NULL,
+    p_after_type TEXT DEFAULT NULL,
+    p_after_id INTEGER DEFAULT NULL,
+    p_limit INTEGER DEFAULT 20
 )
 RETURNS TABLE (
     id INTEGER,
@@ -15,93 +21,96 @@ RETURNS TABLE (
     description TEXT,
     created_at TIMESTAMP WITH TIME ZONE,
     user_id INTEGER,
-    username TEXT
+    username TEXT,
+    rank REAL
 ) AS $$
 DECLARE
-    query_tsquery tsquery := plainto_tsquery('english', search_query);
+    query_tsquery tsquery := websearch_to_tsquery('english', p_query);
 BEGIN
-    CASE
-        WHEN content_type = 'post' OR content_type IS NULL THEN
-            RETURN QUERY
-            SELECT 
-                p.id,
-                'post'::TEXT AS result_type,
-                LEFT(p.content, 50) AS title,
-                p.content AS description,
-                p.created_at,
-                p.user_id,
-                u.username
-            FROM 
-                posts p
-            JOIN
-                users u ON p.user_id = u.id
-            WHERE 
-                p.search_vector @@ query_tsquery AND
-                (date_from IS NULL OR p.created_at >= date_from) AND
-                (date_to IS NULL OR p.created_at <= date_to)
-            ORDER BY
-                CASE 
-                    WHEN sort_by = 'created_at' AND sort_order = 'ASC' THEN p.created_at
-                    WHEN sort_by = 'created_at' AND sort_order = 'DESC' THEN p.created_at
-                    WHEN sort_by = 'title' AND sort_order = 'ASC' THEN LEFT(p.content, 50)
-                    WHEN sort_by = 'title' AND sort_order = 'DESC' THEN LEFT(p.content, 50)
-                END
-            OFFSET p_offset
-            LIMIT p_limit;
-
-        WHEN content_type = 'place' THEN
-            RETURN QUERY
-            SELECT 
-                pl.id,
-                'place'::TEXT AS result_type,
-                pl.name AS title,
-                pl.description,
-                pl.created_at,
-                NULL::INTEGER AS user_id,
-                NULL::TEXT AS username
-            FROM 
-                places pl
-            WHERE 
-                pl.search_vector @@ query_tsquery AND
-                (date_from IS NULL OR pl.created_at >= date_from) AND
-                (date_to IS NULL OR pl.created_at <= date_to)
-            ORDER BY
-                CASE 
-                    WHEN sort_by = 'created_at' AND sort_order = 'ASC' THEN pl.created_at
-                    WHEN sort_by = 'created_at' AND sort_order = 'DESC' THEN pl.created_at
-                    WHEN sort_by = 'title' AND sort_order = 'ASC' THEN pl.name
-                    WHEN sort_by = 'title' AND sort_order = 'DESC' THEN pl.name
-                END
-            OFFSET p_offset
-            LIMIT p_limit;
-
-        WHEN content_type = 'travel_list' THEN
-            RETURN QUERY
-            SELECT 
-                tl.id,
-                'travel_list'::TEXT AS result_type,
-                tl.name AS title,
-                tl.description,
-                tl.created_at,
-                tl.user_id,
-                u.username
-            FROM 
-                travel_lists tl
-            JOIN
-                users u ON tl.user_id = u.id
-            WHERE 
-                tl.search_vector @@ query_tsquery AND
-                (date_from IS NULL OR tl.created_at >= date_from) AND
-                (date_to IS NULL OR tl.created_at <= date_to)
-            ORDER BY
-                CASE 
-                    WHEN sort_by = 'created_at' AND sort_order = 'ASC' THEN tl.created_at
-                    WHEN sort_by = 'created_at' AND sort_order = 'DESC' THEN tl.created_at
-                    WHEN sort_by = 'title' AND sort_order = 'ASC' THEN tl.name
-                    WHEN sort_by = 'title' AND sort_order = 'DESC' THEN tl.name
-                END
-            OFFSET p_offset
-            LIMIT p_limit;
-    END CASE;
+    RETURN QUERY
+    WITH matches AS (
+        (
+            SELECT p.id, 'post'::TEXT AS result_type, LEFT(p.content, 50) AS title,
+                   p.content AS description, p.created_at, p.user_id,
+                   ts_rank_cd(p.search_vector, query_tsquery) AS rank
+            FROM posts p
+            WHERE (p_types IS NULL OR 'post' = ANY(p_types))
+              AND p.search_vector @@ query_tsquery
+              AND (p_date_from IS NULL OR p.created_at >= p_date_from)
+              AND (p_date_to IS NULL OR p.created_at <= p_date_to)
+        )
+        UNION ALL
+        (
+            SELECT pl.id, 'place'::TEXT, pl.name::TEXT, pl.description, pl.created_at,
+                   NULL::INTEGER, ts_rank_cd(pl.search_vector, query_tsquery)
+            FROM places pl
+            WHERE (p_types IS NULL OR 'place' = ANY(p_types))
+              AND pl.search_vector @@ query_tsquery
+              AND (p_date_from IS NULL OR pl.created_at >= p_date_from)
+              AND (p_date_to IS NULL OR pl.created_at <= p_date_to)
+        )
+        UNION ALL
+        (
+            SELECT tl.id, 'travel_list'::TEXT, tl.name::TEXT, tl.description, tl.created_at,
+                   tl.user_id, ts_rank_cd(tl.search_vector, query_tsquery)
+            FROM travel_lists tl
+            WHERE (p_types IS NULL OR 'travel_list' = ANY(p_types))
+              AND tl.search_vector @@ query_tsquery
+              AND (p_date_from IS NULL OR tl.created_at >= p_date_from)
+              AND (p_date_to IS NULL OR tl.created_at <= p_date_to)
+        )
+        UNION ALL
+        (
+            SELECT t.id, 'trip'::TEXT, t.title::TEXT, t.description, t.created_at,
+                   t.user_id, ts_rank_cd(t.search_vector, query_tsquery)
+            FROM trips t
+            WHERE (p_types IS NULL OR 'trip' = ANY(p_types))
+              AND t.search_vector @@ query_tsquery
+              AND (p_date_from IS NULL OR t.created_at >= p_date_from)
+              AND (p_date_to IS NULL OR t.created_at <= p_date_to)
+        )
+    )
+    SELECT m.id, m.result_type, m.title, m.description, m.created_at,
+           m.user_id, u.username::TEXT, m.rank
+    FROM matches m
+    LEFT JOIN users u ON u.id = m.user_id
+    WHERE p_after_rank IS NULL
+       OR m.rank < p_after_rank
+       OR (m.rank = p_after_rank AND m.result_type > p_after_type)
+       OR (m.rank = p_after_rank AND m.result_type = p_after_type AND m.id < p_after_id)
+    ORDER BY m.rank DESC, m.result_type, m.id DESC
+    LIMIT p_limit;
 END;
-$$ LANGUAGE plpgsql;
\ No newline at end of file
+$$ LANGUAGE plpgsql;
+
+-- Sugerencias aproximadas para autocompletar (con errores de escritura):
+-- lugares, ciudades, paises y usuarios similares a p_query segun pg_trgm
+-- (operador %, usa los indices gin_trgm_ops). Ciudades y paises no tienen id.
+CREATE OR REPLACE FUNCTION suggest_fuzzy(p_query TEXT, p_limit INTEGER DEFAULT 10)
+RETURNS TABLE (
+    result_type TEXT,
+    id INTEGER,
+    label TEXT
+) AS $$
+    SELECT m.result_type, m.id, m.label
+    FROM (
+        SELECT 'place'::TEXT AS result_type, pl.id, pl.name::TEXT AS label,
+               similarity(pl.name, p_query) AS score
+        FROM places pl
+        WHERE pl.name % p_query
+        UNION ALL
+        SELECT DISTINCT 'city'::TEXT, NULL::INTEGER, pl.city::TEXT, similarity(pl.city, p_query)
+        FROM places pl
+        WHERE pl.city % p_query
+        UNION ALL
+        SELECT DISTINCT 'country'::TEXT, NULL::INTEGER, pl.country::TEXT, similarity(pl.country, p_query)
+        FROM places pl
+        WHERE pl.country % p_query
+        UNION ALL
+        SELECT 'user'::TEXT, u.id, u.username::TEXT, similarity(u.username, p_query)
+        FROM users u
+        WHERE u.username % p_query
+    ) m
+    ORDER BY m.score DESC, m.label, m.id
+    LIMIT p_limit;
+$$ LANGUAGE sql STABLE;
@@ -0,0 +1,55 @@
+-- Total estimado de filas de una tabla a partir de pg_class.reltuples (lo
+-- actualizan VACUUM, ANALYZE y autovacuum): no lee la tabla ni bloquea a
+-- los escritores. Si la tabla nunca se analizo se cuenta con COUNT(*).
+CREATE OR REPLACE FUNCTION get_table_count(p_table_name VARCHAR(63))
+RETURNS BIGINT AS $$
+DECLARE
+    table_oid REGCLASS := to_regclass(quote_ident(p_table_name));
+    estimate REAL;
+    total BIGINT;
+BEGIN
+    IF table_oid IS NULL THEN
+        RETURN NULL;
+    END IF;
+    SELECT reltuples INTO estimate FROM pg_class WHERE oid = table_oid;
+    IF estimate >= 0 THEN
+        RETURN estimate::BIGINT;
+    END IF;
+    EXECUTE format('SELECT COUNT(*) FROM %s', table_oid) INTO total;
+    RETURN total;
+END;
+$$ LANGUAGE plpgsql STABLE;
+
+-- Estimacion del planificador (pg_class.reltuples y las estadisticas de las
+-- columnas) de las filas que devuelve search_trips, sin leerlas. La consulta
+-- es fija: solo se agregan los filtros presentes, con sus valores escapados.
+CREATE OR REPLACE FUNCTION estimate_trip_search_count(
+    p_user_id INTEGER,
+    p_status VARCHAR(20),
+    p_start_date_from DATE,
+    p_start_date_to DATE,
+    p_title_search TEXT
+) RETURNS BIGINT AS $$
+DECLARE
+    conditions TEXT := '1=1';
+    plan JSON;
+BEGIN
+    IF p_user_id IS NOT NULL THEN
+        conditions := conditions || format(' AND t.user_id = %L', p_user_id);
+    END IF;
+    IF p_status IS NOT NULL THEN
+        conditions := conditions || format(' AND t.status = %L', p_status);
+    END IF;
+    IF p_start_date_from IS NOT NULL THEN
+        conditions := conditions || format(' AND t.start_date >= %L', p_start_date_from);
+    END IF;
+    IF p_start_date_to IS NOT NULL THEN
+        conditions := conditions || format(' AND t.start_date <= %L', p_start_date_to);
+    END IF;
+    IF p_title_search IS NOT NULL THEN
+        conditions := conditions || format(' AND t.search_vector @@ plainto_tsquery(''english'', %L)', p_title_search);
+    END IF;
+    EXECUTE 'EXPLAIN (FORMAT JSON) SELECT 1 FROM trips t WHERE ' || conditions INTO plan;
+    RETURN (plan->0->'Plan'->>'Plan Rows')::BIGINT;
+END;
+$$ LANGUAGE plpgsql;
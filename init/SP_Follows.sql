@@ -93,4 +93,95 @@ BEGIN
     LIMIT p_page_size
     OFFSET ((p_page - 1) * p_page_size);
 END;
-$$ LANGUAGE plpgsql;
\ No newline at end of file
+$$ LANGUAGE plpgsql;
+
+-- Procedimiento para obtener los IDs de los seguidores (fan-out del feed)
+CREATE OR REPLACE FUNCTION get_follower_ids(p_user_id INTEGER)
+RETURNS TABLE (follower_id INTEGER) AS $$
+BEGIN
+    RETURN QUERY
+    SELECT uf.follower_id
+    FROM user_follows uf
+    WHERE uf.followed_id = p_user_id;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Procedimiento para contar los seguidores de un usuario
+CREATE OR REPLACE FUNCTION count_followers(p_user_id INTEGER)
+RETURNS BIGINT AS $$
+BEGIN
+    RETURN (SELECT COUNT(*) FROM user_follows WHERE followed_id = p_user_id);
+END;
+$$ LANGUAGE plpgsql;
+
+-- Procedimiento para saber cuales de los usuarios dados sigue p_user_id
+CREATE OR REPLACE FUNCTION get_followed_among(
+    p_user_id INTEGER,
+    p_user_ids INTEGER[]
+)
+RETURNS TABLE (followed_id INTEGER) AS $$
+BEGIN
+    RETURN QUERY
+    SELECT uf.followed_id
+    FROM user_follows uf
+    WHERE uf.follower_id = p_user_id
+      AND uf.followed_id = ANY(p_user_ids);
+END;
+$$ LANGUAGE plpgsql;
+
+-- Procedimiento para reconstruir el timeline de un usuario:
+-- IDs de los posts mas recientes de los usuarios que sigue
+CREATE OR REPLACE FUNCTION get_feed_post_ids(
+    p_user_id INTEGER,
+    p_limit INTEGER
+)
+RETURNS TABLE (
+    id INTEGER,
+    score DOUBLE PRECISION
+) AS $$
+BEGIN
+    RETURN QUERY
+    SELECT p.id, EXTRACT(EPOCH FROM p.created_at)::DOUBLE PRECISION
+    FROM posts p
+    JOIN user_follows uf ON p.user_id = uf.followed_id
+    WHERE uf.follower_id = p_user_id
+    ORDER BY p.created_at DESC
+    LIMIT p_limit;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Procedimiento para obtener el feed con paginacion por cursor (keyset)
+CREATE OR REPLACE FUNCTION get_feed_by_cursor(
+    p_user_id INTEGER,
+    p_created_at TIMESTAMP WITH TIME ZONE,
+    p_id INTEGER,
+    p_limit INTEGER
+)
+RETURNS TABLE (
+    id INTEGER,
+    user_id INTEGER,
+    content TEXT,
+    created_at TIMESTAMP WITH TIME ZONE,
+    updated_at TIMESTAMP WITH TIME ZONE
+) AS $$
+BEGIN
+    IF p_created_at IS NULL THEN
+        RETURN QUERY
+        SELECT p.id, p.user_id, p.content, p.created_at, p.updated_at
+        FROM posts p
+        JOIN user_follows uf ON p.user_id = uf.followed_id
+        WHERE uf.follower_id = p_user_id
+        ORDER BY p.created_at DESC, p.id DESC
+        LIMIT p_limit;
+    ELSE
+        RETURN QUERY
+        SELECT p.id, p.user_id, p.content, p.created_at, p.updated_at
+        FROM posts p
+        JOIN user_follows uf ON p.user_id = uf.followed_id
+        WHERE uf.follower_id = p_user_id
+          AND (p.created_at, p.id) < (p_created_at, p_id)
+        ORDER BY p.created_at DESC, p.id DESC
+        LIMIT p_limit;
+    END IF;
+END;
+$$ LANGUAGE plpgsql;
@@ -1,25 +1,16 @@
--- Procedimiento para agregar un like
+-- Procedimiento para agregar un like.
+-- Un solo INSERT: si el like ya existe, la restriccion UNIQUE lo descarta
 CREATE OR REPLACE FUNCTION add_like(
     p_user_id INTEGER,
     p_post_id INTEGER DEFAULT NULL,
     p_place_id INTEGER DEFAULT NULL
 ) RETURNS BOOLEAN AS $$
-DECLARE
-    like_exists BOOLEAN;
 BEGIN
-    SELECT EXISTS (
-        SELECT 1 FROM likes 
-        WHERE user_id = p_user_id 
-        AND (post_id = p_post_id OR place_id = p_place_id)
-    ) INTO like_exists;
+    INSERT INTO likes (user_id, post_id, place_id)
+    VALUES (p_user_id, p_post_id, p_place_id)
+    ON CONFLICT DO NOTHING;
 
-    IF NOT like_exists THEN
-        INSERT INTO likes (user_id, post_id, place_id)
-        VALUES (p_user_id, p_post_id, p_place_id);
-        RETURN TRUE;
-    ELSE
-        RETURN FALSE;
-    END IF;
+    RETURN FOUND;
 END;
 $$ LANGUAGE plpgsql;
 
@@ -1,15 +1,24 @@
+-- Las funciones de lugares ahora reciben y devuelven la ubicacion
+-- (latitude, longitude); se eliminan las versiones anteriores
+DROP FUNCTION IF EXISTS create_place(VARCHAR, TEXT, VARCHAR, VARCHAR);
+DROP FUNCTION IF EXISTS update_place(INTEGER, VARCHAR, TEXT, VARCHAR, VARCHAR);
+DROP FUNCTION IF EXISTS get_place_by_id(INTEGER);
+DROP FUNCTION IF EXISTS get_places_by_ids(INTEGER[]);
+
 -- Crear un nuevo lugar
 CREATE OR REPLACE FUNCTION create_place(
     p_name VARCHAR(100),
     p_description TEXT,
     p_city VARCHAR(100),
-    p_country VARCHAR(100)
+    p_country VARCHAR(100),
+    p_latitude DOUBLE PRECISION DEFAULT NULL,
+    p_longitude DOUBLE PRECISION DEFAULT NULL
 ) RETURNS INTEGER AS $$
 DECLARE
     new_place_id INTEGER;
 BEGIN
-    INSERT INTO places (name, description, city, country)
-    VALUES (p_name, p_description, p_city, p_country)
+    INSERT INTO places (name, description, city, country, latitude, longitude)
+    VALUES (p_name, p_description, p_city, p_country, p_latitude, p_longitude)
     RETURNING id INTO new_place_id;
     
     RETURN new_place_id;
@@ -25,23 +34,29 @@ RETURNS TABLE (
     city VARCHAR(100),
     country VARCHAR(100),
     created_at TIMESTAMP WITH TIME ZONE,
-    updated_at TIMESTAMP WITH TIME ZONE
+    updated_at TIMESTAMP WITH TIME ZONE,
+    latitude DOUBLE PRECISION,
+    longitude DOUBLE PRECISION
 ) AS $$
 BEGIN
     RETURN QUERY
-    SELECT p.id, p.name, p.description, p.city, p.country, p.created_at, p.updated_at
+    SELECT p.id, p.name, p.description, p.city, p.country, p.created_at, p.updated_at,
+           p.latitude, p.longitude
     FROM places p
     WHERE p.id = p_place_id;
 END;
 $$ LANGUAGE plpgsql;
 
 -- Actualizar un lugar
+-- Sin ubicacion (NULL) se conserva la que tenia
 CREATE OR REPLACE FUNCTION update_place(
     p_place_id INTEGER,
     p_name VARCHAR(100),
     p_description TEXT,
     p_city VARCHAR(100),
-    p_country VARCHAR(100)
+    p_country VARCHAR(100),
+    p_latitude DOUBLE PRECISION DEFAULT NULL,
+    p_longitude DOUBLE PRECISION DEFAULT NULL
 ) RETURNS INTEGER AS $$
 DECLARE
     updated_id INTEGER;
@@ -51,6 +66,8 @@ BEGIN
         description = p_description, 
         city = p_city, 
         country = p_country, 
+        latitude = COALESCE(p_latitude, latitude),
+        longitude = COALESCE(p_longitude, longitude),
         updated_at = CURRENT_TIMESTAMP 
     WHERE id = p_place_id 
     RETURNING id INTO updated_id;
@@ -72,3 +89,49 @@ BEGIN
 END;
 $$ LANGUAGE plpgsql;        
 
+
+-- Obtener varios lugares por ID en una sola consulta
+CREATE OR REPLACE FUNCTION get_places_by_ids(p_place_ids INTEGER[])
+RETURNS TABLE (
+    id INTEGER,
+    name VARCHAR(100),
+    description TEXT,
+    city VARCHAR(100),
+    country VARCHAR(100),
+    created_at TIMESTAMP WITH TIME ZONE,
+    updated_at TIMESTAMP WITH TIME ZONE,
+    latitude DOUBLE PRECISION,
+    longitude DOUBLE PRECISION
+) AS $$
+BEGIN
+    RETURN QUERY
+    SELECT p.id, p.name, p.description, p.city, p.country, p.created_at, p.updated_at,
+           p.latitude, p.longitude
+    FROM places p
+    WHERE p.id = ANY(p_place_ids);
+END;
+$$ LANGUAGE plpgsql;
+
+-- Lugares cercanos a un punto, del mas cercano al mas lejano, con la
+-- distancia en metros. Con p_radius_m solo los que estan dentro del radio
+-- (earth_box usa el indice GiST y earth_distance descarta las esquinas);
+-- sin radio, los p_limit mas cercanos (busqueda k-NN con <-> sobre el indice).
+CREATE OR REPLACE FUNCTION get_places_nearby(
+    p_latitude DOUBLE PRECISION,
+    p_longitude DOUBLE PRECISION,
+    p_radius_m DOUBLE PRECISION DEFAULT NULL,
+    p_limit INTEGER DEFAULT 20
+)
+RETURNS TABLE (
+    id INTEGER,
+    distance_m DOUBLE PRECISION
+) AS $$
+    SELECT p.id, earth_distance(ll_to_earth(p.latitude, p.longitude), ll_to_earth(p_latitude, p_longitude))
+    FROM places p
+    WHERE p.latitude IS NOT NULL
+      AND (p_radius_m IS NULL
+           OR (earth_box(ll_to_earth(p_latitude, p_longitude), p_radius_m) @> ll_to_earth(p.latitude, p.longitude)
+               AND earth_distance(ll_to_earth(p.latitude, p.longitude), ll_to_earth(p_latitude, p_longitude)) <= p_radius_m))
+    ORDER BY ll_to_earth(p.latitude, p.longitude) <-> ll_to_earth(p_latitude, p_longitude)
+    LIMIT p_limit;
+$$ LANGUAGE sql STABLE;
@@ -38,6 +38,65 @@ BEGIN
 END;
 $$ LANGUAGE plpgsql;
 
+-- Inserta un lote de notificaciones del outbox en una sola sentencia.
+-- Las que ya existen (mismo dedup_key) o cuyo usuario ya no existe se omiten,
+-- asi que reintentar un lote es seguro. Devuelve cuantas se insertaron.
+CREATE OR REPLACE FUNCTION create_notifications_batch(p_items JSONB)
+RETURNS INTEGER AS $$
+DECLARE
+    inserted_rows INTEGER;
+BEGIN
+    INSERT INTO notifications (user_id, type, content, related_id, dedup_key)
+    SELECT i.user_id, i.type, i.content, i.related_id, i.dedup_key
+    FROM jsonb_to_recordset(p_items) AS i(
+        user_id INTEGER,
+        type VARCHAR(50),
+        content TEXT,
+        related_id INTEGER,
+        dedup_key VARCHAR(64)
+    )
+    JOIN users u ON u.id = i.user_id
+    ON CONFLICT (dedup_key) DO NOTHING;
+
+    GET DIAGNOSTICS inserted_rows = ROW_COUNT;
+    RETURN inserted_rows;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Notificaciones de un usuario con paginacion por cursor (keyset)
+CREATE OR REPLACE FUNCTION get_user_notifications_by_cursor(
+    p_user_id INTEGER,
+    p_created_at TIMESTAMP WITH TIME ZONE,
+    p_id INTEGER,
+    p_limit INTEGER DEFAULT 10
+) RETURNS TABLE (
+    id INTEGER,
+    type VARCHAR(50),
+    content TEXT,
+    related_id INTEGER,
+    is_read BOOLEAN,
+    created_at TIMESTAMP WITH TIME ZONE
+) AS $$
+BEGIN
+    IF p_created_at IS NULL THEN
+        RETURN QUERY
+        SELECT n.id, n.type, n.content, n.related_id, n.is_read, n.created_at
+        FROM notifications n
+        WHERE n.user_id = p_user_id
+        ORDER BY n.created_at DESC, n.id DESC
+        LIMIT p_limit;
+    ELSE
+        RETURN QUERY
+        SELECT n.id, n.type, n.content, n.related_id, n.is_read, n.created_at
+        FROM notifications n
+        WHERE n.user_id = p_user_id
+          AND (n.created_at, n.id) < (p_created_at, p_id)
+        ORDER BY n.created_at DESC, n.id DESC
+        LIMIT p_limit;
+    END IF;
+END;
+$$ LANGUAGE plpgsql;
+
 CREATE OR REPLACE FUNCTION mark_notification_as_read(
     p_notification_id INTEGER
 ) RETURNS BOOLEAN AS $$
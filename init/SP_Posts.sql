@@ -1,16 +1,18 @@
 -- Procedimiento para crear una nueva publicacion
+-- (devuelve tambien created_at: es el score del post en los timelines)
+DROP FUNCTION IF EXISTS create_post(INTEGER, TEXT);
 CREATE OR REPLACE FUNCTION create_post(
     p_user_id INTEGER,
     p_content TEXT
-) RETURNS INTEGER AS $$
-DECLARE
-    new_post_id INTEGER;
+) RETURNS TABLE (
+    id INTEGER,
+    created_at TIMESTAMP WITH TIME ZONE
+) AS $$
 BEGIN
+    RETURN QUERY
     INSERT INTO posts (user_id, content)
     VALUES (p_user_id, p_content)
-    RETURNING id INTO new_post_id;
-    
-    RETURN new_post_id;
+    RETURNING posts.id, posts.created_at;
 END;
 $$ LANGUAGE plpgsql;
 
@@ -32,6 +34,8 @@ END;
 $$ LANGUAGE plpgsql;
 
 -- Procedimiento para obtener publicaciones paginadas
+-- (sin total: se pide aparte con get_table_count o count_posts)
+DROP FUNCTION IF EXISTS get_posts_paginated(INTEGER, INTEGER);
 CREATE OR REPLACE FUNCTION get_posts_paginated(
     p_page INTEGER,
     p_page_size INTEGER
@@ -41,25 +45,25 @@ RETURNS TABLE (
     user_id INTEGER,
     content TEXT,
     created_at TIMESTAMP WITH TIME ZONE,
-    updated_at TIMESTAMP WITH TIME ZONE,
-    total_count BIGINT
+    updated_at TIMESTAMP WITH TIME ZONE
 ) AS $$
 BEGIN
     RETURN QUERY
-    WITH posts_cte AS (
-        SELECT p.*, COUNT(*) OVER() AS full_count
-        FROM posts p
-        ORDER BY p.created_at DESC
-    )
-    SELECT 
-        pc.id, pc.user_id, pc.content, pc.created_at, pc.updated_at, pc.full_count
-    FROM 
-        posts_cte pc
+    SELECT p.id, p.user_id, p.content, p.created_at, p.updated_at
+    FROM posts p
+    ORDER BY p.created_at DESC, p.id DESC
     LIMIT p_page_size
     OFFSET (p_page - 1) * p_page_size;
 END;
 $$ LANGUAGE plpgsql;
 
+-- Total exacto de publicaciones (recorre la tabla: solo bajo demanda)
+CREATE OR REPLACE FUNCTION count_posts() RETURNS BIGINT AS $$
+BEGIN
+    RETURN (SELECT COUNT(*) FROM posts);
+END;
+$$ LANGUAGE plpgsql;
+
 -- Actualizar un post
 CREATE OR REPLACE FUNCTION update_post(
     p_post_id INTEGER,
@@ -89,4 +93,141 @@ BEGIN
     
     RETURN deleted_id;
 END;
-$$ LANGUAGE plpgsql;
\ No newline at end of file
+$$ LANGUAGE plpgsql;
+
+-- Obtener los IDs de los posts mas recientes de un usuario
+CREATE OR REPLACE FUNCTION get_user_post_ids(
+    p_user_id INTEGER,
+    p_limit INTEGER
+)
+RETURNS TABLE (
+    id INTEGER,
+    score DOUBLE PRECISION
+) AS $$
+BEGIN
+    RETURN QUERY
+    SELECT p.id, EXTRACT(EPOCH FROM p.created_at)::DOUBLE PRECISION
+    FROM posts p
+    WHERE p.user_id = p_user_id
+    ORDER BY p.created_at DESC
+    LIMIT p_limit;
+END;
+$$ LANGUAGE plpgsql;
+
+
+-- Obtener publicaciones con paginacion por cursor (keyset):
+-- la pagina siguiente empieza despues de (p_created_at, p_id).
+-- Sin cursor devuelve la primera pagina.
+CREATE OR REPLACE FUNCTION get_posts_by_cursor(
+    p_created_at TIMESTAMP WITH TIME ZONE,
+    p_id INTEGER,
+    p_limit INTEGER
+)
+RETURNS TABLE (
+    id INTEGER,
+    user_id INTEGER,
+    content TEXT,
+    created_at TIMESTAMP WITH TIME ZONE,
+    updated_at TIMESTAMP WITH TIME ZONE
+) AS $$
+BEGIN
+    IF p_created_at IS NULL THEN
+        RETURN QUERY
+        SELECT p.id, p.user_id, p.content, p.created_at, p.updated_at
+        FROM posts p
+        ORDER BY p.created_at DESC, p.id DESC
+        LIMIT p_limit;
+    ELSE
+        RETURN QUERY
+        SELECT p.id, p.user_id, p.content, p.created_at, p.updated_at
+        FROM posts p
+        WHERE (p.created_at, p.id) < (p_created_at, p_id)
+        ORDER BY p.created_at DESC, p.id DESC
+        LIMIT p_limit;
+    END IF;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Procedimiento para obtener un post con sus medios, comentarios recientes,
+-- conteo de likes y conteo de reacciones por tipo en una sola consulta
+CREATE OR REPLACE FUNCTION get_post_expanded(
+    p_post_id INTEGER,
+    p_comment_limit INTEGER DEFAULT 50
+)
+RETURNS TABLE (
+    id INTEGER,
+    user_id INTEGER,
+    content TEXT,
+    created_at TIMESTAMP WITH TIME ZONE,
+    updated_at TIMESTAMP WITH TIME ZONE,
+    media_links JSON,
+    comments JSON,
+    comment_count BIGINT,
+    like_count BIGINT,
+    reactions JSON
+) AS $$
+BEGIN
+    RETURN QUERY
+    SELECT p.id, p.user_id, p.content, p.created_at, p.updated_at,
+           m.media_links, c.comments, cc.comment_count, l.like_count, r.reactions
+    FROM posts p
+    CROSS JOIN LATERAL (
+        SELECT COALESCE(json_agg(json_build_object(
+                   'id', pm.id,
+                   'media_url', pm.media_url,
+                   'media_type', pm.media_type
+               ) ORDER BY pm.id), '[]'::json) AS media_links
+        FROM post_media_links pm
+        WHERE pm.post_id = p.id
+    ) m
+    CROSS JOIN LATERAL (
+        SELECT COALESCE(json_agg(json_build_object(
+                   'id', recent.id,
+                   'user_id', recent.user_id,
+                   'content', recent.content,
+                   'created_at', recent.created_at,
+                   'updated_at', recent.updated_at
+               ) ORDER BY recent.created_at DESC, recent.id DESC), '[]'::json) AS comments
+        FROM (
+            SELECT co.id, co.user_id, co.content, co.created_at, co.updated_at
+            FROM comments co
+            WHERE co.post_id = p.id
+            ORDER BY co.created_at DESC, co.id DESC
+            LIMIT p_comment_limit
+        ) recent
+    ) c
+    CROSS JOIN LATERAL (
+        SELECT COUNT(*) AS comment_count FROM comments co WHERE co.post_id = p.id
+    ) cc
+    CROSS JOIN LATERAL (
+        SELECT COUNT(*) AS like_count FROM likes lk WHERE lk.post_id = p.id
+    ) l
+    CROSS JOIN LATERAL (
+        SELECT COALESCE(json_object_agg(rc.reaction_type, rc.total), '{}'::json) AS reactions
+        FROM (
+            SELECT re.reaction_type, COUNT(*) AS total
+            FROM reactions re
+            WHERE re.post_id = p.id
+            GROUP BY re.reaction_type
+        ) rc
+    ) r
+    WHERE p.id = p_post_id;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Procedimiento para obtener varias publicaciones por ID en una sola consulta
+CREATE OR REPLACE FUNCTION get_posts_by_ids(p_post_ids INTEGER[])
+RETURNS TABLE (
+    id INTEGER,
+    user_id INTEGER,
+    content TEXT,
+    created_at TIMESTAMP WITH TIME ZONE,
+    updated_at TIMESTAMP WITH TIME ZONE
+) AS $$
+BEGIN
+    RETURN QUERY
+    SELECT p.id, p.user_id, p.content, p.created_at, p.updated_at
+    FROM posts p
+    WHERE p.id = ANY(p_post_ids);
+END;
+$$ LANGUAGE plpgsql;
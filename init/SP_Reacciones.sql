@@ -1,29 +1,23 @@
--- Procedimiento para agregar o actualizar una reaccion
+-- Procedimiento para agregar o actualizar una reaccion (un solo upsert).
+-- Devuelve el tipo de reaccion anterior (NULL si es nueva) para
+-- actualizar los contadores de reacciones en Redis
+DROP FUNCTION IF EXISTS add_or_update_reaction(INTEGER, INTEGER, VARCHAR);
 CREATE OR REPLACE FUNCTION add_or_update_reaction(
     p_user_id INTEGER,
     p_post_id INTEGER,
     p_reaction_type VARCHAR(20)
-) RETURNS BOOLEAN AS $$
-DECLARE
-    reaction_exists BOOLEAN;
-BEGIN
-    SELECT EXISTS (
-        SELECT 1 FROM reactions 
+) RETURNS VARCHAR(20) AS $$
+    WITH previous AS (
+        SELECT reaction_type
+        FROM reactions
         WHERE user_id = p_user_id AND post_id = p_post_id
-    ) INTO reaction_exists;
-
-    IF reaction_exists THEN
-        UPDATE reactions
-        SET reaction_type = p_reaction_type
-        WHERE user_id = p_user_id AND post_id = p_post_id;
-    ELSE
-        INSERT INTO reactions (user_id, post_id, reaction_type)
-        VALUES (p_user_id, p_post_id, p_reaction_type);
-    END IF;
-
-    RETURN TRUE;
-END;
-$$ LANGUAGE plpgsql;
+    )
+    INSERT INTO reactions (user_id, post_id, reaction_type)
+    VALUES (p_user_id, p_post_id, p_reaction_type)
+    ON CONFLICT (user_id, post_id)
+    DO UPDATE SET reaction_type = EXCLUDED.reaction_type
+    RETURNING (SELECT reaction_type FROM previous);
+$$ LANGUAGE sql;
 
 -- Procedimiento para obtener el conteo de reacciones por tipo
 CREATE OR REPLACE FUNCTION get_reaction_counts(p_post_id INTEGER)
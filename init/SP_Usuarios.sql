@@ -55,3 +55,22 @@ BEGIN
     WHERE u.username = p_username;
 END;
 $$ LANGUAGE plpgsql;
+
+-- Procedimiento para obtener varios usuarios por ID en una sola consulta
+CREATE OR REPLACE FUNCTION get_users_by_ids(p_user_ids INTEGER[])
+RETURNS TABLE (
+    id INTEGER,
+    username VARCHAR(50),
+    email VARCHAR(100),
+    bio TEXT,
+    profile_picture_url VARCHAR(255),
+    created_at TIMESTAMP WITH TIME ZONE,
+    updated_at TIMESTAMP WITH TIME ZONE
+) AS $$
+BEGIN
+    RETURN QUERY
+    SELECT u.id, u.username, u.email, u.bio, u.profile_picture_url, u.created_at, u.updated_at
+    FROM users u
+    WHERE u.id = ANY(p_user_ids);
+END;
+$$ LANGUAGE plpgsql;
@@ -80,6 +80,51 @@ BEGIN
 END;
 $$ LANGUAGE plpgsql;
 
+-- Procedimiento para obtener viajes de un usuario con paginacion por cursor (keyset):
+-- la pagina siguiente empieza despues de (p_start_date, p_id)
+CREATE OR REPLACE FUNCTION get_user_trips_by_cursor(
+    p_user_id INTEGER,
+    p_status VARCHAR(20),
+    p_start_date DATE,
+    p_id INTEGER,
+    p_limit INTEGER
+)
+RETURNS TABLE (
+    id INTEGER,
+    user_id INTEGER,
+    title VARCHAR(200),
+    description TEXT,
+    start_date DATE,
+    end_date DATE,
+    status VARCHAR(20),
+    budget DECIMAL(10,2),
+    created_at TIMESTAMP WITH TIME ZONE,
+    updated_at TIMESTAMP WITH TIME ZONE
+) AS $$
+BEGIN
+    IF p_start_date IS NULL THEN
+        RETURN QUERY
+        SELECT t.id, t.user_id, t.title, t.description, t.start_date, t.end_date,
+               t.status, t.budget, t.created_at, t.updated_at
+        FROM trips t
+        WHERE t.user_id = p_user_id
+        AND (p_status IS NULL OR t.status = p_status)
+        ORDER BY t.start_date DESC, t.id DESC
+        LIMIT p_limit;
+    ELSE
+        RETURN QUERY
+        SELECT t.id, t.user_id, t.title, t.description, t.start_date, t.end_date,
+               t.status, t.budget, t.created_at, t.updated_at
+        FROM trips t
+        WHERE t.user_id = p_user_id
+        AND (p_status IS NULL OR t.status = p_status)
+        AND (t.start_date, t.id) < (p_start_date, p_id)
+        ORDER BY t.start_date DESC, t.id DESC
+        LIMIT p_limit;
+    END IF;
+END;
+$$ LANGUAGE plpgsql;
+
 -- Actualizar un viaje
 CREATE OR REPLACE FUNCTION update_trip(
     p_trip_id INTEGER,
@@ -192,6 +237,7 @@ END;
 $$ LANGUAGE plpgsql;
 
 -- Obtener estadísticas de un viaje
+-- Lee la fila de trip_stats (mantenida por triggers) junto con el viaje
 CREATE OR REPLACE FUNCTION get_trip_statistics(p_trip_id INTEGER)
 RETURNS TABLE (
     total_places INTEGER,
@@ -202,9 +248,247 @@ RETURNS TABLE (
 BEGIN
     RETURN QUERY
     SELECT 
-        (SELECT COUNT(*)::INTEGER FROM trip_places WHERE trip_id = p_trip_id),
-        (SELECT COALESCE(SUM(amount), 0) FROM trip_expenses WHERE trip_id = p_trip_id),
-        (SELECT ROUND(AVG(rating)::NUMERIC, 2) FROM trip_places WHERE trip_id = p_trip_id AND rating IS NOT NULL),
-        (SELECT (t.end_date - t.start_date + 1)::INTEGER FROM trips t WHERE t.id = p_trip_id);
+        COALESCE(s.place_count, 0),
+        COALESCE(s.total_expenses, 0)::DECIMAL(10,2),
+        ROUND(s.rating_sum::NUMERIC / NULLIF(s.rating_count, 0), 2)::DECIMAL(3,2),
+        (t.end_date - t.start_date + 1)::INTEGER
+    FROM trips t
+    LEFT JOIN trip_stats s ON s.trip_id = t.id
+    WHERE t.id = p_trip_id;
 END;
-$$ LANGUAGE plpgsql;
\ No newline at end of file
+$$ LANGUAGE plpgsql;
+
+-- Recalcula las estadisticas de todos los viajes (o solo de p_trip_ids) con
+-- una agregacion por tabla. Sirve para llenar trip_stats en una base existente
+-- o corregirla si se desincroniza. Devuelve la cantidad de viajes procesados.
+-- Bloquea las escrituras en trip_places y trip_expenses mientras corre, para
+-- que ningun trigger aplique un cambio que la agregacion no vio.
+CREATE OR REPLACE FUNCTION rebuild_trip_stats(p_trip_ids INTEGER[] DEFAULT NULL)
+RETURNS INTEGER AS $$
+DECLARE
+    rebuilt INTEGER;
+BEGIN
+    LOCK TABLE trip_places, trip_expenses IN SHARE MODE;
+
+    INSERT INTO trip_stats AS s (trip_id, place_count, rating_sum, rating_count,
+                                 expense_count, total_expenses, updated_at)
+    SELECT t.id,
+           COALESCE(p.place_count, 0), COALESCE(p.rating_sum, 0), COALESCE(p.rating_count, 0),
+           COALESCE(e.expense_count, 0), COALESCE(e.total_expenses, 0),
+           CURRENT_TIMESTAMP
+    FROM trips t
+    LEFT JOIN (
+        SELECT trip_id, COUNT(*) AS place_count, COALESCE(SUM(rating), 0) AS rating_sum,
+               COUNT(rating) AS rating_count
+        FROM trip_places
+        WHERE p_trip_ids IS NULL OR trip_id = ANY(p_trip_ids)
+        GROUP BY trip_id
+    ) p ON p.trip_id = t.id
+    LEFT JOIN (
+        SELECT trip_id, COUNT(*) AS expense_count, SUM(amount) AS total_expenses
+        FROM trip_expenses
+        WHERE p_trip_ids IS NULL OR trip_id = ANY(p_trip_ids)
+        GROUP BY trip_id
+    ) e ON e.trip_id = t.id
+    WHERE p_trip_ids IS NULL OR t.id = ANY(p_trip_ids)
+    ON CONFLICT (trip_id) DO UPDATE
+    SET place_count = EXCLUDED.place_count,
+        rating_sum = EXCLUDED.rating_sum,
+        rating_count = EXCLUDED.rating_count,
+        expense_count = EXCLUDED.expense_count,
+        total_expenses = EXCLUDED.total_expenses,
+        updated_at = EXCLUDED.updated_at;
+
+    GET DIAGNOSTICS rebuilt = ROW_COUNT;
+    RETURN rebuilt;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Agregar un gasto a un viaje
+CREATE OR REPLACE FUNCTION add_trip_expense(
+    p_trip_id INTEGER,
+    p_category VARCHAR(50),
+    p_description VARCHAR(200),
+    p_amount DECIMAL(10,2),
+    p_expense_date DATE,
+    p_place_id INTEGER DEFAULT NULL
+) RETURNS INTEGER AS $$
+DECLARE
+    new_expense_id INTEGER;
+BEGIN
+    INSERT INTO trip_expenses (trip_id, category, description, amount, expense_date, place_id)
+    VALUES (p_trip_id, p_category, p_description, p_amount, p_expense_date, p_place_id)
+    RETURNING id INTO new_expense_id;
+
+    RETURN new_expense_id;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Obtener los gastos de un viaje
+CREATE OR REPLACE FUNCTION get_trip_expenses(p_trip_id INTEGER)
+RETURNS TABLE (
+    id INTEGER,
+    trip_id INTEGER,
+    category VARCHAR(50),
+    description VARCHAR(200),
+    amount DECIMAL(10,2),
+    expense_date DATE,
+    place_id INTEGER,
+    created_at TIMESTAMP WITH TIME ZONE
+) AS $$
+BEGIN
+    RETURN QUERY
+    SELECT e.id, e.trip_id, e.category, e.description, e.amount, e.expense_date,
+           e.place_id, e.created_at
+    FROM trip_expenses e
+    WHERE e.trip_id = p_trip_id
+    ORDER BY e.expense_date, e.id;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Actualizar un gasto (solo si pertenece al viaje)
+CREATE OR REPLACE FUNCTION update_trip_expense(
+    p_expense_id INTEGER,
+    p_trip_id INTEGER,
+    p_category VARCHAR(50),
+    p_description VARCHAR(200),
+    p_amount DECIMAL(10,2),
+    p_expense_date DATE,
+    p_place_id INTEGER DEFAULT NULL
+) RETURNS INTEGER AS $$
+DECLARE
+    updated_id INTEGER;
+BEGIN
+    UPDATE trip_expenses
+    SET category = p_category,
+        description = p_description,
+        amount = p_amount,
+        expense_date = p_expense_date,
+        place_id = p_place_id
+    WHERE id = p_expense_id AND trip_id = p_trip_id
+    RETURNING id INTO updated_id;
+
+    RETURN updated_id;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Eliminar un gasto (solo si pertenece al viaje)
+CREATE OR REPLACE FUNCTION delete_trip_expense(p_expense_id INTEGER, p_trip_id INTEGER)
+RETURNS INTEGER AS $$
+DECLARE
+    deleted_id INTEGER;
+BEGIN
+    DELETE FROM trip_expenses
+    WHERE id = p_expense_id AND trip_id = p_trip_id
+    RETURNING id INTO deleted_id;
+
+    RETURN deleted_id;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Resumen de gastos de un viaje en una sola pasada (GROUPING SETS):
+-- una fila por categoria, una por dia y el total (category y expense_date NULL).
+-- El presupuesto del viaje va en todas las filas.
+CREATE OR REPLACE FUNCTION get_trip_expense_summary(p_trip_id INTEGER)
+RETURNS TABLE (
+    grouping_level TEXT,
+    category VARCHAR(50),
+    expense_date DATE,
+    expense_count INTEGER,
+    total_amount DECIMAL(12,2),
+    budget DECIMAL(10,2)
+) AS $$
+    SELECT CASE
+               WHEN GROUPING(e.category) = 0 THEN 'category'
+               WHEN GROUPING(e.expense_date) = 0 THEN 'day'
+               ELSE 'total'
+           END,
+           e.category, e.expense_date, COUNT(*)::INTEGER, SUM(e.amount)::DECIMAL(12,2),
+           (SELECT t.budget FROM trips t WHERE t.id = p_trip_id)
+    FROM trip_expenses e
+    WHERE e.trip_id = p_trip_id
+    GROUP BY GROUPING SETS ((e.category), (e.expense_date), ())
+    ORDER BY 1, 2, 3;
+$$ LANGUAGE sql STABLE;
+
+-- Agregar varios lugares a un viaje en una sola sentencia.
+-- p_places es un arreglo JSON de {place_id, visit_date, visit_order, notes, rating}.
+-- Los que traen visit_order lo usan tal cual; los demas se numeran, en el
+-- orden del arreglo, despues del mayor orden del viaje y del lote.
+-- Se bloquea la fila del viaje para que dos lotes concurrentes no calculen
+-- el mismo siguiente orden.
+CREATE OR REPLACE FUNCTION add_places_to_trip(p_trip_id INTEGER, p_places JSONB)
+RETURNS TABLE (
+    entry_id INTEGER,
+    place_id INTEGER,
+    visit_order INTEGER
+) AS $$
+DECLARE
+    base_order INTEGER;
+BEGIN
+    PERFORM 1 FROM trips t WHERE t.id = p_trip_id FOR UPDATE;
+
+    SELECT GREATEST(
+               (SELECT COALESCE(MAX(tp.visit_order), 0) FROM trip_places tp WHERE tp.trip_id = p_trip_id),
+               (SELECT COALESCE(MAX((e->>'visit_order')::INTEGER), 0) FROM jsonb_array_elements(p_places) e)
+           )
+    INTO base_order;
+
+    RETURN QUERY
+    WITH items AS (
+        SELECT r.place_id, r.visit_date, r.visit_order, r.notes, r.rating, i.ord
+        FROM jsonb_array_elements(p_places) WITH ORDINALITY AS i(item, ord),
+             jsonb_to_record(i.item) AS r(place_id INTEGER, visit_date DATE, visit_order INTEGER,
+                                          notes TEXT, rating INTEGER)
+    ),
+    numbered AS (
+        SELECT it.*,
+               COALESCE(it.visit_order,
+                        base_order + ROW_NUMBER() OVER (PARTITION BY it.visit_order IS NULL ORDER BY it.ord)
+               )::INTEGER AS final_order
+        FROM items it
+    ),
+    inserted AS (
+        INSERT INTO trip_places (trip_id, place_id, visit_date, visit_order, notes, rating)
+        SELECT p_trip_id, n.place_id, n.visit_date, n.final_order, n.notes, n.rating
+        FROM numbered n
+        ORDER BY n.ord
+        RETURNING trip_places.id, trip_places.place_id, trip_places.visit_order
+    )
+    SELECT ins.id, ins.place_id, ins.visit_order
+    FROM inserted ins
+    ORDER BY ins.visit_order;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Reordenar los lugares de un viaje: p_place_ids tiene todos sus lugares en
+-- el nuevo orden (visit_order 1..N). Un solo UPDATE; la restriccion
+-- UNIQUE(trip_id, visit_order) es DEFERRABLE y se verifica al final.
+-- Devuelve la cantidad de lugares reordenados.
+CREATE OR REPLACE FUNCTION reorder_trip_places(p_trip_id INTEGER, p_place_ids INTEGER[])
+RETURNS INTEGER AS $$
+DECLARE
+    place_total INTEGER;
+    reordered INTEGER;
+BEGIN
+    PERFORM 1 FROM trips t WHERE t.id = p_trip_id FOR UPDATE;
+
+    SELECT COUNT(*) INTO place_total FROM trip_places tp WHERE tp.trip_id = p_trip_id;
+    IF place_total <> COALESCE(array_length(p_place_ids, 1), 0) THEN
+        RAISE EXCEPTION 'The new order must list all % places of trip % exactly once', place_total, p_trip_id
+            USING ERRCODE = 'invalid_parameter_value';
+    END IF;
+
+    UPDATE trip_places tp
+    SET visit_order = o.ord
+    FROM unnest(p_place_ids) WITH ORDINALITY AS o(place_id, ord)
+    WHERE tp.trip_id = p_trip_id AND tp.place_id = o.place_id;
+
+    GET DIAGNOSTICS reordered = ROW_COUNT;
+    IF reordered <> place_total THEN
+        RAISE EXCEPTION 'The new order must list all % places of trip % exactly once', place_total, p_trip_id
+            USING ERRCODE = 'invalid_parameter_value';
+    END IF;
+    RETURN reordered;
+END;
+$$ LANGUAGE plpgsql;
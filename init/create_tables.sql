@@ -44,7 +44,10 @@ CREATE TABLE IF NOT EXISTS places (
     country VARCHAR(100) NOT NULL,
     created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
-    search_vector tsvector
+    search_vector tsvector,
+    latitude DOUBLE PRECISION CHECK (latitude BETWEEN -90 AND 90),
+    longitude DOUBLE PRECISION CHECK (longitude BETWEEN -180 AND 180),
+    CHECK ((latitude IS NULL) = (longitude IS NULL))
 );
 
 CREATE INDEX places_search_idx ON places USING GIN (search_vector);
@@ -135,9 +138,46 @@ CREATE TABLE IF NOT EXISTS reactions (
     UNIQUE(user_id, post_id)
 );
 
+-- Tabla de Seguidores entre Usuarios
+CREATE TABLE IF NOT EXISTS user_follows (
+    id SERIAL PRIMARY KEY,
+    follower_id INTEGER REFERENCES users(id) ON DELETE CASCADE,
+    followed_id INTEGER REFERENCES users(id) ON DELETE CASCADE,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE(follower_id, followed_id)
+);
+
+-- Indice para listar los seguidores de un usuario (fan-out del feed)
+CREATE INDEX idx_user_follows_followed_id ON user_follows(followed_id);
+
+-- Indices para paginar por cursor (created_at, id): todos los posts,
+-- y los posts recientes de un autor (feed y timelines)
+CREATE INDEX idx_posts_created_at_id ON posts(created_at DESC, id DESC);
+CREATE INDEX idx_posts_user_id_created_at ON posts(user_id, created_at DESC, id DESC);
+
+-- Indices por post para get_post_expanded (medios, comentarios recientes,
+-- likes y reacciones); las restricciones UNIQUE empiezan por user_id
+CREATE INDEX idx_post_media_links_post_id ON post_media_links(post_id);
+CREATE INDEX idx_comments_post_id_created_at ON comments(post_id, created_at DESC, id DESC);
+CREATE INDEX idx_likes_post_id ON likes(post_id);
+CREATE INDEX idx_reactions_post_id ON reactions(post_id, reaction_type);
+
 -- Crear extension para busqueda de texto completo si no existe
 CREATE EXTENSION IF NOT EXISTS pg_trgm;
 
+-- Indices de trigramas para las sugerencias aproximadas (suggest_fuzzy)
+CREATE INDEX idx_places_name_trgm ON places USING GIN (name gin_trgm_ops);
+CREATE INDEX idx_places_city_trgm ON places USING GIN (city gin_trgm_ops);
+CREATE INDEX idx_places_country_trgm ON places USING GIN (country gin_trgm_ops);
+CREATE INDEX idx_users_username_trgm ON users USING GIN (username gin_trgm_ops);
+
+-- Ubicacion de los lugares: indice GiST sobre el punto en coordenadas de
+-- earthdistance, para buscar por radio (earth_box) y los mas cercanos (<->)
+CREATE EXTENSION IF NOT EXISTS cube;
+CREATE EXTENSION IF NOT EXISTS earthdistance;
+CREATE INDEX idx_places_location ON places USING GIST (ll_to_earth(latitude, longitude))
+WHERE latitude IS NOT NULL;
+
 
 -- Tabla de Notificaciones
 CREATE TABLE IF NOT EXISTS notifications (
@@ -147,8 +187,10 @@ CREATE TABLE IF NOT EXISTS notifications (
     content TEXT NOT NULL,
     related_id INTEGER, -- ID del post, comentario, usuario o lista de viaje relacionado
     is_read BOOLEAN DEFAULT FALSE,
-    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    dedup_key VARCHAR(64) UNIQUE -- Identificador del evento en el outbox (evita duplicados al reintentar)
 );
 
 -- Indice para mejorar el rendimiento de las consultas de notificaciones
-CREATE INDEX idx_notifications_user_id ON notifications(user_id);
\ No newline at end of file
+-- (tambien sirve para paginar por cursor (created_at, id))
+CREATE INDEX idx_notifications_user_id ON notifications(user_id, created_at DESC, id DESC);
\ No newline at end of file
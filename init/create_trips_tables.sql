@@ -34,7 +34,10 @@ CREATE TABLE IF NOT EXISTS trip_places (
     rating INTEGER CHECK (rating >= 1 AND rating <= 5), -- Calificación del lugar en este viaje
     created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
     UNIQUE(trip_id, place_id),
-    UNIQUE(trip_id, visit_order) -- No puede haber dos lugares con el mismo orden en un viaje
+    -- No puede haber dos lugares con el mismo orden en un viaje. Es DEFERRABLE
+    -- para que se verifique al final de cada sentencia y no fila por fila:
+    -- asi un solo UPDATE puede reordenar (intercambiar) los lugares.
+    UNIQUE(trip_id, visit_order) DEFERRABLE INITIALLY IMMEDIATE
 );
 
 -- Tabla de Gastos del Viaje (opcional, para análisis más completo)
@@ -50,10 +53,160 @@ CREATE TABLE IF NOT EXISTS trip_expenses (
 );
 
 -- Índices para mejorar rendimiento
-CREATE INDEX idx_trips_user_id ON trips(user_id);
+-- (user_id, start_date, id) permite paginar por cursor los viajes de un usuario
+CREATE INDEX idx_trips_user_id ON trips(user_id, start_date DESC, id DESC);
 CREATE INDEX idx_trips_dates ON trips(start_date, end_date);
 CREATE INDEX idx_trips_status ON trips(status);
 CREATE INDEX idx_trip_places_trip_id ON trip_places(trip_id);
 CREATE INDEX idx_trip_places_place_id ON trip_places(place_id);
 CREATE INDEX idx_trip_expenses_trip_id ON trip_expenses(trip_id);
-CREATE INDEX idx_trip_expenses_date ON trip_expenses(expense_date);
\ No newline at end of file
+CREATE INDEX idx_trip_expenses_date ON trip_expenses(expense_date);
+-- Estadisticas de cada viaje, mantenidas por triggers en la misma transaccion
+-- que modifica trip_places o trip_expenses: /trips/<id>/statistics lee una
+-- sola fila en vez de agregar las tablas en cada llamada.
+-- rebuild_trip_stats() las recalcula todas (ver SP_trips.sql).
+CREATE TABLE IF NOT EXISTS trip_stats (
+    trip_id INTEGER PRIMARY KEY REFERENCES trips(id) ON DELETE CASCADE,
+    place_count INTEGER NOT NULL DEFAULT 0,
+    rating_sum INTEGER NOT NULL DEFAULT 0,
+    rating_count INTEGER NOT NULL DEFAULT 0,
+    expense_count INTEGER NOT NULL DEFAULT 0,
+    total_expenses DECIMAL(12,2) NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Cada viaje nuevo empieza con su fila de estadisticas en cero
+CREATE OR REPLACE FUNCTION trip_stats_init() RETURNS TRIGGER AS $$
+BEGIN
+    INSERT INTO trip_stats (trip_id) VALUES (NEW.id) ON CONFLICT (trip_id) DO NOTHING;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER trips_stats_init
+AFTER INSERT ON trips
+FOR EACH ROW EXECUTE FUNCTION trip_stats_init();
+
+-- Triggers por sentencia con tablas de transicion: un INSERT de muchas filas
+-- (o un COPY) actualiza cada viaje una sola vez con el total de sus cambios.
+-- Las filas nuevas suman y las eliminadas restan; un UPDATE resta la version
+-- anterior y suma la nueva.
+CREATE OR REPLACE FUNCTION trip_places_stats_apply() RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO trip_stats AS s (trip_id, place_count, rating_sum, rating_count)
+        SELECT trip_id, COUNT(*), COALESCE(SUM(rating), 0), COUNT(rating)
+        FROM new_rows
+        WHERE trip_id IS NOT NULL
+        GROUP BY trip_id
+        ON CONFLICT (trip_id) DO UPDATE
+        SET place_count = s.place_count + EXCLUDED.place_count,
+            rating_sum = s.rating_sum + EXCLUDED.rating_sum,
+            rating_count = s.rating_count + EXCLUDED.rating_count,
+            updated_at = CURRENT_TIMESTAMP;
+    ELSIF TG_OP = 'UPDATE' THEN
+        UPDATE trip_stats s
+        SET place_count = s.place_count + d.place_count,
+            rating_sum = s.rating_sum + d.rating_sum,
+            rating_count = s.rating_count + d.rating_count,
+            updated_at = CURRENT_TIMESTAMP
+        FROM (
+            SELECT c.trip_id, SUM(c.place_count) AS place_count,
+                   SUM(c.rating_sum) AS rating_sum, SUM(c.rating_count) AS rating_count
+            FROM (
+                SELECT trip_id, -1 AS place_count, -COALESCE(rating, 0) AS rating_sum,
+                       -(rating IS NOT NULL)::INTEGER AS rating_count
+                FROM old_rows
+                UNION ALL
+                SELECT trip_id, 1, COALESCE(rating, 0), (rating IS NOT NULL)::INTEGER
+                FROM new_rows
+            ) c
+            GROUP BY c.trip_id
+        ) d
+        WHERE s.trip_id = d.trip_id;
+    ELSE
+        -- En un DELETE en cascada del viaje su fila ya no existe y no se actualiza nada
+        UPDATE trip_stats s
+        SET place_count = s.place_count - d.place_count,
+            rating_sum = s.rating_sum - d.rating_sum,
+            rating_count = s.rating_count - d.rating_count,
+            updated_at = CURRENT_TIMESTAMP
+        FROM (
+            SELECT trip_id, COUNT(*) AS place_count, COALESCE(SUM(rating), 0) AS rating_sum,
+                   COUNT(rating) AS rating_count
+            FROM old_rows
+            GROUP BY trip_id
+        ) d
+        WHERE s.trip_id = d.trip_id;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION trip_expenses_stats_apply() RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO trip_stats AS s (trip_id, expense_count, total_expenses)
+        SELECT trip_id, COUNT(*), SUM(amount)
+        FROM new_rows
+        WHERE trip_id IS NOT NULL
+        GROUP BY trip_id
+        ON CONFLICT (trip_id) DO UPDATE
+        SET expense_count = s.expense_count + EXCLUDED.expense_count,
+            total_expenses = s.total_expenses + EXCLUDED.total_expenses,
+            updated_at = CURRENT_TIMESTAMP;
+    ELSIF TG_OP = 'UPDATE' THEN
+        UPDATE trip_stats s
+        SET expense_count = s.expense_count + d.expense_count,
+            total_expenses = s.total_expenses + d.total_expenses,
+            updated_at = CURRENT_TIMESTAMP
+        FROM (
+            SELECT c.trip_id, SUM(c.expense_count) AS expense_count, SUM(c.amount) AS total_expenses
+            FROM (
+                SELECT trip_id, -1 AS expense_count, -amount AS amount FROM old_rows
+                UNION ALL
+                SELECT trip_id, 1, amount FROM new_rows
+            ) c
+            GROUP BY c.trip_id
+        ) d
+        WHERE s.trip_id = d.trip_id;
+    ELSE
+        UPDATE trip_stats s
+        SET expense_count = s.expense_count - d.expense_count,
+            total_expenses = s.total_expenses - d.total_expenses,
+            updated_at = CURRENT_TIMESTAMP
+        FROM (
+            SELECT trip_id, COUNT(*) AS expense_count, SUM(amount) AS total_expenses
+            FROM old_rows
+            GROUP BY trip_id
+        ) d
+        WHERE s.trip_id = d.trip_id;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Una tabla de transicion solo se puede declarar en triggers de un evento
+CREATE TRIGGER trip_places_stats_insert
+AFTER INSERT ON trip_places REFERENCING NEW TABLE AS new_rows
+FOR EACH STATEMENT EXECUTE FUNCTION trip_places_stats_apply();
+
+CREATE TRIGGER trip_places_stats_update
+AFTER UPDATE ON trip_places REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+FOR EACH STATEMENT EXECUTE FUNCTION trip_places_stats_apply();
+
+CREATE TRIGGER trip_places_stats_delete
+AFTER DELETE ON trip_places REFERENCING OLD TABLE AS old_rows
+FOR EACH STATEMENT EXECUTE FUNCTION trip_places_stats_apply();
+
+CREATE TRIGGER trip_expenses_stats_insert
+AFTER INSERT ON trip_expenses REFERENCING NEW TABLE AS new_rows
+FOR EACH STATEMENT EXECUTE FUNCTION trip_expenses_stats_apply();
+
+CREATE TRIGGER trip_expenses_stats_update
+AFTER UPDATE ON trip_expenses REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+FOR EACH STATEMENT EXECUTE FUNCTION trip_expenses_stats_apply();
+
+CREATE TRIGGER trip_expenses_stats_delete
+AFTER DELETE ON trip_expenses REFERENCING OLD TABLE AS old_rows
+FOR EACH STATEMENT EXECUTE FUNCTION trip_expenses_stats_apply();
@@ -0,0 +1,42 @@
+# middleware/metrics.py
+import time
+from flask import g, request
+from config.database import add_query_observer, add_pool_observer, get_pool_stats
+from services import metrics
+
+
+def _on_query(sql, params, seconds):
+    metrics.record_query(sql, seconds)
+
+def _on_pool_checkout(seconds):
+    metrics.record_pool_wait(seconds)
+
+
+_observers_registered = False
+
+def register_metrics(app):
+    """
+    Metricas de Prometheus: peticiones y latencia por endpoint, consultas por
+    stored procedure y espera por el pool. Igual que register_timing, se
+    registra antes que la unidad de trabajo para medir tambien el commit.
+    """
+    global _observers_registered
+    if not _observers_registered:
+        add_query_observer(_on_query)
+        add_pool_observer(_on_pool_checkout)
+        _observers_registered = True
+
+    @app.before_request
+    def start_request_metrics():
+        g.metrics_start = time.perf_counter()
+
+    @app.after_request
+    def finish_request_metrics(response):
+        start = g.pop('metrics_start', None)
+        if start is None:
+            return response
+        # El endpoint (no la URL) para que /posts/1 y /posts/2 sean una sola serie
+        endpoint = request.endpoint or 'unmatched'
+        metrics.record_request(endpoint, request.method, response.status_code, time.perf_counter() - start)
+        metrics.update_pool_gauges(get_pool_stats())
+        return response
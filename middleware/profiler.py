@@ -0,0 +1,162 @@
+# middleware/profiler.py
+import os
+import sys
+import time
+import random
+import threading
+from collections import Counter
+from flask import g, request, has_app_context
+from flask_jwt_extended import verify_jwt_in_request, get_jwt_identity
+from services.auth_service import is_admin
+
+# Fraccion de las peticiones que se perfilan (0 lo desactiva)
+PROFILE_SAMPLE_RATE = float(os.getenv('PROFILE_SAMPLE_RATE', 0))
+# Con este header y el token de un administrador se perfila esa peticion
+PROFILE_HEADER = 'X-Profile'
+# Cada cuantos milisegundos se toma una muestra del stack
+PROFILE_INTERVAL_MS = float(os.getenv('PROFILE_INTERVAL_MS', 5))
+# Stacks distintos por endpoint; los demas se cuentan en "[otros]"
+PROFILE_MAX_STACKS = int(os.getenv('PROFILE_MAX_STACKS', 5000))
+MAX_DEPTH = 128
+
+_PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_active = {}  # ident del hilo -> [endpoint, muestras]
+_active_lock = threading.Lock()
+_wake = threading.Event()
+_stacks = {}  # endpoint -> Counter(stack colapsado -> muestras)
+_stacks_lock = threading.Lock()
+_sampler_pid = None
+
+
+# "funcion (archivo)": ruta relativa para el proyecto, desde el paquete para las librerias
+def _frame_label(frame):
+    code = frame.f_code
+    filename = code.co_filename
+    if filename.startswith(_PROJECT_ROOT):
+        filename = os.path.relpath(filename, _PROJECT_ROOT)
+    elif "site-packages" in filename:
+        filename = filename.split("site-packages" + os.sep, 1)[-1]
+    else:
+        filename = os.path.basename(filename)
+    return f"{code.co_name} ({filename})"
+
+# Stack en formato colapsado (raiz;...;hoja) con el endpoint como raiz
+def collapse_stack(endpoint, frame):
+    labels = []
+    while frame is not None and len(labels) < MAX_DEPTH:
+        labels.append(_frame_label(frame))
+        frame = frame.f_back
+    labels.append(endpoint)
+    return ";".join(reversed(labels))
+
+def _record(endpoint, stack):
+    with _stacks_lock:
+        stacks = _stacks.setdefault(endpoint, Counter())
+        if stack not in stacks and len(stacks) >= PROFILE_MAX_STACKS:
+            stack = f"{endpoint};[otros]"
+        stacks[stack] += 1
+
+# Hilo de muestreo: duerme mientras no haya peticiones perfilandose
+def _run_sampler():
+    interval = PROFILE_INTERVAL_MS / 1000
+    while True:
+        _wake.wait()
+        time.sleep(interval)
+        with _active_lock:
+            if not _active:
+                _wake.clear()
+                continue
+            active = {ident: entry for ident, entry in _active.items()}
+        frames = sys._current_frames()
+        for ident, entry in active.items():
+            frame = frames.get(ident)
+            if frame is not None:
+                _record(entry[0], collapse_stack(entry[0], frame))
+                entry[1] += 1
+
+def _start_sampler():
+    global _sampler_pid
+    if _sampler_pid == os.getpid():
+        return
+    _sampler_pid = os.getpid()
+    threading.Thread(target=_run_sampler, name="request-profiler", daemon=True).start()
+
+def start_profiling(endpoint):
+    """Empieza a muestrear el hilo actual; las muestras se suman al endpoint"""
+    _start_sampler()
+    with _active_lock:
+        _active[threading.get_ident()] = [endpoint, 0]
+        _wake.set()
+
+def stop_profiling():
+    """Deja de muestrear el hilo actual y devuelve cuantas muestras se tomaron"""
+    with _active_lock:
+        entry = _active.pop(threading.get_ident(), None)
+    return entry[1] if entry else 0
+
+# El header solo cuenta con un token valido de un administrador
+def _debug_requested():
+    if PROFILE_HEADER not in request.headers:
+        return False
+    try:
+        verify_jwt_in_request()
+        return is_admin(get_jwt_identity())
+    except Exception:
+        return False
+
+def register_profiler(app):
+    """
+    Perfilador opcional de peticiones: muestrea el stack del hilo que atiende
+    la peticion cada PROFILE_INTERVAL_MS y acumula los stacks colapsados por
+    endpoint (ver get_collapsed_stacks). Se activa para una fraccion
+    PROFILE_SAMPLE_RATE de las peticiones o con el header X-Profile.
+    """
+
+    @app.before_request
+    def start_request_profile():
+        if random.random() < PROFILE_SAMPLE_RATE or _debug_requested():
+            start_profiling(request.endpoint or 'unmatched')
+            g.profiling = True
+
+    @app.after_request
+    def finish_request_profile(response):
+        if g.pop('profiling', False):
+            response.headers['X-Profile-Samples'] = str(stop_profiling())
+        return response
+
+    # Si la peticion fallo sin respuesta, igual dejar de muestrear el hilo
+    @app.teardown_request
+    def discard_request_profile(exc):
+        if has_app_context() and g.pop('profiling', False):
+            stop_profiling()
+
+
+def get_collapsed_stacks(endpoint=None):
+    """
+    Stacks acumulados en formato colapsado, una linea "stack muestras" por
+    stack, para flamegraph.pl o speedscope. endpoint filtra uno solo.
+    """
+    with _stacks_lock:
+        items = [
+            (stack, count)
+            for name, stacks in _stacks.items() if endpoint is None or name == endpoint
+            for stack, count in stacks.items()
+        ]
+    return "".join(f"{stack} {count}\n" for stack, count in sorted(items))
+
+def clear_profiles():
+    with _stacks_lock:
+        _stacks.clear()
+
+# El hilo de muestreo no sobrevive al fork (y pudo dejar un lock tomado):
+# el hijo empieza de cero y lo inicia con su primera peticion perfilada
+def _reset_sampler_after_fork():
+    global _sampler_pid, _active_lock, _stacks_lock, _wake
+    _sampler_pid = None
+    _active_lock = threading.Lock()
+    _stacks_lock = threading.Lock()
+    _wake = threading.Event()
+    _active.clear()
+
+os.register_at_fork(after_in_child=_reset_sampler_after_fork)
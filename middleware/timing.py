@@ -0,0 +1,197 @@
+# middleware/timing.py
+import os
+import math
+import time
+import threading
+from flask import g, request, has_request_context
+from flask.json.provider import DefaultJSONProvider
+from flask_jwt_extended import verify_jwt_in_request, get_jwt_identity
+from config.database import add_query_observer, add_redis_observer, add_pool_observer
+from services.auth_service import is_admin
+
+# Header Server-Timing en las respuestas: "false" (por defecto), "admin" (solo
+# con el token de un administrador) o "true" (a todos, p. ej. en desarrollo).
+# El desglose por fase no se envia a cualquier cliente.
+SERVER_TIMING_HEADER = os.getenv('SERVER_TIMING_HEADER', 'false').lower()
+
+# Buckets del histograma: desde 10 microsegundos, cada uno 19% (2^(1/4))
+# mas ancho que el anterior, hasta mas de un minuto
+_BUCKET_BASE = 1e-5
+_BUCKET_GROWTH = 2 ** 0.25
+_BUCKET_COUNT = 92
+
+
+class LatencyHistogram:
+    """
+    Histograma de latencias en memoria del proceso, con buckets exponenciales
+    (memoria fija sin importar cuantas muestras se registren). Los percentiles
+    son el limite superior del bucket donde caen, con un error maximo del 19%.
+    """
+
+    def __init__(self):
+        self._buckets = [0] * _BUCKET_COUNT
+        self._lock = threading.Lock()
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    @staticmethod
+    def _bucket(seconds):
+        if seconds <= _BUCKET_BASE:
+            return 0
+        index = math.ceil(math.log(seconds / _BUCKET_BASE, _BUCKET_GROWTH))
+        return min(index, _BUCKET_COUNT - 1)
+
+    def record(self, seconds):
+        with self._lock:
+            self._buckets[self._bucket(seconds)] += 1
+            self.count += 1
+            self.total += seconds
+            self.max = max(self.max, seconds)
+
+    def _percentile(self, buckets, count, fraction):
+        rank = max(1, math.ceil(count * fraction))
+        seen = 0
+        for index, bucket_count in enumerate(buckets):
+            seen += bucket_count
+            if seen >= rank:
+                return _BUCKET_BASE * _BUCKET_GROWTH ** index
+        return self.max
+
+    # Resumen en milisegundos
+    def snapshot(self):
+        with self._lock:
+            buckets, count, total, maximum = list(self._buckets), self.count, self.total, self.max
+        if not count:
+            return {"count": 0}
+        percentile = lambda fraction: round(min(self._percentile(buckets, count, fraction), maximum) * 1000, 3)
+        return {
+            "count": count,
+            "avg_ms": round(total / count * 1000, 3),
+            "p50_ms": percentile(0.50),
+            "p95_ms": percentile(0.95),
+            "p99_ms": percentile(0.99),
+            "max_ms": round(maximum * 1000, 3),
+        }
+
+
+_histograms = {}
+_histograms_lock = threading.Lock()
+
+
+def record_latency(name, seconds):
+    histogram = _histograms.get(name)
+    if histogram is None:
+        with _histograms_lock:
+            histogram = _histograms.setdefault(name, LatencyHistogram())
+    histogram.record(seconds)
+
+# p50/p95/p99 de cada endpoint ("endpoint:<blueprint>.<funcion>") y de las
+# consultas, comandos de Redis y esperas por el pool de todo el proceso
+def get_latency_stats():
+    with _histograms_lock:
+        histograms = dict(_histograms)
+    return {name: histogram.snapshot() for name, histogram in sorted(histograms.items())}
+
+
+class RequestTiming:
+    """Tiempo acumulado por fase (db, redis, pool, json) de una peticion"""
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.phases = {}  # fase -> [segundos, cantidad]
+
+    def add(self, phase, seconds):
+        entry = self.phases.setdefault(phase, [0.0, 0])
+        entry[0] += seconds
+        entry[1] += 1
+
+    # Valor del header Server-Timing; "app" es el tiempo que no se paso en
+    # ninguna de las fases medidas
+    def server_timing(self, total):
+        parts = []
+        measured = 0.0
+        for phase, (seconds, count) in self.phases.items():
+            measured += seconds
+            parts.append(f'{phase};dur={seconds * 1000:.2f};desc="{count} calls"')
+        parts.append(f"app;dur={max(total - measured, 0) * 1000:.2f}")
+        parts.append(f"total;dur={total * 1000:.2f}")
+        return ", ".join(parts)
+
+
+# Suma el tiempo a la fase de la peticion actual (si hay una)
+def _add_phase(phase, seconds):
+    if has_request_context():
+        timing = g.get('request_timing')
+        if timing is not None:
+            timing.add(phase, seconds)
+
+def _on_query(sql, params, seconds):
+    record_latency("sql", seconds)
+    _add_phase("db", seconds)
+
+def _on_redis(command, args, seconds):
+    record_latency("redis", seconds)
+    _add_phase("redis", seconds)
+
+def _on_pool_checkout(seconds):
+    record_latency("pool_wait", seconds)
+    _add_phase("pool", seconds)
+
+
+def _server_timing_allowed():
+    if SERVER_TIMING_HEADER == 'true':
+        return True
+    if SERVER_TIMING_HEADER != 'admin':
+        return False
+    try:
+        verify_jwt_in_request(optional=True)
+        return is_admin(get_jwt_identity())
+    except Exception:
+        return False
+
+
+class TimedJSONProvider(DefaultJSONProvider):
+    """Serializador JSON de Flask que mide el tiempo de jsonify"""
+
+    def dumps(self, obj, **kwargs):
+        start = time.perf_counter()
+        try:
+            return super().dumps(obj, **kwargs)
+        finally:
+            _add_phase("json", time.perf_counter() - start)
+
+
+_observers_registered = False
+
+def register_timing(app):
+    """
+    Mide cada peticion: tiempo total por endpoint y, dentro de ella, el tiempo
+    en PostgreSQL (consultas y commit), Redis, espera por el pool y jsonify.
+    Registrarlo antes que la unidad de trabajo para que el commit quede dentro
+    de la medicion (los after_request se ejecutan en orden inverso).
+    """
+    global _observers_registered
+    if not _observers_registered:
+        add_query_observer(_on_query)
+        add_redis_observer(_on_redis)
+        add_pool_observer(_on_pool_checkout)
+        _observers_registered = True
+
+    app.json_provider_class = TimedJSONProvider
+    app.json = TimedJSONProvider(app)
+
+    @app.before_request
+    def start_request_timing():
+        g.request_timing = RequestTiming()
+
+    @app.after_request
+    def finish_request_timing(response):
+        timing = g.pop('request_timing', None)
+        if timing is None:
+            return response
+        total = time.perf_counter() - timing.start
+        record_latency(f"endpoint:{request.endpoint or 'unmatched'}", total)
+        if _server_timing_allowed():
+            response.headers['Server-Timing'] = timing.server_timing(total)
+        return response
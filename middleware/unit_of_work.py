@@ -0,0 +1,49 @@
+# middleware/unit_of_work.py
+from flask import g, jsonify, has_app_context
+from config.database import UnitOfWork
+
+
+def register_unit_of_work(app):
+    # Cada peticion comparte una sola conexion y una sola transaccion
+    @app.before_request
+    def begin_unit_of_work():
+        g.db_unit_of_work = UnitOfWork()
+
+    # Commit unico si la respuesta fue exitosa, rollback en caso contrario.
+    # La conexion vuelve al pool antes de enviar la respuesta.
+    @app.after_request
+    def commit_unit_of_work(response):
+        unit = g.pop('db_unit_of_work', None)
+        if unit is None:
+            return response
+        try:
+            if unit.failed and response.status_code < 400:
+                # Una llamada fallo y la ruta capturo el error: la transaccion
+                # ya se revirtio, no se puede responder como si se hubiera guardado
+                print("Error: la transaccion de la peticion fallo y se revirtio")
+                unit.rollback()
+                response = jsonify({"error": "Internal Server Error", "message": "The transaction was rolled back"})
+                response.status_code = 500
+            elif response.status_code >= 400:
+                unit.rollback()
+            else:
+                unit.commit()
+        except Exception as e:
+            print(f"Error al confirmar la transaccion: {e}")
+            unit.rollback()
+            response = jsonify({"error": "Internal Server Error", "message": "Could not commit the transaction"})
+            response.status_code = 500
+        finally:
+            unit.close()
+        return response
+
+    # Si hubo una excepcion no manejada, after_request no se ejecuta:
+    # revertir y devolver la conexion al pool aqui
+    @app.teardown_request
+    def end_unit_of_work(exc):
+        if not has_app_context():
+            return
+        unit = g.pop('db_unit_of_work', None)
+        if unit is not None:
+            unit.rollback()
+            unit.close()
@@ -3,12 +3,14 @@ from datetime import datetime
 from zoneinfo import ZoneInfo
 
 class Place:
-    def __init__(self, name, description, city, country, id=None):
+    def __init__(self, name, description, city, country, id=None, latitude=None, longitude=None):
         self.id = id
         self.name = name
         self.description = description
         self.city = city
         self.country = country
+        self.latitude = latitude
+        self.longitude = longitude
         self.created_at = datetime.now(ZoneInfo("UTC"))
         self.updated_at = datetime.now(ZoneInfo("UTC"))
         self.image_links = []
@@ -24,6 +26,8 @@ class Place:
             "description": self.description,
             "city": self.city,
             "country": self.country,
+            "latitude": self.latitude,
+            "longitude": self.longitude,
             "created_at": self.created_at,
             "updated_at": self.updated_at,
             "image_links": self.image_links,
@@ -31,6 +35,30 @@ class Place:
             "likes": self.likes
         }
 
+    # from_dict: Reconstruye un Place a partir del diccionario de to_dict
+    # (por ejemplo, al leerlo del cache)
+    @classmethod
+    def from_dict(cls, data):
+        place = cls(data["name"], data.get("description"), data.get("city"),
+                    data.get("country"), id=data.get("id"),
+                    latitude=data.get("latitude"), longitude=data.get("longitude"))
+        for field in ("created_at", "updated_at", "image_links", "comments", "likes"):
+            if field in data:
+                setattr(place, field, data[field])
+        return place
+
+    # from_row: Crea un Place a partir de una fila
+    # (id, name, description, city, country, created_at, updated_at[, latitude, longitude])
+    # de las funciones SQL
+    @classmethod
+    def from_row(cls, row):
+        place = cls(row[1], row[2], row[3], row[4], id=row[0])
+        place.created_at = row[5]
+        place.updated_at = row[6]
+        if len(row) > 8:
+            place.latitude, place.longitude = row[7], row[8]
+        return place
+
 class PlaceImageLink:
     def __init__(self, place_id, image_url, id=None):
         self.id = id
@@ -29,6 +29,25 @@ class Post:
             "reactions": self.reactions
         }
 
+    # from_dict: Reconstruye un Post a partir del diccionario de to_dict
+    # (por ejemplo, al leerlo del cache)
+    @classmethod
+    def from_dict(cls, data):
+        post = cls(data["user_id"], data["content"], id=data.get("id"))
+        for field in ("created_at", "updated_at", "media_links", "comments", "likes", "reactions"):
+            if field in data:
+                setattr(post, field, data[field])
+        return post
+
+    # from_row: Crea un Post a partir de una fila
+    # (id, user_id, content, created_at, updated_at) de las funciones SQL
+    @classmethod
+    def from_row(cls, row):
+        post = cls(row[1], row[2], id=row[0])
+        post.created_at = row[3]
+        post.updated_at = row[4]
+        return post
+
 class PostMediaLink:
     def __init__(self, post_id, media_url, media_type, id=None):
         self.id = id
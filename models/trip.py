@@ -44,6 +44,28 @@ class Trip:
             "expenses": self.expenses
         }
 
+    # from_dict: Reconstruye un Trip a partir del diccionario de to_dict
+    # (por ejemplo, al leerlo del cache); acepta fechas en formato ISO
+    @classmethod
+    def from_dict(cls, data):
+        trip = cls(
+            user_id=data["user_id"],
+            title=data["title"],
+            description=data.get("description"),
+            start_date=data["start_date"],
+            end_date=data["end_date"],
+            status=data.get("status", 'planned'),
+            budget=data.get("budget"),
+            id=data.get("id")
+        )
+        for field in ("created_at", "updated_at"):
+            value = data.get(field)
+            if value:
+                setattr(trip, field, value if isinstance(value, datetime) else datetime.fromisoformat(value))
+        trip.places = data.get("places", [])
+        trip.expenses = data.get("expenses", [])
+        return trip
+
     @property
     def duration_days(self):
         """Calcula la duración del viaje en días"""
@@ -122,4 +144,12 @@ class TripExpense:
             "place_id": self.place_id,
             # Convierte la fecha de creación a formato ISO si está definida
             "created_at": self.created_at.isoformat() if hasattr(self, 'created_at') else None
-        }
\ No newline at end of file
+        }
+
+    # from_row: Crea un TripExpense a partir de una fila de get_trip_expenses
+    # (id, trip_id, category, description, amount, expense_date, place_id, created_at)
+    @classmethod
+    def from_row(cls, row):
+        expense = cls(row[1], row[2], row[3], row[4], row[5], place_id=row[6], id=row[0])
+        expense.created_at = row[7]
+        return expense
\ No newline at end of file
@@ -24,4 +24,25 @@ class User:
             "profile_picture_url": self.profile_picture_url,
             "created_at": self.created_at,
             "updated_at": self.updated_at
-        }
\ No newline at end of file
+        }
+
+    # from_dict: Reconstruye un User a partir del diccionario de to_dict
+    # (por ejemplo, al leerlo del cache; to_dict no incluye la contraseña)
+    @classmethod
+    def from_dict(cls, data):
+        user = cls(data["username"], data.get("email"), None, data.get("bio"),
+                   data.get("profile_picture_url"), id=data.get("id"))
+        for field in ("created_at", "updated_at"):
+            if field in data:
+                setattr(user, field, data[field])
+        return user
+
+    # from_row: Crea un User a partir de una fila
+    # (id, username, email, bio, profile_picture_url, created_at, updated_at)
+    # de las funciones SQL (sin contraseña)
+    @classmethod
+    def from_row(cls, row):
+        user = cls(row[1], row[2], None, row[3], row[4], id=row[0])
+        user.created_at = row[5]
+        user.updated_at = row[6]
+        return user
@@ -0,0 +1,35 @@
+# routes/admin_routes.py
+from flask import Blueprint, Response, request, jsonify
+from services.auth_service import admin_required
+from services.slow_query_log import get_slow_queries, clear_slow_queries
+from middleware.profiler import get_collapsed_stacks, clear_profiles
+
+admin_routes = Blueprint('admin_routes', __name__)
+
+# Consultas lentas de este proceso (con su plan si se tomo la muestra): /admin/slow-queries?limit=20
+@admin_routes.route('/admin/slow-queries', methods=['GET'])
+@admin_required
+def slow_queries():
+    limit = request.args.get('limit', type=int)
+    entries = get_slow_queries(limit)
+    return jsonify({"slow_queries": entries, "count": len(entries)}), 200
+
+# Vaciar el registro de consultas lentas
+@admin_routes.route('/admin/slow-queries', methods=['DELETE'])
+@admin_required
+def delete_slow_queries():
+    clear_slow_queries()
+    return jsonify({"message": "Slow query log cleared"}), 200
+
+# Stacks colapsados del perfilador, para flamegraph.pl o speedscope: /admin/profile?endpoint=trip_routes.get_user_trips
+@admin_routes.route('/admin/profile', methods=['GET'])
+@admin_required
+def profile():
+    return Response(get_collapsed_stacks(request.args.get('endpoint')), mimetype='text/plain')
+
+# Descartar los stacks acumulados
+@admin_routes.route('/admin/profile', methods=['DELETE'])
+@admin_required
+def delete_profile():
+    clear_profiles()
+    return jsonify({"message": "Profile data cleared"}), 200
@@ -62,8 +62,17 @@ def get_feed():
     current_user_id = get_jwt_identity()
     page = int(request.args.get('page', 1))
     page_size = int(request.args.get('page_size', 10))
+    # Paginacion por cursor si se envia ?cursor= (vacio para la primera pagina)
+    cursor = request.args.get('cursor')
     try:
+        if cursor is not None:
+            feed_posts, next_cursor = follow_controller.get_feed_by_cursor(current_user_id, cursor, page_size)
+            return jsonify({
+                "posts": [post.to_dict() if hasattr(post, 'to_dict') else post for post in feed_posts],
+                "next_cursor": next_cursor,
+                "page_size": page_size
+            }), 200
         feed_posts = follow_controller.get_feed(current_user_id, page, page_size)
-        return jsonify(feed_posts), 200
+        return jsonify([post.to_dict() if hasattr(post, 'to_dict') else post for post in feed_posts]), 200
     except Exception as e:
         return jsonify({"error": str(e)}), 400
\ No newline at end of file
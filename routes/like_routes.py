@@ -22,6 +22,19 @@ def add_like():
     except Exception as e:
         return jsonify({"error": str(e)}), 400
 
+# Varios likes del usuario autenticado en una sola peticion:
+# {"likes": [{"post_id" | "place_id"}, ...]}
+@like_routes.route('/likes/batch', methods=['POST'])
+@jwt_required()
+def add_likes_batch():
+    data = request.json
+    try:
+        likes = data['likes']
+        added = like_controller.add_likes_batch(int(get_jwt_identity()), likes)
+        return jsonify({"added": added, "skipped": len(likes) - added}), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 400
+
 @like_routes.route('/likes/count', methods=['GET'])
 @jwt_required()
 def get_like_count():
@@ -2,6 +2,7 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from controllers import notification_controller
+from services.pagination import InvalidCursorError
 
 notification_routes = Blueprint('notification_routes', __name__)
 
@@ -12,6 +13,16 @@ def get_notifications():
     current_user_id = get_jwt_identity()
     limit = request.args.get('limit', 10, type=int)
     offset = request.args.get('offset', 0, type=int)
+    # Paginacion por cursor si se envia ?cursor= (vacio para la primera pagina)
+    cursor = request.args.get('cursor')
+    if cursor is not None:
+        try:
+            notifications, next_cursor = notification_controller.get_user_notifications_by_cursor(
+                current_user_id, cursor, limit
+            )
+        except InvalidCursorError as e:
+            return jsonify({"error": str(e)}), 400
+        return jsonify({"notifications": notifications, "next_cursor": next_cursor}), 200
     
     notifications = notification_controller.get_user_notifications(current_user_id, limit, offset)
     return jsonify(notifications), 200
@@ -1,6 +1,7 @@
 # routes/place_routes.py
 from flask import Blueprint, request, jsonify
 from controllers import place_controller
+from services.pagination import parse_ids
 from flask_jwt_extended import jwt_required
 
 place_routes = Blueprint('place_routes', __name__)
@@ -15,7 +16,9 @@ def create_place():
             data['name'],
             data['description'],
             data['city'],
-            data['country']
+            data['country'],
+            data.get('latitude'),
+            data.get('longitude')
         )
         return jsonify({"message": "Place created successfully", "place_id": place_id}), 201
     except Exception as e:
@@ -31,6 +34,46 @@ def get_place(place_id):
     else:
         return jsonify({"error": "Place not found"}), 404
     
+# Obtener varios lugares: /places?ids=3,1,2
+# Los resultados siguen el orden de ids; los que no existen son null y se listan en "missing"
+@place_routes.route('/places', methods=['GET'])
+@jwt_required()
+def get_places():
+    try:
+        place_ids = parse_ids(request.args.get('ids', ''))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    places = place_controller.get_many(place_ids)
+    return jsonify({
+        "places": [place.to_dict() if place else None for place in places],
+        "missing": [place_id for place_id, place in zip(place_ids, places) if place is None]
+    }), 200
+
+# Lugares cercanos: /places/nearby?lat=9.93&lon=-84.08&radius=10&limit=20
+# Con radius (km) devuelve los que estan dentro del radio; sin el, los limit mas cercanos
+@place_routes.route('/places/nearby', methods=['GET'])
+@jwt_required()
+def get_nearby_places():
+    try:
+        latitude = float(request.args['lat'])
+        longitude = float(request.args['lon'])
+        radius = request.args.get('radius')
+        radius = float(radius) if radius else None
+        limit = min(int(request.args.get('limit', 20)), 100)
+    except KeyError as e:
+        return jsonify({"error": f"Missing parameter: {e.args[0]}"}), 400
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    if not -90 <= latitude <= 90 or not -180 <= longitude <= 180:
+        return jsonify({"error": "lat must be between -90 and 90 and lon between -180 and 180"}), 400
+    if (radius is not None and radius <= 0) or limit <= 0:
+        return jsonify({"error": "radius and limit must be positive"}), 400
+
+    nearby = place_controller.get_nearby(latitude, longitude, radius, limit)
+    return jsonify({
+        "places": [dict(place.to_dict(), distance_km=round(distance, 3)) for place, distance in nearby]
+    }), 200
+
 # Actualizar un lugar existente
 @place_routes.route('/places/<int:place_id>', methods=['PUT'])
 @jwt_required()
@@ -42,7 +85,9 @@ def update_place(place_id):
             data['name'],
             data['description'],
             data['city'],
-            data['country']
+            data['country'],
+            data.get('latitude'),
+            data.get('longitude')
         )
         if updated_place_id:
             return jsonify({"message": "Place updated successfully", "place_id": updated_place_id}), 200
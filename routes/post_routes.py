@@ -2,6 +2,7 @@
 from flask import Blueprint, request, jsonify
 from controllers import post_controller
 from flask_jwt_extended import jwt_required, get_jwt_identity
+from services.pagination import InvalidCursorError, parse_include_total, parse_ids
 
 post_routes = Blueprint('post_routes', __name__)
 
@@ -23,6 +24,17 @@ def create_post():
 @post_routes.route('/posts/<int:post_id>', methods=['GET'])
 @jwt_required()
 def get_post(post_id):
+    # ?expand=comments,likes,reactions,media incluye esas partes en la misma respuesta
+    expand = request.args.get('expand')
+    if expand:
+        try:
+            document = post_controller.get_post_expanded(post_id, post_controller.parse_expand(expand))
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        if document is None:
+            return jsonify({"error": "Post not found"}), 404
+        return jsonify(document), 200
+
     post = post_controller.get_post(post_id)
     if post:
         return jsonify(post.to_dict() if hasattr(post, 'to_dict') else post), 200
@@ -33,15 +45,43 @@ def get_post(post_id):
 @post_routes.route('/posts', methods=['GET'])
 @jwt_required()
 def get_posts():
-    page = int(request.args.get('page', 1))
+    # Varios posts por ID: /posts?ids=3,1,2 (en ese orden; los que no existen son null)
+    if 'ids' in request.args:
+        try:
+            post_ids = parse_ids(request.args['ids'])
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        posts = post_controller.get_many(post_ids)
+        return jsonify({
+            "posts": [post.to_dict() if post else None for post in posts],
+            "missing": [post_id for post_id, post in zip(post_ids, posts) if post is None]
+        }), 200
+
     page_size = int(request.args.get('page_size', 10))
-    posts, total_count = post_controller.get_posts_paginated(page, page_size)
-    return jsonify({
+    # Paginacion por cursor si se envia ?cursor= (vacio para la primera pagina)
+    cursor = request.args.get('cursor')
+    if cursor is not None:
+        try:
+            posts, next_cursor = post_controller.get_posts_by_cursor(cursor, page_size)
+        except InvalidCursorError as e:
+            return jsonify({"error": str(e)}), 400
+        return jsonify({
+            "posts": [post.to_dict() if hasattr(post, 'to_dict') else post for post in posts],
+            "next_cursor": next_cursor,
+            "page_size": page_size
+        }), 200
+
+    page = int(request.args.get('page', 1))
+    include_total = parse_include_total(request.args.get('include_total'))
+    posts, total_count = post_controller.get_posts_paginated(page, page_size, include_total)
+    response = {
         "posts": [post.to_dict() if hasattr(post, 'to_dict') else post for post in posts],
-        "total_count": total_count,
         "page": page,
         "page_size": page_size
-    }), 200
+    }
+    if include_total:
+        response["total_count"] = total_count
+    return jsonify(response), 200
 
 # Actualizar un post existente
 @post_routes.route('/posts/<int:post_id>', methods=['PUT'])
@@ -22,6 +22,18 @@ def add_or_update_reaction():
     except Exception as e:
         return jsonify({"error": str(e)}), 400
 
+# Varias reacciones del usuario autenticado en una sola peticion:
+# {"reactions": [{"post_id", "reaction_type"}, ...]}
+@reaction_routes.route('/reactions/batch', methods=['POST'])
+@jwt_required()
+def add_or_update_reactions_batch():
+    data = request.json
+    try:
+        applied = reaction_controller.add_or_update_reactions_batch(int(get_jwt_identity()), data['reactions'])
+        return jsonify({"applied": applied}), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 400
+
 @reaction_routes.route('/reactions/count/<int:post_id>', methods=['GET'])
 def get_reaction_counts(post_id):
     counts = reaction_controller.get_reaction_counts(post_id)
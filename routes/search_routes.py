@@ -1,13 +1,47 @@
 # routes/search_routes.py
+from datetime import datetime
 from flask import Blueprint, request, jsonify
 from controllers import search_controller
+from services import suggest_service
 from flask_jwt_extended import jwt_required
+from services.pagination import InvalidCursorError
 
 search_routes = Blueprint('search_routes', __name__)
 
+# /search?q=&types=post,place,travel_list,trip&date_from=&date_to=&limit=
+# Con ?cursor= (vacio para la primera pagina) devuelve {"results", "next_cursor"}
 @search_routes.route('/search', methods=['GET'])
 @jwt_required()
 def search():
     query = request.args.get('q', '')
-    results = search_controller.search_content(query)
-    return jsonify(results), 200
\ No newline at end of file
+    try:
+        types = search_controller.parse_types(request.args.get('types'))
+        date_from = _parse_date(request.args.get('date_from'))
+        date_to = _parse_date(request.args.get('date_to'))
+        limit = min(int(request.args.get('limit', 20)), 100)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    cursor = request.args.get('cursor')
+    if cursor is not None:
+        try:
+            results, next_cursor = search_controller.search(query, types, date_from, date_to, cursor, limit)
+        except InvalidCursorError as e:
+            return jsonify({"error": str(e)}), 400
+        return jsonify({"results": results, "next_cursor": next_cursor}), 200
+
+    results = search_controller.search_content(query, types, date_from, date_to, limit)
+    return jsonify(results), 200
+
+# /search/suggest?q=&limit= : autocompletado de lugares, ciudades, paises y usuarios
+@search_routes.route('/search/suggest', methods=['GET'])
+@jwt_required()
+def suggest():
+    try:
+        limit = min(int(request.args.get('limit', 10)), 20)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify(suggest_service.suggest(request.args.get('q', ''), limit)), 200
+
+def _parse_date(value):
+    return datetime.fromisoformat(value) if value else None
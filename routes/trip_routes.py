@@ -1,8 +1,10 @@
 # routes/trip_routes.py
 from flask import Blueprint, request, jsonify
-from controllers import trip_controller
+import io
+from controllers import trip_controller, trip_expense_controller
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from datetime import datetime
+from services.pagination import parse_include_total
 
 trip_routes = Blueprint('trip_routes', __name__)
 
@@ -61,8 +63,20 @@ def get_user_trips():
     status = request.args.get('status')
     page = int(request.args.get('page', 1))
     page_size = int(request.args.get('page_size', 10))
+    # Paginación por cursor si se envía ?cursor= (vacío para la primera página)
+    cursor = request.args.get('cursor')
     
     try:
+        if cursor is not None:
+            trips, next_cursor = trip_controller.get_user_trips_by_cursor(
+                current_user_id, status, cursor, page_size
+            )
+            return jsonify({
+                "trips": [trip.to_dict() for trip in trips],
+                "next_cursor": next_cursor,
+                "page_size": page_size
+            }), 200
+
         trips, total_count = trip_controller.get_user_trips(
             current_user_id, status, page, page_size
         )
@@ -157,6 +171,49 @@ def add_place_to_trip(trip_id):
     except Exception as e:
         return jsonify({"error": str(e)}), 400
 
+# Agregar varios lugares a un viaje: {"places": [{"place_id", "visit_date"?,
+# "visit_order"?, "notes"?, "rating"?}, ...]} en una sola sentencia
+@trip_routes.route('/trips/<int:trip_id>/places/batch', methods=['POST'])
+@jwt_required()
+def add_places_to_trip_batch(trip_id):
+    current_user_id = int(get_jwt_identity())  # Convertir a int
+    data = request.json
+
+    if not isinstance(data, dict) or not isinstance(data.get('places'), list):
+        return jsonify({"error": "Missing required field: places"}), 400
+
+    try:
+        # Verificar que el viaje pertenece al usuario actual
+        trip = trip_controller.get_trip(trip_id)
+        if not trip or trip.user_id != current_user_id:
+            return jsonify({"error": "Unauthorized or trip not found"}), 403
+
+        entries = trip_controller.add_places_to_trip_batch(trip_id, data['places'])
+        return jsonify({"message": "Places added to trip successfully", "entries": entries}), 201
+    except Exception as e:
+        return jsonify({"error": str(e)}), 400
+
+# Reordenar los lugares de un viaje: {"place_ids": [...]} con todos sus lugares
+# en el nuevo orden
+@trip_routes.route('/trips/<int:trip_id>/places/order', methods=['PUT'])
+@jwt_required()
+def reorder_trip_places(trip_id):
+    current_user_id = int(get_jwt_identity())  # Convertir a int
+    data = request.json
+
+    if not isinstance(data, dict) or not isinstance(data.get('place_ids'), list):
+        return jsonify({"error": "Missing required field: place_ids"}), 400
+
+    try:
+        trip = trip_controller.get_trip(trip_id)
+        if not trip or trip.user_id != current_user_id:
+            return jsonify({"error": "Unauthorized or trip not found"}), 403
+
+        reordered = trip_controller.reorder_trip_places(trip_id, data['place_ids'])
+        return jsonify({"message": "Trip places reordered successfully", "reordered": reordered}), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 400
+
 # Eliminar un lugar de un viaje
 @trip_routes.route('/trips/<int:trip_id>/places/<int:place_id>', methods=['DELETE'])
 @jwt_required()
@@ -214,6 +271,141 @@ def get_trip_statistics(trip_id):
     except Exception as e:
         return jsonify({"error": str(e)}), 400
 
+# Agregar un gasto a un viaje
+@trip_routes.route('/trips/<int:trip_id>/expenses', methods=['POST'])
+@jwt_required()
+def add_trip_expense(trip_id):
+    current_user_id = int(get_jwt_identity())  # Convertir a int
+    data = request.json
+
+    required_fields = ['category', 'description', 'amount', 'expense_date']
+    for field in required_fields:
+        if field not in data:
+            return jsonify({"error": f"Missing required field: {field}"}), 400
+
+    try:
+        # Verificar que el viaje pertenece al usuario actual
+        trip = trip_controller.get_trip(trip_id)
+        if not trip or trip.user_id != current_user_id:
+            return jsonify({"error": "Unauthorized or trip not found"}), 403
+
+        expense_id = trip_expense_controller.add_expense(
+            trip_id=trip_id,
+            category=data['category'],
+            description=data['description'],
+            amount=data['amount'],
+            expense_date=data['expense_date'],
+            place_id=data.get('place_id')
+        )
+        return jsonify({"message": "Expense added successfully", "expense_id": expense_id}), 201
+    except Exception as e:
+        return jsonify({"error": str(e)}), 400
+
+# Obtener los gastos de un viaje
+@trip_routes.route('/trips/<int:trip_id>/expenses', methods=['GET'])
+@jwt_required()
+def get_trip_expenses(trip_id):
+    current_user_id = int(get_jwt_identity())  # Convertir a int
+
+    try:
+        trip = trip_controller.get_trip(trip_id)
+        if not trip or trip.user_id != current_user_id:
+            return jsonify({"error": "Unauthorized or trip not found"}), 403
+
+        expenses = trip_expense_controller.get_expenses(trip_id)
+        return jsonify({"expenses": [expense.to_dict() for expense in expenses]}), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 400
+
+# Actualizar un gasto de un viaje
+@trip_routes.route('/trips/<int:trip_id>/expenses/<int:expense_id>', methods=['PUT'])
+@jwt_required()
+def update_trip_expense(trip_id, expense_id):
+    current_user_id = int(get_jwt_identity())  # Convertir a int
+    data = request.json
+
+    try:
+        trip = trip_controller.get_trip(trip_id)
+        if not trip or trip.user_id != current_user_id:
+            return jsonify({"error": "Unauthorized or trip not found"}), 403
+
+        updated_expense_id = trip_expense_controller.update_expense(
+            trip_id=trip_id,
+            expense_id=expense_id,
+            category=data.get('category'),
+            description=data.get('description'),
+            amount=data.get('amount'),
+            expense_date=data.get('expense_date'),
+            place_id=data.get('place_id')
+        )
+        if updated_expense_id:
+            return jsonify({"message": "Expense updated successfully", "expense_id": updated_expense_id}), 200
+        else:
+            return jsonify({"error": "Expense not found"}), 404
+    except Exception as e:
+        return jsonify({"error": str(e)}), 400
+
+# Eliminar un gasto de un viaje
+@trip_routes.route('/trips/<int:trip_id>/expenses/<int:expense_id>', methods=['DELETE'])
+@jwt_required()
+def delete_trip_expense(trip_id, expense_id):
+    current_user_id = int(get_jwt_identity())  # Convertir a int
+
+    try:
+        trip = trip_controller.get_trip(trip_id)
+        if not trip or trip.user_id != current_user_id:
+            return jsonify({"error": "Unauthorized or trip not found"}), 403
+
+        deleted_expense_id = trip_expense_controller.delete_expense(trip_id, expense_id)
+        if deleted_expense_id:
+            return jsonify({"message": "Expense deleted successfully", "expense_id": deleted_expense_id}), 200
+        else:
+            return jsonify({"error": "Expense not found"}), 404
+    except Exception as e:
+        return jsonify({"error": str(e)}), 400
+
+# Importar gastos en bloque: el cuerpo es CSV (Content-Type: text/csv, con
+# encabezado category,description,amount,expense_date,place_id) o NDJSON
+# (application/x-ndjson). Se lee como stream y se carga con COPY.
+@trip_routes.route('/trips/<int:trip_id>/expenses/import', methods=['POST'])
+@jwt_required()
+def import_trip_expenses(trip_id):
+    current_user_id = int(get_jwt_identity())  # Convertir a int
+
+    mimetype = request.mimetype
+    if mimetype == 'text/csv':
+        fmt = 'csv'
+    elif mimetype in ('application/x-ndjson', 'application/ndjson'):
+        fmt = 'ndjson'
+    else:
+        return jsonify({"error": "Content-Type must be text/csv or application/x-ndjson"}), 415
+
+    try:
+        trip = trip_controller.get_trip(trip_id)
+        if not trip or trip.user_id != current_user_id:
+            return jsonify({"error": "Unauthorized or trip not found"}), 403
+
+        lines = io.TextIOWrapper(request.stream, encoding='utf-8', newline='')
+        imported = trip_expense_controller.import_expenses(trip_id, lines, fmt)
+        return jsonify({"message": "Expenses imported successfully", "imported": imported}), 201
+    except Exception as e:
+        return jsonify({"error": str(e)}), 400
+
+# Gastos por categoría y por día, y total frente al presupuesto
+@trip_routes.route('/trips/<int:trip_id>/expenses/summary', methods=['GET'])
+@jwt_required()
+def get_trip_expense_summary(trip_id):
+    current_user_id = int(get_jwt_identity())  # Convertir a int
+
+    try:
+        trip = trip_controller.get_trip(trip_id)
+        if not trip or trip.user_id != current_user_id:
+            return jsonify({"error": "Unauthorized or trip not found"}), 403
+
+        return jsonify(trip_expense_controller.get_expense_summary(trip_id)), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 400
+
 # Buscar viajes (funcionalidad avanzada)
 @trip_routes.route('/trips/search', methods=['GET'])
 @jwt_required()
@@ -227,8 +419,35 @@ def search_trips():
     title_search = request.args.get('title')
     page = int(request.args.get('page', 1))
     page_size = int(request.args.get('page_size', 10))
+    cursor = request.args.get('cursor')
+    search_criteria = {
+        "status": status,
+        "start_date_from": start_date_from,
+        "start_date_to": start_date_to,
+        "title": title_search
+    }
     
     try:
+        if cursor is not None:
+            # Paginación por cursor (start_date, id), sin total
+            trips, next_cursor = trip_controller.search_trips_by_cursor(
+                user_id=current_user_id,
+                status=status,
+                start_date_from=start_date_from,
+                start_date_to=start_date_to,
+                title_search=title_search,
+                cursor=cursor,
+                page_size=page_size
+            )
+            return jsonify({
+                "trips": [trip.to_dict() for trip in trips],
+                "next_cursor": next_cursor,
+                "page_size": page_size,
+                "search_criteria": search_criteria
+            }), 200
+
+        # Total opcional: ?include_total=false|true (estimado)|exact
+        include_total = parse_include_total(request.args.get('include_total'))
         trips, total_count = trip_controller.search_trips(
             user_id=current_user_id,
             status=status,
@@ -236,20 +455,18 @@ def search_trips():
             start_date_to=start_date_to,
             title_search=title_search,
             page=page,
-            page_size=page_size
+            page_size=page_size,
+            include_total=include_total
         )
         
-        return jsonify({
+        response = {
             "trips": [trip.to_dict() for trip in trips],
-            "total_count": total_count,
             "page": page,
             "page_size": page_size,
-            "search_criteria": {
-                "status": status,
-                "start_date_from": start_date_from,
-                "start_date_to": start_date_to,
-                "title": title_search
-            }
-        }), 200
+            "search_criteria": search_criteria
+        }
+        if include_total:
+            response["total_count"] = total_count
+        return jsonify(response), 200
     except Exception as e:
         return jsonify({"error": str(e)}), 400
\ No newline at end of file
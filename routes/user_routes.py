@@ -3,6 +3,7 @@ from flask_jwt_extended import jwt_required, get_jwt_identity, create_access_tok
 from services.auth_service import authenticate_user
 from flask import Blueprint, request, jsonify
 from controllers import user_controller
+from services.pagination import parse_ids
 
 user_routes = Blueprint('user_routes', __name__)
 
@@ -33,6 +34,21 @@ def get_user(user_id):
     else:
         return jsonify({"error": "User not found"}), 404
     
+# Obtener varios usuarios: /users?ids=3,1,2
+# Los resultados siguen el orden de ids; los que no existen son null y se listan en "missing"
+@user_routes.route('/users', methods=['GET'])
+@jwt_required()
+def get_users():
+    try:
+        user_ids = parse_ids(request.args.get('ids', ''))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    users = user_controller.get_many(user_ids)
+    return jsonify({
+        "users": [user.to_dict() if user else None for user in users],
+        "missing": [user_id for user_id, user in zip(user_ids, users) if user is None]
+    }), 200
+
 # Login
 @user_routes.route('/login', methods=['POST'])
 @jwt_required()
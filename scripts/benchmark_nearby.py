@@ -0,0 +1,116 @@
+# scripts/benchmark_nearby.py
+# Mide la latencia de la busqueda de lugares cercanos con N lugares aleatorios,
+# en Redis (GEOSEARCH) y en PostgreSQL (indice GiST de earthdistance).
+# Usa una llave y una tabla temporales, no toca los datos reales.
+# Uso: python -m scripts.benchmark_nearby --places 1000000 --queries 1000
+import time
+import random
+import argparse
+from config.database import get_redis_connection, postgres_connection
+from services import geo_service
+
+BENCH_KEY = "bench:places:geo"
+# Caja de Centroamerica: densidad parecida a la de una region con muchos lugares
+LAT_RANGE = (7.0, 18.0)
+LON_RANGE = (-92.0, -77.0)
+
+NEARBY_SQL = """
+    SELECT p.id, earth_distance(ll_to_earth(p.latitude, p.longitude), ll_to_earth(%(lat)s, %(lon)s))
+    FROM bench_places p
+    WHERE %(radius)s::float8 IS NULL
+       OR (earth_box(ll_to_earth(%(lat)s, %(lon)s), %(radius)s) @> ll_to_earth(p.latitude, p.longitude)
+           AND earth_distance(ll_to_earth(p.latitude, p.longitude), ll_to_earth(%(lat)s, %(lon)s)) <= %(radius)s)
+    ORDER BY ll_to_earth(p.latitude, p.longitude) <-> ll_to_earth(%(lat)s, %(lon)s)
+    LIMIT %(limit)s
+"""
+
+
+def _point():
+    return random.uniform(*LAT_RANGE), random.uniform(*LON_RANGE)
+
+def _percentiles(samples):
+    samples = sorted(samples)
+    pick = lambda p: samples[min(len(samples) - 1, int(len(samples) * p))] * 1000
+    return f"p50={pick(0.50):.3f}ms p95={pick(0.95):.3f}ms p99={pick(0.99):.3f}ms"
+
+def _measure(run, queries):
+    samples = []
+    for _ in range(queries):
+        lat, lon = _point()
+        start = time.perf_counter()
+        run(lat, lon)
+        samples.append(time.perf_counter() - start)
+    return _percentiles(samples)
+
+def bench_redis(places, queries, radius_km, limit):
+    redis_client = get_redis_connection()
+    if redis_client is None:
+        print("Redis no esta disponible, se omite")
+        return
+    redis_client.delete(BENCH_KEY)
+    try:
+        start = time.perf_counter()
+        for offset in range(0, places, 10000):
+            batch = []
+            for place_id in range(offset, min(offset + 10000, places)):
+                lat, lon = _point()
+                batch.extend((lon, lat, place_id))
+            redis_client.geoadd(BENCH_KEY, batch)
+        print(f"Redis: {places} lugares cargados en {time.perf_counter() - start:.1f}s")
+
+        # Misma logica que geo_service.nearby, sobre la llave de prueba
+        original_client, original_key = geo_service.redis_client, geo_service.GEO_KEY
+        geo_service.redis_client, geo_service.GEO_KEY = redis_client, BENCH_KEY
+        try:
+            print(f"Redis radio {radius_km}km: " + _measure(
+                lambda lat, lon: geo_service.nearby(lat, lon, radius_km, limit), queries))
+            print(f"Redis {limit} mas cercanos: " + _measure(
+                lambda lat, lon: geo_service.nearby(lat, lon, None, limit), queries))
+        finally:
+            geo_service.redis_client, geo_service.GEO_KEY = original_client, original_key
+    finally:
+        redis_client.delete(BENCH_KEY)
+
+def bench_postgres(places, queries, radius_km, limit):
+    # Todo en una transaccion: la tabla temporal se elimina al terminar
+    with postgres_connection() as conn:
+        with conn.cursor() as cur:
+            start = time.perf_counter()
+            cur.execute(
+                """
+                CREATE TEMP TABLE bench_places ON COMMIT DROP AS
+                SELECT i AS id,
+                       %s + random() * %s AS latitude,
+                       %s + random() * %s AS longitude
+                FROM generate_series(1, %s) AS i
+                """,
+                (LAT_RANGE[0], LAT_RANGE[1] - LAT_RANGE[0], LON_RANGE[0], LON_RANGE[1] - LON_RANGE[0], places)
+            )
+            cur.execute("CREATE INDEX ON bench_places USING GIST (ll_to_earth(latitude, longitude))")
+            cur.execute("ANALYZE bench_places")
+            print(f"PostgreSQL: {places} lugares cargados e indexados en {time.perf_counter() - start:.1f}s")
+
+            def run(lat, lon, radius_m):
+                cur.execute(NEARBY_SQL, {"lat": lat, "lon": lon, "radius": radius_m, "limit": limit})
+                cur.fetchall()
+
+            print(f"PostgreSQL radio {radius_km}km: " + _measure(
+                lambda lat, lon: run(lat, lon, radius_km * 1000), queries))
+            print(f"PostgreSQL {limit} mas cercanos: " + _measure(
+                lambda lat, lon: run(lat, lon, None), queries))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark de /places/nearby")
+    parser.add_argument("--places", type=int, default=1000000)
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--radius", type=float, default=10.0, help="radio en km")
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--skip-redis", action="store_true")
+    parser.add_argument("--skip-postgres", action="store_true")
+    args = parser.parse_args()
+
+    if not args.skip_redis:
+        bench_redis(args.places, args.queries, args.radius, args.limit)
+    if not args.skip_postgres:
+        bench_postgres(args.places, args.queries, args.radius, args.limit)
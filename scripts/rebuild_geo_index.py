@@ -0,0 +1,12 @@
+# scripts/rebuild_geo_index.py
+# Reconstruye el set GEO de ubicaciones de lugares en Redis desde PostgreSQL.
+# Uso: python -m scripts.rebuild_geo_index
+from services import geo_service
+
+
+if __name__ == '__main__':
+    if not geo_service.enabled():
+        print("Redis no esta disponible, no hay indice que reconstruir")
+    else:
+        count = geo_service.rebuild_index()
+        print(f"Indice de ubicaciones reconstruido: {count} lugares")
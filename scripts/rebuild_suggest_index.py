@@ -0,0 +1,12 @@
+# scripts/rebuild_suggest_index.py
+# Reconstruye el indice de autocompletado en Redis desde PostgreSQL.
+# Uso: python -m scripts.rebuild_suggest_index
+from services import suggest_service
+
+
+if __name__ == '__main__':
+    if not suggest_service.enabled():
+        print("Redis no esta disponible, no hay indice que reconstruir")
+    else:
+        counts = suggest_service.rebuild_index()
+        print(f"Indice de sugerencias reconstruido: {counts['places']} lugares, {counts['users']} usuarios")
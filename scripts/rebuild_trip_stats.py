@@ -0,0 +1,11 @@
+# scripts/rebuild_trip_stats.py
+# Recalcula la tabla trip_stats desde trip_places y trip_expenses.
+# Uso: python -m scripts.rebuild_trip_stats [trip_id ...]
+import sys
+from controllers import trip_controller
+
+
+if __name__ == '__main__':
+    trip_ids = [int(arg) for arg in sys.argv[1:]]
+    rebuilt = trip_controller.rebuild_trip_stats(trip_ids or None)
+    print(f"Estadisticas recalculadas para {rebuilt} viajes")
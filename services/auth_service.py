@@ -1,11 +1,30 @@
 # services/auth_service.py
-from flask_jwt_extended import create_access_token
+import os
+import functools
+from flask import jsonify
+from flask_jwt_extended import create_access_token, get_jwt_identity, jwt_required
 from werkzeug.security import check_password_hash
 from controllers import user_controller
 
+# Ids de los usuarios con acceso a las rutas de administracion, separados por coma
+ADMIN_USER_IDS = {user_id.strip() for user_id in os.getenv('ADMIN_USER_IDS', '').split(',') if user_id.strip()}
+
 def authenticate_user(username, password):
     user = user_controller.get_user_by_username(username)
     if user and check_password_hash(user.password, password):
         access_token = create_access_token(identity=user.id)
         return access_token
-    return None
\ No newline at end of file
+    return None
+
+def is_admin(user_id):
+    return user_id is not None and str(user_id) in ADMIN_USER_IDS
+
+# Como jwt_required, pero ademas el usuario tiene que estar en ADMIN_USER_IDS
+def admin_required(view):
+    @functools.wraps(view)
+    @jwt_required()
+    def wrapper(*args, **kwargs):
+        if not is_admin(get_jwt_identity()):
+            return jsonify({"error": "Admin access required"}), 403
+        return view(*args, **kwargs)
+    return wrapper
@@ -0,0 +1,119 @@
+# services/cache_codec.py
+import os
+import json
+from datetime import datetime, date
+from decimal import Decimal
+
+try:
+    import msgpack
+except ImportError:  # msgpack es opcional: sin el se usa JSON
+    msgpack = None
+
+
+class CacheCodecError(ValueError):
+    """La entrada del cache no tiene un formato conocido"""
+
+
+# Tipos que JSON no soporta de forma nativa se guardan como {"$tipo": valor}
+def _json_default(value):
+    if isinstance(value, datetime):
+        return {"$dt": value.isoformat()}
+    if isinstance(value, date):
+        return {"$date": value.isoformat()}
+    if isinstance(value, Decimal):
+        return {"$dec": str(value)}
+    raise TypeError(f"Object of type {type(value).__name__} is not cacheable")
+
+def _json_object_hook(obj):
+    if len(obj) == 1:
+        if "$dt" in obj:
+            return datetime.fromisoformat(obj["$dt"])
+        if "$date" in obj:
+            return date.fromisoformat(obj["$date"])
+        if "$dec" in obj:
+            return Decimal(obj["$dec"])
+    return obj
+
+
+class JsonCodec:
+    """JSON compacto con soporte para datetime, date y Decimal"""
+    version = 1
+    name = "json"
+
+    def encode(self, value):
+        return json.dumps(value, default=_json_default, separators=(",", ":"),
+                          ensure_ascii=False).encode("utf-8")
+
+    def decode(self, payload):
+        return json.loads(payload, object_hook=_json_object_hook)
+
+
+# Codigos de tipos extendidos de msgpack
+_EXT_DATETIME = 1
+_EXT_DATE = 2
+_EXT_DECIMAL = 3
+
+def _msgpack_default(value):
+    if isinstance(value, datetime):
+        return msgpack.ExtType(_EXT_DATETIME, value.isoformat().encode("ascii"))
+    if isinstance(value, date):
+        return msgpack.ExtType(_EXT_DATE, value.isoformat().encode("ascii"))
+    if isinstance(value, Decimal):
+        return msgpack.ExtType(_EXT_DECIMAL, str(value).encode("ascii"))
+    raise TypeError(f"Object of type {type(value).__name__} is not cacheable")
+
+def _msgpack_ext_hook(code, data):
+    if code == _EXT_DATETIME:
+        return datetime.fromisoformat(data.decode("ascii"))
+    if code == _EXT_DATE:
+        return date.fromisoformat(data.decode("ascii"))
+    if code == _EXT_DECIMAL:
+        return Decimal(data.decode("ascii"))
+    return msgpack.ExtType(code, data)
+
+
+class MsgpackCodec:
+    """Formato binario msgpack con tipos extendidos para datetime, date y Decimal"""
+    version = 2
+    name = "msgpack"
+
+    def encode(self, value):
+        return msgpack.packb(value, default=_msgpack_default, use_bin_type=True)
+
+    def decode(self, payload):
+        return msgpack.unpackb(payload, ext_hook=_msgpack_ext_hook, raw=False,
+                               strict_map_key=False)
+
+
+# Codecs registrados por su byte de version
+CODECS = {JsonCodec.version: JsonCodec()}
+if msgpack is not None:
+    CODECS[MsgpackCodec.version] = MsgpackCodec()
+
+def get_codec(name=None):
+    name = name or os.getenv('CACHE_CODEC') or ("msgpack" if msgpack is not None else "json")
+    for codec in CODECS.values():
+        if codec.name == name:
+            return codec
+    raise CacheCodecError(f"Unknown cache codec: {name}")
+
+_default_codec = get_codec()
+
+# Serializa un valor: el primer byte indica el codec usado
+def encode_entry(value, codec=None):
+    codec = codec or _default_codec
+    return bytes((codec.version,)) + codec.encode(value)
+
+# Deserializa una entrada usando el codec indicado por su primer byte
+def decode_entry(entry):
+    if isinstance(entry, str):
+        entry = entry.encode("utf-8")
+    if not entry:
+        raise CacheCodecError("Empty cache entry")
+    codec = CODECS.get(entry[0])
+    if codec is None:
+        raise CacheCodecError(f"Unknown cache entry version: {entry[0]}")
+    try:
+        return codec.decode(entry[1:])
+    except Exception as e:
+        raise CacheCodecError(f"Corrupt cache entry: {e}") from e
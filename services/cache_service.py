@@ -1,21 +1,373 @@
-# services/cache_service.py 
-from config.database import get_redis_connection
+# services/cache_service.py
+import os
+import time
+import uuid
+import threading
+import functools
+from collections import OrderedDict
+from redis.exceptions import RedisError
+from config.database import get_redis_connection, has_pending_writes
+from services.cache_codec import encode_entry, decode_entry, CacheCodecError
+from services.metrics import record_cache
 
-redis_client = get_redis_connection()
+# Las entradas son binarias (byte de version + payload), sin decode_responses
+redis_client = get_redis_connection(decode_responses=False)
+
+# Canal de pub/sub para invalidar el cache local de todos los workers
+INVALIDATION_CHANNEL = "cache:invalidate"
+
+
+class LocalCache:
+    """
+    Cache LRU en memoria del proceso, limitado en tamaño y con TTL.
+    Guarda las entradas ya serializadas para que nadie modifique el valor
+    cacheado al modificar el objeto que recibe.
+    """
+
+    def __init__(self, maxsize=1024, ttl=30.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()  # key -> (expira_en, entrada)
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0}
+
+    def get(self, key):
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                self.stats["misses"] += 1
+                return None
+            expires_at, entry = item
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                self.stats["expirations"] += 1
+                self.stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self.stats["hits"] += 1
+            return entry
+
+    def set(self, key, entry, ttl=None):
+        if self.maxsize <= 0:
+            return
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, entry)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.stats["evictions"] += 1
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self.stats, size=len(self._entries), max_size=self.maxsize)
+
+
+local_cache = LocalCache(
+    maxsize=int(os.getenv('LOCAL_CACHE_SIZE', 1024)),
+    ttl=float(os.getenv('LOCAL_CACHE_TTL', 30)),
+)
+_redis_stats = {"hits": 0, "misses": 0}
+_stats_lock = threading.Lock()
+_listener_pid = None
+
+
+def _count(name, key):
+    with _stats_lock:
+        _redis_stats[name] += 1
+    record_cache(key, name == "hits")
+
+# Escucha invalidaciones de otros workers y las aplica al cache local.
+# Si se pierde la conexion se vacia el cache local, porque pudo perder mensajes.
+def _listen_for_invalidations():
+    while True:
+        try:
+            pubsub = redis_client.pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(INVALIDATION_CHANNEL)
+            for message in pubsub.listen():
+                key = message.get("data")
+                if isinstance(key, bytes):
+                    key = key.decode("utf-8")
+                local_cache.delete(key)
+        except Exception as e:
+            print(f"Error en el canal de invalidacion del cache: {e}")
+        local_cache.clear()
+        time.sleep(1)
+
+# Inicia el listener una vez por proceso (tambien despues de un fork)
+def start_invalidation_listener():
+    global _listener_pid
+    if redis_client is None or _listener_pid == os.getpid():
+        return
+    _listener_pid = os.getpid()
+    threading.Thread(target=_listen_for_invalidations, name="cache-invalidation", daemon=True).start()
+
+# Los hilos no sobreviven a un fork: reiniciar el listener en cada worker
+def _restart_listener_after_fork():
+    if _listener_pid is not None:
+        start_invalidation_listener()
+
+os.register_at_fork(after_in_child=_restart_listener_after_fork)
+
+# Lee una llave: primero el cache local, luego Redis.
+# Las entradas ilegibles cuentan como miss.
+def cache_get(key):
+    entry = local_cache.get(key)
+    if entry is None:
+        entry = redis_client.get(key)
+        if not entry:
+            _count("misses", key)
+            return None
+        _count("hits", key)
+        local_cache.set(key, entry)
+    try:
+        return decode_entry(entry)
+    except CacheCodecError:
+        local_cache.delete(key)
+        return None
+
+def cache_set(key, value, expire_time=3600):
+    entry = encode_entry(value)
+    redis_client.setex(key, expire_time, entry)
+    local_cache.set(key, entry, ttl=expire_time)
+
+# Elimina las llaves de Redis y avisa a todos los workers (una sola ida a Redis)
+def cache_invalidate(*keys):
+    for key in keys:
+        local_cache.delete(key)
+    if redis_client is None:
+        return
+    pipe = redis_client.pipeline(transaction=False)
+    pipe.delete(*keys)
+    for key in keys:
+        pipe.publish(INVALIDATION_CHANNEL, key)
+    pipe.execute()
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+_flights = {}
+_flights_lock = threading.Lock()
+
+# Coalesce llamadas concurrentes con la misma llave dentro del proceso:
+# solo la primera ejecuta func, las demas esperan y reciben su resultado
+def single_flight(key, func):
+    with _flights_lock:
+        flight = _flights.get(key)
+        leader = flight is None
+        if leader:
+            flight = _flights[key] = _Flight()
+    if not leader:
+        flight.done.wait()
+        if flight.error is not None:
+            raise flight.error
+        return flight.result
+    try:
+        flight.result = func()
+        return flight.result
+    except Exception as e:
+        flight.error = e
+        raise
+    finally:
+        with _flights_lock:
+            _flights.pop(key, None)
+        flight.done.set()
+
+# Libera el lock solo si todavia es nuestro (compare-and-delete atomico)
+_RELEASE_LOCK_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+def _release_lock(lock_key, token):
+    redis_client.eval(_RELEASE_LOCK_SCRIPT, 1, lock_key, token)
+
+# Entrada serializada desde el cache local o Redis (sin deserializar)
+def _get_entry(key):
+    entry = local_cache.get(key)
+    if entry is None:
+        entry = redis_client.get(key)
+        if entry:
+            local_cache.set(key, entry)
+    return entry or None
+
+# Carga el valor y lo guarda en ambos niveles; devuelve la entrada serializada
+def _load_and_store(key, load, expire_time):
+    value = load()
+    if value is None:
+        return None
+    entry = encode_entry(value)
+    redis_client.setex(key, expire_time, entry)
+    local_cache.set(key, entry, ttl=expire_time)
+    return entry
+
+# Entre procesos: solo quien obtiene el lock consulta la base de datos;
+# los demas esperan a que aparezca la llave (o cargan ellos si tarda demasiado)
+def _load_with_lock(key, load, expire_time, lock_timeout, lock_wait):
+    lock_key = f"lock:{key}"
+    token = uuid.uuid4().hex
+    if redis_client.set(lock_key, token, nx=True, px=int(lock_timeout * 1000)):
+        try:
+            return _load_and_store(key, load, expire_time)
+        finally:
+            _release_lock(lock_key, token)
+    deadline = time.monotonic() + lock_wait
+    while time.monotonic() < deadline:
+        time.sleep(0.02)
+        entry = _get_entry(key)
+        if entry is not None:
+            return entry
+    return _load_and_store(key, load, expire_time)
+
+def read_through(key_func, to_cache, from_cache, expire_time=3600,
+                 distributed_lock=True, lock_timeout=5.0, lock_wait=2.0):
+    """
+    Decorador de lectura a traves del cache con proteccion contra estampidas.
+
+    key_func construye la llave a partir de los argumentos, to_cache convierte
+    el resultado en algo serializable y from_cache lo reconstruye. En un miss,
+    las llamadas concurrentes del proceso se coalescen (single-flight) y, con
+    distributed_lock, un lock en Redis evita que varios procesos consulten la
+    base de datos a la vez. Los resultados None no se cachean. Si Redis no esta
+    disponible, o la peticion ya escribio en su transaccion, se llama
+    directamente a la funcion.
+    """
+    def decorator(loader):
+        @functools.wraps(loader)
+        def wrapper(*args, **kwargs):
+            # Con escrituras sin confirmar en la peticion, lo que se lee puede
+            # revertirse: se consulta sin cache y sin coalescer con otras peticiones
+            if redis_client is None or has_pending_writes():
+                return loader(*args, **kwargs)
+            key = key_func(*args, **kwargs)
+
+            def load():
+                result = loader(*args, **kwargs)
+                return None if result is None else to_cache(result)
+
+            try:
+                entry = _get_entry(key)
+                if entry is None:
+                    _count("misses", key)
+                    if distributed_lock:
+                        fetch = lambda: _load_with_lock(key, load, expire_time, lock_timeout, lock_wait)
+                    else:
+                        fetch = lambda: _load_and_store(key, load, expire_time)
+                    entry = single_flight(key, fetch)
+                else:
+                    _count("hits", key)
+            except RedisError as e:
+                print(f"Error de Redis, leyendo sin cache: {e}")
+                return loader(*args, **kwargs)
+            if entry is None:
+                return None
+            try:
+                return from_cache(decode_entry(entry))
+            except CacheCodecError:
+                local_cache.delete(key)
+                return loader(*args, **kwargs)
+
+        # Acceso directo a la funcion original, sin cache
+        wrapper.uncached = loader
+        return wrapper
+    return decorator
+
+def read_through_many(ids, key_func, load_many, to_cache, from_cache, expire_time=3600):
+    """
+    Version por lotes de read_through: busca las llaves de todos los ids en el
+    cache local y luego con un solo MGET en Redis; los que faltan se cargan
+    con load_many(ids_faltantes) -> {id: objeto} en una sola consulta y se
+    guardan con un pipeline. Devuelve una lista en el orden de ids, con None
+    para los que no existen.
+    """
+    unique_ids = list(dict.fromkeys(ids))
+    if redis_client is None or has_pending_writes():
+        found = load_many(unique_ids) if unique_ids else {}
+        return [found.get(item_id) for item_id in ids]
+
+    values = {}
+    entries = {item_id: local_cache.get(key_func(item_id)) for item_id in unique_ids}
+    remote_ids = [item_id for item_id, entry in entries.items() if entry is None]
+    try:
+        if remote_ids:
+            for item_id, entry in zip(remote_ids, redis_client.mget([key_func(i) for i in remote_ids])):
+                if entry:
+                    _count("hits", key_func(item_id))
+                    local_cache.set(key_func(item_id), entry)
+                    entries[item_id] = entry
+                else:
+                    _count("misses", key_func(item_id))
+    except RedisError as e:
+        print(f"Error de Redis, leyendo sin cache: {e}")
+        found = load_many(unique_ids)
+        return [found.get(item_id) for item_id in ids]
+
+    for item_id, entry in entries.items():
+        if entry is None:
+            continue
+        try:
+            values[item_id] = from_cache(decode_entry(entry))
+        except CacheCodecError:
+            local_cache.delete(key_func(item_id))
+
+    missing = [item_id for item_id in unique_ids if item_id not in values]
+    if missing:
+        loaded = load_many(missing)
+        values.update(loaded)
+        try:
+            pipe = redis_client.pipeline(transaction=False)
+            for item_id, value in loaded.items():
+                entry = encode_entry(to_cache(value))
+                pipe.setex(key_func(item_id), expire_time, entry)
+                local_cache.set(key_func(item_id), entry, ttl=expire_time)
+            pipe.execute()
+        except RedisError as e:
+            print(f"Error al guardar en el cache: {e}")
+    return [values.get(item_id) for item_id in ids]
+
+# Contadores de aciertos/fallos por nivel de cache
+def get_cache_stats():
+    with _stats_lock:
+        redis_stats = dict(_redis_stats)
+    return {"local": local_cache.snapshot(), "redis": redis_stats}
 
 def cache_post(post_id, post_data, expire_time=3600):
-    key = f"post:{post_id}"
-    redis_client.setex(key, expire_time, str(post_data))
+    cache_set(f"post:{post_id}", post_data, expire_time)
 
 def get_cached_post(post_id):
-    key = f"post:{post_id}"
-    cached_post = redis_client.get(key)
-    return eval(cached_post) if cached_post else None
+    return cache_get(f"post:{post_id}")
+
+def invalidate_post(post_id):
+    cache_invalidate(f"post:{post_id}", f"post:{post_id}:expanded")
+
+# Solo el documento de ?expand= (p. ej. al agregar un comentario)
+def invalidate_post_expanded(post_id):
+    cache_invalidate(f"post:{post_id}:expanded")
+
+def invalidate_user(user_id):
+    cache_invalidate(f"user:{user_id}")
+
+def invalidate_place(place_id):
+    cache_invalidate(f"place:{place_id}")
+
+def invalidate_trip(trip_id):
+    cache_invalidate(f"trip:{trip_id}")
 
 def cache_popular_posts(posts, expire_time=3600):
-    key = "popular_posts"
-    redis_client.setex(key, expire_time, str(posts))
+    cache_set("popular_posts", posts, expire_time)
 
 def get_cached_popular_posts():
-    cached_posts = redis_client.get("popular_posts")
-    return eval(cached_posts) if cached_posts else None
\ No newline at end of file
+    return cache_get("popular_posts")
@@ -0,0 +1,46 @@
+# services/copy_stream.py
+import io
+import csv
+
+
+class CopyStream(io.RawIOBase):
+    """
+    Archivo de solo lectura que convierte un iterador de filas (tuplas) en CSV
+    a medida que COPY ... FROM STDIN lo lee (cursor.copy_expert), sin tener
+    todas las filas en memoria. None se escribe como campo vacio (NULL en
+    FORMAT csv). Una excepcion del iterador aborta el COPY; psycopg2 la
+    reemplaza por un error generico, asi que queda guardada en error.
+    """
+
+    def __init__(self, rows):
+        self._rows = iter(rows)
+        self._text = io.StringIO()
+        self._writer = csv.writer(self._text, lineterminator="\n")
+        self._buffer = b""
+        self.count = 0
+        self.error = None
+
+    def readable(self):
+        return True
+
+    def _fill(self, size):
+        self._text.seek(0)
+        self._text.truncate()
+        try:
+            for row in self._rows:
+                self._writer.writerow(row)
+                self.count += 1
+                if self._text.tell() >= size:
+                    break
+        except Exception as e:
+            self.error = e
+            raise
+        return self._text.getvalue().encode("utf-8")
+
+    def read(self, size=-1):
+        if size is None or size < 0:
+            size = 1 << 16
+        if len(self._buffer) < size:
+            self._buffer += self._fill(size - len(self._buffer))
+        chunk, self._buffer = self._buffer[:size], self._buffer[size:]
+        return chunk
@@ -0,0 +1,170 @@
+# services/counter_service.py
+import os
+import time
+import threading
+from redis.exceptions import RedisError
+from config.database import get_redis_connection, postgres_connection
+
+redis_client = get_redis_connection()
+
+# Los contadores de objetos sin actividad expiran y se recalculan al leerlos
+COUNTER_TTL = int(os.getenv('COUNTER_TTL', 24 * 3600))
+# Cada cuantos segundos se comparan con PostgreSQL los contadores modificados
+COUNTER_RECONCILE_INTERVAL = int(os.getenv('COUNTER_RECONCILE_INTERVAL', 300))
+RECONCILE_BATCH_SIZE = 1000
+
+# Objetos ("post:{id}" / "place:{id}") cuyos contadores cambiaron desde la ultima reconciliacion
+DIRTY_KEY = "counters:dirty"
+RECONCILE_LOCK_KEY = "lock:counters:reconcile"
+
+# Campo presente solo en los hashes cargados completos desde PostgreSQL.
+# Si falta (Redis vaciado, llave expirada o creada por un HINCRBY) se recalcula.
+BUILT_FIELD = "_built"
+LIKES_FIELD = "likes"
+REACTION_PREFIX = "reaction:"
+
+_reconciler_pid = None
+
+
+def counter_key(kind, target_id):
+    return f"counters:{kind}:{target_id}"
+
+def _target(post_id=None, place_id=None):
+    return ("post", post_id) if post_id is not None else ("place", place_id)
+
+# Conteos actuales en PostgreSQL, con los nombres de campo del hash
+def _load(kind, target_id):
+    with postgres_connection() as conn:
+        with conn.cursor() as cur:
+            if kind == "post":
+                cur.execute("SELECT get_like_count(%s, %s)", (target_id, None))
+            else:
+                cur.execute("SELECT get_like_count(%s, %s)", (None, target_id))
+            fields = {LIKES_FIELD: cur.fetchone()[0]}
+            if kind == "post":
+                cur.execute("SELECT * FROM get_reaction_counts(%s)", (target_id,))
+                fields.update({REACTION_PREFIX + reaction_type: count
+                               for reaction_type, count in cur.fetchall()})
+    return fields
+
+def _store(kind, target_id, fields):
+    key = counter_key(kind, target_id)
+    pipe = redis_client.pipeline()
+    pipe.delete(key)
+    pipe.hset(key, mapping=dict(fields, **{BUILT_FIELD: 1}))
+    pipe.expire(key, COUNTER_TTL)
+    pipe.execute()
+
+def _get_counters(kind, target_id):
+    if redis_client is None:
+        return _load(kind, target_id)
+    try:
+        cached = redis_client.hgetall(counter_key(kind, target_id))
+    except RedisError as e:
+        print(f"Error al leer los contadores de {kind} {target_id}: {e}")
+        return _load(kind, target_id)
+    if BUILT_FIELD in cached:
+        return {field: int(value) for field, value in cached.items() if field != BUILT_FIELD}
+    fields = _load(kind, target_id)
+    try:
+        _store(kind, target_id, fields)
+    except RedisError as e:
+        print(f"Error al guardar los contadores de {kind} {target_id}: {e}")
+    return fields
+
+# Aplica cambios [(kind, target_id, {campo: cantidad})] en una sola transaccion
+def _increment_many(changes):
+    if redis_client is None or not changes:
+        return
+    try:
+        pipe = redis_client.pipeline()
+        for kind, target_id, amounts in changes:
+            key = counter_key(kind, target_id)
+            for field, amount in amounts.items():
+                pipe.hincrby(key, field, amount)
+            pipe.expire(key, COUNTER_TTL)
+            pipe.sadd(DIRTY_KEY, f"{kind}:{target_id}")
+        pipe.execute()
+    except RedisError as e:
+        print(f"Error al actualizar los contadores: {e}")
+
+def _reaction_amounts(reaction_type, previous_type):
+    amounts = {REACTION_PREFIX + reaction_type: 1}
+    if previous_type is not None:
+        amounts[REACTION_PREFIX + previous_type] = -1
+    return amounts
+
+def get_like_count(post_id=None, place_id=None):
+    if post_id is None and place_id is None:
+        return 0
+    return _get_counters(*_target(post_id, place_id)).get(LIKES_FIELD, 0)
+
+# Lista de (tipo de reaccion, cantidad) de un post
+def get_reaction_counts(post_id):
+    return [
+        (field[len(REACTION_PREFIX):], count)
+        for field, count in _get_counters("post", post_id).items()
+        if field.startswith(REACTION_PREFIX) and count > 0
+    ]
+
+def record_like(post_id=None, place_id=None):
+    record_likes([(post_id, place_id)])
+
+# Likes nuevos [(post_id, place_id)]
+def record_likes(likes):
+    _increment_many([(*_target(post_id, place_id), {LIKES_FIELD: 1}) for post_id, place_id in likes])
+
+# Una reaccion nueva suma a su tipo; un cambio de tipo mueve el conteo
+def record_reaction(post_id, reaction_type, previous_type=None):
+    record_reactions([(post_id, reaction_type, previous_type)])
+
+# Reacciones aplicadas [(post_id, tipo, tipo anterior o None)]
+def record_reactions(reactions):
+    _increment_many([
+        ("post", post_id, _reaction_amounts(reaction_type, previous_type))
+        for post_id, reaction_type, previous_type in reactions
+        if reaction_type != previous_type
+    ])
+
+def reconcile_counters(limit=RECONCILE_BATCH_SIZE):
+    """
+    Recalcula desde PostgreSQL los contadores modificados desde la ultima
+    pasada y corrige lo que se haya desviado (incrementos perdidos por un
+    error de Redis o por una carrera con una recarga). Devuelve cuantos
+    objetos se recalcularon.
+    """
+    members = redis_client.spop(DIRTY_KEY, limit) or []
+    for i, member in enumerate(members):
+        kind, target_id = member.split(":", 1)
+        try:
+            _store(kind, target_id, _load(kind, target_id))
+        except Exception:
+            # Los que faltan quedan para la siguiente pasada
+            redis_client.sadd(DIRTY_KEY, *members[i:])
+            raise
+    return len(members)
+
+# Solo un worker reconcilia en cada intervalo
+def _run_reconciler():
+    while True:
+        time.sleep(COUNTER_RECONCILE_INTERVAL)
+        try:
+            if redis_client.set(RECONCILE_LOCK_KEY, os.getpid(), nx=True, ex=COUNTER_RECONCILE_INTERVAL):
+                while reconcile_counters() == RECONCILE_BATCH_SIZE:
+                    pass
+        except Exception as e:
+            print(f"Error al reconciliar los contadores: {e}")
+
+# Inicia la reconciliacion una vez por proceso (tambien despues de un fork)
+def start_counter_reconciler():
+    global _reconciler_pid
+    if redis_client is None or _reconciler_pid == os.getpid():
+        return
+    _reconciler_pid = os.getpid()
+    threading.Thread(target=_run_reconciler, name="counter-reconciler", daemon=True).start()
+
+def _restart_reconciler_after_fork():
+    if _reconciler_pid is not None:
+        start_counter_reconciler()
+
+os.register_at_fork(after_in_child=_restart_reconciler_after_fork)
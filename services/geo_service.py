@@ -0,0 +1,133 @@
+# services/geo_service.py
+import os
+from redis.exceptions import RedisError
+from config.database import get_redis_connection, postgres_connection
+
+redis_client = get_redis_connection()
+
+# Ubicacion de todos los lugares con coordenadas (GEOADD: miembro = id del lugar)
+GEO_KEY = "places:geo"
+# Radio maximo de busqueda (media circunferencia de la Tierra)
+MAX_RADIUS_KM = 20038.0
+# En modo k-NN se busca primero en este radio y se multiplica por
+# KNN_GROWTH hasta tener k lugares: GEOSEARCH ordena todo lo que cae en el
+# radio, asi que un radio enorme recorreria el set completo
+KNN_START_RADIUS_KM = float(os.getenv('GEO_KNN_START_RADIUS_KM', 5))
+KNN_GROWTH = 4
+# Redis GEO solo acepta latitudes hasta +-85.05: las busquedas que llegan mas
+# alla las responde PostgreSQL, que si tiene esos lugares
+MAX_LATITUDE = 85.05112878
+# Km por grado de latitud (redondeado hacia abajo: el radio se sobreestima)
+KM_PER_DEGREE = 110.5
+
+# Miembro centinela que rebuild_index agrega al terminar: indica que el set
+# tiene todos los lugares. Si falta (llave borrada, vaciada o nunca
+# construida) las busquedas van a PostgreSQL. Se ubica junto al polo sur,
+# donde casi ninguna busqueda lo alcanza.
+BUILT_MARKER = "*"
+BUILT_MARKER_POSITION = (0.0, -85.0, BUILT_MARKER)
+
+
+def enabled():
+    return redis_client is not None
+
+def index_place(place_id, latitude, longitude):
+    if not enabled():
+        return
+    try:
+        if latitude is None or longitude is None:
+            redis_client.zrem(GEO_KEY, place_id)
+        else:
+            redis_client.geoadd(GEO_KEY, (longitude, latitude, place_id))
+    except RedisError as e:
+        # Redis solo acepta latitudes entre -85.05 y 85.05; esos lugares
+        # solo se encuentran con la consulta de PostgreSQL
+        print(f"Error al indexar la ubicacion del lugar {place_id}: {e}")
+
+def remove_place(place_id):
+    if not enabled():
+        return
+    try:
+        redis_client.zrem(GEO_KEY, place_id)
+    except RedisError as e:
+        print(f"Error al quitar la ubicacion del lugar {place_id}: {e}")
+
+# True si el circulo puede incluir latitudes que Redis no guarda
+def _reaches_poles(latitude, radius_km):
+    return abs(latitude) + radius_km / KM_PER_DEGREE > MAX_LATITUDE
+
+# Lugares dentro del radio, o None si el indice no esta construido
+def _search(latitude, longitude, radius_km, limit):
+    pipe = redis_client.pipeline(transaction=False)
+    pipe.geopos(GEO_KEY, BUILT_MARKER)
+    # Uno de mas por si el centinela cae en el radio
+    pipe.geosearch(
+        GEO_KEY, longitude=longitude, latitude=latitude, radius=radius_km,
+        unit="km", sort="ASC", count=limit + 1, withdist=True
+    )
+    (built,), rows = pipe.execute()
+    if built is None:
+        return None
+    return [(int(member), distance) for member, distance in rows if member != BUILT_MARKER][:limit]
+
+def nearby(latitude, longitude, radius_km=None, limit=20):
+    """
+    Ids de los lugares cercanos al punto, del mas cercano al mas lejano, como
+    lista de (place_id, distancia_km). Con radius_km solo los que estan dentro
+    del radio; sin el, los limit mas cercanos. Devuelve None si Redis no esta
+    disponible, si el indice no esta construido o si la busqueda llega a
+    latitudes que Redis no guarda (el llamador usa PostgreSQL).
+    """
+    if not enabled():
+        return None
+    try:
+        if radius_km is not None:
+            radius_km = min(radius_km, MAX_RADIUS_KM)
+            if _reaches_poles(latitude, radius_km):
+                return None
+            return _search(latitude, longitude, radius_km, limit)
+        radius = KNN_START_RADIUS_KM
+        while True:
+            if _reaches_poles(latitude, radius):
+                return None
+            results = _search(latitude, longitude, radius, limit)
+            if results is None or len(results) >= limit or radius >= MAX_RADIUS_KM:
+                return results
+            radius = min(radius * KNN_GROWTH, MAX_RADIUS_KM)
+    except RedisError as e:
+        print(f"Error al buscar lugares cercanos en Redis: {e}")
+        return None
+
+# Reconstruye el set de ubicaciones desde PostgreSQL; el centinela se
+# agrega al final, cuando ya estan todos los lugares
+def rebuild_index(batch_size=1000):
+    redis_client.delete(GEO_KEY)
+    count = 0
+    with postgres_connection() as conn:
+        with conn.cursor(name="geo_rebuild") as cur:
+            cur.itersize = batch_size
+            cur.execute("SELECT id, latitude, longitude FROM places WHERE latitude IS NOT NULL")
+            batch = []
+            for place_id, latitude, longitude in cur:
+                batch.extend((longitude, latitude, place_id))
+                if len(batch) >= batch_size * 3:
+                    count += _add_batch(batch)
+                    batch = []
+            if batch:
+                count += _add_batch(batch)
+    redis_client.geoadd(GEO_KEY, BUILT_MARKER_POSITION)
+    return count
+
+def _add_batch(batch):
+    try:
+        redis_client.geoadd(GEO_KEY, batch)
+        return len(batch) // 3
+    except RedisError:
+        # Alguna coordenada fuera del rango de Redis: agregarlas una por una
+        added = 0
+        for i in range(0, len(batch), 3):
+            try:
+                added += redis_client.geoadd(GEO_KEY, batch[i:i + 3])
+            except RedisError as e:
+                print(f"Lugar {batch[i + 2]} sin indexar: {e}")
+        return added
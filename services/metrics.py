@@ -0,0 +1,132 @@
+# services/metrics.py
+import os
+import re
+from prometheus_client import (
+    CollectorRegistry, Counter, Gauge, Histogram, REGISTRY, CONTENT_TYPE_LATEST, generate_latest, multiprocess
+)
+from prometheus_client.core import GaugeMetricFamily
+
+# Con varios workers (gunicorn, uwsgi) cada proceso escribe sus metricas en
+# archivos de este directorio y /metrics los suma al responder. La variable
+# debe estar definida antes de iniciar el servidor y el directorio vacio.
+MULTIPROC_DIR = os.getenv('PROMETHEUS_MULTIPROC_DIR')
+
+# Buckets en segundos, de 1 ms a 10 s
+REQUEST_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 10.0)
+
+http_requests = Counter(
+    'http_requests_total', 'Peticiones HTTP atendidas', ['endpoint', 'method', 'status']
+)
+http_request_duration = Histogram(
+    'http_request_duration_seconds', 'Duracion de las peticiones HTTP', ['endpoint'], buckets=REQUEST_BUCKETS
+)
+db_queries = Counter(
+    'db_queries_total', 'Consultas a PostgreSQL por procedimiento', ['procedure']
+)
+db_query_duration = Histogram(
+    'db_query_duration_seconds', 'Duracion de las consultas a PostgreSQL', ['procedure'], buckets=QUERY_BUCKETS
+)
+db_pool_wait = Histogram(
+    'db_pool_wait_seconds', 'Espera por una conexion del pool', buckets=QUERY_BUCKETS
+)
+db_pool_connections = Gauge(
+    'db_pool_connections', 'Conexiones del pool de PostgreSQL por estado', ['state'],
+    multiprocess_mode='livesum'
+)
+cache_requests = Counter(
+    'cache_requests_total', 'Lecturas del cache por prefijo de llave', ['prefix', 'result']
+)
+outbox_events = Counter(
+    'notification_outbox_events_total', 'Notificaciones encoladas, escritas y lotes fallidos', ['event']
+)
+
+# "SELECT [* FROM] nombre(" con nombre_con_guion_bajo, como los stored
+# procedures de init/ (asi COUNT(*) o NOW() no se confunden con uno)
+_PROCEDURE_RE = re.compile(r"^\s*select\s+(?:\*\s+from\s+)?([a-z]+_[a-z0-9_]*)\s*\(", re.IGNORECASE)
+
+
+def procedure_name(sql):
+    """
+    Etiqueta de una consulta: el stored procedure que llama o, si no llama
+    ninguno, la primera palabra en minusculas (insert, commit, copy, ...).
+    Las etiquetas tienen que ser pocas: nunca se usa el texto completo.
+    """
+    if isinstance(sql, bytes):
+        sql = sql.decode("utf-8", "replace")
+    sql = str(sql)
+    match = _PROCEDURE_RE.match(sql)
+    if match:
+        return match.group(1).lower()
+    words = sql.split(None, 1)
+    return words[0].lower() if words else "unknown"
+
+# Prefijo de una llave de cache sin sus partes numericas:
+# "post:42:expanded" -> "post:expanded", "popular_posts" -> "popular_posts"
+def key_prefix(key):
+    if isinstance(key, bytes):
+        key = key.decode("utf-8", "replace")
+    parts = [part for part in str(key).split(":") if part and not part.lstrip("-").isdigit()]
+    return ":".join(parts[:2]) or "unknown"
+
+def record_request(endpoint, method, status, seconds):
+    http_requests.labels(endpoint, method, str(status)).inc()
+    http_request_duration.labels(endpoint).observe(seconds)
+
+def record_query(sql, seconds):
+    procedure = procedure_name(sql)
+    db_queries.labels(procedure).inc()
+    db_query_duration.labels(procedure).observe(seconds)
+
+def record_pool_wait(seconds):
+    db_pool_wait.observe(seconds)
+
+def record_cache(key, hit):
+    cache_requests.labels(key_prefix(key), "hit" if hit else "miss").inc()
+
+def record_outbox(event, amount=1):
+    outbox_events.labels(event).inc(amount)
+
+# Copia las estadisticas del pool del proceso a los gauges
+def update_pool_gauges(stats):
+    if not stats.get("initialized"):
+        return
+    for state in ("in_use", "idle", "max_size"):
+        db_pool_connections.labels(state).set(stats.get(state, 0))
+
+
+class OutboxCollector:
+    """
+    Notificaciones pendientes en el outbox, leidas al momento de responder
+    /metrics. El stream de Redis es compartido, asi que no hace falta
+    sumarlo entre procesos.
+    """
+
+    def collect(self):
+        # Importacion tardia: notification_outbox abre la conexion a Redis
+        from services.notification_outbox import get_outbox_stats
+        stats = get_outbox_stats()
+        backlog = GaugeMetricFamily(
+            'notification_outbox_backlog', 'Notificaciones pendientes de escribir'
+        )
+        backlog.add_metric([], stats.get("backlog") or 0)
+        yield backlog
+
+
+_outbox_registry = CollectorRegistry()
+_outbox_registry.register(OutboxCollector())
+
+
+def generate_metrics():
+    """Texto de /metrics (formato de exposicion de Prometheus) y su content type"""
+    if MULTIPROC_DIR:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry) + generate_latest(_outbox_registry), CONTENT_TYPE_LATEST
+
+# Para el hook child_exit de gunicorn: borra los gauges del worker terminado
+def mark_worker_dead(pid):
+    if MULTIPROC_DIR:
+        multiprocess.mark_process_dead(pid)
@@ -0,0 +1,185 @@
+# services/notification_outbox.py
+import os
+import time
+import uuid
+import queue
+import socket
+import threading
+from psycopg2.extras import Json
+from redis.exceptions import RedisError, ResponseError
+from config.database import get_redis_connection, postgres_connection
+from services.metrics import record_outbox
+
+redis_client = get_redis_connection()
+
+# Stream de Redis con las notificaciones pendientes de escribir en PostgreSQL
+OUTBOX_STREAM = "notifications:outbox"
+OUTBOX_GROUP = "notification-writers"
+# Notificaciones por cada INSERT
+OUTBOX_BATCH_SIZE = int(os.getenv('OUTBOX_BATCH_SIZE', 500))
+# Mensajes sin confirmar por mas de este tiempo (p. ej. de un worker que murio)
+# los toma otro consumidor
+OUTBOX_CLAIM_IDLE_MS = int(os.getenv('OUTBOX_CLAIM_IDLE_MS', 30000))
+
+# Sin Redis se usa una cola en memoria del proceso
+_local_queue = queue.Queue()
+_stats = {"enqueued": 0, "written": 0, "failed_batches": 0}
+_stats_lock = threading.Lock()
+_worker_pid = None
+_group_ready = False
+
+
+def _count(name, amount=1):
+    with _stats_lock:
+        _stats[name] += amount
+    record_outbox(name, amount)
+
+def _consumer_name():
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+def _ensure_group():
+    global _group_ready
+    if _group_ready:
+        return
+    try:
+        redis_client.xgroup_create(OUTBOX_STREAM, OUTBOX_GROUP, id="0", mkstream=True)
+    except ResponseError as e:
+        if "BUSYGROUP" not in str(e):
+            raise
+    _group_ready = True
+
+def enqueue_notification(user_id, type, content, related_id=None, dedup_key=None):
+    """
+    Agrega una notificacion al outbox; un worker en segundo plano la escribe.
+    dedup_key identifica el evento: si se entrega mas de una vez, solo se inserta una.
+    """
+    item = {
+        "user_id": int(user_id),
+        "type": type,
+        "content": content,
+        "related_id": related_id,
+        "dedup_key": dedup_key or uuid.uuid4().hex,
+    }
+    if redis_client is not None:
+        try:
+            fields = dict(item, related_id="" if related_id is None else related_id)
+            redis_client.xadd(OUTBOX_STREAM, fields)
+            _count("enqueued")
+            return item["dedup_key"]
+        except RedisError as e:
+            print(f"Error al encolar la notificacion en Redis, se usa la cola local: {e}")
+    _local_queue.put(item)
+    _count("enqueued")
+    return item["dedup_key"]
+
+def _from_fields(fields):
+    return {
+        "user_id": int(fields["user_id"]),
+        "type": fields["type"],
+        "content": fields["content"],
+        "related_id": int(fields["related_id"]) if fields.get("related_id") else None,
+        "dedup_key": fields["dedup_key"],
+    }
+
+# Escribe el lote con un solo INSERT de varias filas
+def _write_batch(items):
+    with postgres_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("SELECT create_notifications_batch(%s)", (Json(items),))
+            return cur.fetchone()[0]
+
+def _flush_stream(block_ms):
+    _ensure_group()
+    consumer = _consumer_name()
+    # Primero los mensajes abandonados por otros consumidores (o por un intento fallido)
+    _, messages, *_ = redis_client.xautoclaim(
+        OUTBOX_STREAM, OUTBOX_GROUP, consumer,
+        min_idle_time=OUTBOX_CLAIM_IDLE_MS, start_id="0-0", count=OUTBOX_BATCH_SIZE
+    )
+    messages = [(message_id, fields) for message_id, fields in messages if fields]
+    if len(messages) < OUTBOX_BATCH_SIZE:
+        response = redis_client.xreadgroup(
+            OUTBOX_GROUP, consumer, {OUTBOX_STREAM: ">"},
+            count=OUTBOX_BATCH_SIZE - len(messages), block=block_ms
+        )
+        for _, stream_messages in response or []:
+            messages.extend(stream_messages)
+    if not messages:
+        return 0
+
+    try:
+        written = _write_batch([_from_fields(fields) for _, fields in messages])
+    except Exception:
+        # Sin XACK: los mensajes quedan pendientes y se reintentan con XAUTOCLAIM
+        _count("failed_batches")
+        raise
+    # Confirmar solo despues del commit (at-least-once) y sacarlos del stream
+    message_ids = [message_id for message_id, _ in messages]
+    pipe = redis_client.pipeline(transaction=False)
+    pipe.xack(OUTBOX_STREAM, OUTBOX_GROUP, *message_ids)
+    pipe.xdel(OUTBOX_STREAM, *message_ids)
+    pipe.execute()
+    _count("written", written)
+    return len(messages)
+
+def _flush_local(block_ms):
+    items = []
+    try:
+        items.append(_local_queue.get(timeout=block_ms / 1000) if block_ms else _local_queue.get_nowait())
+        while len(items) < OUTBOX_BATCH_SIZE:
+            items.append(_local_queue.get_nowait())
+    except queue.Empty:
+        pass
+    if not items:
+        return 0
+    try:
+        written = _write_batch(items)
+    except Exception:
+        _count("failed_batches")
+        for item in items:
+            _local_queue.put(item)
+        raise
+    _count("written", written)
+    return len(items)
+
+# Procesa un lote del outbox; devuelve cuantas notificaciones se procesaron
+def flush_outbox(block_ms=None):
+    if redis_client is not None:
+        return _flush_stream(block_ms)
+    return _flush_local(block_ms)
+
+def _run_worker():
+    backoff = 0.5
+    while True:
+        try:
+            flush_outbox(block_ms=1000)
+            backoff = 0.5
+        except Exception as e:
+            print(f"Error al escribir notificaciones del outbox: {e}")
+            time.sleep(backoff)
+            backoff = min(backoff * 2, 30)
+
+# Inicia el worker una vez por proceso (tambien despues de un fork)
+def start_notification_worker():
+    global _worker_pid
+    if _worker_pid == os.getpid():
+        return
+    _worker_pid = os.getpid()
+    threading.Thread(target=_run_worker, name="notification-outbox", daemon=True).start()
+
+def _restart_worker_after_fork():
+    global _group_ready
+    _group_ready = False
+    if _worker_pid is not None:
+        start_notification_worker()
+
+os.register_at_fork(after_in_child=_restart_worker_after_fork)
+
+# Notificaciones pendientes y contadores del proceso
+def get_outbox_stats():
+    stats = dict(_stats)
+    try:
+        stats["backlog"] = redis_client.xlen(OUTBOX_STREAM) if redis_client is not None else _local_queue.qsize()
+    except RedisError:
+        stats["backlog"] = None
+    return stats
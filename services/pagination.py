@@ -0,0 +1,77 @@
+# services/pagination.py
+import json
+import base64
+from datetime import datetime, date
+
+
+class InvalidCursorError(ValueError):
+    """El cursor de paginacion no es valido"""
+
+
+# Tipos de llave de ordenamiento que puede llevar un cursor
+_PARSERS = {
+    "datetime": datetime.fromisoformat,
+    "date": date.fromisoformat,
+    "score": float,
+    # Busqueda: (relevancia, tipo de contenido)
+    "rank": lambda key: (float(key[0]), str(key[1])),
+}
+
+
+# Cursor opaco (base64 de JSON) con la llave de ordenamiento y el id
+# de la ultima fila de la pagina
+def encode_cursor(sort_key, row_id):
+    if isinstance(sort_key, (datetime, date)):
+        sort_key = sort_key.isoformat()
+    raw = json.dumps([sort_key, row_id], separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor, kind="datetime"):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        sort_key, row_id = json.loads(raw)
+        if not isinstance(row_id, int):
+            raise TypeError("cursor id must be an integer")
+        return _PARSERS[kind](sort_key), row_id
+    except (ValueError, TypeError, IndexError, KeyError) as e:
+        raise InvalidCursorError("Invalid pagination cursor") from e
+
+# Recibe hasta page_size + 1 elementos: si sobra uno, hay pagina siguiente.
+# Devuelve (elementos de la pagina, cursor siguiente o None).
+def paginate(items, page_size, sort_key):
+    if len(items) <= page_size:
+        return items, None
+    items = items[:page_size]
+    return items, encode_cursor(*sort_key(items[-1]))
+
+# Modo del total en las respuestas paginadas (?include_total=):
+# false -> sin total, true (por defecto) -> contador o estimacion barata,
+# exact -> COUNT(*) exacto bajo demanda
+def parse_include_total(value):
+    value = (value or "true").lower()
+    if value in ("false", "0", "no"):
+        return None
+    if value == "exact":
+        return "exact"
+    return "estimate"
+
+# Si la pagina no se lleno, el total se conoce sin contar
+def total_from_page(page, page_size, rows):
+    if rows < page_size and (rows > 0 or page == 1):
+        return (page - 1) * page_size + rows
+    return None
+
+# Maximo de ids por peticion en los endpoints ?ids=
+MAX_IDS = 100
+
+# Convierte "3,1,2" en [3, 1, 2] (conserva el orden y los repetidos)
+def parse_ids(value, max_ids=MAX_IDS):
+    try:
+        ids = [int(part) for part in value.split(",") if part.strip()]
+    except ValueError as e:
+        raise ValueError("ids must be a comma-separated list of integers") from e
+    if not ids:
+        raise ValueError("ids must not be empty")
+    if len(ids) > max_ids:
+        raise ValueError(f"At most {max_ids} ids per request")
+    return ids
@@ -0,0 +1,107 @@
+# services/search_cache.py
+import os
+import json
+import time
+import hashlib
+import threading
+from redis.exceptions import RedisError
+from config.database import get_redis_connection, has_pending_writes
+from services.cache_codec import encode_entry, decode_entry, CacheCodecError
+from services.cache_service import local_cache
+from services.metrics import record_cache
+
+redis_client = get_redis_connection(decode_responses=False)
+
+SEARCH_CACHE_TTL = int(os.getenv('SEARCH_CACHE_TTL', 300))
+
+# Generacion de cada tipo de contenido. Se incrementa al crear, editar o
+# eliminar contenido de ese tipo; como forma parte de la llave, las busquedas
+# cacheadas con la generacion anterior dejan de usarse y expiran solas.
+GENERATION_KEY = "search:gen:{}"
+
+_stats = {"hits": 0, "misses": 0, "hit_time": 0.0, "miss_time": 0.0}
+_stats_lock = threading.Lock()
+
+
+def _record(counter, timer, elapsed):
+    with _stats_lock:
+        _stats[counter] += 1
+        _stats[timer] += elapsed
+    record_cache("search", counter == "hits")
+
+# Mayusculas y espacios no cambian el resultado de websearch_to_tsquery
+def normalize_query(query):
+    return " ".join(query.casefold().split())
+
+def bump_generation(content_type):
+    if redis_client is None:
+        return
+    try:
+        redis_client.incr(GENERATION_KEY.format(content_type))
+    except RedisError as e:
+        print(f"Error al invalidar las busquedas de {content_type}: {e}")
+
+def _cache_key(query, types, date_from, date_to, cursor, limit):
+    types = sorted(types)
+    generations = redis_client.mget([GENERATION_KEY.format(t) for t in types])
+    params = [
+        normalize_query(query),
+        {t: int(g or 0) for t, g in zip(types, generations)},
+        date_from.isoformat() if date_from else None,
+        date_to.isoformat() if date_to else None,
+        cursor,
+        limit,
+    ]
+    digest = hashlib.sha1(json.dumps(params, separators=(",", ":")).encode("utf-8")).hexdigest()
+    return f"search:result:{digest}"
+
+def cached_search(query, types, date_from, date_to, cursor, limit, load):
+    """
+    Devuelve la pagina de resultados cacheada para la consulta normalizada y
+    los filtros, o la carga con load() y la guarda por SEARCH_CACHE_TTL segundos.
+    types son los tipos de contenido que abarca la busqueda: su generacion
+    forma parte de la llave.
+    """
+    if redis_client is None or has_pending_writes():
+        return load()
+    start = time.perf_counter()
+    try:
+        key = _cache_key(query, types, date_from, date_to, cursor, limit)
+        entry = local_cache.get(key)
+        if entry is None:
+            entry = redis_client.get(key)
+            if entry:
+                local_cache.set(key, entry, ttl=SEARCH_CACHE_TTL)
+        if entry:
+            try:
+                page = decode_entry(entry)
+                _record("hits", "hit_time", time.perf_counter() - start)
+                return page
+            except CacheCodecError:
+                local_cache.delete(key)
+    except RedisError as e:
+        print(f"Error de Redis, buscando sin cache: {e}")
+        return load()
+
+    page = load()
+    try:
+        entry = encode_entry(page)
+        redis_client.setex(key, SEARCH_CACHE_TTL, entry)
+        local_cache.set(key, entry, ttl=SEARCH_CACHE_TTL)
+    except RedisError as e:
+        print(f"Error al guardar la busqueda en el cache: {e}")
+    _record("misses", "miss_time", time.perf_counter() - start)
+    return page
+
+# Aciertos, fallos y latencia promedio (ms) de las busquedas cacheadas
+def get_search_cache_stats():
+    with _stats_lock:
+        stats = dict(_stats)
+    total = stats["hits"] + stats["misses"]
+    return {
+        "hits": stats["hits"],
+        "misses": stats["misses"],
+        "hit_ratio": round(stats["hits"] / total, 4) if total else None,
+        "avg_hit_ms": round(stats["hit_time"] * 1000 / stats["hits"], 3) if stats["hits"] else None,
+        "avg_miss_ms": round(stats["miss_time"] * 1000 / stats["misses"], 3) if stats["misses"] else None,
+    }
@@ -0,0 +1,161 @@
+# services/slow_query_log.py
+import os
+import sys
+import queue
+import random
+import threading
+from collections import deque
+from datetime import datetime, date, time as dt_time
+from decimal import Decimal
+from config.database import add_query_observer, get_postgres_pool
+
+# Consultas que tardan al menos esto (ms) se registran; 0 lo desactiva
+SLOW_QUERY_MS = float(os.getenv('SLOW_QUERY_MS', 250))
+# Consultas lentas que se guardan (las mas recientes)
+SLOW_QUERY_LOG_SIZE = int(os.getenv('SLOW_QUERY_LOG_SIZE', 100))
+# Fraccion de las consultas lentas a las que se les captura el plan con
+# EXPLAIN (ANALYZE, BUFFERS); ANALYZE vuelve a ejecutar la consulta
+SLOW_QUERY_EXPLAIN_SAMPLE = float(os.getenv('SLOW_QUERY_EXPLAIN_SAMPLE', 0))
+# Tiempo maximo (ms) de cada EXPLAIN ANALYZE
+SLOW_QUERY_EXPLAIN_TIMEOUT_MS = int(os.getenv('SLOW_QUERY_EXPLAIN_TIMEOUT_MS', 10000))
+# EXPLAIN pendientes; si la cola esta llena la muestra se descarta
+EXPLAIN_QUEUE_SIZE = 20
+
+EXPLAIN_THREAD_NAME = "slow-query-explain"
+# Solo se explican lecturas; aun asi se ejecutan en una transaccion READ ONLY
+# que se revierte, por si llaman a una funcion que modifica datos
+EXPLAINABLE = ("select", "with")
+
+_PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_SKIPPED_FILES = {
+    os.path.join(_PROJECT_ROOT, "config", "database.py"),
+    os.path.abspath(__file__),
+}
+
+_entries = deque(maxlen=SLOW_QUERY_LOG_SIZE)
+_entries_lock = threading.Lock()
+_explain_queue = queue.Queue(maxsize=EXPLAIN_QUEUE_SIZE)
+_observer_registered = False
+_explain_worker_pid = None
+
+
+# Valor de un parametro para el log: numeros, fechas y NULL tal cual; el
+# texto (correos, contrasenas, busquedas) solo con su longitud
+def redact(value):
+    if value is None or isinstance(value, (bool, int, float, Decimal)):
+        return value
+    if isinstance(value, (datetime, date, dt_time)):
+        return value.isoformat()
+    if isinstance(value, (str, bytes)):
+        return f"<{type(value).__name__} len={len(value)}>"
+    if isinstance(value, dict):
+        return {key: redact(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [redact(item) for item in value]
+    return f"<{type(value).__name__}>"
+
+# Primer frame del proyecto fuera de la capa de datos: "archivo:linea en funcion"
+def _caller():
+    frame = sys._getframe(1)
+    while frame is not None:
+        filename = os.path.abspath(frame.f_code.co_filename)
+        if filename.startswith(_PROJECT_ROOT) and filename not in _SKIPPED_FILES:
+            path = os.path.relpath(filename, _PROJECT_ROOT)
+            return f"{path}:{frame.f_lineno} in {frame.f_code.co_name}"
+        frame = frame.f_back
+    return "unknown"
+
+def _statement(sql):
+    if isinstance(sql, bytes):
+        sql = sql.decode("utf-8", "replace")
+    return " ".join(str(sql).split())
+
+def _on_query(sql, params, seconds):
+    duration_ms = seconds * 1000
+    if SLOW_QUERY_MS <= 0 or duration_ms < SLOW_QUERY_MS:
+        return
+    # Los EXPLAIN del worker tambien son lentos: no registrarlos
+    if threading.current_thread().name == EXPLAIN_THREAD_NAME:
+        return
+
+    statement = _statement(sql)
+    entry = {
+        "time": datetime.utcnow().isoformat(timespec="milliseconds") + "Z",
+        "duration_ms": round(duration_ms, 3),
+        "statement": statement,
+        "params": redact(params),
+        "caller": _caller(),
+        "plan": None,
+    }
+    print(f"Consulta lenta ({entry['duration_ms']} ms) en {entry['caller']}: {statement} params={entry['params']}")
+    with _entries_lock:
+        _entries.append(entry)
+
+    explainable = statement.split(None, 1)[0].lower() in EXPLAINABLE if statement else False
+    if explainable and random.random() < SLOW_QUERY_EXPLAIN_SAMPLE:
+        entry["plan"] = "pending"
+        try:
+            # Los parametros reales solo viven en la cola hasta el EXPLAIN
+            _explain_queue.put_nowait((entry, sql, params))
+        except queue.Full:
+            entry["plan"] = None
+
+def explain(sql, params):
+    """
+    Plan real de una consulta con EXPLAIN (ANALYZE, BUFFERS), en una
+    conexion aparte del pool y una transaccion de solo lectura que siempre
+    se revierte. Devuelve el plan como texto.
+    """
+    pool = get_postgres_pool()
+    conn = pool.getconn()
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SET TRANSACTION READ ONLY")
+            cur.execute("SET LOCAL statement_timeout = %s", (SLOW_QUERY_EXPLAIN_TIMEOUT_MS,))
+            if isinstance(sql, bytes):
+                sql = sql.decode("utf-8")
+            cur.execute("EXPLAIN (ANALYZE, BUFFERS) " + sql, params)
+            return "\n".join(row[0] for row in cur.fetchall())
+    finally:
+        if not conn.closed:
+            conn.rollback()
+        pool.putconn(conn)
+
+def _run_explain_worker():
+    while True:
+        entry, sql, params = _explain_queue.get()
+        try:
+            entry["plan"] = explain(sql, params)
+        except Exception as e:
+            entry["plan"] = f"EXPLAIN failed: {e}"
+
+def start_slow_query_log():
+    """
+    Registra el observador de consultas lentas y, si se toman muestras de
+    planes, inicia el worker de EXPLAIN una vez por proceso (tambien despues
+    de un fork).
+    """
+    global _observer_registered, _explain_worker_pid
+    if not _observer_registered:
+        add_query_observer(_on_query)
+        _observer_registered = True
+    if SLOW_QUERY_EXPLAIN_SAMPLE <= 0 or _explain_worker_pid == os.getpid():
+        return
+    _explain_worker_pid = os.getpid()
+    threading.Thread(target=_run_explain_worker, name=EXPLAIN_THREAD_NAME, daemon=True).start()
+
+def _restart_worker_after_fork():
+    if _explain_worker_pid is not None:
+        start_slow_query_log()
+
+os.register_at_fork(after_in_child=_restart_worker_after_fork)
+
+# Consultas lentas del proceso, de la mas reciente a la mas antigua
+def get_slow_queries(limit=None):
+    with _entries_lock:
+        entries = [dict(entry) for entry in reversed(_entries)]
+    return entries[:limit] if limit else entries
+
+def clear_slow_queries():
+    with _entries_lock:
+        _entries.clear()
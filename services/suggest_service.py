@@ -0,0 +1,177 @@
+# services/suggest_service.py
+import unicodedata
+from redis.exceptions import RedisError
+from config.database import get_redis_connection, postgres_connection
+
+redis_client = get_redis_connection()
+
+# Indice de prefijos: sorted set con todos los scores en 0, asi ZRANGEBYLEX
+# devuelve en orden alfabetico los miembros que empiezan con un prefijo.
+# Cada miembro es "termino normalizado\0tipo\0id\0texto a mostrar".
+INDEX_KEY = "suggest:index"
+# Miembros de cada documento (para quitarlos al actualizarlo)
+DOC_KEY = "suggest:doc:{}:{}"
+# Ciudades y paises compartidos por varios lugares: cuantos los usan
+REFS_KEY = "suggest:refs"
+
+SEPARATOR = "\0"
+# Mayor que cualquier caracter: cierra el rango de un prefijo
+RANGE_END = "\U0010ffff"
+# Con menos sugerencias que esto (y una consulta de 3+ letras) se prueba con pg_trgm
+FUZZY_MIN_LENGTH = 3
+# Miembros que se leen del indice por consulta (incluye repetidos por palabra)
+SCAN_FACTOR = 4
+
+
+def enabled():
+    return redis_client is not None
+
+# Minusculas y sin acentos: "San José" -> "san jose"
+def normalize(text):
+    decomposed = unicodedata.normalize("NFKD", text or "")
+    stripped = "".join(c for c in decomposed if not unicodedata.combining(c))
+    return " ".join(stripped.casefold().split())
+
+# "san jose" se encuentra por "san" y por "jose"
+def _terms(text):
+    words = normalize(text).split()
+    return {" ".join(words[i:]) for i in range(len(words))}
+
+def _members(kind, item_id, label):
+    return {SEPARATOR.join((term, kind, str(item_id), label)) for term in _terms(label)}
+
+def _parse(member):
+    _, kind, item_id, label = member.split(SEPARATOR, 3)
+    return {"type": kind, "id": int(item_id) if item_id else None, "text": label}
+
+# Reemplaza los terminos de un documento en un solo paso atomico. Los
+# miembros sin id (ciudad, pais) los comparten varios lugares: se cuentan en
+# REFS_KEY y solo se quitan del indice cuando ningun lugar los usa. Se hace en
+# Lua para que un alta concurrente no quede entre el conteo y el ZREM.
+# KEYS: documento, indice, contadores; ARGV: los miembros nuevos. Los
+# compartidos se reconocen por el id vacio ("\0\0" en el miembro).
+_REPLACE_DOCUMENT_SCRIPT = """
+local shared = string.char(0, 0)
+local new, old = {}, {}
+for i = 1, #ARGV do new[ARGV[i]] = true end
+for _, member in ipairs(redis.call('smembers', KEYS[1])) do
+    old[member] = true
+    if not new[member] then
+        local keep = false
+        if string.find(member, shared, 1, true) then
+            keep = redis.call('hincrby', KEYS[3], member, -1) > 0
+            if not keep then redis.call('hdel', KEYS[3], member) end
+        end
+        if not keep then redis.call('zrem', KEYS[2], member) end
+    end
+end
+for i = 1, #ARGV do
+    local member = ARGV[i]
+    if not old[member] then
+        if string.find(member, shared, 1, true) then
+            redis.call('hincrby', KEYS[3], member, 1)
+        end
+        redis.call('zadd', KEYS[2], 0, member)
+    end
+end
+redis.call('del', KEYS[1])
+for i = 1, #ARGV do redis.call('sadd', KEYS[1], ARGV[i]) end
+return 1
+"""
+
+def _replace_document(doc_type, doc_id, members):
+    doc_key = DOC_KEY.format(doc_type, doc_id)
+    redis_client.eval(_REPLACE_DOCUMENT_SCRIPT, 3, doc_key, INDEX_KEY, REFS_KEY, *members)
+
+def index_place(place_id, name, city, country):
+    if not enabled():
+        return
+    members = _members("place", place_id, name) | _members("city", "", city) | _members("country", "", country)
+    try:
+        _replace_document("place", place_id, members)
+    except RedisError as e:
+        print(f"Error al indexar el lugar {place_id} para sugerencias: {e}")
+
+def remove_place(place_id):
+    if not enabled():
+        return
+    try:
+        _replace_document("place", place_id, set())
+    except RedisError as e:
+        print(f"Error al quitar el lugar {place_id} de las sugerencias: {e}")
+
+def index_user(user_id, username):
+    if not enabled():
+        return
+    try:
+        _replace_document("user", user_id, _members("user", user_id, username))
+    except RedisError as e:
+        print(f"Error al indexar el usuario {user_id} para sugerencias: {e}")
+
+def _prefix_matches(prefix, limit):
+    members = redis_client.zrangebylex(
+        INDEX_KEY, f"[{prefix}", f"[{prefix}{RANGE_END}", start=0, num=limit * SCAN_FACTOR
+    )
+    suggestions = []
+    seen = set()
+    for member in members:
+        suggestion = _parse(member)
+        key = (suggestion["type"], suggestion["id"], suggestion["text"])
+        if key not in seen:
+            seen.add(key)
+            suggestions.append(suggestion)
+        if len(suggestions) == limit:
+            break
+    return suggestions
+
+# Coincidencias aproximadas con pg_trgm (errores de escritura)
+def _fuzzy_matches(query, limit):
+    with postgres_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("SELECT * FROM suggest_fuzzy(%s, %s)", (query, limit))
+            rows = cur.fetchall()
+    return [{"type": row[0], "id": row[1], "text": row[2]} for row in rows]
+
+def suggest(query, limit=10):
+    """
+    Sugerencias para autocompletar (lugares, ciudades, paises y usuarios) que
+    empiezan con query. Si el indice da pocas, se completan con coincidencias
+    aproximadas de PostgreSQL; sin Redis solo se usan estas.
+    """
+    prefix = normalize(query)
+    if not prefix:
+        return []
+    suggestions = []
+    if enabled():
+        try:
+            suggestions = _prefix_matches(prefix, limit)
+        except RedisError as e:
+            print(f"Error al leer el indice de sugerencias: {e}")
+    if len(suggestions) < limit and len(prefix) >= FUZZY_MIN_LENGTH:
+        seen = {(s["type"], s["id"], s["text"]) for s in suggestions}
+        for suggestion in _fuzzy_matches(query, limit):
+            if (suggestion["type"], suggestion["id"], suggestion["text"]) not in seen and len(suggestions) < limit:
+                suggestions.append(suggestion)
+    return suggestions
+
+# Reconstruye el indice completo desde PostgreSQL
+# (al desplegarlo por primera vez o si se perdieron los datos de Redis)
+def rebuild_index(batch_size=1000):
+    redis_client.delete(INDEX_KEY, REFS_KEY)
+    for doc_key in redis_client.scan_iter(match="suggest:doc:*", count=batch_size):
+        redis_client.delete(doc_key)
+    counts = {"places": 0, "users": 0}
+    with postgres_connection() as conn:
+        with conn.cursor(name="suggest_rebuild") as cur:
+            cur.itersize = batch_size
+            cur.execute("SELECT id, name, city, country FROM places")
+            for place_id, name, city, country in cur:
+                index_place(place_id, name, city, country)
+                counts["places"] += 1
+        with conn.cursor(name="suggest_rebuild_users") as cur:
+            cur.itersize = batch_size
+            cur.execute("SELECT id, username FROM users")
+            for user_id, username in cur:
+                index_user(user_id, username)
+                counts["users"] += 1
+    return counts
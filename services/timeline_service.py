@@ -0,0 +1,336 @@
+# services/timeline_service.py
+import os
+import time
+import heapq
+import socket
+import threading
+from redis.exceptions import RedisError, ResponseError
+from config.database import get_redis_connection, postgres_connection
+
+redis_client = get_redis_connection()
+
+# Cantidad de posts que se guardan por timeline y por autor
+TIMELINE_MAX_LENGTH = int(os.getenv('TIMELINE_MAX_LENGTH', 800))
+# Autores con mas seguidores que esto no hacen fan-out: sus posts se leen al pedir el feed
+FANOUT_FOLLOWER_THRESHOLD = int(os.getenv('FANOUT_FOLLOWER_THRESHOLD', 10000))
+# Los timelines de usuarios inactivos expiran y se reconstruyen desde PostgreSQL
+TIMELINE_TTL = int(os.getenv('TIMELINE_TTL', 7 * 24 * 3600))
+# Timelines actualizados por cada ida a Redis durante el fan-out
+FANOUT_BATCH_SIZE = 500
+
+PULL_AUTHORS_KEY = "timeline:pull_authors"
+
+# Stream de Redis con los posts creados y eliminados pendientes de distribuir
+# a los timelines de los seguidores (lo procesa un worker, fuera de la peticion)
+FANOUT_STREAM = "timeline:fanout"
+FANOUT_GROUP = "timeline-fanout"
+# Eventos que toma el worker por cada lectura del stream
+FANOUT_READ_COUNT = 10
+# Eventos sin confirmar por mas de este tiempo (p. ej. de un worker que murio)
+# los toma otro consumidor
+FANOUT_CLAIM_IDLE_MS = int(os.getenv('FANOUT_CLAIM_IDLE_MS', 30000))
+
+# Miembro centinela con score +inf: indica que el sorted set esta completo.
+# Si falta (llave expirada o creada por un fan-out parcial) se reconstruye.
+BUILT_MARKER = "*"
+
+
+def timeline_key(user_id):
+    return f"timeline:{user_id}"
+
+def author_key(user_id):
+    return f"timeline:author:{user_id}"
+
+def enabled():
+    return redis_client is not None
+
+
+# Consultas a PostgreSQL usadas para construir los timelines
+def _fetch_ids(sql, params):
+    with postgres_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute(sql, params)
+            return cur.fetchall()
+
+def _follower_ids(user_id):
+    return [row[0] for row in _fetch_ids("SELECT * FROM get_follower_ids(%s)", (user_id,))]
+
+def _follower_count(user_id):
+    return _fetch_ids("SELECT count_followers(%s)", (user_id,))[0][0]
+
+
+# Agrega un post a varios sorted sets y los recorta al tamaño maximo
+def _push(pipe, key, post_id, score):
+    pipe.zadd(key, {str(post_id): score})
+    # Los rangos mas bajos son los posts mas viejos; el centinela (+inf) nunca se recorta
+    pipe.zremrangebyrank(key, 0, -(TIMELINE_MAX_LENGTH + 2))
+    pipe.expire(key, TIMELINE_TTL)
+
+# Reemplaza un sorted set por las entradas (post_id, score) dadas
+def _rebuild(key, entries):
+    pipe = redis_client.pipeline()
+    pipe.delete(key)
+    mapping = {str(post_id): score for post_id, score in entries}
+    mapping[BUILT_MARKER] = float("inf")
+    pipe.zadd(key, mapping)
+    pipe.expire(key, TIMELINE_TTL)
+    pipe.execute()
+
+def _is_built(key):
+    return redis_client.zscore(key, BUILT_MARKER) is not None
+
+def _ensure_author(user_id):
+    key = author_key(user_id)
+    if not _is_built(key):
+        _rebuild(key, _fetch_ids("SELECT * FROM get_user_post_ids(%s, %s)", (user_id, TIMELINE_MAX_LENGTH)))
+    return key
+
+def _ensure_timeline(user_id):
+    key = timeline_key(user_id)
+    if not _is_built(key):
+        _rebuild(key, _fetch_ids("SELECT * FROM get_feed_post_ids(%s, %s)", (user_id, TIMELINE_MAX_LENGTH)))
+    return key
+
+# Los primeros `count` posts (post_id, score) de un sorted set, sin el centinela
+def _head(key, count):
+    entries = redis_client.zrevrange(key, 1, count, withscores=True)
+    return sorted(((int(member), score) for member, score in entries),
+                  key=lambda entry: (-entry[1], -entry[0]))
+
+
+# Fan-out-on-write: agrega el post nuevo al timeline de cada seguidor.
+# Los autores con demasiados seguidores solo se marcan para fan-out-on-read.
+def fan_out_post(author_id, post_id, score):
+    pipe = redis_client.pipeline(transaction=False)
+    _push(pipe, _ensure_author(author_id), post_id, score)
+    if _follower_count(author_id) > FANOUT_FOLLOWER_THRESHOLD:
+        pipe.sadd(PULL_AUTHORS_KEY, author_id)
+        pipe.execute()
+        return
+    pipe.srem(PULL_AUTHORS_KEY, author_id)
+    for i, follower_id in enumerate(_follower_ids(author_id), 1):
+        _push(pipe, timeline_key(follower_id), post_id, score)
+        if i % FANOUT_BATCH_SIZE == 0:
+            pipe.execute()
+    pipe.execute()
+
+# Quita un post eliminado del timeline de cada seguidor
+def fan_out_removal(author_id, post_id):
+    pipe = redis_client.pipeline(transaction=False)
+    pipe.zrem(author_key(author_id), str(post_id))
+    if not redis_client.sismember(PULL_AUTHORS_KEY, author_id):
+        for i, follower_id in enumerate(_follower_ids(author_id), 1):
+            pipe.zrem(timeline_key(follower_id), str(post_id))
+            if i % FANOUT_BATCH_SIZE == 0:
+                pipe.execute()
+    pipe.execute()
+
+def _enqueue(fields):
+    try:
+        redis_client.xadd(FANOUT_STREAM, fields)
+    except RedisError as e:
+        print(f"Error al encolar el fan-out del post {fields['post_id']}: {e}")
+
+# Encola el post nuevo para el worker de fan-out. score es created_at en
+# segundos, el mismo que usa PostgreSQL al reconstruir los timelines.
+def push_post(author_id, post_id, score):
+    if not enabled():
+        return
+    _enqueue({"op": "push", "author_id": author_id, "post_id": post_id, "score": score})
+
+# Encola la eliminacion del post (en el mismo stream, despues de su alta)
+def remove_post(author_id, post_id):
+    if not enabled():
+        return
+    _enqueue({"op": "remove", "author_id": author_id, "post_id": post_id})
+
+def _consumer_name():
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+_group_ready = False
+_worker_pid = None
+
+def _ensure_group():
+    global _group_ready
+    if _group_ready:
+        return
+    try:
+        redis_client.xgroup_create(FANOUT_STREAM, FANOUT_GROUP, id="0", mkstream=True)
+    except ResponseError as e:
+        if "BUSYGROUP" not in str(e):
+            raise
+    _group_ready = True
+
+def _apply(fields):
+    author_id, post_id = int(fields["author_id"]), int(fields["post_id"])
+    if fields["op"] == "push":
+        fan_out_post(author_id, post_id, float(fields["score"]))
+    else:
+        fan_out_removal(author_id, post_id)
+
+# Procesa los eventos pendientes del stream; devuelve cuantos se procesaron.
+# Cada evento se confirma despues de aplicarlo (reaplicarlo no cambia nada).
+def flush_fanout(block_ms=None):
+    if not enabled():
+        return 0
+    _ensure_group()
+    consumer = _consumer_name()
+    _, messages, *_ = redis_client.xautoclaim(
+        FANOUT_STREAM, FANOUT_GROUP, consumer,
+        min_idle_time=FANOUT_CLAIM_IDLE_MS, start_id="0-0", count=FANOUT_READ_COUNT
+    )
+    messages = [(message_id, fields) for message_id, fields in messages if fields]
+    if not messages:
+        response = redis_client.xreadgroup(
+            FANOUT_GROUP, consumer, {FANOUT_STREAM: ">"}, count=FANOUT_READ_COUNT, block=block_ms
+        )
+        for _, stream_messages in response or []:
+            messages.extend(stream_messages)
+    for message_id, fields in messages:
+        # Si falla, el evento queda pendiente y se reintenta con XAUTOCLAIM
+        _apply(fields)
+        pipe = redis_client.pipeline(transaction=False)
+        pipe.xack(FANOUT_STREAM, FANOUT_GROUP, message_id)
+        pipe.xdel(FANOUT_STREAM, message_id)
+        pipe.execute()
+    return len(messages)
+
+def _run_worker():
+    backoff = 0.5
+    while True:
+        try:
+            flush_fanout(block_ms=1000)
+            backoff = 0.5
+        except Exception as e:
+            print(f"Error al distribuir posts a los timelines: {e}")
+            time.sleep(backoff)
+            backoff = min(backoff * 2, 30)
+
+# Inicia el worker de fan-out una vez por proceso (tambien despues de un fork)
+def start_fanout_worker():
+    global _worker_pid
+    if not enabled() or _worker_pid == os.getpid():
+        return
+    _worker_pid = os.getpid()
+    threading.Thread(target=_run_worker, name="timeline-fanout", daemon=True).start()
+
+def _restart_worker_after_fork():
+    global _group_ready
+    _group_ready = False
+    if _worker_pid is not None:
+        start_fanout_worker()
+
+os.register_at_fork(after_in_child=_restart_worker_after_fork)
+
+# Al seguir a alguien se mezclan sus posts recientes en el timeline
+def add_followed(follower_id, followed_id):
+    if not enabled():
+        return
+    try:
+        key = timeline_key(follower_id)
+        if not _is_built(key) or redis_client.sismember(PULL_AUTHORS_KEY, followed_id):
+            return
+        source = _ensure_author(followed_id)
+        pipe = redis_client.pipeline()
+        pipe.zunionstore(key, [key, source], aggregate="MAX")
+        pipe.zremrangebyrank(key, 0, -(TIMELINE_MAX_LENGTH + 2))
+        pipe.expire(key, TIMELINE_TTL)
+        pipe.execute()
+    except RedisError as e:
+        print(f"Error al actualizar el timeline de {follower_id}: {e}")
+
+# Al dejar de seguir a alguien se quitan sus posts del timeline.
+# Todo post suyo que este en el timeline esta tambien entre sus
+# TIMELINE_MAX_LENGTH posts mas recientes; si no se conocen, se descarta el timeline.
+def remove_followed(follower_id, followed_id):
+    if not enabled():
+        return
+    try:
+        key = timeline_key(follower_id)
+        source = author_key(followed_id)
+        if not _is_built(source):
+            redis_client.delete(key)
+            return
+        post_ids = [m for m in redis_client.zrange(source, 0, -1) if m != BUILT_MARKER]
+        if post_ids:
+            redis_client.zrem(key, *post_ids)
+    except RedisError as e:
+        print(f"Error al actualizar el timeline de {follower_id}: {e}")
+
+# Posts (post_id, score) anteriores a (before_score, before_id), de mas nuevo a mas viejo.
+# Devuelve None si el sorted set esta lleno y no alcanza: el resto solo esta en PostgreSQL.
+def _head_before(key, before_score, before_id, count):
+    if before_score is None:
+        entries = redis_client.zrevrange(key, 1, count, withscores=True)
+    else:
+        # Empates con el score del cursor: solo los de id menor
+        ties = redis_client.zrangebyscore(key, before_score, before_score, withscores=True)
+        entries = [(m, sc) for m, sc in ties if m != BUILT_MARKER and int(m) < before_id]
+        entries += redis_client.zrevrangebyscore(
+            key, f"({before_score}", "-inf", start=0, num=count, withscores=True
+        )
+    entries = sorted(((int(member), score) for member, score in entries),
+                     key=lambda entry: (-entry[1], -entry[0]))[:count]
+    if len(entries) < count and redis_client.zcard(key) > TIMELINE_MAX_LENGTH:
+        return None
+    return entries
+
+def _merge(sources, count):
+    merged = []
+    seen = set()
+    for post_id, score in heapq.merge(*sources, key=lambda entry: (-entry[1], -entry[0])):
+        if post_id not in seen:
+            seen.add(post_id)
+            merged.append((post_id, score))
+        if len(merged) == count:
+            break
+    return merged
+
+def get_feed_entries_before(user_id, before_score, before_id, count):
+    """
+    Pagina del feed por cursor: hasta `count` posts (post_id, score) anteriores
+    a (before_score, before_id). Devuelve None si Redis no tiene suficientes
+    posts o no esta disponible, para que el llamador consulte PostgreSQL.
+    """
+    if not enabled():
+        return None
+    try:
+        sources = [_head_before(_ensure_timeline(user_id), before_score, before_id, count)]
+        pull_authors = [int(a) for a in redis_client.smembers(PULL_AUTHORS_KEY)]
+        if pull_authors:
+            followed = _fetch_ids("SELECT * FROM get_followed_among(%s, %s)", (user_id, pull_authors))
+            for (author_id,) in followed:
+                sources.append(_head_before(_ensure_author(author_id), before_score, before_id, count))
+        redis_client.expire(timeline_key(user_id), TIMELINE_TTL)
+    except RedisError as e:
+        print(f"Error al leer el timeline de {user_id}: {e}")
+        return None
+    if any(source is None for source in sources):
+        return None
+    return _merge(sources, count)
+
+def get_feed_post_ids(user_id, offset, limit):
+    """
+    IDs de los posts del feed, del mas reciente al mas viejo.
+
+    Mezcla el timeline precalculado del usuario con los posts recientes de los
+    autores seguidos que no hacen fan-out. Devuelve None si la pagina esta mas
+    alla de lo que se guarda en Redis (o si Redis no esta disponible) para que
+    el llamador consulte PostgreSQL.
+    """
+    if not enabled() or offset + limit > TIMELINE_MAX_LENGTH:
+        return None
+    try:
+        count = offset + limit
+        sources = [_head(_ensure_timeline(user_id), count)]
+        pull_authors = [int(a) for a in redis_client.smembers(PULL_AUTHORS_KEY)]
+        if pull_authors:
+            followed = _fetch_ids("SELECT * FROM get_followed_among(%s, %s)", (user_id, pull_authors))
+            for (author_id,) in followed:
+                sources.append(_head(_ensure_author(author_id), count))
+        redis_client.expire(timeline_key(user_id), TIMELINE_TTL)
+    except RedisError as e:
+        print(f"Error al leer el timeline de {user_id}: {e}")
+        return None
+
+    return [post_id for post_id, _ in _merge(sources, count)[offset:]]
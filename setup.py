@@ -17,6 +17,13 @@ setup(
         'pytest-cov==4.0.0',
         'pytz==2024.1',
         'mongomock==4.1.2',
-        'fakeredis==2.20.0',
+        'msgpack==1.0.7',
+        'prometheus-client==0.20.0',
     ],
+    extras_require={
+        # Las pruebas de los scripts Lua necesitan fakeredis con lupa
+        'test': [
+            'fakeredis[lua]==2.20.0',
+        ],
+    },
 )
\ No newline at end of file
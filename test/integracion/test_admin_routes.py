@@ -0,0 +1,87 @@
+# tests/integracion/test_admin_routes.py
+from unittest.mock import patch
+import pytest
+from flask_jwt_extended import create_access_token
+from app import app
+
+@pytest.fixture
+def client():
+    app.config['TESTING'] = True
+    app.config['JWT_SECRET_KEY'] = 'test-secret-key'
+    with app.test_client() as client:
+        with app.app_context():
+            yield client
+
+def auth_headers(user_id):
+    with app.app_context():
+        return {'Authorization': f'Bearer {create_access_token(identity=user_id)}'}
+
+@patch('services.auth_service.ADMIN_USER_IDS', {"1"})
+@patch('routes.admin_routes.get_slow_queries')
+def test_get_slow_queries_as_admin(mock_get_slow_queries, client):
+    mock_get_slow_queries.return_value = [{"statement": "SELECT 1", "duration_ms": 300.0}]
+
+    response = client.get('/admin/slow-queries?limit=5', headers=auth_headers("1"))
+
+    assert response.status_code == 200
+    assert response.json["count"] == 1
+    mock_get_slow_queries.assert_called_once_with(5)
+
+@patch('services.auth_service.ADMIN_USER_IDS', {"1"})
+def test_get_slow_queries_forbidden_for_non_admin(client):
+    response = client.get('/admin/slow-queries', headers=auth_headers("2"))
+
+    assert response.status_code == 403
+
+def test_get_slow_queries_requires_token(client):
+    response = client.get('/admin/slow-queries')
+
+    assert response.status_code == 401
+
+@patch('services.auth_service.ADMIN_USER_IDS', {"1"})
+@patch('routes.admin_routes.clear_slow_queries')
+def test_clear_slow_queries(mock_clear, client):
+    response = client.delete('/admin/slow-queries', headers=auth_headers("1"))
+
+    assert response.status_code == 200
+    mock_clear.assert_called_once()
+
+@patch('services.auth_service.ADMIN_USER_IDS', {"1"})
+@patch('routes.admin_routes.get_collapsed_stacks')
+def test_get_profile_as_collapsed_stacks(mock_get_stacks, client):
+    mock_get_stacks.return_value = "trip_routes.get_user_trips;get_user_trips (controllers/trip_controller.py) 12\n"
+
+    response = client.get('/admin/profile?endpoint=trip_routes.get_user_trips', headers=auth_headers("1"))
+
+    assert response.status_code == 200
+    assert response.mimetype == 'text/plain'
+    assert response.data.endswith(b" 12\n")
+    mock_get_stacks.assert_called_once_with('trip_routes.get_user_trips')
+
+@patch('services.auth_service.ADMIN_USER_IDS', {"1"})
+def test_latency_stats_are_admin_only(client):
+    assert client.get('/health/latency').status_code == 401
+    assert client.get('/health/latency', headers=auth_headers("2")).status_code == 403
+
+    response = client.get('/health/latency', headers=auth_headers("1"))
+
+    assert response.status_code == 200
+    assert isinstance(response.json, dict)
+
+@pytest.mark.parametrize("endpoint, stats_function", [
+    ('/health/pool', 'app.get_pool_stats'),
+    ('/health/cache', 'app.get_cache_stats'),
+    ('/health/search', 'app.get_search_cache_stats'),
+    ('/health/notifications', 'app.get_outbox_stats'),
+])
+@patch('services.auth_service.ADMIN_USER_IDS', {"1"})
+def test_health_stats_are_admin_only(endpoint, stats_function, client):
+    with patch(stats_function, return_value={"ok": 1}) as mock_stats:
+        assert client.get(endpoint).status_code == 401
+        assert client.get(endpoint, headers=auth_headers("2")).status_code == 403
+        mock_stats.assert_not_called()
+
+        response = client.get(endpoint, headers=auth_headers("1"))
+
+    assert response.status_code == 200
+    assert response.json == {"ok": 1}
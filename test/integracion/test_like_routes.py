@@ -66,3 +66,20 @@ def test_get_like_count(mock_get_like_count, client):
 
     assert response.status_code == 200
     assert response.get_json() == {"count": 10}
+
+@patch('controllers.like_controller.add_likes_batch')
+def test_add_likes_batch(mock_add_likes_batch, client):
+    mock_add_likes_batch.return_value = 1
+
+    with app.app_context():
+        access_token = create_access_token(identity="1")
+
+    response = client.post(
+        '/likes/batch',
+        headers={'Authorization': f'Bearer {access_token}'},
+        json={'likes': [{'post_id': 123}, {'post_id': 124}]}
+    )
+
+    assert response.status_code == 200
+    assert response.get_json() == {"added": 1, "skipped": 1}
+    mock_add_likes_batch.assert_called_once_with(1, [{'post_id': 123}, {'post_id': 124}])
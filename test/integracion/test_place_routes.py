@@ -80,3 +80,32 @@ def test_delete_place(mock_delete_place, client):
 
     assert response.status_code == 200
     assert response.get_json() == {"message": "Place deleted successfully", "place_id": 1}
+
+@patch('controllers.place_controller.get_nearby')
+def test_get_nearby_places(mock_get_nearby, client):
+    from models.place import Place
+    place = Place('Teatro Nacional', None, 'San Jose', 'Costa Rica', id=1, latitude=9.9339, longitude=-84.0775)
+    mock_get_nearby.return_value = [(place, 0.51234)]
+    with app.app_context():
+        access_token = create_access_token(identity="1")
+    response = client.get(
+        '/places/nearby?lat=9.93&lon=-84.08&radius=5',
+        headers={'Authorization': f'Bearer {access_token}'}
+    )
+
+    assert response.status_code == 200
+    mock_get_nearby.assert_called_once_with(9.93, -84.08, 5.0, 20)
+    result = response.get_json()["places"][0]
+    assert result["id"] == 1
+    assert result["latitude"] == 9.9339
+    assert result["distance_km"] == 0.512
+
+def test_get_nearby_places_rejects_invalid_coordinates(client):
+    with app.app_context():
+        access_token = create_access_token(identity="1")
+    response = client.get(
+        '/places/nearby?lat=95&lon=-84.08',
+        headers={'Authorization': f'Bearer {access_token}'}
+    )
+
+    assert response.status_code == 400
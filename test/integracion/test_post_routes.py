@@ -43,6 +43,30 @@ def test_get_post(mock_get_post, client):
         'content': 'Test content'
     }
 
+@patch('controllers.post_controller.get_post_expanded')
+def test_get_post_expanded(mock_get_post_expanded, client):
+    mock_get_post_expanded.return_value = {'id': 1, 'user_id': 1, 'content': 'Test content', 'like_count': 3}
+    with app.app_context():
+        access_token = create_access_token(identity="1")
+    response = client.get(
+        '/posts/1?expand=likes',
+        headers={'Authorization': f'Bearer {access_token}'}
+    )
+
+    assert response.status_code == 200
+    assert response.get_json()['like_count'] == 3
+    mock_get_post_expanded.assert_called_once_with(1, {'likes'})
+
+def test_get_post_expanded_invalid(client):
+    with app.app_context():
+        access_token = create_access_token(identity="1")
+    response = client.get(
+        '/posts/1?expand=followers',
+        headers={'Authorization': f'Bearer {access_token}'}
+    )
+
+    assert response.status_code == 400
+
 @patch('controllers.post_controller.get_posts_paginated')
 def test_get_posts(mock_get_posts_paginated, client):
     mock_get_posts_paginated.return_value = ([{'id': 1, 'user_id': 1, 'content': 'Test content'}], 1)
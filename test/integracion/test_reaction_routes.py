@@ -31,3 +31,20 @@ def test_add_or_update_reaction(mock_add_or_update_reaction, client):
 
     assert response.status_code == 201
     assert response.json["message"] == "Reaction added/updated successfully"
+
+@patch('controllers.reaction_controller.add_or_update_reactions_batch')
+def test_add_or_update_reactions_batch(mock_batch, client):
+    mock_batch.side_effect = ValueError("Each reaction needs post_id and reaction_type")
+
+    with app.app_context():
+        access_token = create_access_token(identity="1")
+
+    response = client.post(
+        '/reactions/batch',
+        headers={'Authorization': f'Bearer {access_token}'},
+        json={'reactions': [{'post_id': 1}]}
+    )
+
+    assert response.status_code == 400
+    assert "error" in response.json
+    mock_batch.assert_called_once_with(1, [{'post_id': 1}])
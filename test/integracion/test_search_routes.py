@@ -56,3 +56,51 @@ def test_search(mock_search_content, client):
             "created_at": "2023-10-02"
         }
     ]
+
+@patch('controllers.search_controller.search')
+def test_search_by_cursor(mock_search, client):
+    mock_search.return_value = ([{"id": 1, "content_type": "trip"}], "next")
+
+    with app.app_context():
+        access_token = create_access_token(identity="1")
+
+    response = client.get(
+        '/search',
+        headers={'Authorization': f'Bearer {access_token}'},
+        query_string={'q': 'test', 'types': 'trip', 'date_from': '2024-01-01', 'cursor': ''}
+    )
+
+    assert response.status_code == 200
+    assert response.json == {"results": [{"id": 1, "content_type": "trip"}], "next_cursor": "next"}
+    args = mock_search.call_args[0]
+    assert args[1] == ["trip"]
+    assert args[2].year == 2024
+
+def test_search_invalid_type(client):
+    with app.app_context():
+        access_token = create_access_token(identity="1")
+
+    response = client.get(
+        '/search',
+        headers={'Authorization': f'Bearer {access_token}'},
+        query_string={'q': 'test', 'types': 'comment'}
+    )
+
+    assert response.status_code == 400
+
+@patch('services.suggest_service.suggest')
+def test_search_suggest(mock_suggest, client):
+    mock_suggest.return_value = [{"type": "place", "id": 1, "text": "Volcán Arenal"}]
+
+    with app.app_context():
+        access_token = create_access_token(identity="1")
+
+    response = client.get(
+        '/search/suggest',
+        headers={'Authorization': f'Bearer {access_token}'},
+        query_string={'q': 'aren', 'limit': 50}
+    )
+
+    assert response.status_code == 200
+    assert response.json == [{"type": "place", "id": 1, "text": "Volcán Arenal"}]
+    mock_suggest.assert_called_once_with('aren', 20)
@@ -508,4 +508,97 @@ def test_get_trip_statistics_failed(mock_get_statistics, mock_get_trip, client):
     )
 
     assert response.status_code == 400
-    assert response.json['error'] == 'Failed to get trip statistics'
\ No newline at end of file
+    assert response.json['error'] == 'Failed to get trip statistics'
+@patch('controllers.trip_controller.get_trip')
+@patch('controllers.trip_expense_controller.import_expenses')
+def test_import_trip_expenses_csv(mock_import, mock_get_trip, client):
+    """Test de importación de gastos en CSV"""
+    mock_get_trip.return_value = Trip(1, "Viaje", "", date(2024, 7, 1), date(2024, 7, 15), id=1)
+    received = []
+    mock_import.side_effect = lambda trip_id, lines, fmt: received.extend(lines) or 2
+
+    with app.app_context():
+        access_token = create_access_token(identity="1")
+
+    response = client.post(
+        '/trips/1/expenses/import',
+        headers={'Authorization': f'Bearer {access_token}', 'Content-Type': 'text/csv'},
+        data="category,description,amount,expense_date,place_id\nfood,Cena,10,2024-07-01,\n"
+    )
+
+    assert response.status_code == 201
+    assert response.json["imported"] == 2
+    assert mock_import.call_args[0][2] == 'csv'
+    assert received[1] == "food,Cena,10,2024-07-01,\n"
+
+@patch('controllers.trip_controller.get_trip')
+def test_import_trip_expenses_rejects_unknown_format(mock_get_trip, client):
+    """Test de importación con un Content-Type no soportado"""
+    with app.app_context():
+        access_token = create_access_token(identity="1")
+
+    response = client.post(
+        '/trips/1/expenses/import',
+        headers={'Authorization': f'Bearer {access_token}'},
+        json=[{"category": "food"}]
+    )
+
+    assert response.status_code == 415
+
+@patch('controllers.trip_controller.get_trip')
+@patch('controllers.trip_expense_controller.get_expense_summary')
+def test_get_trip_expense_summary(mock_summary, mock_get_trip, client):
+    """Test del resumen de gastos de un viaje"""
+    mock_get_trip.return_value = Trip(1, "Viaje", "", date(2024, 7, 1), date(2024, 7, 15), id=1)
+    mock_summary.return_value = {"by_category": [], "by_day": [], "expense_count": 0,
+                                 "total_spent": 0.0, "budget": None, "remaining": None,
+                                 "over_budget": False}
+
+    with app.app_context():
+        access_token = create_access_token(identity="1")
+
+    response = client.get('/trips/1/expenses/summary', headers={'Authorization': f'Bearer {access_token}'})
+
+    assert response.status_code == 200
+    assert response.json["over_budget"] is False
+    mock_summary.assert_called_once_with(1)
+
+@patch('controllers.trip_controller.get_trip')
+@patch('controllers.trip_controller.add_places_to_trip_batch')
+def test_add_places_to_trip_batch(mock_batch, mock_get_trip, client):
+    """Test de agregar varios lugares a un viaje"""
+    mock_get_trip.return_value = Trip(1, "Viaje", "", date(2024, 7, 1), date(2024, 7, 15), id=1)
+    mock_batch.return_value = [{"entry_id": 11, "place_id": 5, "visit_order": 1}]
+
+    with app.app_context():
+        access_token = create_access_token(identity="1")
+
+    response = client.post(
+        '/trips/1/places/batch',
+        headers={'Authorization': f'Bearer {access_token}'},
+        json={"places": [{"place_id": 5}]}
+    )
+
+    assert response.status_code == 201
+    assert response.json["entries"] == [{"entry_id": 11, "place_id": 5, "visit_order": 1}]
+    mock_batch.assert_called_once_with(1, [{"place_id": 5}])
+
+@patch('controllers.trip_controller.get_trip')
+@patch('controllers.trip_controller.reorder_trip_places')
+def test_reorder_trip_places(mock_reorder, mock_get_trip, client):
+    """Test de reordenar los lugares de un viaje"""
+    mock_get_trip.return_value = Trip(1, "Viaje", "", date(2024, 7, 1), date(2024, 7, 15), id=1)
+    mock_reorder.return_value = 2
+
+    with app.app_context():
+        access_token = create_access_token(identity="1")
+
+    response = client.put(
+        '/trips/1/places/order',
+        headers={'Authorization': f'Bearer {access_token}'},
+        json={"place_ids": [8, 5]}
+    )
+
+    assert response.status_code == 200
+    assert response.json["reordered"] == 2
+    mock_reorder.assert_called_once_with(1, [8, 5])
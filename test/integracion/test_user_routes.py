@@ -92,3 +92,37 @@ def test_refresh_token(client):
 
     assert response.status_code == 200
     assert 'access_token' in response.json
+
+def test_get_users_by_ids(client, mocker):
+    """Test para obtener varios usuarios con ?ids="""
+    mock_get_many = mocker.patch('controllers.user_controller.get_many')
+    mock_get_many.return_value = [
+        user.User(id=2, username='maria', email='maria@example.com', password=None),
+        None
+    ]
+
+    with app.app_context():
+        access_token = create_access_token(identity="1")
+
+    response = client.get(
+        '/users?ids=2,7',
+        headers={'Authorization': f'Bearer {access_token}'}
+    )
+
+    assert response.status_code == 200
+    assert response.json["users"][0]["username"] == 'maria'
+    assert response.json["users"][1] is None
+    assert response.json["missing"] == [7]
+    mock_get_many.assert_called_once_with([2, 7])
+
+def test_get_users_by_ids_invalid(client):
+    """Test de ids invalidos"""
+    with app.app_context():
+        access_token = create_access_token(identity="1")
+
+    response = client.get(
+        '/users?ids=2,abc',
+        headers={'Authorization': f'Bearer {access_token}'}
+    )
+
+    assert response.status_code == 400
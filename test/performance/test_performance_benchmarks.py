@@ -0,0 +1,50 @@
+# test/performance/test_performance_benchmarks.py
+"""
+Prueba rapida de la suite de benchmarks/: todos los escenarios corren con
+PostgreSQL y Redis en memoria y la comparacion contra el baseline detecta
+regresiones. Para medir de verdad:
+
+    python -m benchmarks.run
+"""
+
+from benchmarks import harness
+from benchmarks.run import run_scenarios
+from benchmarks.scenarios import SCENARIOS
+
+RESULT_KEYS = {"iterations", "ops_per_sec", "p50_ms", "p95_ms", "p99_ms", "alloc_peak_kb", "alloc_retained_kb"}
+
+
+def _result(ops_per_sec=1000.0, p95_ms=1.0, alloc_peak_kb=20.0):
+    return {"ops_per_sec": ops_per_sec, "p95_ms": p95_ms, "alloc_peak_kb": alloc_peak_kb}
+
+
+class TestBenchmarkSuite:
+
+    def test_all_scenarios_run(self):
+        results = run_scenarios(scale=0.02, repeat=1)
+
+        assert set(results) == set(SCENARIOS)
+        for name, result in results.items():
+            assert set(result) == RESULT_KEYS, name
+            assert result["ops_per_sec"] > 0
+            assert result["p50_ms"] <= result["p95_ms"] <= result["p99_ms"]
+
+    def test_measure_reports_allocations(self):
+        result = harness.measure(lambda: [0] * 100000, iterations=5, warmup=1, repeat=1, alloc_iterations=5)
+
+        # Una lista de 100000 referencias ocupa ~780 KB
+        assert result["alloc_peak_kb"] > 700
+        assert result["alloc_retained_kb"] < 1
+
+    def test_compare_flags_regressions(self):
+        baseline = {"GET /trips": _result(), "GET /posts/<id>": _result()}
+        results = {
+            "GET /trips": _result(ops_per_sec=600.0, p95_ms=1.6, alloc_peak_kb=30.0),
+            "GET /posts/<id>": _result(ops_per_sec=900.0, p95_ms=1.1, alloc_peak_kb=20.5),
+            "GET /nuevo": _result(ops_per_sec=1.0),
+        }
+
+        regressions = harness.compare(results, baseline)
+
+        assert len(regressions) == 3
+        assert all(regression.startswith("GET /trips:") for regression in regressions)
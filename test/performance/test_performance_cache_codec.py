@@ -0,0 +1,81 @@
+# test/performance/test_performance_cache_codec.py
+"""
+Benchmark del cache de Redis: formato anterior (str + eval) contra los
+codecs de services/cache_codec.py.
+Mide operaciones por segundo de codificacion/decodificacion y tamaño del payload.
+
+Uso:
+    python -m pytest test/performance/test_performance_cache_codec.py -v -s
+"""
+
+import time
+import datetime as dt
+import zoneinfo
+from decimal import Decimal
+import pytest
+from models.post import Post
+from services.cache_codec import CODECS, encode_entry, decode_entry
+
+ITERATIONS = 2000
+
+# Espacio de nombres necesario para que eval pueda leer lo que genera str()
+LEGACY_NAMESPACE = {"datetime": dt, "zoneinfo": zoneinfo, "Decimal": Decimal}
+
+
+def _sample_post():
+    post = Post(user_id=42, content="Recorrido por el Volcán Irazú y Cartago " * 4, id=1001)
+    post.media_links = [{"media_url": f"https://cdn.example.com/{i}.jpg", "media_type": "image"} for i in range(3)]
+    post.comments = [{"id": i, "user_id": i, "content": "¡Qué buen viaje!"} for i in range(5)]
+    return post.to_dict()
+
+
+def _ops_per_second(func, value):
+    start = time.perf_counter()
+    for _ in range(ITERATIONS):
+        func(value)
+    elapsed = time.perf_counter() - start
+    return ITERATIONS / elapsed if elapsed else float("inf")
+
+
+def _legacy_encode(value):
+    return str(value).encode("utf-8")
+
+
+def _legacy_decode(entry):
+    return eval(entry.decode("utf-8"), LEGACY_NAMESPACE)
+
+
+class TestCacheCodecPerformance:
+
+    def test_codecs_vs_legacy_eval(self):
+        print("\n⚡ BENCHMARK: Serialización del cache")
+        data = _sample_post()
+
+        legacy_entry = _legacy_encode(data)
+        results = {
+            "legacy (str/eval)": (
+                _ops_per_second(_legacy_encode, data),
+                _ops_per_second(_legacy_decode, legacy_entry),
+                len(legacy_entry),
+            )
+        }
+
+        for codec in CODECS.values():
+            entry = encode_entry(data, codec=codec)
+            assert decode_entry(entry) == data
+            results[codec.name] = (
+                _ops_per_second(lambda v: encode_entry(v, codec=codec), data),
+                _ops_per_second(decode_entry, entry),
+                len(entry),
+            )
+
+        print(f"   {'formato':<20}{'encode ops/s':>15}{'decode ops/s':>15}{'bytes':>10}")
+        for name, (encode_ops, decode_ops, size) in results.items():
+            print(f"   {name:<20}{encode_ops:>15,.0f}{decode_ops:>15,.0f}{size:>10}")
+
+        legacy_decode_ops = results["legacy (str/eval)"][1]
+        legacy_size = results["legacy (str/eval)"][2]
+        for codec in CODECS.values():
+            encode_ops, decode_ops, size = results[codec.name]
+            assert decode_ops > legacy_decode_ops, f"{codec.name} decodifica más lento que eval"
+            assert size < legacy_size, f"{codec.name} genera payloads más grandes que str()"
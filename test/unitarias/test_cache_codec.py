@@ -0,0 +1,46 @@
+# tests/unitarias/test_cache_codec.py
+import pytest
+from datetime import datetime, date
+from decimal import Decimal
+from zoneinfo import ZoneInfo
+from services import cache_codec
+from services.cache_codec import JsonCodec, encode_entry, decode_entry, CacheCodecError, CODECS
+
+SAMPLE = {
+    "id": 7,
+    "content": "Café en Cartago ☕",
+    "created_at": datetime(2024, 7, 1, 8, 15, 30, 123456, tzinfo=ZoneInfo("UTC")),
+    "start_date": date(2024, 7, 1),
+    "budget": Decimal("2500.50"),
+    "media_links": [],
+    "tags": ["viaje", None, True, 1.5],
+}
+
+@pytest.mark.parametrize("codec", list(CODECS.values()), ids=lambda c: c.name)
+def test_codec_round_trip(codec):
+    entry = encode_entry(SAMPLE, codec=codec)
+
+    assert entry[0] == codec.version
+    assert decode_entry(entry) == SAMPLE
+
+def test_entries_from_other_codec_are_readable():
+    # Una entrada escrita con JSON se puede leer aunque el codec por defecto sea otro
+    entry = encode_entry(SAMPLE, codec=JsonCodec())
+    assert decode_entry(entry) == SAMPLE
+
+def test_unknown_version_raises():
+    with pytest.raises(CacheCodecError):
+        decode_entry(b"{'legacy': 'eval format'}")
+
+def test_corrupt_payload_raises():
+    with pytest.raises(CacheCodecError):
+        decode_entry(bytes((JsonCodec.version,)) + b"{not json")
+
+def test_unsupported_type_is_rejected():
+    with pytest.raises(TypeError):
+        encode_entry({"value": object()}, codec=JsonCodec())
+
+def test_get_codec_by_name():
+    assert cache_codec.get_codec("json").version == JsonCodec.version
+    with pytest.raises(CacheCodecError):
+        cache_codec.get_codec("pickle")
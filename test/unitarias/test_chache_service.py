@@ -1,5 +1,19 @@
+import time
+import threading
 import pytest
+import fakeredis
+from datetime import datetime
+from zoneinfo import ZoneInfo
+from services import cache_service
 from services.cache_service import cache_post, get_cached_post, cache_popular_posts, get_cached_popular_posts
+from services.cache_service import invalidate_post, LocalCache, INVALIDATION_CHANNEL
+from services.cache_codec import encode_entry, decode_entry
+
+@pytest.fixture(autouse=True)
+def empty_local_cache():
+    cache_service.local_cache.clear()
+    yield
+    cache_service.local_cache.clear()
 
 def test_cache_post(mocker):
     mock_redis = mocker.patch('services.cache_service.redis_client')
@@ -9,7 +23,7 @@ def test_cache_post(mocker):
     
     cache_post(post_id, post_data)
     
-    mock_redis.setex.assert_called_once_with(f"post:{post_id}", 3600, str(post_data))
+    mock_redis.setex.assert_called_once_with(f"post:{post_id}", 3600, encode_entry(post_data))
 
 def test_get_cached_post(mocker):
     mock_redis = mocker.patch('services.cache_service.redis_client')
@@ -17,13 +31,32 @@ def test_get_cached_post(mocker):
     post_id = 1
     post_data = {"title": "Test Post", "content": "This is a test"}
     
-    mock_redis.get.return_value = str(post_data)
+    mock_redis.get.return_value = encode_entry(post_data)
     
     cached_post = get_cached_post(post_id)
     
     mock_redis.get.assert_called_once_with(f"post:{post_id}")
     assert cached_post == post_data
 
+def test_get_cached_post_keeps_datetimes(mocker):
+    mock_redis = mocker.patch('services.cache_service.redis_client')
+
+    created_at = datetime(2024, 7, 1, 12, 30, tzinfo=ZoneInfo("UTC"))
+    post_data = {"id": 1, "content": "Test", "created_at": created_at}
+    mock_redis.get.return_value = encode_entry(post_data)
+
+    cached_post = get_cached_post(1)
+
+    assert cached_post["created_at"] == created_at
+
+def test_get_cached_post_ignores_legacy_entries(mocker):
+    mock_redis = mocker.patch('services.cache_service.redis_client')
+
+    # Formato anterior (str + eval): nunca se debe evaluar
+    mock_redis.get.return_value = b"__import__('os').system('echo pwned')"
+
+    assert get_cached_post(1) is None
+
 def test_cache_popular_posts(mocker):
     mock_redis = mocker.patch('services.cache_service.redis_client')
     
@@ -31,16 +64,189 @@ def test_cache_popular_posts(mocker):
     
     cache_popular_posts(popular_posts)
     
-    mock_redis.setex.assert_called_once_with("popular_posts", 3600, str(popular_posts))
+    mock_redis.setex.assert_called_once_with("popular_posts", 3600, encode_entry(popular_posts))
+    assert decode_entry(mock_redis.setex.call_args[0][2]) == popular_posts
 
 def test_get_cached_popular_posts(mocker):
     mock_redis = mocker.patch('services.cache_service.redis_client')
     
     popular_posts = [{"title": "Popular Post 1"}, {"title": "Popular Post 2"}]
     
-    mock_redis.get.return_value = str(popular_posts)
+    mock_redis.get.return_value = encode_entry(popular_posts)
     
     cached_posts = get_cached_popular_posts()
     
     mock_redis.get.assert_called_once_with("popular_posts")
     assert cached_posts == popular_posts
+
+def test_get_cached_post_uses_local_tier(mocker):
+    mocker.patch('services.cache_service.redis_client', fakeredis.FakeRedis())
+
+    cache_post(1, {"content": "hot"})
+    cache_service.redis_client.flushall()
+
+    # El segundo nivel ya no tiene la llave, pero el cache local si
+    assert get_cached_post(1) == {"content": "hot"}
+    assert cache_service.get_cache_stats()["local"]["hits"] >= 1
+
+def test_get_cached_post_fills_local_tier_from_redis(mocker):
+    mock_redis = mocker.patch('services.cache_service.redis_client')
+    mock_redis.get.return_value = encode_entry({"content": "from redis"})
+
+    get_cached_post(1)
+    get_cached_post(1)
+
+    mock_redis.get.assert_called_once_with("post:1")
+
+def test_cached_value_cannot_be_mutated_by_caller(mocker):
+    mocker.patch('services.cache_service.redis_client', fakeredis.FakeRedis())
+
+    cache_post(1, {"comments": []})
+    get_cached_post(1)["comments"].append("oops")
+
+    assert get_cached_post(1) == {"comments": []}
+
+def test_invalidate_post_clears_both_tiers_and_publishes(mocker):
+    fake = fakeredis.FakeRedis()
+    mocker.patch('services.cache_service.redis_client', fake)
+    pubsub = fake.pubsub(ignore_subscribe_messages=True)
+    pubsub.subscribe(INVALIDATION_CHANNEL)
+
+    cache_post(1, {"content": "old"})
+    invalidate_post(1)
+
+    assert get_cached_post(1) is None
+    assert fake.get("post:1") is None
+    messages = [pubsub.get_message(timeout=0.1) for _ in range(3)]
+    assert {"type": "message", "pattern": None, "channel": INVALIDATION_CHANNEL.encode(), "data": b"post:1"} in messages
+
+def test_local_cache_evicts_least_recently_used():
+    cache = LocalCache(maxsize=2, ttl=60)
+    cache.set("a", b"1")
+    cache.set("b", b"2")
+    cache.get("a")
+    cache.set("c", b"3")
+
+    assert cache.get("b") is None
+    assert cache.get("a") == b"1"
+    assert cache.snapshot()["evictions"] == 1
+
+def test_local_cache_expires_entries():
+    cache = LocalCache(maxsize=10, ttl=0.01)
+    cache.set("a", b"1")
+    time.sleep(0.02)
+
+    assert cache.get("a") is None
+    assert cache.snapshot()["expirations"] == 1
+
+def test_read_through_caches_result(mocker):
+    mocker.patch('services.cache_service.redis_client', fakeredis.FakeRedis())
+    mocker.patch('services.cache_service._release_lock')
+    loader = mocker.Mock(return_value={"id": 1, "content": "Test"})
+    get_item = cache_service.read_through(lambda item_id: f"item:{item_id}", dict, dict)(loader)
+
+    assert get_item(1) == {"id": 1, "content": "Test"}
+    assert get_item(1) == {"id": 1, "content": "Test"}
+    loader.assert_called_once_with(1)
+
+def test_read_through_skips_cache_with_pending_writes(mocker):
+    fake = fakeredis.FakeRedis()
+    mocker.patch('services.cache_service.redis_client', fake)
+    mocker.patch('services.cache_service.has_pending_writes', return_value=True)
+    loader = mocker.Mock(return_value={"id": 1, "content": "Uncommitted"})
+    get_item = cache_service.read_through(lambda item_id: f"item:{item_id}", dict, dict)(loader)
+
+    assert get_item(1) == {"id": 1, "content": "Uncommitted"}
+    assert get_item(1) == {"id": 1, "content": "Uncommitted"}
+    assert loader.call_count == 2
+    assert fake.get("item:1") is None
+    assert cache_service.local_cache.get("item:1") is None
+
+def test_read_through_does_not_cache_none(mocker):
+    mocker.patch('services.cache_service.redis_client', fakeredis.FakeRedis())
+    mocker.patch('services.cache_service._release_lock')
+    loader = mocker.Mock(return_value=None)
+    get_item = cache_service.read_through(lambda item_id: f"item:{item_id}", dict, dict)(loader)
+
+    assert get_item(1) is None
+    assert get_item(1) is None
+    assert loader.call_count == 2
+
+def test_read_through_coalesces_concurrent_misses(mocker):
+    mocker.patch('services.cache_service.redis_client', fakeredis.FakeRedis())
+    mocker.patch('services.cache_service._release_lock')
+    calls = []
+
+    def loader(item_id):
+        calls.append(item_id)
+        time.sleep(0.1)
+        return {"id": item_id}
+
+    get_item = cache_service.read_through(lambda item_id: f"item:{item_id}", dict, dict)(loader)
+    barrier = threading.Barrier(20)
+    results = []
+
+    def worker():
+        barrier.wait()
+        results.append(get_item(7))
+
+    threads = [threading.Thread(target=worker) for _ in range(20)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert calls == [7]
+    assert results == [{"id": 7}] * 20
+
+def test_read_through_waits_for_lock_holder(mocker):
+    fake = fakeredis.FakeRedis()
+    mocker.patch('services.cache_service.redis_client', fake)
+    loader = mocker.Mock(return_value={"id": 1})
+    get_item = cache_service.read_through(lambda item_id: f"item:{item_id}", dict, dict)(loader)
+
+    # Otro proceso tiene el lock y guarda el valor mientras esperamos
+    fake.set("lock:item:1", "otro-worker", px=5000)
+    threading.Timer(0.05, lambda: fake.setex("item:1", 60, encode_entry({"id": 1, "from": "otro"}))).start()
+
+    assert get_item(1) == {"id": 1, "from": "otro"}
+    loader.assert_not_called()
+
+def test_read_through_without_redis_calls_loader(mocker):
+    mocker.patch('services.cache_service.redis_client', None)
+    loader = mocker.Mock(return_value={"id": 1})
+    get_item = cache_service.read_through(lambda item_id: f"item:{item_id}", dict, dict)(loader)
+
+    assert get_item(1) == {"id": 1}
+    assert get_item(1) == {"id": 1}
+    assert loader.call_count == 2
+
+def test_read_through_many_uses_mget_and_loads_missing_once(mocker):
+    fake = fakeredis.FakeRedis()
+    mocker.patch('services.cache_service.redis_client', fake)
+    fake.setex("item:1", 60, encode_entry({"id": 1}))
+    load_many = mocker.Mock(return_value={2: {"id": 2}})
+
+    def get_many(ids):
+        return cache_service.read_through_many(
+            ids, key_func=lambda i: f"item:{i}", load_many=load_many,
+            to_cache=dict, from_cache=dict
+        )
+
+    # Orden de la peticion, repetidos incluidos, y None para el que no existe
+    assert get_many([2, 1, 3, 2]) == [{"id": 2}, {"id": 1}, None, {"id": 2}]
+    load_many.assert_called_once_with([2, 3])
+    assert decode_entry(fake.get("item:2")) == {"id": 2}
+
+    load_many.reset_mock(return_value=True)
+    load_many.return_value = {}
+    assert get_many([1, 2]) == [{"id": 1}, {"id": 2}]
+    load_many.assert_not_called()
+
+def test_read_through_many_without_redis(mocker):
+    mocker.patch('services.cache_service.redis_client', None)
+    load_many = mocker.Mock(return_value={1: "a"})
+
+    assert cache_service.read_through_many(
+        [1, 5], key_func=str, load_many=load_many, to_cache=str, from_cache=str
+    ) == ["a", None]
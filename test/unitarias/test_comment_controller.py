@@ -5,9 +5,9 @@ from models.comment import Comment
 
 def test_create_comment_success(mocker):
     # Mock de la conexión a la base de datos y la consulta
-    mock_conn = mocker.patch('controllers.comment_controller.get_postgres_connection')
+    mock_conn = mocker.patch('controllers.comment_controller.postgres_connection')
     mock_cursor = mocker.Mock()
-    mock_conn.return_value.cursor.return_value.__enter__.return_value = mock_cursor
+    mock_conn.return_value.__enter__.return_value.cursor.return_value.__enter__.return_value = mock_cursor
 
     # Simula el retorno de `cur.fetchone()` con un ID de comentario
     mock_cursor.fetchone.return_value = [1]
@@ -17,8 +17,8 @@ def test_create_comment_success(mocker):
     mock_post.user_id = 2
     mocker.patch('controllers.post_controller.get_post', return_value=mock_post)
 
-    # Mock de `notification_controller.create_notification` para evitar una notificación real
-    mock_create_notification = mocker.patch('controllers.notification_controller.create_notification')
+    # Mock de `notification_controller.queue_notification` para evitar una notificación real
+    mock_create_notification = mocker.patch('controllers.notification_controller.queue_notification')
 
     # Ejecuta la función
     comment_id = comment_controller.create_comment(user_id=1, content="Test comment", post_id=123)
@@ -35,9 +35,9 @@ def test_create_comment_success(mocker):
 
 def test_create_comment_no_notification(mocker):
     # Mock de la conexión a la base de datos y la consulta
-    mock_conn = mocker.patch('controllers.comment_controller.get_postgres_connection')
+    mock_conn = mocker.patch('controllers.comment_controller.postgres_connection')
     mock_cursor = mocker.Mock()
-    mock_conn.return_value.cursor.return_value.__enter__.return_value = mock_cursor
+    mock_conn.return_value.__enter__.return_value.cursor.return_value.__enter__.return_value = mock_cursor
 
     # Simula el retorno de `cur.fetchone()` con un ID de comentario
     mock_cursor.fetchone.return_value = [2]
@@ -47,8 +47,8 @@ def test_create_comment_no_notification(mocker):
     mock_post.user_id = 1  # Mismo user_id que el creador del comentario
     mocker.patch('controllers.post_controller.get_post', return_value=mock_post)
 
-    # Mock de `notification_controller.create_notification` para evitar una notificación real
-    mock_create_notification = mocker.patch('controllers.notification_controller.create_notification')
+    # Mock de `notification_controller.queue_notification` para evitar una notificación real
+    mock_create_notification = mocker.patch('controllers.notification_controller.queue_notification')
 
     # Ejecuta la función
     comment_id = comment_controller.create_comment(user_id=1, content="Another test comment", post_id=123)
@@ -64,9 +64,9 @@ def test_create_comment_no_notification(mocker):
 
 def test_get_comments(mocker):
     # Mock de la conexión a la base de datos y la consulta
-    mock_conn = mocker.patch('controllers.comment_controller.get_postgres_connection')
+    mock_conn = mocker.patch('controllers.comment_controller.postgres_connection')
     mock_cursor = mocker.Mock()
-    mock_conn.return_value.cursor.return_value.__enter__.return_value = mock_cursor
+    mock_conn.return_value.__enter__.return_value.cursor.return_value.__enter__.return_value = mock_cursor
 
     # Datos simulados de retorno de `cur.fetchall()`
     mock_cursor.fetchall.return_value = [
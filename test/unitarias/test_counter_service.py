@@ -0,0 +1,76 @@
+# test/unitarias/test_counter_service.py
+import pytest
+import fakeredis
+from services import counter_service
+
+
+@pytest.fixture
+def fake_redis(mocker):
+    fake = fakeredis.FakeRedis(decode_responses=True)
+    mocker.patch('services.counter_service.redis_client', fake)
+    return fake
+
+@pytest.fixture
+def database(mocker):
+    counts = {("post", 1): {"likes": 3, "reaction:love": 2, "reaction:wow": 1}}
+    mock_load = mocker.patch(
+        'services.counter_service._load',
+        side_effect=lambda kind, target_id: dict(counts[(kind, int(target_id))])
+    )
+    return counts, mock_load
+
+
+def test_counts_are_loaded_once(fake_redis, database):
+    _, mock_load = database
+
+    assert counter_service.get_like_count(post_id=1) == 3
+    assert counter_service.get_reaction_counts(1) == [("love", 2), ("wow", 1)]
+    mock_load.assert_called_once_with("post", 1)
+
+def test_record_updates_counts_in_redis(fake_redis, database):
+    _, mock_load = database
+    counter_service.get_like_count(post_id=1)
+
+    counter_service.record_like(post_id=1)
+    counter_service.record_reaction(1, "wow", previous_type="love")
+    counter_service.record_reaction(1, "haha")
+
+    assert counter_service.get_like_count(post_id=1) == 4
+    assert sorted(counter_service.get_reaction_counts(1)) == [("haha", 1), ("love", 1), ("wow", 2)]
+    assert mock_load.call_count == 1
+
+def test_same_reaction_does_not_change_counts(fake_redis, database):
+    counter_service.record_reaction(1, "love", previous_type="love")
+
+    assert not fake_redis.exists(counter_service.counter_key("post", 1))
+
+def test_counts_are_rebuilt_after_flush(fake_redis, database):
+    counts, mock_load = database
+    counter_service.get_like_count(post_id=1)
+    fake_redis.flushall()
+
+    # Un incremento sobre un hash vacio no lo marca como completo
+    counter_service.record_like(post_id=1)
+    counts[("post", 1)]["likes"] = 4
+
+    assert counter_service.get_like_count(post_id=1) == 4
+    assert mock_load.call_count == 2
+
+def test_reconcile_fixes_drift(fake_redis, database):
+    counts, _ = database
+    counter_service.get_like_count(post_id=1)
+    counter_service.record_like(post_id=1)
+    counter_service.record_like(post_id=1)
+    # Solo uno de los dos likes llego a PostgreSQL
+    counts[("post", 1)]["likes"] = 4
+
+    assert counter_service.reconcile_counters() == 1
+    assert counter_service.get_like_count(post_id=1) == 4
+    assert counter_service.reconcile_counters() == 0
+
+def test_without_redis_reads_postgres(mocker, database):
+    mocker.patch('services.counter_service.redis_client', None)
+
+    counter_service.record_like(post_id=1)
+
+    assert counter_service.get_like_count(post_id=1) == 3
@@ -0,0 +1,131 @@
+# tests/unitarias/test_database_pool.py
+import pytest
+from psycopg2 import extensions
+from config import database
+from config.database import PostgresPool, PoolTimeoutError
+
+
+class FakeConnection:
+    """Conexion falsa con lo minimo que usa el pool"""
+
+    def __init__(self, healthy=True):
+        self.closed = 0
+        self.healthy = healthy
+        self.commits = 0
+        self.rollbacks = 0
+        self.info = type("Info", (), {"transaction_status": extensions.TRANSACTION_STATUS_IDLE})()
+
+    def cursor(self):
+        conn = self
+
+        class Cursor:
+            def __enter__(self):
+                return self
+
+            def __exit__(self, *args):
+                return False
+
+            def execute(self, sql):
+                if not conn.healthy:
+                    raise Exception("server closed the connection unexpectedly")
+
+        return Cursor()
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        self.rollbacks += 1
+        self.info.transaction_status = extensions.TRANSACTION_STATUS_IDLE
+
+    def close(self):
+        self.closed = 1
+
+
+def make_pool(**kwargs):
+    created = []
+
+    def connect():
+        conn = FakeConnection()
+        created.append(conn)
+        return conn
+
+    return PostgresPool(connect, **kwargs), created
+
+
+def test_pool_opens_min_connections_and_reuses_them():
+    pool, created = make_pool(minconn=2, maxconn=4)
+    assert len(created) == 2
+
+    conn = pool.getconn()
+    pool.putconn(conn)
+    again = pool.getconn()
+
+    assert again is conn
+    assert len(created) == 2
+    assert pool.stats()["checkouts"] == 2
+
+
+def test_pool_times_out_when_exhausted():
+    pool, _ = make_pool(minconn=0, maxconn=1, timeout=0.05)
+    pool.getconn()
+
+    with pytest.raises(PoolTimeoutError):
+        pool.getconn()
+    assert pool.stats()["timeouts"] == 1
+
+
+def test_pool_recycles_expired_connections():
+    pool, created = make_pool(minconn=1, maxconn=2, max_lifetime=0)
+    old = created[0]
+
+    conn = pool.getconn()
+
+    assert conn is not old
+    assert old.closed
+    assert pool.stats()["connections_discarded"] == 1
+
+
+def test_pool_replaces_connection_that_fails_health_check():
+    pool, created = make_pool(minconn=1, maxconn=2, health_check_idle=0)
+    created[0].healthy = False
+
+    conn = pool.getconn()
+
+    assert conn is not created[0]
+    assert pool.stats()["health_check_failures"] == 1
+
+
+def test_putconn_rolls_back_open_transaction():
+    pool, _ = make_pool(minconn=0, maxconn=1)
+    conn = pool.getconn()
+    conn.info.transaction_status = extensions.TRANSACTION_STATUS_INTRANS
+
+    pool.putconn(conn)
+
+    assert conn.rollbacks == 1
+    assert pool.stats()["idle"] == 1
+
+
+def test_postgres_connection_commits_and_returns_to_pool(mocker):
+    pool, created = make_pool(minconn=1, maxconn=1)
+    mocker.patch('config.database.get_postgres_pool', return_value=pool)
+
+    with database.postgres_connection() as conn:
+        assert pool.stats()["in_use"] == 1
+
+    assert conn.commits == 1
+    assert pool.stats()["in_use"] == 0
+
+
+def test_postgres_connection_rolls_back_on_error(mocker):
+    pool, created = make_pool(minconn=1, maxconn=1)
+    mocker.patch('config.database.get_postgres_pool', return_value=pool)
+
+    with pytest.raises(ValueError):
+        with database.postgres_connection():
+            raise ValueError("boom")
+
+    assert created[0].rollbacks == 1
+    assert created[0].commits == 0
+    assert pool.stats()["idle"] == 1
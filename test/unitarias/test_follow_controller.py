@@ -3,13 +3,15 @@ import pytest
 from controllers import follow_controller
 from models.user import User
 from models.post import Post
+from datetime import datetime, timezone
+from services.pagination import encode_cursor, decode_cursor
 
 def test_follow_user_success(mocker):
-    mock_conn = mocker.patch('controllers.follow_controller.get_postgres_connection')
+    mock_conn = mocker.patch('controllers.follow_controller.postgres_connection')
     mock_cursor = mocker.Mock()
-    mock_conn.return_value.cursor.return_value.__enter__.return_value = mock_cursor
+    mock_conn.return_value.__enter__.return_value.cursor.return_value.__enter__.return_value = mock_cursor
     mock_cursor.fetchone.return_value = [1]
-    mock_create_notification = mocker.patch('controllers.notification_controller.create_notification')
+    mock_create_notification = mocker.patch('controllers.notification_controller.queue_notification')
 
 
     follow_id = follow_controller.follow_user(follower_id=1, followed_id=2)
@@ -25,9 +27,9 @@ def test_follow_user_success(mocker):
     assert follow_id == 1
 
 def test_unfollow_user_success(mocker):
-    mock_conn = mocker.patch('controllers.follow_controller.get_postgres_connection')
+    mock_conn = mocker.patch('controllers.follow_controller.postgres_connection')
     mock_cursor = mocker.Mock()
-    mock_conn.return_value.cursor.return_value.__enter__.return_value = mock_cursor
+    mock_conn.return_value.__enter__.return_value.cursor.return_value.__enter__.return_value = mock_cursor
     mock_cursor.fetchone.return_value = [1]
 
     unfollow_id = follow_controller.unfollow_user(follower_id=1, followed_id=2)
@@ -39,9 +41,9 @@ def test_unfollow_user_success(mocker):
     assert unfollow_id == 1
 
 def test_get_followed_users(mocker):
-    mock_conn = mocker.patch('controllers.follow_controller.get_postgres_connection')
+    mock_conn = mocker.patch('controllers.follow_controller.postgres_connection')
     mock_cursor = mocker.Mock()
-    mock_conn.return_value.cursor.return_value.__enter__.return_value = mock_cursor
+    mock_conn.return_value.__enter__.return_value.cursor.return_value.__enter__.return_value = mock_cursor
     mock_cursor.fetchall.return_value = [
         ('user1', 'user1@example.com', 'bio', 'profile_pic_url', '2023-10-10', '2023-10-10'),
         ('user2', 'user2@example.com', 'bio', 'profile_pic_url', '2023-10-10', '2023-10-10')
@@ -58,9 +60,9 @@ def test_get_followed_users(mocker):
     assert followed_users[0].username == 'user1'
 
 def test_get_followers(mocker):
-    mock_conn = mocker.patch('controllers.follow_controller.get_postgres_connection')
+    mock_conn = mocker.patch('controllers.follow_controller.postgres_connection')
     mock_cursor = mocker.Mock()
-    mock_conn.return_value.cursor.return_value.__enter__.return_value = mock_cursor
+    mock_conn.return_value.__enter__.return_value.cursor.return_value.__enter__.return_value = mock_cursor
 
     mock_cursor.fetchall.return_value = [
     ('user1', 'user1@example.com', 'bio', 'profile_pic_url', '2023-10-10', '2023-10-10'),
@@ -80,9 +82,9 @@ def test_get_followers(mocker):
     assert followers[0].username == 'user1'
 
 def test_get_feed(mocker):
-    mock_conn = mocker.patch('controllers.follow_controller.get_postgres_connection')
+    mock_conn = mocker.patch('controllers.follow_controller.postgres_connection')
     mock_cursor = mocker.Mock()
-    mock_conn.return_value.cursor.return_value.__enter__.return_value = mock_cursor
+    mock_conn.return_value.__enter__.return_value.cursor.return_value.__enter__.return_value = mock_cursor
     mock_cursor.fetchall.return_value = [
         (1, 'First post', 'content1'),
         (2, 'Second post', 'content2')
@@ -96,4 +98,42 @@ def test_get_feed(mocker):
 
     assert len(feed_posts) == 2
     assert isinstance(feed_posts[0], Post)
-    assert feed_posts[0].content == 'First post'
\ No newline at end of file
+    assert feed_posts[0].content == 'First post'
+def test_get_feed_by_cursor_from_database(mocker):
+    mocker.patch('services.timeline_service.redis_client', None)
+    mock_conn = mocker.patch('controllers.follow_controller.postgres_connection')
+    mock_cursor = mocker.Mock()
+    mock_conn.return_value.__enter__.return_value.cursor.return_value.__enter__.return_value = mock_cursor
+    created_at = datetime(2024, 7, 1, 12, 0, tzinfo=timezone.utc)
+    mock_cursor.fetchall.return_value = [
+        (5, 2, 'Post 5', created_at, created_at),
+        (4, 2, 'Post 4', created_at, created_at)
+    ]
+
+    posts, next_cursor = follow_controller.get_feed_by_cursor(
+        user_id=1, cursor=encode_cursor(created_at.timestamp(), 6), page_size=1
+    )
+
+    mock_cursor.execute.assert_called_once_with(
+        "SELECT * FROM get_feed_by_cursor(%s, %s, %s, %s)", (1, created_at, 6, 2)
+    )
+    assert [post.id for post in posts] == [5]
+    assert decode_cursor(next_cursor, kind="score") == (created_at.timestamp(), 5)
+
+def test_get_feed_by_cursor_skips_deleted_posts_without_losing_entries(mocker):
+    mocker.patch(
+        'services.timeline_service.get_feed_entries_before',
+        return_value=[(5, 500.0), (4, 400.0), (3, 300.0)]
+    )
+    created_at = datetime(2024, 7, 1, 12, 0, tzinfo=timezone.utc)
+    mock_get_many = mocker.patch(
+        'controllers.post_controller.get_many',
+        return_value=[Post.from_row((5, 2, 'Post 5', created_at, created_at)), None]
+    )
+
+    posts, next_cursor = follow_controller.get_feed_by_cursor(user_id=1, page_size=2)
+
+    mock_get_many.assert_called_once_with([5, 4])
+    assert [post.id for post in posts] == [5]
+    # La siguiente pagina empieza despues del post borrado, no salta el 3
+    assert decode_cursor(next_cursor, kind="score") == (400.0, 4)
@@ -0,0 +1,87 @@
+# test/unitarias/test_geo_service.py
+import pytest
+import fakeredis
+from services import geo_service
+
+
+@pytest.fixture(autouse=True)
+def fake_redis(mocker):
+    fake = fakeredis.FakeRedis(decode_responses=True)
+    mocker.patch('services.geo_service.redis_client', fake)
+    yield fake
+
+
+# San Jose, Cartago (~20 km), Liberia (~170 km)
+def index_places(fake_redis):
+    geo_service.index_place(1, 9.9333, -84.0833)
+    geo_service.index_place(2, 9.8644, -83.9194)
+    geo_service.index_place(3, 10.6346, -85.4407)
+    fake_redis.geoadd(geo_service.GEO_KEY, geo_service.BUILT_MARKER_POSITION)
+
+def test_radius_returns_places_inside_sorted_by_distance(fake_redis):
+    index_places(fake_redis)
+
+    results = geo_service.nearby(9.93, -84.08, radius_km=50)
+
+    assert [place_id for place_id, _ in results] == [1, 2]
+    assert results[0][1] < 1
+    assert 15 < results[1][1] < 25
+
+def test_knn_expands_radius_until_limit(mocker, fake_redis):
+    index_places(fake_redis)
+    mocker.patch.object(geo_service, 'KNN_START_RADIUS_KM', 1)
+
+    results = geo_service.nearby(9.93, -84.08, limit=3)
+
+    assert [place_id for place_id, _ in results] == [1, 2, 3]
+
+def test_knn_with_fewer_places_than_limit_uses_postgres(fake_redis):
+    index_places(fake_redis)
+
+    # Para juntar 10 el radio llega a los polos, donde Redis no tiene lugares
+    assert geo_service.nearby(9.93, -84.08, limit=10) is None
+
+def test_remove_and_clear_location(fake_redis):
+    index_places(fake_redis)
+    geo_service.remove_place(1)
+    geo_service.index_place(2, None, None)
+
+    assert geo_service.nearby(9.93, -84.08, radius_km=50) == []
+
+def test_without_redis_returns_none(mocker):
+    mocker.patch('services.geo_service.redis_client', None)
+
+    assert geo_service.nearby(9.93, -84.08, radius_km=5) is None
+
+def test_without_built_marker_returns_none(fake_redis):
+    index_places(fake_redis)
+    fake_redis.zrem(geo_service.GEO_KEY, geo_service.BUILT_MARKER)
+
+    assert geo_service.nearby(9.93, -84.08, radius_km=50) is None
+    assert geo_service.nearby(9.93, -84.08, limit=2) is None
+
+def test_search_near_poles_returns_none(fake_redis):
+    index_places(fake_redis)
+
+    # El centinela no aparece entre los resultados
+    assert geo_service.nearby(-85.0, 0.0, radius_km=1) == []
+
+    assert geo_service.nearby(84.9, 10.0, radius_km=50) is None
+    assert geo_service.nearby(-89.0, 0.0, limit=5) is None
+
+def test_rebuild_index_adds_built_marker(mocker, fake_redis):
+    fake_redis.geoadd(geo_service.GEO_KEY, geo_service.BUILT_MARKER_POSITION + (0.0, 0.0, "99"))
+    cursor = mocker.MagicMock()
+    cursor.__iter__.return_value = iter([
+        (1, 9.9333, -84.0833),
+        (2, 9.8644, -83.9194),
+    ])
+    conn = mocker.MagicMock()
+    conn.cursor.return_value.__enter__.return_value = cursor
+    mocker.patch('services.geo_service.postgres_connection').return_value.__enter__.return_value = conn
+
+    assert geo_service.rebuild_index() == 2
+
+    assert fake_redis.geopos(geo_service.GEO_KEY, geo_service.BUILT_MARKER) != [None]
+    assert fake_redis.geopos(geo_service.GEO_KEY, "99") == [None]
+    assert [place_id for place_id, _ in geo_service.nearby(9.93, -84.08, radius_km=50)] == [1, 2]
@@ -3,16 +3,16 @@ from controllers import like_controller
 from models.post import Post
 
 def test_add_like_success(mocker):
-    mock_conn = mocker.patch('controllers.like_controller.get_postgres_connection')
+    mock_conn = mocker.patch('controllers.like_controller.postgres_connection')
     mock_cursor = mocker.Mock()
-    mock_conn.return_value.cursor.return_value.__enter__.return_value = mock_cursor
+    mock_conn.return_value.__enter__.return_value.cursor.return_value.__enter__.return_value = mock_cursor
     mock_cursor.fetchone.return_value = [True]
 
     mock_post = mocker.Mock()
     mock_post.user_id = 2
     
     mocker.patch('controllers.post_controller.get_post', return_value=mock_post)
-    mock_create_notification = mocker.patch('controllers.notification_controller.create_notification')
+    mock_create_notification = mocker.patch('controllers.notification_controller.queue_notification')
 
     success = like_controller.add_like(user_id=1, post_id=123)
 
@@ -21,21 +21,21 @@ def test_add_like_success(mocker):
         (1, 123, None)
     )
     mock_create_notification.assert_called_once_with(
-        2, "comment", "User 1 commented on your post", 123
+        2, "like", "User 1 liked your post", 123
     )
     assert success is True
 
 def test_add_like_no_notification(mocker):
-    mock_conn = mocker.patch('controllers.like_controller.get_postgres_connection')
+    mock_conn = mocker.patch('controllers.like_controller.postgres_connection')
     mock_cursor = mocker.Mock()
-    mock_conn.return_value.cursor.return_value.__enter__.return_value = mock_cursor
+    mock_conn.return_value.__enter__.return_value.cursor.return_value.__enter__.return_value = mock_cursor
     mock_cursor.fetchone.return_value = [True]
     
     mock_post = mocker.Mock()
     mock_post.user_id = 1 
     
     mocker.patch('controllers.post_controller.get_post', return_value=mock_post)
-    mock_create_notification = mocker.patch('controllers.notification_controller.create_notification')
+    mock_create_notification = mocker.patch('controllers.notification_controller.queue_notification')
 
     success = like_controller.add_like(user_id=1, post_id=123)
 
@@ -48,14 +48,81 @@ def test_add_like_no_notification(mocker):
     assert success is True
 
 def test_get_like_count(mocker):
-    mock_conn = mocker.patch('controllers.like_controller.get_postgres_connection')
+    # Sin Redis el conteo se lee de PostgreSQL
+    mocker.patch('services.counter_service.redis_client', None)
+    mock_conn = mocker.patch('services.counter_service.postgres_connection')
     mock_cursor = mocker.Mock()
-    mock_conn.return_value.cursor.return_value.__enter__.return_value = mock_cursor
+    mock_conn.return_value.__enter__.return_value.cursor.return_value.__enter__.return_value = mock_cursor
     mock_cursor.fetchone.return_value = [10]
+    mock_cursor.fetchall.return_value = []
 
     like_count = like_controller.get_like_count(post_id=123)
 
-    mock_cursor.execute.assert_called_once_with(
+    mock_cursor.execute.assert_any_call(
         "SELECT get_like_count(%s, %s)", (123, None)
     )
     assert like_count == 10
+
+def test_add_likes_batch(mocker):
+    mock_conn = mocker.patch('controllers.like_controller.postgres_connection')
+    mock_cursor = mocker.Mock()
+    mock_conn.return_value.__enter__.return_value.cursor.return_value.__enter__.return_value = mock_cursor
+    # El like a 123 ya existia: solo se insertan dos
+    mock_execute_values = mocker.patch(
+        'controllers.like_controller.execute_values',
+        return_value=[(2, 124, None), (2, None, 7)]
+    )
+    mock_post = mocker.Mock()
+    mock_post.user_id = 5
+    mock_get_many = mocker.patch('controllers.post_controller.get_many', return_value=[mock_post])
+    mock_get_post = mocker.patch('controllers.post_controller.get_post')
+    mock_queue_notification = mocker.patch('controllers.notification_controller.queue_notification')
+    mock_record_likes = mocker.patch('services.counter_service.record_likes')
+
+    # El user_id de cada elemento se ignora: todos son del usuario autenticado
+    added = like_controller.add_likes_batch(2, [
+        {"post_id": 123},
+        {"user_id": 1, "post_id": 124},
+        {"place_id": 7},
+    ])
+
+    assert added == 2
+    args, kwargs = mock_execute_values.call_args
+    assert "ON CONFLICT DO NOTHING" in args[1]
+    assert args[2] == [(2, 123, None), (2, 124, None), (2, None, 7)]
+    assert kwargs["page_size"] == 3
+    mock_record_likes.assert_called_once_with([(124, None), (None, 7)])
+    mock_queue_notification.assert_called_once_with(
+        5, "like", "User 2 liked your post", 124
+    )
+    # Los propietarios se cargan juntos, no un get_post por like
+    mock_get_many.assert_called_once_with([124])
+    mock_get_post.assert_not_called()
+
+def test_add_likes_batch_skips_deleted_posts(mocker):
+    mocker.patch('controllers.like_controller.postgres_connection')
+    mocker.patch(
+        'controllers.like_controller.execute_values',
+        return_value=[(2, 123, None), (2, 124, None)]
+    )
+    mock_post = mocker.Mock()
+    mock_post.user_id = 5
+    mocker.patch('controllers.post_controller.get_many', return_value=[None, mock_post])
+    mock_queue_notification = mocker.patch('controllers.notification_controller.queue_notification')
+    mocker.patch('services.counter_service.record_likes')
+
+    added = like_controller.add_likes_batch(2, [{"post_id": 123}, {"post_id": 124}])
+
+    assert added == 2
+    mock_queue_notification.assert_called_once_with(
+        5, "like", "User 2 liked your post", 124
+    )
+
+def test_add_likes_batch_rejects_invalid_items(mocker):
+    mock_execute_values = mocker.patch('controllers.like_controller.execute_values')
+
+    with pytest.raises(ValueError):
+        like_controller.add_likes_batch(1, [{"post_id": 1, "place_id": 2}])
+    with pytest.raises(ValueError):
+        like_controller.add_likes_batch(1, [{"post_id": 1}] * (like_controller.MAX_BATCH_SIZE + 1))
+    mock_execute_values.assert_not_called()
@@ -0,0 +1,85 @@
+# tests/unitarias/test_metrics.py
+import pytest
+from flask import Flask, jsonify
+from prometheus_client import REGISTRY
+from config import database
+from config.database import postgres_connection
+from middleware.metrics import register_metrics
+from middleware.unit_of_work import register_unit_of_work
+from services import metrics
+from services.metrics import procedure_name, key_prefix
+
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+@pytest.fixture
+def app(mocker):
+    pool = mocker.Mock()
+    pool.getconn.side_effect = lambda: mocker.MagicMock(closed=0)
+    mocker.patch('config.database.get_postgres_pool', return_value=pool)
+    app = Flask(__name__)
+    register_metrics(app)
+    register_unit_of_work(app)
+    return app
+
+
+@pytest.mark.parametrize("sql, expected", [
+    ("SELECT * FROM get_trip_statistics(%s)", "get_trip_statistics"),
+    ("SELECT create_place(%s, %s, %s, %s, %s, %s)", "create_place"),
+    ("  select * from search_content (%s)", "search_content"),
+    (b"SELECT add_trip_expense(%s)", "add_trip_expense"),
+    ("SELECT COUNT(*) FROM posts", "select"),
+    ("INSERT INTO likes (user_id) VALUES (%s)", "insert"),
+    ("COMMIT", "commit"),
+    ("", "unknown"),
+])
+def test_procedure_name(sql, expected):
+    assert procedure_name(sql) == expected
+
+@pytest.mark.parametrize("key, expected", [
+    ("post:42", "post"),
+    ("post:42:expanded", "post:expanded"),
+    ("popular_posts", "popular_posts"),
+    ("search:v3:abc", "search:v3"),
+    (b"user:7", "user"),
+])
+def test_key_prefix(key, expected):
+    assert key_prefix(key) == expected
+
+def test_request_and_query_metrics(app):
+    @app.route('/trips/<int:trip_id>/statistics')
+    def statistics(trip_id):
+        with postgres_connection():
+            database._notify(database._query_observers, "SELECT * FROM get_trip_statistics(%s)", (trip_id,), 0.002)
+        return jsonify({"trip_id": trip_id}), 200
+
+    requests_before = sample('http_requests_total', endpoint='statistics', method='GET', status='200')
+    queries_before = sample('db_queries_total', procedure='get_trip_statistics')
+    commits_before = sample('db_queries_total', procedure='commit')
+
+    client = app.test_client()
+    client.get('/trips/1/statistics')
+    client.get('/trips/2/statistics')
+
+    assert sample('http_requests_total', endpoint='statistics', method='GET', status='200') == requests_before + 2
+    assert sample('db_queries_total', procedure='get_trip_statistics') == queries_before + 2
+    assert sample('db_queries_total', procedure='commit') >= commits_before + 2
+    assert sample('http_request_duration_seconds_count', endpoint='statistics') >= 2
+
+def test_cache_metrics_by_prefix():
+    before = sample('cache_requests_total', prefix='post:expanded', result='miss')
+
+    metrics.record_cache("post:1:expanded", hit=False)
+
+    assert sample('cache_requests_total', prefix='post:expanded', result='miss') == before + 1
+
+def test_generate_metrics_includes_outbox_backlog(mocker):
+    mocker.patch('services.notification_outbox.get_outbox_stats', return_value={"backlog": 7})
+
+    body, content_type = metrics.generate_metrics()
+
+    assert content_type.startswith('text/plain')
+    assert b'notification_outbox_backlog 7.0' in body
+    assert b'http_requests_total' in body
@@ -1,10 +1,12 @@
 import pytest
+from datetime import datetime, timezone
+from services.pagination import decode_cursor
 from controllers import notification_controller
 
 def test_create_notification(mocker):
-    mock_conn = mocker.patch('controllers.notification_controller.get_postgres_connection')
+    mock_conn = mocker.patch('controllers.notification_controller.postgres_connection')
     mock_cursor = mocker.Mock()
-    mock_conn.return_value.cursor.return_value.__enter__.return_value = mock_cursor
+    mock_conn.return_value.__enter__.return_value.cursor.return_value.__enter__.return_value = mock_cursor
     mock_cursor.fetchone.return_value = [1]
 
     notification_id = notification_controller.create_notification(
@@ -21,9 +23,9 @@ def test_create_notification(mocker):
     assert notification_id == 1
 
 def test_get_user_notifications(mocker):
-    mock_conn = mocker.patch('controllers.notification_controller.get_postgres_connection')
+    mock_conn = mocker.patch('controllers.notification_controller.postgres_connection')
     mock_cursor = mocker.Mock()
-    mock_conn.return_value.cursor.return_value.__enter__.return_value = mock_cursor
+    mock_conn.return_value.__enter__.return_value.cursor.return_value.__enter__.return_value = mock_cursor
 
     mock_cursor.fetchall.return_value = [
         (1, "comment", "User 2 commented on your post", 123, False, "2023-10-10"),
@@ -43,9 +45,9 @@ def test_get_user_notifications(mocker):
     assert notifications[1]["is_read"] is True
 
 def test_mark_notification_as_read(mocker):
-    mock_conn = mocker.patch('controllers.notification_controller.get_postgres_connection')
+    mock_conn = mocker.patch('controllers.notification_controller.postgres_connection')
     mock_cursor = mocker.Mock()
-    mock_conn.return_value.cursor.return_value.__enter__.return_value = mock_cursor
+    mock_conn.return_value.__enter__.return_value.cursor.return_value.__enter__.return_value = mock_cursor
 
     mock_cursor.fetchone.return_value = [True]
 
@@ -55,4 +57,30 @@ def test_mark_notification_as_read(mocker):
         "SELECT mark_notification_as_read(%s)", (1,)
     )
 
-    assert success is True
\ No newline at end of file
+    assert success is True
+def test_get_user_notifications_by_cursor(mocker):
+    mock_conn = mocker.patch('controllers.notification_controller.postgres_connection')
+    mock_cursor = mocker.Mock()
+    mock_conn.return_value.__enter__.return_value.cursor.return_value.__enter__.return_value = mock_cursor
+
+    mock_cursor.fetchall.return_value = [
+        (3, "like", "User 3 liked your post", 124, False, datetime(2023, 10, 12, tzinfo=timezone.utc)),
+        (2, "comment", "User 2 commented on your post", 123, False, datetime(2023, 10, 11, tzinfo=timezone.utc)),
+        (1, "follow", "User 4 followed you", None, True, datetime(2023, 10, 10, tzinfo=timezone.utc))
+    ]
+
+    notifications, next_cursor = notification_controller.get_user_notifications_by_cursor(user_id=1, limit=2)
+
+    mock_cursor.execute.assert_called_once_with(
+        "SELECT * FROM get_user_notifications_by_cursor(%s, %s, %s, %s)", (1, None, None, 3)
+    )
+    assert [n["id"] for n in notifications] == [3, 2]
+    assert decode_cursor(next_cursor) == (datetime(2023, 10, 11, tzinfo=timezone.utc), 2)
+
+    mock_cursor.execute.reset_mock()
+    notification_controller.get_user_notifications_by_cursor(user_id=1, cursor=next_cursor, limit=2)
+
+    mock_cursor.execute.assert_called_once_with(
+        "SELECT * FROM get_user_notifications_by_cursor(%s, %s, %s, %s)",
+        (1, datetime(2023, 10, 11, tzinfo=timezone.utc), 2, 3)
+    )
@@ -0,0 +1,73 @@
+# test/unitarias/test_notification_outbox.py
+import queue
+import pytest
+import fakeredis
+from services import notification_outbox
+
+
+@pytest.fixture
+def fake_redis(mocker):
+    fake = fakeredis.FakeRedis(decode_responses=True)
+    mocker.patch('services.notification_outbox.redis_client', fake)
+    mocker.patch('services.notification_outbox._group_ready', False)
+    return fake
+
+@pytest.fixture
+def local_queue(mocker):
+    mocker.patch('services.notification_outbox.redis_client', None)
+    local = queue.Queue()
+    mocker.patch('services.notification_outbox._local_queue', local)
+    return local
+
+
+def test_flush_writes_batch_and_acks(fake_redis, mocker):
+    mock_write = mocker.patch('services.notification_outbox._write_batch', return_value=2)
+
+    notification_outbox.enqueue_notification(2, "follow", "User 1 followed you", None, dedup_key="a")
+    notification_outbox.enqueue_notification(3, "comment", "User 1 commented on your post", 10, dedup_key="b")
+
+    assert notification_outbox.flush_outbox() == 2
+    mock_write.assert_called_once_with([
+        {"user_id": 2, "type": "follow", "content": "User 1 followed you", "related_id": None, "dedup_key": "a"},
+        {"user_id": 3, "type": "comment", "content": "User 1 commented on your post", "related_id": 10, "dedup_key": "b"},
+    ])
+    # Confirmadas y eliminadas del stream
+    assert fake_redis.xlen(notification_outbox.OUTBOX_STREAM) == 0
+    assert notification_outbox.flush_outbox() == 0
+
+def test_failed_write_keeps_messages_for_retry(fake_redis, mocker):
+    mocker.patch('services.notification_outbox.OUTBOX_CLAIM_IDLE_MS', 0)
+    mock_write = mocker.patch(
+        'services.notification_outbox._write_batch', side_effect=[Exception("db down"), 1]
+    )
+    notification_outbox.enqueue_notification(2, "follow", "User 1 followed you", None, dedup_key="a")
+
+    with pytest.raises(Exception):
+        notification_outbox.flush_outbox()
+    assert fake_redis.xlen(notification_outbox.OUTBOX_STREAM) == 1
+
+    # El reintento toma el mensaje pendiente con la misma dedup_key
+    assert notification_outbox.flush_outbox() == 1
+    assert mock_write.call_args_list[1][0][0][0]["dedup_key"] == "a"
+    assert fake_redis.xlen(notification_outbox.OUTBOX_STREAM) == 0
+
+def test_enqueue_generates_dedup_key(fake_redis):
+    first = notification_outbox.enqueue_notification(2, "follow", "User 1 followed you")
+    second = notification_outbox.enqueue_notification(2, "follow", "User 1 followed you")
+
+    assert first and second and first != second
+
+def test_local_queue_without_redis(local_queue, mocker):
+    mock_write = mocker.patch(
+        'services.notification_outbox._write_batch', side_effect=[Exception("db down"), 1]
+    )
+    notification_outbox.enqueue_notification(2, "follow", "User 1 followed you", None, dedup_key="a")
+
+    with pytest.raises(Exception):
+        notification_outbox.flush_outbox()
+    # Se devuelve a la cola para el siguiente intento
+    assert local_queue.qsize() == 1
+
+    assert notification_outbox.flush_outbox() == 1
+    assert local_queue.qsize() == 0
+    assert notification_outbox.get_outbox_stats()["backlog"] == 0
@@ -0,0 +1,44 @@
+# test/unitarias/test_pagination.py
+import pytest
+from datetime import datetime, date
+from zoneinfo import ZoneInfo
+from services.pagination import encode_cursor, decode_cursor, paginate, parse_ids, InvalidCursorError
+
+
+def test_cursor_roundtrip_keeps_datetime():
+    created_at = datetime(2024, 7, 1, 12, 30, 15, 123456, tzinfo=ZoneInfo("UTC"))
+
+    assert decode_cursor(encode_cursor(created_at, 42)) == (created_at, 42)
+
+def test_cursor_roundtrip_dates_and_scores():
+    assert decode_cursor(encode_cursor(date(2024, 7, 1), 3), kind="date") == (date(2024, 7, 1), 3)
+    assert decode_cursor(encode_cursor(1719837015.25, 9), kind="score") == (1719837015.25, 9)
+
+@pytest.mark.parametrize("cursor", ["not-a-cursor", encode_cursor("2024-07-01", "1"), encode_cursor("ayer", 1), ""])
+def test_invalid_cursor_raises(cursor):
+    with pytest.raises(InvalidCursorError):
+        decode_cursor(cursor)
+
+def test_cursor_with_unknown_kind_raises():
+    with pytest.raises(InvalidCursorError):
+        decode_cursor(encode_cursor(1719837015.25, 9), kind="otro")
+
+def test_paginate_returns_next_cursor_only_when_more_rows():
+    rows = [(date(2024, 7, d), d) for d in (5, 4, 3)]
+
+    page, next_cursor = paginate(rows, 2, lambda row: row)
+    assert page == rows[:2]
+    assert decode_cursor(next_cursor, kind="date") == (date(2024, 7, 4), 4)
+
+    page, next_cursor = paginate(rows, 3, lambda row: row)
+    assert page == rows
+    assert next_cursor is None
+
+def test_parse_ids():
+    assert parse_ids("3,1,3") == [3, 1, 3]
+    with pytest.raises(ValueError):
+        parse_ids("")
+    with pytest.raises(ValueError):
+        parse_ids("1,x")
+    with pytest.raises(ValueError):
+        parse_ids(",".join(["1"] * 101))
@@ -1,11 +1,12 @@
 import pytest
+from datetime import datetime, timezone
 from controllers import place_controller
 from models.place import Place
 
 def test_create_place(mocker):
-    mock_conn = mocker.patch('controllers.place_controller.get_postgres_connection')
+    mock_conn = mocker.patch('controllers.place_controller.postgres_connection')
     mock_cursor = mocker.Mock()
-    mock_conn.return_value.cursor.return_value.__enter__.return_value = mock_cursor
+    mock_conn.return_value.__enter__.return_value.cursor.return_value.__enter__.return_value = mock_cursor
     mock_cursor.fetchone.return_value = [1]
 
     place_id = place_controller.create_place(
@@ -16,17 +17,23 @@ def test_create_place(mocker):
     )
 
     mock_cursor.execute.assert_called_once_with(
-        "SELECT create_place(%s, %s, %s, %s)",
-        ("Test Place", "A place for testing", "Test City", "Test Country")
+        "SELECT create_place(%s, %s, %s, %s, %s, %s)",
+        ("Test Place", "A place for testing", "Test City", "Test Country", None, None)
     )
 
     assert place_id == 1
 
 def test_get_place(mocker):
-    mock_conn = mocker.patch('controllers.place_controller.get_postgres_connection')
+    mock_conn = mocker.patch('controllers.place_controller.postgres_connection')
     mock_cursor = mocker.Mock()
-    mock_conn.return_value.cursor.return_value.__enter__.return_value = mock_cursor
-    mock_cursor.fetchone.return_value = ("Test Place", "A place for testing", "Test City", "Test Country")
+    mock_conn.return_value.__enter__.return_value.cursor.return_value.__enter__.return_value = mock_cursor
+    # Columnas de get_place_by_id: id, name, description, city, country,
+    # created_at, updated_at, latitude, longitude
+    created_at = datetime(2024, 5, 1, 12, 0, tzinfo=timezone.utc)
+    mock_cursor.fetchone.return_value = (
+        1, "Test Place", "A place for testing", "Test City", "Test Country",
+        created_at, created_at, 9.93, -84.08
+    )
 
     place = place_controller.get_place(place_id=1)
 
@@ -35,13 +42,15 @@ def test_get_place(mocker):
     )
 
     assert isinstance(place, Place)
+    assert place.id == 1
     assert place.name == "Test Place"
     assert place.city == "Test City"
+    assert (place.latitude, place.longitude) == (9.93, -84.08)
 
 def test_update_place(mocker):
-    mock_conn = mocker.patch('controllers.place_controller.get_postgres_connection')
+    mock_conn = mocker.patch('controllers.place_controller.postgres_connection')
     mock_cursor = mocker.Mock()
-    mock_conn.return_value.cursor.return_value.__enter__.return_value = mock_cursor
+    mock_conn.return_value.__enter__.return_value.cursor.return_value.__enter__.return_value = mock_cursor
     mock_cursor.fetchone.return_value = [1]
 
     updated_place_id = place_controller.update_place(
@@ -53,16 +62,16 @@ def test_update_place(mocker):
     )
 
     mock_cursor.execute.assert_called_once_with(
-        "SELECT update_place(%s, %s, %s, %s, %s)",
-        (1, "Updated Place", "Updated description", "Updated City", "Updated Country")
+        "SELECT update_place(%s, %s, %s, %s, %s, %s, %s)",
+        (1, "Updated Place", "Updated description", "Updated City", "Updated Country", None, None)
     )
 
     assert updated_place_id == 1
 
 def test_delete_place(mocker):
-    mock_conn = mocker.patch('controllers.place_controller.get_postgres_connection')
+    mock_conn = mocker.patch('controllers.place_controller.postgres_connection')
     mock_cursor = mocker.Mock()
-    mock_conn.return_value.cursor.return_value.__enter__.return_value = mock_cursor
+    mock_conn.return_value.__enter__.return_value.cursor.return_value.__enter__.return_value = mock_cursor
     mock_cursor.fetchone.return_value = [1]
 
     deleted_place_id = place_controller.delete_place(place_id=1)
@@ -71,4 +80,59 @@ def test_delete_place(mocker):
         "SELECT delete_place(%s)", (1,)
     )
 
-    assert deleted_place_id == 1
\ No newline at end of file
+    assert deleted_place_id == 1
+def test_get_many_places(mocker):
+    mocker.patch('services.cache_service.redis_client', None)
+    mock_conn = mocker.patch('controllers.place_controller.postgres_connection')
+    mock_cursor = mocker.Mock()
+    mock_conn.return_value.__enter__.return_value.cursor.return_value.__enter__.return_value = mock_cursor
+    mock_cursor.fetchall.return_value = [
+        (2, "Arenal", "Volcan", "La Fortuna", "Costa Rica", None, None),
+    ]
+
+    places = place_controller.get_many([2, 9])
+
+    mock_cursor.execute.assert_called_once_with(
+        "SELECT * FROM get_places_by_ids(%s)", ([2, 9],)
+    )
+    assert isinstance(places[0], Place)
+    assert places[0].city == "La Fortuna"
+    assert places[1] is None
+
+def test_create_place_with_location_indexes_it(mocker):
+    mock_conn = mocker.patch('controllers.place_controller.postgres_connection')
+    mock_cursor = mocker.Mock()
+    mock_conn.return_value.__enter__.return_value.cursor.return_value.__enter__.return_value = mock_cursor
+    mock_cursor.fetchone.return_value = [5]
+    mock_index = mocker.patch('services.geo_service.index_place')
+
+    place_controller.create_place("Arenal", "Volcan", "La Fortuna", "Costa Rica", 10.46, -84.70)
+
+    mock_index.assert_called_once_with(5, 10.46, -84.70)
+
+def test_get_nearby_uses_redis(mocker):
+    mocker.patch('services.geo_service.nearby', return_value=[(2, 0.5), (9, 1.2), (4, 3.0)])
+    places = [Place("A", None, "X", "Y", id=2), None, Place("C", None, "X", "Y", id=4)]
+    mock_get_many = mocker.patch('controllers.place_controller.get_many', return_value=places)
+    mock_conn = mocker.patch('controllers.place_controller.postgres_connection')
+
+    nearby = place_controller.get_nearby(9.9, -84.1, radius_km=5, limit=10)
+
+    mock_get_many.assert_called_once_with([2, 9, 4])
+    mock_conn.assert_not_called()
+    assert [(place.id, distance) for place, distance in nearby] == [(2, 0.5), (4, 3.0)]
+
+def test_get_nearby_falls_back_to_postgres(mocker):
+    mocker.patch('services.geo_service.nearby', return_value=None)
+    mocker.patch('controllers.place_controller.get_many', return_value=[Place("A", None, "X", "Y", id=2)])
+    mock_conn = mocker.patch('controllers.place_controller.postgres_connection')
+    mock_cursor = mocker.Mock()
+    mock_conn.return_value.__enter__.return_value.cursor.return_value.__enter__.return_value = mock_cursor
+    mock_cursor.fetchall.return_value = [(2, 1500.0)]
+
+    nearby = place_controller.get_nearby(9.9, -84.1, radius_km=2, limit=10)
+
+    mock_cursor.execute.assert_called_once_with(
+        "SELECT * FROM get_places_nearby(%s, %s, %s, %s)", (9.9, -84.1, 2000, 10)
+    )
+    assert nearby[0][1] == 1.5
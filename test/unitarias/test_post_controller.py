@@ -1,13 +1,20 @@
 import pytest
+import fakeredis
+from datetime import datetime, timezone
+from services.pagination import encode_cursor, decode_cursor
 from controllers import post_controller
+from services import cache_service
 from models.post import Post
 
 def test_create_post(mocker):
-    mock_conn = mocker.patch('controllers.post_controller.get_postgres_connection')
+    mock_conn = mocker.patch('controllers.post_controller.postgres_connection')
     mock_cursor = mocker.Mock()
-    mock_conn.return_value.cursor.return_value.__enter__.return_value = mock_cursor
+    mock_conn.return_value.__enter__.return_value.cursor.return_value.__enter__.return_value = mock_cursor
 
-    mock_cursor.fetchone.return_value = [1]
+    mock_push = mocker.patch('controllers.post_controller.timeline_service.push_post')
+    mocker.patch('controllers.post_controller.bump_generation')
+    created_at = datetime(2024, 5, 1, 12, 0, tzinfo=timezone.utc)
+    mock_cursor.fetchone.return_value = (1, created_at)
 
     post_id = post_controller.create_post(
         user_id=1,
@@ -15,58 +22,132 @@ def test_create_post(mocker):
     )
 
     mock_cursor.execute.assert_called_once_with(
-        "SELECT create_post(%s, %s)",
+        "SELECT * FROM create_post(%s, %s)",
         (1, "Test content")
     )
     assert post_id == 1
+    mock_push.assert_called_once_with(1, 1, created_at.timestamp())
 
 def test_get_post(mocker):
-    mock_cache = mocker.patch('controllers.post_controller.get_cached_post', return_value=None)
-    mock_conn = mocker.patch('controllers.post_controller.get_postgres_connection')
+    mocker.patch('services.cache_service.redis_client', fakeredis.FakeRedis())
+    mocker.patch('services.cache_service._release_lock')
+    cache_service.local_cache.clear()
+    mock_conn = mocker.patch('controllers.post_controller.postgres_connection')
     mock_cursor = mocker.Mock()
-    mock_conn.return_value.cursor.return_value.__enter__.return_value = mock_cursor
-
-    mock_cursor.fetchone.return_value = (1, "Test content")
+    mock_conn.return_value.__enter__.return_value.cursor.return_value.__enter__.return_value = mock_cursor
 
-    mock_cache_post = mocker.patch('controllers.post_controller.cache_post')
+    # Columnas de get_post_by_id: id, user_id, content, created_at, updated_at
+    created_at = datetime(2024, 5, 1, 12, 0, tzinfo=timezone.utc)
+    mock_cursor.fetchone.return_value = (1, 7, "Test content", created_at, created_at)
 
     post = post_controller.get_post(post_id=1)
+    cached = post_controller.get_post(post_id=1)
 
-    mock_cache.assert_called_once_with(1)
     mock_cursor.execute.assert_called_once_with(
         "SELECT * FROM get_post_by_id(%s)", (1,)
     )
-    mock_cache_post.assert_called_once()
     assert isinstance(post, Post)
-    assert post.content == "Test content"
+    assert (post.id, post.user_id, post.content) == (1, 7, "Test content")
+    assert post.created_at == created_at
+    assert isinstance(cached, Post)
+    assert cached.content == "Test content"
+    cache_service.local_cache.clear()
+
+def test_get_post_expanded_uses_one_query_and_caches_document(mocker):
+    mocker.patch('services.cache_service.redis_client', fakeredis.FakeRedis())
+    mocker.patch('services.cache_service._release_lock')
+    cache_service.local_cache.clear()
+    mock_conn = mocker.patch('controllers.post_controller.postgres_connection')
+    mock_cursor = mocker.Mock()
+    mock_conn.return_value.__enter__.return_value.cursor.return_value.__enter__.return_value = mock_cursor
+
+    created_at = datetime(2024, 7, 1, 12, 0, tzinfo=timezone.utc)
+    mock_cursor.fetchone.return_value = (
+        1, 2, "Test content", created_at, created_at,
+        [{"id": 1, "media_url": "http://img", "media_type": "image"}],
+        [{"id": 5, "user_id": 3, "content": "Nice"}], 1,
+        7, {"love": 2}
+    )
+
+    post = post_controller.get_post_expanded(1, {"likes", "reactions"})
+    with_comments = post_controller.get_post_expanded(1, {"comments", "media"})
+
+    mock_cursor.execute.assert_called_once_with(
+        "SELECT * FROM get_post_expanded(%s, %s)", (1, post_controller.EXPANDED_COMMENT_LIMIT)
+    )
+    assert post == {
+        "id": 1, "user_id": 2, "content": "Test content",
+        "created_at": created_at, "updated_at": created_at,
+        "like_count": 7, "reactions": {"love": 2}
+    }
+    assert with_comments["comments"] == [{"id": 5, "user_id": 3, "content": "Nice"}]
+    assert with_comments["comment_count"] == 1
+    assert with_comments["media_links"][0]["media_type"] == "image"
+    assert "like_count" not in with_comments
+    cache_service.local_cache.clear()
+
+def test_parse_expand_rejects_unknown_parts():
+    assert post_controller.parse_expand("comments, likes,") == {"comments", "likes"}
+    with pytest.raises(ValueError):
+        post_controller.parse_expand("comments,followers")
 
 def test_get_posts_paginated(mocker):
-    mock_conn = mocker.patch('controllers.post_controller.get_postgres_connection')
+    mock_conn = mocker.patch('controllers.post_controller.postgres_connection')
     mock_cursor = mocker.Mock()
-    mock_conn.return_value.cursor.return_value.__enter__.return_value = mock_cursor
+    mock_conn.return_value.__enter__.return_value.cursor.return_value.__enter__.return_value = mock_cursor
 
+    created_at = datetime(2024, 7, 1, 12, 0, tzinfo=timezone.utc)
     mock_cursor.fetchall.return_value = [
-        (1, "Test content 1", 2),
-        (1, "Test content 2", 2)
+        (1, 1, "Test content 1", created_at, created_at),
+        (2, 1, "Test content 2", created_at, created_at)
     ]
+    mock_cursor.fetchone.return_value = (5,)
 
     posts, total_count = post_controller.get_posts_paginated(page=1, page_size=2)
 
-    mock_cursor.execute.assert_called_once_with(
+    mock_cursor.execute.assert_any_call(
         "SELECT * FROM get_posts_paginated(%s, %s)", (1, 2)
     )
+    # El total es la estimacion de pg_class.reltuples, no COUNT(*)
+    mock_cursor.execute.assert_called_with("SELECT get_table_count(%s)", ('posts',))
     assert len(posts) == 2
-    assert total_count == 2
+    assert total_count == 5
     assert isinstance(posts[0], Post)
     assert posts[0].content == "Test content 1"
 
+def test_get_posts_paginated_short_page_skips_count(mocker):
+    mock_conn = mocker.patch('controllers.post_controller.postgres_connection')
+    mock_cursor = mocker.Mock()
+    mock_conn.return_value.__enter__.return_value.cursor.return_value.__enter__.return_value = mock_cursor
+
+    created_at = datetime(2024, 7, 1, 12, 0, tzinfo=timezone.utc)
+    mock_cursor.fetchall.return_value = [(1, 1, "Test content 1", created_at, created_at)]
+
+    posts, total_count = post_controller.get_posts_paginated(page=3, page_size=10)
+
+    mock_cursor.execute.assert_called_once_with(
+        "SELECT * FROM get_posts_paginated(%s, %s)", (3, 10)
+    )
+    assert total_count == 21
+
+def test_get_posts_paginated_without_total(mocker):
+    mock_conn = mocker.patch('controllers.post_controller.postgres_connection')
+    mock_cursor = mocker.Mock()
+    mock_conn.return_value.__enter__.return_value.cursor.return_value.__enter__.return_value = mock_cursor
+    mock_cursor.fetchall.return_value = []
+
+    posts, total_count = post_controller.get_posts_paginated(page=1, page_size=10, include_total=None)
+
+    assert mock_cursor.execute.call_count == 1
+    assert total_count is None
+
 # def test_update_post(mocker):
 #     # Mock de 'redis_client' para evitar conexión real con Redis
 #     mock_redis_client = mocker.patch('services.cache_service.redis_client')
 #     # Mock de la conexión a la base de datos
-#     mock_conn = mocker.patch('controllers.post_controller.get_postgres_connection')
+#     mock_conn = mocker.patch('controllers.post_controller.postgres_connection')
 #     mock_cursor = mocker.Mock()
-#     mock_conn.return_value.cursor.return_value.__enter__.return_value = mock_cursor
+#     mock_conn.return_value.__enter__.return_value.cursor.return_value.__enter__.return_value = mock_cursor
 
 #     # Simula el retorno de `cur.fetchone()` con el ID del post actualizado
 #     mock_cursor.fetchone.return_value = [1]
@@ -85,10 +166,10 @@ def test_get_posts_paginated(mocker):
 #     assert updated_post_id == 1
 
 def test_delete_post(mocker):
-    mock_cache = mocker.patch('controllers.post_controller.cache_post')
-    mock_conn = mocker.patch('controllers.post_controller.get_postgres_connection')
+    mock_cache = mocker.patch('controllers.post_controller.invalidate_post')
+    mock_conn = mocker.patch('controllers.post_controller.postgres_connection')
     mock_cursor = mocker.Mock()
-    mock_conn.return_value.cursor.return_value.__enter__.return_value = mock_cursor
+    mock_conn.return_value.__enter__.return_value.cursor.return_value.__enter__.return_value = mock_cursor
 
     mock_cursor.fetchone.return_value = [1]
 
@@ -97,5 +178,27 @@ def test_delete_post(mocker):
     mock_cursor.execute.assert_called_once_with(
         "SELECT delete_post(%s)", (1,)
     )
-    mock_cache.assert_called_once_with(1, None, expire_time=1)
+    mock_cache.assert_called_once_with(1)
     assert deleted_post_id == 1
+
+def test_get_posts_by_cursor(mocker):
+    mock_conn = mocker.patch('controllers.post_controller.postgres_connection')
+    mock_cursor = mocker.Mock()
+    mock_conn.return_value.__enter__.return_value.cursor.return_value.__enter__.return_value = mock_cursor
+
+    created_at = datetime(2024, 7, 1, 12, 0, tzinfo=timezone.utc)
+    mock_cursor.fetchall.return_value = [
+        (3, 1, "Test content 3", created_at, created_at),
+        (2, 1, "Test content 2", created_at, created_at),
+        (1, 1, "Test content 1", created_at, created_at)
+    ]
+    cursor = encode_cursor(created_at, 4)
+
+    posts, next_cursor = post_controller.get_posts_by_cursor(cursor=cursor, page_size=2)
+
+    mock_cursor.execute.assert_called_once_with(
+        "SELECT * FROM get_posts_by_cursor(%s, %s, %s)", (created_at, 4, 3)
+    )
+    assert [post.id for post in posts] == [3, 2]
+    assert posts[0].content == "Test content 3"
+    assert decode_cursor(next_cursor) == (created_at, 2)
@@ -2,23 +2,28 @@ import pytest
 from controllers import reaction_controller
 
 def test_add_or_update_reaction(mocker):
-    mock_conn = mocker.patch('controllers.reaction_controller.get_postgres_connection')
+    mock_conn = mocker.patch('controllers.reaction_controller.postgres_connection')
     mock_cursor = mocker.Mock()
-    mock_conn.return_value.cursor.return_value.__enter__.return_value = mock_cursor
-    mock_cursor.fetchone.return_value = [True]
+    mock_conn.return_value.__enter__.return_value.cursor.return_value.__enter__.return_value = mock_cursor
+    # La funcion devuelve el tipo de reaccion anterior
+    mock_cursor.fetchone.return_value = ["love"]
+    mock_record = mocker.patch('services.counter_service.record_reaction')
 
     success = reaction_controller.add_or_update_reaction(user_id=1, post_id=123, reaction_type="like")
 
     mock_cursor.execute.assert_called_once_with(
         "SELECT add_or_update_reaction(%s, %s, %s)", (1, 123, "like")
     )
-    
+    mock_record.assert_called_once_with(123, "like", "love")
+
     assert success is True
 
 def test_get_reaction_counts(mocker):
-    mock_conn = mocker.patch('controllers.reaction_controller.get_postgres_connection')
+    mocker.patch('services.counter_service.redis_client', None)
+    mock_conn = mocker.patch('services.counter_service.postgres_connection')
     mock_cursor = mocker.Mock()
-    mock_conn.return_value.cursor.return_value.__enter__.return_value = mock_cursor
+    mock_conn.return_value.__enter__.return_value.cursor.return_value.__enter__.return_value = mock_cursor
+    mock_cursor.fetchone.return_value = [0]
 
     mock_cursor.fetchall.return_value = [
         ("like", 10),
@@ -28,9 +33,37 @@ def test_get_reaction_counts(mocker):
 
     counts = reaction_controller.get_reaction_counts(post_id=123)
 
-    mock_cursor.execute.assert_called_once_with(
+    mock_cursor.execute.assert_any_call(
         "SELECT * FROM get_reaction_counts(%s)", (123,)
     )
     
     assert len(counts) == 3
-    assert counts == [("like", 10), ("love", 5), ("wow", 2)]
\ No newline at end of file
+    assert counts == [("like", 10), ("love", 5), ("wow", 2)]
+def test_add_or_update_reactions_batch(mocker):
+    mock_conn = mocker.patch('controllers.reaction_controller.postgres_connection')
+    mock_cursor = mocker.Mock()
+    mock_conn.return_value.__enter__.return_value.cursor.return_value.__enter__.return_value = mock_cursor
+    # (post_id, tipo, tipo anterior)
+    mock_execute_values = mocker.patch(
+        'controllers.reaction_controller.execute_values',
+        return_value=[(10, "wow", "love"), (11, "like", None)]
+    )
+    mock_record = mocker.patch('services.counter_service.record_reactions')
+
+    applied = reaction_controller.add_or_update_reactions_batch(1, [
+        {"post_id": 10, "reaction_type": "love"},
+        {"post_id": 11, "reaction_type": "like"},
+        {"user_id": 2, "post_id": 10, "reaction_type": "wow"},
+    ])
+
+    assert applied == 2
+    # Una sola fila por post, todas del usuario autenticado: gana la ultima reaccion
+    assert mock_execute_values.call_args[0][2] == [(1, 11, "like"), (1, 10, "wow")]
+    mock_record.assert_called_once_with([(10, "wow", "love"), (11, "like", None)])
+
+def test_add_or_update_reactions_batch_requires_fields(mocker):
+    mock_execute_values = mocker.patch('controllers.reaction_controller.execute_values')
+
+    with pytest.raises(ValueError):
+        reaction_controller.add_or_update_reactions_batch(1, [{"post_id": 10}])
+    mock_execute_values.assert_not_called()
@@ -0,0 +1,82 @@
+# tests/unitarias/test_request_profiler.py
+import sys
+import time
+import pytest
+from flask import Flask, jsonify
+from flask_jwt_extended import JWTManager, create_access_token
+from middleware import profiler
+from middleware.profiler import register_profiler, get_collapsed_stacks, collapse_stack
+
+
+@pytest.fixture(autouse=True)
+def clean_profiles(mocker):
+    mocker.patch.object(profiler, 'PROFILE_SAMPLE_RATE', 0)
+    mocker.patch.object(profiler, 'PROFILE_INTERVAL_MS', 1)
+    mocker.patch('services.auth_service.ADMIN_USER_IDS', {"1"})
+    profiler.clear_profiles()
+    yield
+    profiler.clear_profiles()
+
+
+@pytest.fixture
+def app():
+    app = Flask(__name__)
+    app.config['JWT_SECRET_KEY'] = 'test-secret-key'
+    JWTManager(app)
+    register_profiler(app)
+
+    @app.route('/trips/slow')
+    def slow_trips():
+        build_trips()
+        return jsonify({"ok": True}), 200
+
+    return app
+
+
+def build_trips():
+    # Trabajo de CPU suficiente para varias muestras
+    deadline = time.perf_counter() + 0.05
+    while time.perf_counter() < deadline:
+        sum(range(1000))
+
+def auth_headers(app, user_id):
+    with app.app_context():
+        return {'Authorization': f'Bearer {create_access_token(identity=user_id)}', 'X-Profile': '1'}
+
+def test_collapse_stack_from_root_to_leaf():
+    def leaf():
+        return collapse_stack("trip_routes.get_user_trips", sys._getframe())
+
+    stack = leaf().split(";")
+
+    assert stack[0] == "trip_routes.get_user_trips"
+    assert stack[-1] == "leaf (test/unitarias/test_request_profiler.py)"
+    assert stack[-2] == "test_collapse_stack_from_root_to_leaf (test/unitarias/test_request_profiler.py)"
+
+def test_sampled_request_collects_stacks(app, mocker):
+    mocker.patch.object(profiler, 'PROFILE_SAMPLE_RATE', 1.0)
+
+    response = app.test_client().get('/trips/slow')
+
+    assert int(response.headers['X-Profile-Samples']) > 0
+    output = get_collapsed_stacks("slow_trips")
+    assert "build_trips (test/unitarias/test_request_profiler.py)" in output
+    line = output.splitlines()[0]
+    assert line.startswith("slow_trips;")
+    assert int(line.rsplit(" ", 1)[1]) >= 1
+
+def test_debug_header_requires_admin(app):
+    client = app.test_client()
+
+    response = client.get('/trips/slow', headers=auth_headers(app, "2"))
+    assert 'X-Profile-Samples' not in response.headers
+
+    response = client.get('/trips/slow', headers=auth_headers(app, "1"))
+    assert 'X-Profile-Samples' in response.headers
+
+def test_requests_are_not_profiled_by_default(app):
+    response = app.test_client().get('/trips/slow', headers={'X-Profile': '1'})
+
+    assert response.status_code == 200
+    assert 'X-Profile-Samples' not in response.headers
+    assert get_collapsed_stacks() == ""
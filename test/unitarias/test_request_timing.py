@@ -0,0 +1,124 @@
+# tests/unitarias/test_request_timing.py
+import pytest
+import fakeredis
+from flask import Flask, jsonify
+from flask_jwt_extended import JWTManager, create_access_token
+from config import database
+from config.database import UnitOfWork, TimedRedis, postgres_connection
+from middleware import timing
+from middleware.timing import LatencyHistogram, register_timing
+from middleware.unit_of_work import register_unit_of_work
+
+
+@pytest.fixture(autouse=True)
+def clean_histograms(mocker):
+    mocker.patch.dict(timing._histograms, clear=True)
+
+
+@pytest.fixture
+def app(mocker):
+    pool = mocker.Mock()
+    pool.getconn.side_effect = lambda: mocker.MagicMock(closed=0)
+    mocker.patch('config.database.get_postgres_pool', return_value=pool)
+    app = Flask(__name__)
+    app.config['JWT_SECRET_KEY'] = 'test-secret-key'
+    JWTManager(app)
+    register_timing(app)
+    register_unit_of_work(app)
+    return app
+
+
+def test_histogram_percentiles():
+    histogram = LatencyHistogram()
+    for ms in range(1, 101):
+        histogram.record(ms / 1000)
+
+    stats = histogram.snapshot()
+
+    assert stats["count"] == 100
+    assert stats["max_ms"] == 100.0
+    # Error maximo de un bucket (19%)
+    assert 50 <= stats["p50_ms"] <= 50 * 1.19
+    assert 99 <= stats["p99_ms"] <= 100
+    assert stats["p50_ms"] <= stats["p95_ms"] <= stats["p99_ms"]
+
+def test_request_records_endpoint_and_server_timing(app, mocker):
+    mocker.patch.object(timing, 'SERVER_TIMING_HEADER', 'true')
+
+    @app.route('/trips/<int:trip_id>/statistics')
+    def statistics(trip_id):
+        with postgres_connection():
+            # Simula dos consultas de 5 ms informadas por TimedCursor
+            database._notify(database._query_observers, "SELECT 1", None, 0.005)
+            database._notify(database._query_observers, "SELECT 2", None, 0.005)
+        return jsonify({"trip_id": trip_id}), 200
+
+    response = app.test_client().get('/trips/1/statistics')
+
+    header = response.headers['Server-Timing']
+    assert 'db;dur=10.' in header
+    assert 'pool;dur=' in header
+    assert 'json;dur=' in header
+    assert 'total;dur=' in header
+    stats = timing.get_latency_stats()
+    assert stats["endpoint:statistics"]["count"] == 1
+    assert stats["sql"]["count"] >= 2
+
+def test_server_timing_is_off_by_default(app):
+    @app.route('/ping')
+    def ping():
+        return jsonify({}), 200
+
+    response = app.test_client().get('/ping')
+
+    assert 'Server-Timing' not in response.headers
+    assert timing.get_latency_stats()["endpoint:ping"]["count"] == 1
+
+def test_server_timing_admin_mode_requires_admin_token(app, mocker):
+    mocker.patch.object(timing, 'SERVER_TIMING_HEADER', 'admin')
+    mocker.patch('services.auth_service.ADMIN_USER_IDS', {"1"})
+
+    @app.route('/ping')
+    def ping():
+        return jsonify({}), 200
+
+    with app.app_context():
+        admin, user = create_access_token(identity="1"), create_access_token(identity="2")
+    client = app.test_client()
+
+    assert 'Server-Timing' in client.get('/ping', headers={'Authorization': f'Bearer {admin}'}).headers
+    assert 'Server-Timing' not in client.get('/ping', headers={'Authorization': f'Bearer {user}'}).headers
+    assert 'Server-Timing' not in client.get('/ping').headers
+
+def test_timed_redis_reports_commands_and_pipelines(mocker):
+    observer = mocker.Mock()
+    mocker.patch.object(database, '_redis_observers', [observer])
+    client = TimedRedis(connection_pool=fakeredis.FakeRedis().connection_pool)
+
+    client.set("post:1", "x")
+    pipe = client.pipeline()
+    pipe.get("post:1")
+    pipe.get("post:2")
+    assert pipe.execute() == [b"x", None]
+
+    commands = [call.args[0] for call in observer.call_args_list]
+    assert commands == ["SET", "PIPELINE"]
+    assert observer.call_args_list[1].args[1] == (2,)
+
+def test_commit_is_reported_as_query(mocker):
+    observer = mocker.Mock()
+    mocker.patch.object(database, '_query_observers', [observer])
+    unit = UnitOfWork(pool=mocker.Mock())
+    unit.connection()
+
+    unit.commit()
+
+    assert observer.call_args.args[0] == "COMMIT"
+
+def test_failing_observer_does_not_break_the_query(mocker):
+    mocker.patch.object(database, '_query_observers', [mocker.Mock(side_effect=RuntimeError("boom"))])
+    conn = mocker.Mock()
+
+    database._commit(conn)
+
+    conn.commit.assert_called_once()
@@ -0,0 +1,67 @@
+# test/unitarias/test_search_cache.py
+import pytest
+import fakeredis
+from datetime import datetime, timezone
+from services import search_cache, cache_service
+
+
+@pytest.fixture(autouse=True)
+def fake_redis(mocker):
+    fake = fakeredis.FakeRedis()
+    mocker.patch('services.search_cache.redis_client', fake)
+    cache_service.local_cache.clear()
+    yield fake
+    cache_service.local_cache.clear()
+
+
+def search(load, query="Costa Rica", types=("post", "place")):
+    return search_cache.cached_search(query, list(types), None, None, None, 20, load)
+
+def test_normalized_query_hits_cache(mocker):
+    page = {"results": [{"id": 1, "created_at": datetime(2024, 1, 1, tzinfo=timezone.utc)}], "next_cursor": None}
+    load = mocker.Mock(return_value=page)
+
+    assert search(load, "Costa Rica") == page
+    assert search(load, "  costa   RICA ") == page
+    load.assert_called_once()
+
+def test_generation_bump_invalidates_only_matching_types(mocker):
+    load = mocker.Mock(return_value={"results": [], "next_cursor": None})
+    search(load, types=("post", "place"))
+    search(load, types=("trip",))
+
+    search_cache.bump_generation("trip")
+    search(load, types=("post", "place"))
+    assert load.call_count == 2
+
+    search(load, types=("trip",))
+    assert load.call_count == 3
+
+def test_filters_are_part_of_the_key(mocker):
+    load = mocker.Mock(return_value={"results": [], "next_cursor": None})
+    search_cache.cached_search("lima", ["post"], None, None, None, 20, load)
+    search_cache.cached_search("lima", ["post"], None, None, None, 10, load)
+    search_cache.cached_search("lima", ["post"], datetime(2024, 1, 1), None, None, 20, load)
+
+    assert load.call_count == 3
+
+def test_stats_report_hit_ratio(mocker):
+    mocker.patch.dict(search_cache._stats, {"hits": 0, "misses": 0, "hit_time": 0.0, "miss_time": 0.0})
+    load = mocker.Mock(return_value={"results": [], "next_cursor": None})
+    search(load)
+    search(load)
+    search(load)
+
+    stats = search_cache.get_search_cache_stats()
+    assert stats["hits"] == 2
+    assert stats["misses"] == 1
+    assert stats["hit_ratio"] == pytest.approx(0.6667)
+    assert stats["avg_hit_ms"] is not None
+
+def test_without_redis_always_loads(mocker):
+    mocker.patch('services.search_cache.redis_client', None)
+    load = mocker.Mock(return_value={"results": [], "next_cursor": None})
+    search(load)
+    search(load)
+
+    assert load.call_count == 2
@@ -1,19 +1,21 @@
 import pytest
 from controllers import search_controller
+from services.pagination import encode_cursor, decode_cursor
 
 def test_search_content(mocker):
-    mock_conn = mocker.patch('controllers.search_controller.get_postgres_connection')
+    mock_conn = mocker.patch('controllers.search_controller.postgres_connection')
     mock_cursor = mocker.Mock()
-    mock_conn.return_value.cursor.return_value.__enter__.return_value = mock_cursor
+    mock_conn.return_value.__enter__.return_value.cursor.return_value.__enter__.return_value = mock_cursor
     mock_cursor.fetchall.return_value = [
-        (1, "post", "Sample Post", "This is a sample post description", "2024-10-14"),
-        (2, "comment", "Sample Comment", "This is a sample comment description", "2024-10-14")
+        (1, "post", "Sample Post", "This is a sample post description", "2024-10-14", 3, "ana", 0.5),
+        (2, "place", "Sample Place", "This is a sample place description", "2024-10-14", None, None, 0.2)
     ]
 
     results = search_controller.search_content(query="sample")
 
     mock_cursor.execute.assert_called_once_with(
-        "SELECT * FROM search_content(%s)", ("sample",)
+        "SELECT * FROM search_content(%s, %s, %s, %s, %s, %s, %s, %s)",
+        ("sample", None, None, None, None, None, None, 21)
     )
 
     assert len(results) == 2
@@ -23,13 +25,47 @@ def test_search_content(mocker):
             "content_type": "post",
             "title": "Sample Post",
             "description": "This is a sample post description",
-            "created_at": "2024-10-14"
+            "created_at": "2024-10-14",
+            "user_id": 3,
+            "username": "ana",
+            "rank": 0.5
         },
         {
             "id": 2,
-            "content_type": "comment",
-            "title": "Sample Comment",
-            "description": "This is a sample comment description",
-            "created_at": "2024-10-14"
+            "content_type": "place",
+            "title": "Sample Place",
+            "description": "This is a sample place description",
+            "created_at": "2024-10-14",
+            "user_id": None,
+            "username": None,
+            "rank": 0.2
         }
     ]
+
+def test_search_by_cursor(mocker):
+    mock_conn = mocker.patch('controllers.search_controller.postgres_connection')
+    mock_cursor = mocker.Mock()
+    mock_conn.return_value.__enter__.return_value.cursor.return_value.__enter__.return_value = mock_cursor
+    mock_cursor.fetchall.return_value = [
+        (4, "trip", "Trip", "", None, 1, "ana", 0.1),
+        (9, "place", "Place", "", None, None, None, 0.1),
+        (2, "post", "Post", "", None, 1, "ana", 0.05)
+    ]
+
+    results, next_cursor = search_controller.search(
+        "costa rica", types=["trip", "place"], cursor=encode_cursor([0.3, "post"], 7), limit=2
+    )
+
+    mock_cursor.execute.assert_called_once_with(
+        "SELECT * FROM search_content(%s, %s, %s, %s, %s, %s, %s, %s)",
+        ("costa rica", ["trip", "place"], None, None, 0.3, "post", 7, 3)
+    )
+    assert [result["id"] for result in results] == [4, 9]
+    # El cursor siguiente apunta a la ultima fila de la pagina
+    assert decode_cursor(next_cursor, kind="rank") == ((0.1, "place"), 9)
+
+def test_parse_types():
+    assert search_controller.parse_types("post, trip") == ["post", "trip"]
+    assert search_controller.parse_types(None) is None
+    with pytest.raises(ValueError):
+        search_controller.parse_types("post,comment")
@@ -0,0 +1,78 @@
+# tests/unitarias/test_slow_query_log.py
+import pytest
+from datetime import date
+from services import slow_query_log
+from services.slow_query_log import redact, get_slow_queries
+
+
+@pytest.fixture(autouse=True)
+def clean_log(mocker):
+    mocker.patch.object(slow_query_log, 'SLOW_QUERY_MS', 100)
+    mocker.patch.object(slow_query_log, 'SLOW_QUERY_EXPLAIN_SAMPLE', 0)
+    slow_query_log.clear_slow_queries()
+    yield
+    slow_query_log.clear_slow_queries()
+
+
+def search_trips_query():
+    # Simula lo que hace TimedCursor al terminar una consulta lenta
+    slow_query_log._on_query("SELECT t.*\n  FROM trips t WHERE t.title ILIKE %s LIMIT %s", ["%europa%", 10], 0.350)
+
+def test_redact_hides_text_values():
+    params = ["secret@example.com", 10, None, date(2024, 5, 1), {"q": "playa"}, b"abc"]
+
+    assert redact(params) == ["<str len=18>", 10, None, "2024-05-01", {"q": "<str len=5>"}, "<bytes len=3>"]
+
+def test_slow_query_is_logged_with_caller():
+    search_trips_query()
+
+    entries = get_slow_queries()
+    assert len(entries) == 1
+    entry = entries[0]
+    assert entry["duration_ms"] == 350.0
+    assert entry["statement"] == "SELECT t.* FROM trips t WHERE t.title ILIKE %s LIMIT %s"
+    assert entry["params"] == ["<str len=8>", 10]
+    assert entry["caller"].startswith("test/unitarias/test_slow_query_log.py:")
+    assert entry["caller"].endswith("in search_trips_query")
+    assert entry["plan"] is None
+
+def test_fast_queries_are_ignored():
+    slow_query_log._on_query("SELECT 1", None, 0.050)
+
+    assert get_slow_queries() == []
+
+def test_log_keeps_most_recent_first(mocker):
+    for ms in (200, 300, 400):
+        slow_query_log._on_query("SELECT 1", None, ms / 1000)
+
+    assert [entry["duration_ms"] for entry in get_slow_queries(limit=2)] == [400.0, 300.0]
+
+def test_sampled_select_is_queued_for_explain(mocker):
+    mocker.patch.object(slow_query_log, 'SLOW_QUERY_EXPLAIN_SAMPLE', 1.0)
+    queue = mocker.patch.object(slow_query_log, '_explain_queue')
+
+    search_trips_query()
+    slow_query_log._on_query("INSERT INTO likes (user_id) VALUES (%s)", (1,), 0.5)
+
+    # Solo las lecturas se explican, con los parametros reales
+    queue.put_nowait.assert_called_once()
+    entry, sql, params = queue.put_nowait.call_args[0][0]
+    assert params == ["%europa%", 10]
+    assert entry["plan"] == "pending"
+
+def test_explain_runs_read_only_and_rolls_back(mocker):
+    cursor = mocker.MagicMock()
+    cursor.fetchall.return_value = [("Limit  (actual time=0.1..0.2 rows=10 loops=1)",), ("  Buffers: shared hit=4",)]
+    conn = mocker.MagicMock(closed=0)
+    conn.cursor.return_value.__enter__.return_value = cursor
+    pool = mocker.Mock()
+    pool.getconn.return_value = conn
+    mocker.patch('services.slow_query_log.get_postgres_pool', return_value=pool)
+
+    plan = slow_query_log.explain("SELECT * FROM trips WHERE id = %s", (1,))
+
+    assert plan == "Limit  (actual time=0.1..0.2 rows=10 loops=1)\n  Buffers: shared hit=4"
+    cursor.execute.assert_any_call("SET TRANSACTION READ ONLY")
+    cursor.execute.assert_any_call("EXPLAIN (ANALYZE, BUFFERS) SELECT * FROM trips WHERE id = %s", (1,))
+    conn.rollback.assert_called_once()
+    pool.putconn.assert_called_once_with(conn)
@@ -0,0 +1,84 @@
+# test/unitarias/test_suggest_service.py
+import pytest
+import fakeredis
+from services import suggest_service
+
+
+@pytest.fixture(autouse=True)
+def fake_redis(mocker):
+    fake = fakeredis.FakeRedis(decode_responses=True)
+    mocker.patch('services.suggest_service.redis_client', fake)
+    yield fake
+
+
+@pytest.fixture
+def fuzzy(mocker):
+    return mocker.patch('services.suggest_service._fuzzy_matches', return_value=[])
+
+
+def test_prefix_matches_any_word_without_accents(fuzzy):
+    suggest_service.index_place(1, "Volcán Arenal", "La Fortuna", "Costa Rica")
+
+    assert suggest_service.suggest("aren") == [{"type": "place", "id": 1, "text": "Volcán Arenal"}]
+    assert suggest_service.suggest("VOLCAN") == [{"type": "place", "id": 1, "text": "Volcán Arenal"}]
+    assert suggest_service.suggest("costa") == [{"type": "country", "id": None, "text": "Costa Rica"}]
+
+def test_update_replaces_old_terms(fuzzy):
+    suggest_service.index_place(1, "Playa Tamarindo", "Tamarindo", "Costa Rica")
+    suggest_service.index_place(1, "Playa Conchal", "Tamarindo", "Costa Rica")
+
+    assert suggest_service.suggest("playa") == [{"type": "place", "id": 1, "text": "Playa Conchal"}]
+
+def test_shared_city_survives_until_last_place_is_removed(fuzzy):
+    suggest_service.index_place(1, "Teatro Nacional", "San José", "Costa Rica")
+    suggest_service.index_place(2, "Museo del Oro", "San José", "Costa Rica")
+    city = {"type": "city", "id": None, "text": "San José"}
+
+    suggest_service.remove_place(1)
+    assert suggest_service.suggest("san jo") == [city]
+
+    suggest_service.remove_place(2)
+    assert suggest_service.suggest("san jo") == []
+
+def test_shared_city_counts_are_cleaned_up(fake_redis, fuzzy):
+    suggest_service.index_place(1, "Teatro Nacional", "San José", "Costa Rica")
+    suggest_service.index_place(2, "Museo del Oro", "San José", "Costa Rica")
+    city = "san jose\0city\0\0San José"
+    assert fake_redis.hget(suggest_service.REFS_KEY, city) == "2"
+
+    suggest_service.index_place(1, "Teatro Nacional", "San José", "Costa Rica")
+    assert fake_redis.hget(suggest_service.REFS_KEY, city) == "2"
+
+    suggest_service.remove_place(1)
+    suggest_service.remove_place(2)
+    assert fake_redis.hgetall(suggest_service.REFS_KEY) == {}
+    assert fake_redis.zcard(suggest_service.INDEX_KEY) == 0
+
+def test_users_and_limit(fuzzy):
+    for user_id, username in enumerate(["maria", "mariano", "marisol"], start=1):
+        suggest_service.index_user(user_id, username)
+
+    results = suggest_service.suggest("mari", limit=2)
+    assert [r["text"] for r in results] == ["maria", "mariano"]
+
+def test_fuzzy_fallback_completes_results(fuzzy):
+    suggest_service.index_place(1, "Monteverde", "Monteverde", "Costa Rica")
+    fuzzy.return_value = [
+        {"type": "place", "id": 1, "text": "Monteverde"},
+        {"type": "place", "id": 7, "text": "Montezuma"},
+    ]
+
+    results = suggest_service.suggest("montev")
+
+    fuzzy.assert_called_once_with("montev", 10)
+    assert [r["id"] for r in results if r["type"] == "place"] == [1, 7]
+
+def test_short_query_skips_fuzzy(fuzzy):
+    assert suggest_service.suggest("mo") == []
+    fuzzy.assert_not_called()
+
+def test_without_redis_uses_fuzzy(mocker, fuzzy):
+    mocker.patch('services.suggest_service.redis_client', None)
+    fuzzy.return_value = [{"type": "user", "id": 3, "text": "carlos"}]
+
+    assert suggest_service.suggest("carlso") == [{"type": "user", "id": 3, "text": "carlos"}]
@@ -0,0 +1,156 @@
+# test/unitarias/test_timeline_service.py
+import pytest
+import fakeredis
+from services import timeline_service
+
+
+@pytest.fixture
+def fake_redis(mocker):
+    fake = fakeredis.FakeRedis(decode_responses=True)
+    mocker.patch('services.timeline_service.redis_client', fake)
+    mocker.patch('services.timeline_service._group_ready', False)
+    return fake
+
+
+def fake_database(mocker, followers=None, feeds=None, author_posts=None, followed_among=None):
+    followers = followers or {}
+    feeds = feeds or {}
+    author_posts = author_posts or {}
+
+    def fetch(sql, params):
+        if "get_follower_ids" in sql:
+            return [(f,) for f in followers.get(params[0], [])]
+        if "count_followers" in sql:
+            return [(len(followers.get(params[0], [])),)]
+        if "get_feed_post_ids" in sql:
+            return feeds.get(params[0], [])
+        if "get_user_post_ids" in sql:
+            return author_posts.get(params[0], [])
+        if "get_followed_among" in sql:
+            return [(a,) for a in (followed_among or [])]
+        raise AssertionError(sql)
+
+    return mocker.patch('services.timeline_service._fetch_ids', side_effect=fetch)
+
+
+def test_feed_is_rebuilt_from_database_once(mocker, fake_redis):
+    fetch = fake_database(mocker, feeds={1: [(30, 3.0), (20, 2.0), (10, 1.0)]})
+
+    assert timeline_service.get_feed_post_ids(1, 0, 2) == [30, 20]
+    assert timeline_service.get_feed_post_ids(1, 2, 2) == [10]
+    assert fetch.call_count == 1
+
+
+def test_push_post_fans_out_to_followers(mocker, fake_redis):
+    fake_database(mocker, followers={5: [1, 2]}, feeds={1: [(10, 1.0)], 2: []})
+    timeline_service.get_feed_post_ids(1, 0, 10)
+    timeline_service.get_feed_post_ids(2, 0, 10)
+
+    timeline_service.push_post(5, 11, score=2.0)
+    assert timeline_service.get_feed_post_ids(1, 0, 10) == [10]
+
+    assert timeline_service.flush_fanout() == 1
+    assert timeline_service.get_feed_post_ids(1, 0, 10) == [11, 10]
+    assert timeline_service.get_feed_post_ids(2, 0, 10) == [11]
+    assert fake_redis.xlen(timeline_service.FANOUT_STREAM) == 0
+
+
+def test_timelines_are_capped(mocker, fake_redis):
+    mocker.patch('services.timeline_service.TIMELINE_MAX_LENGTH', 3)
+    fake_database(mocker, followers={5: [1]}, feeds={1: []})
+    timeline_service.get_feed_post_ids(1, 0, 3)
+
+    for post_id in range(1, 6):
+        timeline_service.fan_out_post(5, post_id, float(post_id))
+
+    assert timeline_service.get_feed_post_ids(1, 0, 3) == [5, 4, 3]
+    # Paginas fuera del timeline se leen de PostgreSQL
+    assert timeline_service.get_feed_post_ids(1, 3, 3) is None
+
+
+def test_remove_post_prunes_follower_timelines(mocker, fake_redis):
+    fake_database(mocker, followers={5: [1]}, feeds={1: [(10, 1.0)]})
+    timeline_service.get_feed_post_ids(1, 0, 10)
+    timeline_service.push_post(5, 11, score=2.0)
+    timeline_service.remove_post(5, 11)
+
+    assert timeline_service.flush_fanout() == 2
+
+    assert timeline_service.get_feed_post_ids(1, 0, 10) == [10]
+
+
+def test_unfollow_removes_author_posts(mocker, fake_redis):
+    fake_database(mocker, followers={5: [1], 6: [1]}, feeds={1: []})
+    timeline_service.get_feed_post_ids(1, 0, 10)
+    timeline_service.fan_out_post(5, 11, 1.0)
+    timeline_service.fan_out_post(6, 12, 2.0)
+
+    timeline_service.remove_followed(1, 5)
+
+    assert timeline_service.get_feed_post_ids(1, 0, 10) == [12]
+
+
+def test_follow_merges_author_posts(mocker, fake_redis):
+    fake_database(mocker, feeds={1: [(10, 1.0)]}, author_posts={7: [(21, 3.0), (20, 0.5)]})
+    timeline_service.get_feed_post_ids(1, 0, 10)
+
+    timeline_service.add_followed(1, 7)
+
+    assert timeline_service.get_feed_post_ids(1, 0, 10) == [21, 10, 20]
+
+
+def test_popular_authors_are_read_on_demand(mocker, fake_redis):
+    mocker.patch('services.timeline_service.FANOUT_FOLLOWER_THRESHOLD', 1)
+    fake_database(
+        mocker,
+        followers={9: [1, 2, 3]},
+        feeds={1: [(10, 1.0), (12, 3.0)]},
+        author_posts={9: []},
+        followed_among=[9],
+    )
+
+    timeline_service.fan_out_post(9, 11, 2.0)
+
+    assert fake_redis.sismember(timeline_service.PULL_AUTHORS_KEY, 9)
+    assert not fake_redis.exists(timeline_service.timeline_key(2))
+    assert timeline_service.get_feed_post_ids(1, 0, 10) == [12, 11, 10]
+
+
+def test_failed_fanout_stays_pending_for_retry(mocker, fake_redis):
+    fake_database(mocker, followers={5: [1]}, feeds={1: []})
+    mocker.patch('services.timeline_service.FANOUT_CLAIM_IDLE_MS', 0)
+    timeline_service.get_feed_post_ids(1, 0, 10)
+    timeline_service.push_post(5, 11, score=2.0)
+    fan_out = timeline_service.fan_out_post
+    mocker.patch('services.timeline_service.fan_out_post', side_effect=[RuntimeError("boom"), None])
+
+    with pytest.raises(RuntimeError):
+        timeline_service.flush_fanout()
+    assert fake_redis.xlen(timeline_service.FANOUT_STREAM) == 1
+
+    timeline_service.fan_out_post.side_effect = fan_out
+    assert timeline_service.flush_fanout() == 1
+    assert fake_redis.xlen(timeline_service.FANOUT_STREAM) == 0
+    assert timeline_service.get_feed_post_ids(1, 0, 10) == [11]
+
+
+def test_feed_without_redis_uses_database(mocker):
+    mocker.patch('services.timeline_service.redis_client', None)
+
+    assert timeline_service.get_feed_post_ids(1, 0, 10) is None
+
+
+def test_feed_entries_before_cursor(mocker, fake_redis):
+    fake_database(mocker, feeds={1: [(40, 4.0), (30, 3.0), (31, 3.0), (20, 2.0)]})
+
+    first = timeline_service.get_feed_entries_before(1, None, None, 2)
+    assert first == [(40, 4.0), (31, 3.0)]
+
+    # Empate en el score: continua con el id menor
+    assert timeline_service.get_feed_entries_before(1, 3.0, 31, 2) == [(30, 3.0), (20, 2.0)]
+
+def test_feed_entries_before_past_the_cap_uses_database(mocker, fake_redis):
+    mocker.patch('services.timeline_service.TIMELINE_MAX_LENGTH', 2)
+    fake_database(mocker, feeds={1: [(40, 4.0), (30, 3.0)]})
+
+    assert timeline_service.get_feed_entries_before(1, 3.0, 30, 2) is None
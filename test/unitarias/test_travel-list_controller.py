@@ -4,9 +4,9 @@ from models.travel_list import TravelList
 from models.place import Place
 
 def test_create_travel_list(mocker):
-    mock_conn = mocker.patch('controllers.travel_list_controller.get_postgres_connection')
+    mock_conn = mocker.patch('controllers.travel_list_controller.postgres_connection')
     mock_cursor = mocker.Mock()
-    mock_conn.return_value.cursor.return_value.__enter__.return_value = mock_cursor
+    mock_conn.return_value.__enter__.return_value.cursor.return_value.__enter__.return_value = mock_cursor
 
     mock_cursor.fetchone.return_value = [1]
 
@@ -19,9 +19,9 @@ def test_create_travel_list(mocker):
     assert list_id == 1
 
 def test_get_travel_list(mocker):
-    mock_conn = mocker.patch('controllers.travel_list_controller.get_postgres_connection')
+    mock_conn = mocker.patch('controllers.travel_list_controller.postgres_connection')
     mock_cursor = mocker.Mock()
-    mock_conn.return_value.cursor.return_value.__enter__.return_value = mock_cursor
+    mock_conn.return_value.__enter__.return_value.cursor.return_value.__enter__.return_value = mock_cursor
 
     mock_cursor.fetchone.return_value = (1, "My Travel List", "A sample description")
 
@@ -35,9 +35,9 @@ def test_get_travel_list(mocker):
     assert travel_list.name == "My Travel List"
 
 def test_update_travel_list(mocker):
-    mock_conn = mocker.patch('controllers.travel_list_controller.get_postgres_connection')
+    mock_conn = mocker.patch('controllers.travel_list_controller.postgres_connection')
     mock_cursor = mocker.Mock()
-    mock_conn.return_value.cursor.return_value.__enter__.return_value = mock_cursor
+    mock_conn.return_value.__enter__.return_value.cursor.return_value.__enter__.return_value = mock_cursor
 
     mock_cursor.fetchone.return_value = [1]
 
@@ -51,9 +51,9 @@ def test_update_travel_list(mocker):
     assert updated_list_id == 1
 
 def test_delete_travel_list(mocker):
-    mock_conn = mocker.patch('controllers.travel_list_controller.get_postgres_connection')
+    mock_conn = mocker.patch('controllers.travel_list_controller.postgres_connection')
     mock_cursor = mocker.Mock()
-    mock_conn.return_value.cursor.return_value.__enter__.return_value = mock_cursor
+    mock_conn.return_value.__enter__.return_value.cursor.return_value.__enter__.return_value = mock_cursor
 
     mock_cursor.fetchone.return_value = [1]
 
@@ -65,9 +65,9 @@ def test_delete_travel_list(mocker):
     assert deleted_list_id == 1
 
 def test_add_place_to_list(mocker):
-    mock_conn = mocker.patch('controllers.travel_list_controller.get_postgres_connection')
+    mock_conn = mocker.patch('controllers.travel_list_controller.postgres_connection')
     mock_cursor = mocker.Mock()
-    mock_conn.return_value.cursor.return_value.__enter__.return_value = mock_cursor
+    mock_conn.return_value.__enter__.return_value.cursor.return_value.__enter__.return_value = mock_cursor
 
     mock_cursor.fetchone.return_value = [1]
 
@@ -79,9 +79,9 @@ def test_add_place_to_list(mocker):
     assert entry_id == 1
 
 def test_get_places_in_list(mocker):
-    mock_conn = mocker.patch('controllers.travel_list_controller.get_postgres_connection')
+    mock_conn = mocker.patch('controllers.travel_list_controller.postgres_connection')
     mock_cursor = mocker.Mock()
-    mock_conn.return_value.cursor.return_value.__enter__.return_value = mock_cursor
+    mock_conn.return_value.__enter__.return_value.cursor.return_value.__enter__.return_value = mock_cursor
 
     mock_cursor.fetchall.return_value = [
         ("Place One", "Description", "City", "Country"),
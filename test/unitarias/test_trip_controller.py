@@ -3,12 +3,13 @@ import pytest
 from controllers import trip_controller
 from models.trip import Trip
 from datetime import date
+from services.pagination import encode_cursor, decode_cursor, InvalidCursorError
 
 def test_create_trip(mocker):
     """Test de creación de un viaje exitosa"""
-    mock_conn = mocker.patch('controllers.trip_controller.get_postgres_connection')
+    mock_conn = mocker.patch('controllers.trip_controller.postgres_connection')
     mock_cursor = mocker.Mock()
-    mock_conn.return_value.cursor.return_value.__enter__.return_value = mock_cursor
+    mock_conn.return_value.__enter__.return_value.cursor.return_value.__enter__.return_value = mock_cursor
     mock_cursor.fetchone.return_value = [1]
 
     trip_id = trip_controller.create_trip(
@@ -29,9 +30,9 @@ def test_create_trip(mocker):
 
 def test_create_trip_without_budget(mocker):
     """Test de creación de viaje sin presupuesto"""
-    mock_conn = mocker.patch('controllers.trip_controller.get_postgres_connection')
+    mock_conn = mocker.patch('controllers.trip_controller.postgres_connection')
     mock_cursor = mocker.Mock()
-    mock_conn.return_value.cursor.return_value.__enter__.return_value = mock_cursor
+    mock_conn.return_value.__enter__.return_value.cursor.return_value.__enter__.return_value = mock_cursor
     mock_cursor.fetchone.return_value = [2]
 
     trip_id = trip_controller.create_trip(
@@ -50,9 +51,9 @@ def test_create_trip_without_budget(mocker):
 
 def test_get_trip_success(mocker):
     """Test de obtención exitosa de un viaje"""
-    mock_conn = mocker.patch('controllers.trip_controller.get_postgres_connection')
+    mock_conn = mocker.patch('controllers.trip_controller.postgres_connection')
     mock_cursor = mocker.Mock()
-    mock_conn.return_value.cursor.return_value.__enter__.return_value = mock_cursor
+    mock_conn.return_value.__enter__.return_value.cursor.return_value.__enter__.return_value = mock_cursor
     
     # Datos simulados de retorno de la BD
     mock_cursor.fetchone.return_value = (
@@ -78,9 +79,9 @@ def test_get_trip_success(mocker):
 
 def test_get_trip_not_found(mocker):
     """Test cuando el viaje no existe"""
-    mock_conn = mocker.patch('controllers.trip_controller.get_postgres_connection')
+    mock_conn = mocker.patch('controllers.trip_controller.postgres_connection')
     mock_cursor = mocker.Mock()
-    mock_conn.return_value.cursor.return_value.__enter__.return_value = mock_cursor
+    mock_conn.return_value.__enter__.return_value.cursor.return_value.__enter__.return_value = mock_cursor
     mock_cursor.fetchone.return_value = None
 
     trip = trip_controller.get_trip(trip_id=999)
@@ -92,9 +93,9 @@ def test_get_trip_not_found(mocker):
 
 def test_get_user_trips_with_data(mocker):
     """Test de obtención de viajes de un usuario con datos"""
-    mock_conn = mocker.patch('controllers.trip_controller.get_postgres_connection')
+    mock_conn = mocker.patch('controllers.trip_controller.postgres_connection')
     mock_cursor = mocker.Mock()
-    mock_conn.return_value.cursor.return_value.__enter__.return_value = mock_cursor
+    mock_conn.return_value.__enter__.return_value.cursor.return_value.__enter__.return_value = mock_cursor
     
     # Simulando dos viajes con total_count
     mock_cursor.fetchall.return_value = [
@@ -116,9 +117,9 @@ def test_get_user_trips_with_data(mocker):
 
 def test_get_user_trips_with_status_filter(mocker):
     """Test de obtención de viajes filtrados por estado"""
-    mock_conn = mocker.patch('controllers.trip_controller.get_postgres_connection')
+    mock_conn = mocker.patch('controllers.trip_controller.postgres_connection')
     mock_cursor = mocker.Mock()
-    mock_conn.return_value.cursor.return_value.__enter__.return_value = mock_cursor
+    mock_conn.return_value.__enter__.return_value.cursor.return_value.__enter__.return_value = mock_cursor
     
     mock_cursor.fetchall.return_value = [
         (1, 1, "Viaje Completado", "Descripción", date(2024, 7, 1), date(2024, 7, 15), "completed", 2000.00, None, None, 1)
@@ -136,9 +137,9 @@ def test_get_user_trips_with_status_filter(mocker):
 
 def test_get_user_trips_empty(mocker):
     """Test cuando el usuario no tiene viajes"""
-    mock_conn = mocker.patch('controllers.trip_controller.get_postgres_connection')
+    mock_conn = mocker.patch('controllers.trip_controller.postgres_connection')
     mock_cursor = mocker.Mock()
-    mock_conn.return_value.cursor.return_value.__enter__.return_value = mock_cursor
+    mock_conn.return_value.__enter__.return_value.cursor.return_value.__enter__.return_value = mock_cursor
     mock_cursor.fetchall.return_value = []
 
     trips, total_count = trip_controller.get_user_trips(user_id=999)
@@ -148,9 +149,9 @@ def test_get_user_trips_empty(mocker):
 
 def test_update_trip_success(mocker):
     """Test de actualización exitosa de un viaje"""
-    mock_conn = mocker.patch('controllers.trip_controller.get_postgres_connection')
+    mock_conn = mocker.patch('controllers.trip_controller.postgres_connection')
     mock_cursor = mocker.Mock()
-    mock_conn.return_value.cursor.return_value.__enter__.return_value = mock_cursor
+    mock_conn.return_value.__enter__.return_value.cursor.return_value.__enter__.return_value = mock_cursor
     mock_cursor.fetchone.return_value = [1]
 
     updated_trip_id = trip_controller.update_trip(
@@ -171,9 +172,9 @@ def test_update_trip_success(mocker):
 
 def test_update_trip_not_found(mocker):
     """Test de actualización de viaje que no existe"""
-    mock_conn = mocker.patch('controllers.trip_controller.get_postgres_connection')
+    mock_conn = mocker.patch('controllers.trip_controller.postgres_connection')
     mock_cursor = mocker.Mock()
-    mock_conn.return_value.cursor.return_value.__enter__.return_value = mock_cursor
+    mock_conn.return_value.__enter__.return_value.cursor.return_value.__enter__.return_value = mock_cursor
     mock_cursor.fetchone.return_value = None
 
     updated_trip_id = trip_controller.update_trip(
@@ -190,9 +191,9 @@ def test_update_trip_not_found(mocker):
 
 def test_delete_trip_success(mocker):
     """Test de eliminación exitosa de un viaje"""
-    mock_conn = mocker.patch('controllers.trip_controller.get_postgres_connection')
+    mock_conn = mocker.patch('controllers.trip_controller.postgres_connection')
     mock_cursor = mocker.Mock()
-    mock_conn.return_value.cursor.return_value.__enter__.return_value = mock_cursor
+    mock_conn.return_value.__enter__.return_value.cursor.return_value.__enter__.return_value = mock_cursor
     mock_cursor.fetchone.return_value = [1]
 
     deleted_trip_id = trip_controller.delete_trip(trip_id=1)
@@ -204,9 +205,9 @@ def test_delete_trip_success(mocker):
 
 def test_delete_trip_not_found(mocker):
     """Test de eliminación de viaje que no existe"""
-    mock_conn = mocker.patch('controllers.trip_controller.get_postgres_connection')
+    mock_conn = mocker.patch('controllers.trip_controller.postgres_connection')
     mock_cursor = mocker.Mock()
-    mock_conn.return_value.cursor.return_value.__enter__.return_value = mock_cursor
+    mock_conn.return_value.__enter__.return_value.cursor.return_value.__enter__.return_value = mock_cursor
     mock_cursor.fetchone.return_value = None
 
     deleted_trip_id = trip_controller.delete_trip(trip_id=999)
@@ -215,9 +216,9 @@ def test_delete_trip_not_found(mocker):
 
 def test_add_place_to_trip_success(mocker):
     """Test de agregar lugar a viaje exitosamente"""
-    mock_conn = mocker.patch('controllers.trip_controller.get_postgres_connection')
+    mock_conn = mocker.patch('controllers.trip_controller.postgres_connection')
     mock_cursor = mocker.Mock()
-    mock_conn.return_value.cursor.return_value.__enter__.return_value = mock_cursor
+    mock_conn.return_value.__enter__.return_value.cursor.return_value.__enter__.return_value = mock_cursor
     mock_cursor.fetchone.return_value = [1]
 
     entry_id = trip_controller.add_place_to_trip(
@@ -237,9 +238,9 @@ def test_add_place_to_trip_success(mocker):
 
 def test_add_place_to_trip_minimal_data(mocker):
     """Test de agregar lugar con datos mínimos"""
-    mock_conn = mocker.patch('controllers.trip_controller.get_postgres_connection')
+    mock_conn = mocker.patch('controllers.trip_controller.postgres_connection')
     mock_cursor = mocker.Mock()
-    mock_conn.return_value.cursor.return_value.__enter__.return_value = mock_cursor
+    mock_conn.return_value.__enter__.return_value.cursor.return_value.__enter__.return_value = mock_cursor
     mock_cursor.fetchone.return_value = [2]
 
     entry_id = trip_controller.add_place_to_trip(
@@ -255,9 +256,9 @@ def test_add_place_to_trip_minimal_data(mocker):
 
 def test_remove_place_from_trip_success(mocker):
     """Test de eliminar lugar de viaje exitosamente"""
-    mock_conn = mocker.patch('controllers.trip_controller.get_postgres_connection')
+    mock_conn = mocker.patch('controllers.trip_controller.postgres_connection')
     mock_cursor = mocker.Mock()
-    mock_conn.return_value.cursor.return_value.__enter__.return_value = mock_cursor
+    mock_conn.return_value.__enter__.return_value.cursor.return_value.__enter__.return_value = mock_cursor
     mock_cursor.fetchone.return_value = [1]
 
     deleted_entry_id = trip_controller.remove_place_from_trip(trip_id=1, place_id=5)
@@ -269,9 +270,9 @@ def test_remove_place_from_trip_success(mocker):
 
 def test_remove_place_from_trip_not_found(mocker):
     """Test de eliminar lugar que no está en el viaje"""
-    mock_conn = mocker.patch('controllers.trip_controller.get_postgres_connection')
+    mock_conn = mocker.patch('controllers.trip_controller.postgres_connection')
     mock_cursor = mocker.Mock()
-    mock_conn.return_value.cursor.return_value.__enter__.return_value = mock_cursor
+    mock_conn.return_value.__enter__.return_value.cursor.return_value.__enter__.return_value = mock_cursor
     mock_cursor.fetchone.return_value = None
 
     deleted_entry_id = trip_controller.remove_place_from_trip(trip_id=1, place_id=999)
@@ -280,9 +281,9 @@ def test_remove_place_from_trip_not_found(mocker):
 
 def test_get_trip_places_success(mocker):
     """Test de obtener lugares de un viaje"""
-    mock_conn = mocker.patch('controllers.trip_controller.get_postgres_connection')
+    mock_conn = mocker.patch('controllers.trip_controller.postgres_connection')
     mock_cursor = mocker.Mock()
-    mock_conn.return_value.cursor.return_value.__enter__.return_value = mock_cursor
+    mock_conn.return_value.__enter__.return_value.cursor.return_value.__enter__.return_value = mock_cursor
     
     mock_cursor.fetchall.return_value = [
         (1, "Torre Eiffel", "Icónica torre en París", "París", "Francia", date(2024, 7, 5), 1, "Primera parada", 5),
@@ -304,9 +305,9 @@ def test_get_trip_places_success(mocker):
 
 def test_get_trip_places_empty(mocker):
     """Test de obtener lugares cuando el viaje no tiene lugares"""
-    mock_conn = mocker.patch('controllers.trip_controller.get_postgres_connection')
+    mock_conn = mocker.patch('controllers.trip_controller.postgres_connection')
     mock_cursor = mocker.Mock()
-    mock_conn.return_value.cursor.return_value.__enter__.return_value = mock_cursor
+    mock_conn.return_value.__enter__.return_value.cursor.return_value.__enter__.return_value = mock_cursor
     mock_cursor.fetchall.return_value = []
 
     places = trip_controller.get_trip_places(trip_id=1)
@@ -315,9 +316,9 @@ def test_get_trip_places_empty(mocker):
 
 def test_get_trip_statistics_success(mocker):
     """Test de obtener estadísticas de un viaje"""
-    mock_conn = mocker.patch('controllers.trip_controller.get_postgres_connection')
+    mock_conn = mocker.patch('controllers.trip_controller.postgres_connection')
     mock_cursor = mocker.Mock()
-    mock_conn.return_value.cursor.return_value.__enter__.return_value = mock_cursor
+    mock_conn.return_value.__enter__.return_value.cursor.return_value.__enter__.return_value = mock_cursor
     
     # total_places, total_expenses, avg_rating, duration_days
     mock_cursor.fetchone.return_value = (3, 1500.50, 4.33, 15)
@@ -335,20 +336,35 @@ def test_get_trip_statistics_success(mocker):
 
 def test_get_trip_statistics_no_data(mocker):
     """Test de estadísticas cuando no hay datos"""
-    mock_conn = mocker.patch('controllers.trip_controller.get_postgres_connection')
+    mock_conn = mocker.patch('controllers.trip_controller.postgres_connection')
     mock_cursor = mocker.Mock()
-    mock_conn.return_value.cursor.return_value.__enter__.return_value = mock_cursor
+    mock_conn.return_value.__enter__.return_value.cursor.return_value.__enter__.return_value = mock_cursor
     mock_cursor.fetchone.return_value = None
 
     statistics = trip_controller.get_trip_statistics(trip_id=999)
 
     assert statistics is None
 
+def test_rebuild_trip_stats(mocker):
+    """Test de recalcular las estadísticas materializadas"""
+    mock_conn = mocker.patch('controllers.trip_controller.postgres_connection')
+    mock_cursor = mocker.Mock()
+    mock_conn.return_value.__enter__.return_value.cursor.return_value.__enter__.return_value = mock_cursor
+    mock_cursor.fetchone.return_value = (2,)
+
+    rebuilt = trip_controller.rebuild_trip_stats([4, 7])
+
+    mock_cursor.execute.assert_called_once_with("SELECT rebuild_trip_stats(%s)", ([4, 7],))
+    assert rebuilt == 2
+
+    trip_controller.rebuild_trip_stats()
+    assert mock_cursor.execute.call_args[0][1] == (None,)
+
 def test_search_trips_by_user_simplified(mocker):
     """Test simplificado de búsqueda de viajes por usuario"""
-    mock_conn = mocker.patch('controllers.trip_controller.get_postgres_connection')
+    mock_conn = mocker.patch('controllers.trip_controller.postgres_connection')
     mock_cursor = mocker.Mock()
-    mock_conn.return_value.cursor.return_value.__enter__.return_value = mock_cursor
+    mock_conn.return_value.__enter__.return_value.cursor.return_value.__enter__.return_value = mock_cursor
     
     # Simular que no hay resultados (caso válido)
     mock_cursor.fetchall.return_value = []
@@ -362,9 +378,9 @@ def test_search_trips_by_user_simplified(mocker):
 
 def test_search_trips_with_filters(mocker):
     """Test de búsqueda con múltiples filtros"""
-    mock_conn = mocker.patch('controllers.trip_controller.get_postgres_connection')
+    mock_conn = mocker.patch('controllers.trip_controller.postgres_connection')
     mock_cursor = mocker.Mock()
-    mock_conn.return_value.cursor.return_value.__enter__.return_value = mock_cursor
+    mock_conn.return_value.__enter__.return_value.cursor.return_value.__enter__.return_value = mock_cursor
     
     mock_cursor.fetchall.return_value = []
 
@@ -381,4 +397,142 @@ def test_search_trips_with_filters(mocker):
     # Verificar que se ejecutó la consulta con los filtros
     assert mock_cursor.execute.called
     assert trips == []
-    assert total_count == 0
\ No newline at end of file
+    assert total_count == 0
+def test_get_user_trips_by_cursor(mocker):
+    """Test de paginación por cursor (start_date, id) de los viajes de un usuario"""
+    mock_conn = mocker.patch('controllers.trip_controller.postgres_connection')
+    mock_cursor = mocker.Mock()
+    mock_conn.return_value.__enter__.return_value.cursor.return_value.__enter__.return_value = mock_cursor
+
+    mock_cursor.fetchall.return_value = [
+        (2, 1, "Viaje 2", "Descripción 2", date(2024, 8, 1), date(2024, 8, 10), "planned", 1500.00, None, None),
+        (1, 1, "Viaje 1", "Descripción 1", date(2024, 7, 1), date(2024, 7, 15), "completed", 2000.00, None, None)
+    ]
+
+    trips, next_cursor = trip_controller.get_user_trips_by_cursor(user_id=1, page_size=1)
+
+    mock_cursor.execute.assert_called_once_with(
+        "SELECT * FROM get_user_trips_by_cursor(%s, %s, %s, %s, %s)", (1, None, None, None, 2)
+    )
+    assert [trip.id for trip in trips] == [2]
+    assert decode_cursor(next_cursor, kind="date") == (date(2024, 8, 1), 2)
+
+def test_search_trips_by_cursor_uses_seek_condition(mocker):
+    """Test de búsqueda por cursor: filtra por (start_date, id) sin OFFSET ni COUNT"""
+    mock_conn = mocker.patch('controllers.trip_controller.postgres_connection')
+    mock_cursor = mocker.Mock()
+    mock_conn.return_value.__enter__.return_value.cursor.return_value.__enter__.return_value = mock_cursor
+    mock_cursor.fetchall.return_value = [
+        (1, 1, "Viaje 1", "Descripción 1", date(2024, 7, 1), date(2024, 7, 15), "completed", 2000.00, None, None, None)
+    ]
+
+    cursor = encode_cursor(date(2024, 8, 1), 2)
+    trips, next_cursor = trip_controller.search_trips_by_cursor(user_id=1, status="completed", cursor=cursor, page_size=10)
+
+    query, params = mock_cursor.execute.call_args[0]
+    assert "(t.start_date, t.id) < (%s, %s)" in query
+    assert "OFFSET" not in query and "COUNT" not in query
+    assert params == [1, "completed", date(2024, 8, 1), 2, 11]
+    assert len(trips) == 1
+    assert next_cursor is None
+
+def test_search_trips_by_cursor_rejects_invalid_cursor(mocker):
+    """Un cursor inválido no llega a la base de datos"""
+    mock_conn = mocker.patch('controllers.trip_controller.postgres_connection')
+
+    with pytest.raises(InvalidCursorError):
+        trip_controller.search_trips_by_cursor(user_id=1, cursor="basura")
+    mock_conn.assert_not_called()
+
+def test_search_trips_estimates_total_without_full_count(mocker):
+    """Con la página llena, el total se estima con el planificador en vez de COUNT(*) OVER()"""
+    mock_conn = mocker.patch('controllers.trip_controller.postgres_connection')
+    mock_cursor = mocker.Mock()
+    mock_conn.return_value.__enter__.return_value.cursor.return_value.__enter__.return_value = mock_cursor
+    mock_cursor.fetchall.return_value = [
+        (2, 1, "Viaje 2", "Descripción 2", date(2024, 8, 1), date(2024, 8, 10), "planned", 1500.00, None, None, None),
+        (1, 1, "Viaje 1", "Descripción 1", date(2024, 7, 1), date(2024, 7, 15), "completed", 2000.00, None, None, None)
+    ]
+    mock_cursor.fetchone.return_value = (40,)
+
+    trips, total_count = trip_controller.search_trips(user_id=1, title_search="playa", page=1, page_size=2)
+
+    page_query = mock_cursor.execute.call_args_list[0][0][0]
+    assert "COUNT" not in page_query
+    # Solo los valores de los filtros: la consulta que se estima es fija
+    mock_cursor.execute.assert_called_with(
+        "SELECT estimate_trip_search_count(%s, %s, %s, %s, %s)", (1, None, None, None, "playa")
+    )
+    # Ya no se descarta la última fila de la página
+    assert [trip.id for trip in trips] == [2, 1]
+    assert total_count == 40
+
+def test_search_trips_exact_total(mocker):
+    """include_total='exact' cuenta con los mismos filtros"""
+    mock_conn = mocker.patch('controllers.trip_controller.postgres_connection')
+    mock_cursor = mocker.Mock()
+    mock_conn.return_value.__enter__.return_value.cursor.return_value.__enter__.return_value = mock_cursor
+    mock_cursor.fetchall.return_value = [
+        (1, 1, "Viaje 1", "Descripción 1", date(2024, 7, 1), date(2024, 7, 15), "completed", 2000.00, None, None, None)
+    ]
+    mock_cursor.fetchone.return_value = (7,)
+
+    trips, total_count = trip_controller.search_trips(user_id=1, status="completed", page=2, page_size=1,
+                                                      include_total="exact")
+
+    count_query, params = mock_cursor.execute.call_args[0]
+    assert count_query.startswith("SELECT COUNT(*) FROM trips t WHERE")
+    assert params == [1, "completed"]
+    assert total_count == 7
+
+def test_add_places_to_trip_batch(mocker):
+    """Test de agregar varios lugares a un viaje en una sola sentencia"""
+    mock_conn = mocker.patch('controllers.trip_controller.postgres_connection')
+    mock_cursor = mocker.Mock()
+    mock_conn.return_value.__enter__.return_value.cursor.return_value.__enter__.return_value = mock_cursor
+    mock_cursor.fetchall.return_value = [(11, 5, 3), (12, 8, 4)]
+
+    entries = trip_controller.add_places_to_trip_batch(1, [
+        {"place_id": 5, "notes": "Llegada"},
+        {"place_id": 8, "rating": 4},
+    ])
+
+    mock_cursor.execute.assert_called_once()
+    sql, (trip_id, items) = mock_cursor.execute.call_args[0]
+    assert sql == "SELECT * FROM add_places_to_trip(%s, %s)"
+    assert trip_id == 1
+    assert items.adapted == [
+        {"place_id": 5, "visit_date": None, "visit_order": None, "notes": "Llegada", "rating": None},
+        {"place_id": 8, "visit_date": None, "visit_order": None, "notes": None, "rating": 4},
+    ]
+    assert entries == [
+        {"entry_id": 11, "place_id": 5, "visit_order": 3},
+        {"entry_id": 12, "place_id": 8, "visit_order": 4},
+    ]
+
+def test_add_places_to_trip_batch_requires_place_id(mocker):
+    """Test de lote con un lugar sin place_id"""
+    mock_conn = mocker.patch('controllers.trip_controller.postgres_connection')
+
+    with pytest.raises(ValueError):
+        trip_controller.add_places_to_trip_batch(1, [{"place_id": 5}, {"notes": "?"}])
+    mock_conn.assert_not_called()
+
+def test_reorder_trip_places(mocker):
+    """Test de reordenar los lugares de un viaje"""
+    mock_conn = mocker.patch('controllers.trip_controller.postgres_connection')
+    mock_cursor = mocker.Mock()
+    mock_conn.return_value.__enter__.return_value.cursor.return_value.__enter__.return_value = mock_cursor
+    mock_cursor.fetchone.return_value = (3,)
+
+    reordered = trip_controller.reorder_trip_places(1, [8, "5", 2])
+
+    mock_cursor.execute.assert_called_once_with("SELECT reorder_trip_places(%s, %s)", (1, [8, 5, 2]))
+    assert reordered == 3
+
+def test_reorder_trip_places_rejects_duplicates(mocker):
+    """Test de reordenar con lugares repetidos"""
+    mocker.patch('controllers.trip_controller.postgres_connection')
+
+    with pytest.raises(ValueError):
+        trip_controller.reorder_trip_places(1, [8, 5, 8])
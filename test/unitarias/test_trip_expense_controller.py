@@ -0,0 +1,115 @@
+# tests/unitarias/test_trip_expense_controller.py
+import io
+import pytest
+from datetime import date
+from decimal import Decimal
+from controllers import trip_expense_controller
+from controllers.trip_expense_controller import ExpenseImportError
+
+
+@pytest.fixture
+def mock_cursor(mocker):
+    mock_conn = mocker.patch('controllers.trip_expense_controller.postgres_connection')
+    cursor = mocker.Mock()
+    mock_conn.return_value.__enter__.return_value.cursor.return_value.__enter__.return_value = cursor
+    return cursor
+
+# Simula COPY: lee el stream completo en bloques pequeños como lo hace psycopg2
+def copy_reader(copied):
+    def copy_expert(sql, stream, size=64):
+        while True:
+            chunk = stream.read(size)
+            if not chunk:
+                break
+            copied.append(chunk)
+    return copy_expert
+
+def test_add_expense(mock_cursor):
+    mock_cursor.fetchone.return_value = [10]
+
+    expense_id = trip_expense_controller.add_expense(1, "food", "Cena", "25.5", "2024-07-02")
+
+    mock_cursor.execute.assert_called_once_with(
+        "SELECT add_trip_expense(%s, %s, %s, %s, %s, %s)",
+        (1, "food", "Cena", Decimal("25.50"), date(2024, 7, 2), None)
+    )
+    assert expense_id == 10
+
+def test_add_expense_rejects_invalid_category(mock_cursor):
+    with pytest.raises(ValueError):
+        trip_expense_controller.add_expense(1, "souvenirs", "Llavero", 5, "2024-07-02")
+    mock_cursor.execute.assert_not_called()
+
+def test_import_csv_streams_rows_to_copy(mock_cursor):
+    copied = []
+    mock_cursor.copy_expert.side_effect = copy_reader(copied)
+    body = io.StringIO(
+        "category,description,amount,expense_date,place_id\n"
+        "transport,\"Bus, aeropuerto\",12.00,2024-07-01,\n"
+        "food,Almuerzo,8.5,2024-07-01,3\n"
+    )
+
+    imported = trip_expense_controller.import_expenses(7, body, "csv")
+
+    assert imported == 2
+    assert mock_cursor.copy_expert.call_args[0][0] == trip_expense_controller.COPY_SQL
+    assert b"".join(copied).decode("utf-8") == (
+        '7,transport,"Bus, aeropuerto",12.00,2024-07-01,\n'
+        "7,food,Almuerzo,8.50,2024-07-01,3\n"
+    )
+
+def test_import_ndjson(mock_cursor):
+    copied = []
+    mock_cursor.copy_expert.side_effect = copy_reader(copied)
+    body = io.StringIO(
+        '{"category": "accommodation", "description": "Hotel", "amount": 120, "expense_date": "2024-07-01"}\n'
+        "\n"
+        '{"category": "other", "description": "Propina", "amount": 2, "expense_date": "2024-07-03"}\n'
+    )
+
+    assert trip_expense_controller.import_expenses(7, body, "ndjson") == 2
+    assert b"".join(copied).decode("utf-8").count("\n") == 2
+
+def test_import_reports_invalid_line(mock_cursor):
+    def copy_expert(sql, stream):
+        try:
+            while stream.read(64):
+                pass
+        except Exception:
+            # psycopg2 reemplaza la excepcion del read() por un error generico
+            raise RuntimeError("COPY from stdin failed: error in .read() call")
+    mock_cursor.copy_expert.side_effect = copy_expert
+    body = io.StringIO(
+        "category,description,amount,expense_date,place_id\n"
+        "food,Cena,10,2024-07-01,\n"
+        "food,Cena,abc,2024-07-01,\n"
+    )
+
+    with pytest.raises(ExpenseImportError, match="Line 3"):
+        trip_expense_controller.import_expenses(7, body, "csv")
+
+def test_expense_summary(mock_cursor):
+    mock_cursor.fetchall.return_value = [
+        ("category", "food", None, 2, Decimal("30.00"), Decimal("100.00")),
+        ("category", "transport", None, 1, Decimal("90.00"), Decimal("100.00")),
+        ("day", None, date(2024, 7, 1), 3, Decimal("120.00"), Decimal("100.00")),
+        ("total", None, None, 3, Decimal("120.00"), Decimal("100.00")),
+    ]
+
+    summary = trip_expense_controller.get_expense_summary(7)
+
+    mock_cursor.execute.assert_called_once_with("SELECT * FROM get_trip_expense_summary(%s)", (7,))
+    assert summary["by_category"][1] == {"category": "transport", "expense_count": 1, "total": 90.0}
+    assert summary["by_day"] == [{"date": "2024-07-01", "expense_count": 3, "total": 120.0}]
+    assert summary["total_spent"] == 120.0
+    assert summary["remaining"] == -20.0
+    assert summary["over_budget"] is True
+
+def test_expense_summary_without_expenses(mock_cursor):
+    mock_cursor.fetchall.return_value = [("total", None, None, 0, None, None)]
+
+    summary = trip_expense_controller.get_expense_summary(7)
+
+    assert summary["total_spent"] == 0.0
+    assert summary["remaining"] is None
+    assert summary["over_budget"] is False
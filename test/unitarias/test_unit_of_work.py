@@ -0,0 +1,178 @@
+# tests/unitarias/test_unit_of_work.py
+import pytest
+from flask import Flask, jsonify
+from config import database
+from config.database import UnitOfWork, postgres_connection, on_commit, has_pending_writes
+from middleware.unit_of_work import register_unit_of_work
+
+
+@pytest.fixture
+def pool(mocker):
+    pool = mocker.Mock()
+    pool.getconn.side_effect = lambda: mocker.MagicMock(closed=0)
+    mocker.patch('config.database.get_postgres_pool', return_value=pool)
+    return pool
+
+
+@pytest.fixture
+def app():
+    app = Flask(__name__)
+    register_unit_of_work(app)
+    return app
+
+
+def test_nested_calls_share_one_connection_and_commit_once(app, pool):
+    seen = []
+
+    @app.route('/write')
+    def write():
+        with postgres_connection() as first:
+            seen.append(first)
+        with postgres_connection() as second:
+            seen.append(second)
+        return jsonify({"ok": True}), 201
+
+    response = app.test_client().get('/write')
+
+    assert response.status_code == 201
+    assert seen[0] is seen[1]
+    pool.getconn.assert_called_once()
+    seen[0].commit.assert_called_once()
+    pool.putconn.assert_called_once_with(seen[0])
+
+
+def test_failed_call_rolls_back_whole_request(app, pool):
+    seen = []
+
+    @app.route('/fail')
+    def fail():
+        with postgres_connection() as conn:
+            seen.append(conn)
+        try:
+            with postgres_connection():
+                raise ValueError("boom")
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        return jsonify({}), 200
+
+    response = app.test_client().get('/fail')
+
+    assert response.status_code == 400
+    seen[0].commit.assert_not_called()
+    assert seen[0].rollback.called
+    pool.putconn.assert_called_once_with(seen[0])
+
+
+def test_caught_failure_with_success_status_returns_500(app, pool):
+    calls = []
+
+    @app.route('/swallow')
+    def swallow():
+        with postgres_connection():
+            on_commit(lambda: calls.append("sent"))
+        try:
+            with postgres_connection():
+                raise ValueError("boom")
+        except ValueError:
+            pass
+        return jsonify({"ok": True}), 201
+
+    response = app.test_client().get('/swallow')
+
+    assert response.status_code == 500
+    assert calls == []
+    pool.putconn.assert_called_once()
+
+
+def test_on_commit_runs_after_commit_and_is_dropped_on_rollback(app, pool):
+    calls = []
+
+    @app.route('/ok')
+    def ok():
+        with postgres_connection():
+            on_commit(lambda: calls.append("ok"))
+        assert calls == []
+        return jsonify({}), 200
+
+    @app.route('/denied')
+    def denied():
+        with postgres_connection():
+            on_commit(lambda: calls.append("denied"))
+        return jsonify({}), 403
+
+    client = app.test_client()
+    client.get('/ok')
+    client.get('/denied')
+
+    assert calls == ["ok"]
+
+
+def test_request_without_queries_does_not_checkout(app, pool):
+    @app.route('/static')
+    def static_view():
+        return jsonify({}), 200
+
+    app.test_client().get('/static')
+
+    pool.getconn.assert_not_called()
+
+
+def test_on_commit_runs_immediately_outside_request():
+    calls = []
+    on_commit(lambda: calls.append(1))
+    assert calls == [1]
+
+
+def test_unit_of_work_commit_failure_returns_500(app, pool):
+    @app.route('/boom')
+    def boom():
+        with postgres_connection() as conn:
+            conn.commit.side_effect = Exception("could not serialize access")
+        return jsonify({}), 200
+
+    response = app.test_client().get('/boom')
+
+    assert response.status_code == 500
+    assert "serialize" not in response.get_data(as_text=True)
+
+
+def test_has_pending_writes_asks_postgres_only_when_unknown(mocker):
+    conn = mocker.MagicMock(closed=0)
+    cursor = conn.cursor.return_value.__enter__.return_value
+    cursor.fetchone.return_value = (False,)
+    unit = UnitOfWork(pool=mocker.Mock(getconn=mocker.Mock(return_value=conn)))
+    assert unit.has_pending_writes() is False
+
+    unit.connection()
+    unit.record_statement("SELECT * FROM get_post_by_id(%s)")
+    unit.record_statement("SELECT t.* FROM trips t WHERE t.user_id = %s")
+    assert unit.has_pending_writes() is False
+    cursor.execute.assert_not_called()
+
+    # No se sabe si el procedimiento escribe: se pregunta una sola vez
+    unit.record_statement("SELECT add_like(%s, %s, %s)")
+    assert unit.has_pending_writes() is False
+    assert unit.has_pending_writes() is False
+    cursor.execute.assert_called_once_with("SELECT txid_current_if_assigned() IS NOT NULL")
+
+    # Las escrituras registran acciones para despues del commit
+    unit.on_commit(lambda: None)
+    assert unit.has_pending_writes() is True
+    cursor.execute.assert_called_once()
+
+
+def test_reads_in_request_do_not_query_for_pending_writes(app, pool):
+    seen = []
+
+    @app.route('/read')
+    def read():
+        with postgres_connection() as conn:
+            seen.append(conn)
+            database._notify(database._query_observers, "SELECT * FROM get_post_by_id(%s)", (1,), 0.001)
+        seen.append(has_pending_writes())
+        return jsonify({}), 200
+
+    app.test_client().get('/read')
+
+    assert seen[1] is False
+    seen[0].cursor.assert_not_called()
@@ -1,11 +1,12 @@
 import pytest
+from datetime import datetime, timezone
 from controllers import user_controller
 from models.user import User
 
 def test_create_user(mocker):
-    mock_conn = mocker.patch('controllers.user_controller.get_postgres_connection')
+    mock_conn = mocker.patch('controllers.user_controller.postgres_connection')
     mock_cursor = mocker.Mock()
-    mock_conn.return_value.cursor.return_value.__enter__.return_value = mock_cursor
+    mock_conn.return_value.__enter__.return_value.cursor.return_value.__enter__.return_value = mock_cursor
 
     mock_cursor.fetchone.return_value = [1]
 
@@ -24,26 +25,41 @@ def test_create_user(mocker):
     assert user_id == 1
 
 def test_get_user(mocker):
-    mock_conn = mocker.patch('controllers.user_controller.get_postgres_connection')
+    mock_conn = mocker.patch('controllers.user_controller.postgres_connection')
     mock_cursor = mocker.Mock()
-    mock_conn.return_value.cursor.return_value.__enter__.return_value = mock_cursor
+    mock_conn.return_value.__enter__.return_value.cursor.return_value.__enter__.return_value = mock_cursor
 
-    mock_cursor.fetchone.return_value = ("testuser", "testuser@example.com", "password")
+    # Columnas de get_user_by_id: id, username, email, bio,
+    # profile_picture_url, created_at, updated_at
+    created_at = datetime(2024, 5, 1, 12, 0, tzinfo=timezone.utc)
+    mock_cursor.fetchone.return_value = (1, "testuser", "testuser@example.com", None, None, created_at, created_at)
     user = user_controller.get_user(user_id=1)
 
     mock_cursor.execute.assert_called_once_with(
         "SELECT * FROM get_user_by_id(%s)", (1,)
     )
-    
-    print(user.id)
-    print(user.username)
-    print(user.email)
-    print(user.bio)
-    print(user.profile_picture_url)
-    
-    
+
     assert isinstance(user, User)
+    assert user.id == 1
     assert user.username == "testuser"
     assert user.email == "testuser@example.com"
     assert user.profile_picture_url == None
     assert user.bio == None
+
+def test_get_many_users(mocker):
+    mocker.patch('services.cache_service.redis_client', None)
+    mock_conn = mocker.patch('controllers.user_controller.postgres_connection')
+    mock_cursor = mocker.Mock()
+    mock_conn.return_value.__enter__.return_value.cursor.return_value.__enter__.return_value = mock_cursor
+    mock_cursor.fetchall.return_value = [
+        (1, "ana", "ana@example.com", None, None, None, None),
+        (3, "luis", "luis@example.com", "bio", None, None, None),
+    ]
+
+    users = user_controller.get_many([3, 2, 1])
+
+    mock_cursor.execute.assert_called_once_with(
+        "SELECT * FROM get_users_by_ids(%s)", ([3, 2, 1],)
+    )
+    assert [user.username if user else None for user in users] == ["luis", None, "ana"]
+    assert users[0].password is None